@@ -4,29 +4,39 @@
 API路由定义
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Dict, List, Any, Optional
 import asyncio
 import json
 from datetime import datetime
 
-# 导入全局变量依赖
-from app.main import coordinator, db_manager
+# 导入全局变量依赖（组件在 lifespan 中创建，请求时再读取）
+import app.main as app_main
+from app.broadcast import HEARTBEAT
+from app.responses import FastJSONResponse, envelope, stream_json
+
+# 产品数超过该值时分块序列化、边生成边发送
+STREAM_THRESHOLD = 1000
+
+# 推送连接发送一条消息的最长等待（秒），超时视为慢客户端并断开，客户端重连后补发或重新同步
+PUSH_SEND_TIMEOUT = 10.0
 
 router = APIRouter()
 
 async def get_coordinator():
-    """获取协调器依赖"""
-    if coordinator is None:
-        raise HTTPException(status_code=503, detail="Service not available")
-    return coordinator
+    """获取协调器依赖（首次请求时创建）"""
+    try:
+        return await app_main.ensure_coordinator()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service not available: {e}")
 
 async def get_db_manager():
-    """获取数据库管理器依赖"""
-    if db_manager is None:
-        raise HTTPException(status_code=503, detail="Database not available")
-    return db_manager
+    """获取数据库管理器依赖（首次请求时创建）"""
+    try:
+        return await app_main.ensure_db_manager()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database not available: {e}")
 
 @router.get("/status")
 async def get_status(coordinator=Depends(get_coordinator)):
@@ -41,97 +51,214 @@ async def get_status(coordinator=Depends(get_coordinator)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/scrape/platform")
+def _job_response(job, message: str, coalesced: bool = False) -> Dict[str, Any]:
+    """作业提交后的响应：作业快照及查询、订阅地址；coalesced 表示合并到了相同的未完成作业"""
+    return {
+        "success": True,
+        "message": "已有相同的作业在排队或执行，返回该作业" if coalesced else message,
+        "data": {
+            **job.snapshot(),
+            "coalesced": coalesced,
+            "status_url": f"/api/v1/jobs/{job.job_id}",
+            "events_url": f"/api/v1/jobs/{job.job_id}/events"
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _admit_job(coordinator, kind: str, params: Dict[str, Any]):
+    """提交作业；排队的作业已满时返回 429 和预计可以重试的秒数"""
+    from main import JobQueueFull  # 协调器依赖已加载该模块
+    try:
+        return coordinator.job_queue.admit(kind, params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/scrape/platform", status_code=202)
 async def scrape_platform(
     platform: str,
     categories: List[str],
     keywords: List[str],
     max_pages: int = 5,
-    background_tasks: BackgroundTasks = None,
     coordinator=Depends(get_coordinator)
 ):
-    """执行指定平台的数据抓取"""
-    try:
-        # 验证平台
-        from code.main import Platform
-        if platform.lower() not in [p.value for p in Platform]:
-            raise HTTPException(status_code=400, detail=f"不支持的平台: {platform}")
-        
-        # 执行抓取
-        platform_enum = Platform(platform.lower())
-        results = await coordinator.scrape_platform(
-            platform_enum, categories, keywords, max_pages
-        )
-        
-        return {
-            "success": True,
-            "message": f"{platform}平台抓取任务已启动",
-            "data": {
-                "platform": platform,
-                "categories": categories,
-                "keywords": keywords,
-                "max_pages": max_pages,
-                "tasks_created": len(results)
-            },
-            "timestamp": datetime.now().isoformat()
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """提交指定平台的抓取作业（立即返回作业ID，进度见 /jobs/{job_id}）"""
+    # 验证平台
+    from main import Platform  # 协调器依赖已加载该模块
+    if platform.lower() not in [p.value for p in Platform]:
+        raise HTTPException(status_code=400, detail=f"不支持的平台: {platform}")
+    
+    job, coalesced = _admit_job(coordinator, "platform", {
+        "platform": platform.lower(),
+        "categories": categories,
+        "keywords": keywords,
+        "max_pages": max_pages
+    })
+    return _job_response(job, f"{platform}平台抓取任务已提交", coalesced)
 
-@router.post("/scrape/all")
+@router.post("/scrape/all", status_code=202)
 async def scrape_all_platforms(
     categories: List[str],
     keywords: List[str],
     max_pages: int = 5,
     coordinator=Depends(get_coordinator)
 ):
-    """执行所有平台的数据抓取"""
+    """提交所有平台的抓取作业（立即返回作业ID，进度见 /jobs/{job_id}）"""
+    job, coalesced = _admit_job(coordinator, "all", {
+        "categories": categories,
+        "keywords": keywords,
+        "max_pages": max_pages
+    })
+    return _job_response(job, "所有平台抓取任务已提交", coalesced)
+
+@router.get("/jobs")
+async def list_jobs(
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    coordinator=Depends(get_coordinator)
+):
+    """最近的抓取作业"""
+    from main import TaskStatus  # 协调器依赖已加载该模块
+    if status and status not in [s.value for s in TaskStatus]:
+        raise HTTPException(status_code=400, detail=f"未知的作业状态: {status}")
+    
     try:
-        results = await coordinator.scrape_all_platforms(categories, keywords, max_pages)
-        
-        total_tasks = sum(len(platform_results) for platform_results in results.values())
-        
-        return {
-            "success": True,
-            "message": "所有平台抓取任务已启动",
-            "data": {
-                "platforms": {platform.value: len(platform_results) for platform, platform_results in results.items()},
-                "total_tasks": total_tasks,
-                "categories": categories,
-                "keywords": keywords,
-                "max_pages": max_pages
-            },
-            "timestamp": datetime.now().isoformat()
-        }
+        jobs = coordinator.job_queue.list_jobs(TaskStatus(status) if status else None, limit)
+        return FastJSONResponse(envelope({
+            "jobs": [job.snapshot() for job in jobs],
+            "total": len(jobs)
+        }))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, coordinator=Depends(get_coordinator)):
+    """抓取作业状态与进度"""
+    job = coordinator.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"作业不存在: {job_id}")
+    
+    return {
+        "success": True,
+        "data": job.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, coordinator=Depends(get_coordinator)):
+    """以 Server-Sent Events 推送作业进度，作业结束后关闭连接"""
+    if coordinator.job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"作业不存在: {job_id}")
+    
+    async def events():
+        async for snapshot in coordinator.job_queue.subscribe(job_id):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/updates")
+async def stream_updates(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """以 Server-Sent Events 推送看板增量更新（浏览器断线重连时按 Last-Event-ID 补发）"""
+    last_event_id = request.headers.get("last-event-id", "")
+    if since is None and last_event_id.isdigit():
+        since = int(last_event_id)
+    
+    async def events():
+        yield "retry: 3000\n\n"
+        async for batch in app_main.broadcaster.subscribe(since):
+            if batch is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield "".join(entry[2] for entry in batch)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/updates/ws")
+async def updates_websocket(websocket: WebSocket, since: Optional[int] = None):
+    """以 WebSocket 推送看板增量更新，每条消息一个事件（含 seq，重连时作为 since 传回）"""
+    await websocket.accept()
+    broadcaster = app_main.broadcaster
+    
+    async def pump():
+        await websocket.send_text(f'{{"type":"connected","seq":{broadcaster.seq}}}')
+        async for batch in broadcaster.subscribe(since):
+            for text in ([HEARTBEAT] if batch is None else [entry[1] for entry in batch]):
+                await asyncio.wait_for(websocket.send_text(text), PUSH_SEND_TIMEOUT)
+    
+    async def drain():
+        # 客户端不发送业务消息，只用来发现断开
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    
+    sending, receiving = asyncio.create_task(pump()), asyncio.create_task(drain())
+    done, pending = await asyncio.wait({sending, receiving}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    
+    if sending in done and not sending.cancelled():
+        error = sending.exception()
+        if isinstance(error, asyncio.TimeoutError):
+            # 1013 Try Again Later：客户端消费太慢
+            await websocket.close(code=1013)
+        elif error is None:
+            # 应用关闭
+            await websocket.close(code=1001)
+
 @router.get("/products")
 async def get_products(
     platform: Optional[str] = None,
     category: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
     db_manager=Depends(get_db_manager)
 ):
-    """获取产品数据"""
+    """获取产品数据（按更新时间倒序）"""
     try:
-        # 这里可以添加数据库查询逻辑
-        # 暂时返回示例数据
-        sample_products = []
+        products = await asyncio.to_thread(db_manager.get_products, platform, category, limit, offset)
+        meta = {"total": len(products), "limit": limit, "offset": offset}
         
-        return {
-            "success": True,
-            "data": {
-                "products": sample_products,
-                "total": len(sample_products),
-                "limit": limit,
-                "offset": offset
-            },
-            "timestamp": datetime.now().isoformat()
-        }
+        if len(products) > STREAM_THRESHOLD:
+            return stream_json(meta, "products", products)
+        return FastJSONResponse(envelope(dict(meta, products=products)))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search")
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    platform: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db_manager=Depends(get_db_manager)
+):
+    """全文搜索产品名、关键词和热评（BM25 排序，最后一个词前缀匹配）"""
+    try:
+        # 在线程池中执行，避免阻塞事件循环
+        products = await asyncio.to_thread(db_manager.search_products, q, platform, category, limit, offset)
+        
+        return FastJSONResponse(envelope({
+            "query": q,
+            "products": products,
+            "total": len(products),
+            "limit": limit,
+            "offset": offset
+        }))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,34 +266,84 @@ async def get_products(
 @router.get("/statistics")
 async def get_statistics(
     days: int = 7,
-    db_manager=Depends(get_db_manager)
+    coordinator=Depends(get_coordinator)
 ):
-    """获取统计数据"""
+    """获取统计数据（协调器按平台、日期记录的抓取统计）"""
     try:
-        stats = db_manager.get_statistics(days)
+        stats = coordinator.db_manager.get_statistics(days)
         
-        return {
-            "success": True,
-            "data": {
-                "statistics": stats,
-                "period_days": days
-            },
-            "timestamp": datetime.now().isoformat()
-        }
+        return FastJSONResponse(envelope({
+            "statistics": stats,
+            "period_days": days
+        }))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/analytics/platforms")
+async def get_platform_comparison(db_manager=Depends(get_db_manager)):
+    """平台对比：各平台产品数、占比、均价、评分与销量"""
+    try:
+        data = await asyncio.to_thread(db_manager.analytics.platform_comparison)
+        return FastJSONResponse(envelope(data))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/categories")
+async def get_category_breakdown(
+    platform: Optional[str] = None,
+    db_manager=Depends(get_db_manager)
+):
+    """分类明细：各分类汇总及各平台明细"""
+    try:
+        data = await asyncio.to_thread(db_manager.analytics.category_breakdown, platform)
+        return FastJSONResponse(envelope(data))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/prices")
+async def get_price_distribution(
+    bins: int = Query(20, ge=1, le=100),
+    platform: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    db_manager=Depends(get_db_manager)
+):
+    """价格分布直方图（按平台计数）及估算分位数"""
+    try:
+        data = await asyncio.to_thread(db_manager.analytics.price_distribution,
+                                       bins, platform, category, min_price, max_price)
+        return FastJSONResponse(envelope(data))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/ranking")
+async def get_ranking(
+    metric: str = "popularity",
+    limit: int = Query(20, ge=1, le=100),
+    platform: Optional[str] = None,
+    category: Optional[str] = None,
+    db_manager=Depends(get_db_manager)
+):
+    """热度排行：popularity（销量*0.6+评分*0.4）、sales、rating、likes、views"""
+    try:
+        data = await asyncio.to_thread(db_manager.analytics.ranking, metric, limit, platform, category)
+        return FastJSONResponse(envelope(data))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/config")
 async def update_config(
     key: str,
     value: Any,
     coordinator=Depends(get_coordinator)
 ):
-    """更新配置"""
+    """更新配置（立即生效；短时间内的多次修改合并为一次写文件）"""
     try:
-        coordinator.config.config[key] = value
-        coordinator.config.save()
+        value = coordinator.config.update(key, value)
         
         return {
             "success": True,
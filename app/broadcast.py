@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+看板实时推送
+=====================================
+
+新产品、价格变化、任务完成、作业结束等增量事件经 Broadcaster 推送给所有 WebSocket / SSE 客户端，
+看板不再定时轮询整页数据：
+1. 所有客户端共享一个定长环形缓冲区，每个事件只序列化一次；每个客户端只保存自己的读取位置
+2. 发布事件与客户端数量无关：追加到缓冲区后唤醒全部等待者，各客户端自己批量读取新事件
+3. 慢客户端不会拖慢其他客户端，也不会让内存增长：落后超过缓冲区长度时收到 resync 事件，
+   跳到最新位置，由看板重新拉取一次完整数据
+4. publish 可在任意线程调用（产品库写入、任务执行线程），在事件循环中追加
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.responses import dumps
+
+# 缓冲区中的事件：(序号, JSON 文本, SSE 帧)
+Entry = Tuple[int, str, str]
+
+HEARTBEAT = '{"type":"heartbeat"}'
+
+
+class Broadcaster:
+    """事件广播（同一进程内所有推送连接共享）"""
+
+    def __init__(self, buffer_size: int = 1024, heartbeat: float = 15.0):
+        """
+        Args:
+            buffer_size: 缓冲的最近事件数，客户端落后超过该数量时需要重新同步
+            heartbeat: 超过该秒数没有事件时产出 None，调用方发送保活消息
+        """
+        self.buffer: Deque[Entry] = deque(maxlen=buffer_size)
+        self.heartbeat = heartbeat
+        # 序号从启动时的毫秒时间戳开始：进程重启后旧的 since 小于缓冲区起点，客户端会重新同步
+        self.seq = int(time.time() * 1000)
+        self.subscribers = 0
+        self.published = 0
+        self.resyncs = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._closed = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """绑定事件循环（应用启动时调用），之前发布的事件直接丢弃"""
+        self._loop = loop
+        self._changed = asyncio.Event()
+        self._closed = False
+
+    def close(self):
+        """结束所有订阅（应用关闭时调用）"""
+        self._closed = True
+        if self._changed is not None:
+            self._changed.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'seq': self.seq, 'buffered': len(self.buffer), 'subscribers': self.subscribers,
+                'published': self.published, 'resyncs': self.resyncs}
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """发布事件（线程安全）；未绑定事件循环或已关闭时忽略"""
+        loop = self._loop
+        if loop is None or self._closed:
+            return
+        # 在调用方线程序列化，事件循环中只拼接序号
+        body = dumps({'type': event_type, 'data': data, 'timestamp': datetime.now().isoformat()}).decode('utf-8')
+        try:
+            loop.call_soon_threadsafe(self._append, body)
+        except RuntimeError:
+            # 事件循环已关闭（应用正在退出）
+            pass
+
+    def _append(self, body: str):
+        self.seq += 1
+        text = f'{{"seq":{self.seq},{body[1:]}'
+        self.buffer.append((self.seq, text, f"id: {self.seq}\ndata: {text}\n\n"))
+        self.published += 1
+        # 换一个新的 Event 再唤醒旧的：所有等待者醒来一次，之后的等待用新 Event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _resync(self, cursor: int) -> Entry:
+        """客户端错过事件时的提示：看板重新拉取完整数据，之后从最新位置继续"""
+        self.resyncs += 1
+        text = dumps({'seq': self.seq, 'type': 'resync', 'data': {'since': cursor},
+                      'timestamp': datetime.now().isoformat()}).decode('utf-8')
+        return self.seq, text, f"id: {self.seq}\nevent: resync\ndata: {text}\n\n"
+
+    async def subscribe(self, since: Optional[int] = None):
+        """
+        逐批产出新事件，直到调用 close()
+
+        Args:
+            since: 上次收到的事件序号（断线重连时补发之后的事件）；None 表示只接收之后发布的事件
+
+        超过 heartbeat 秒没有事件时产出 None。缓冲区中已没有 since 之后的全部事件、
+        或 since 不是本进程发出的序号时，先产出一个 resync 事件。
+        """
+        self.subscribers += 1
+        try:
+            cursor = self.seq if since is None else since
+            while not self._closed:
+                changed = self._changed
+                missed = self.seq - cursor
+                if missed:
+                    if missed < 0 or missed > len(self.buffer):
+                        yield [self._resync(cursor)]
+                        cursor = self.seq
+                        continue
+                    # 新事件都在缓冲区末尾，从右侧取出 missed 个
+                    batch: List[Entry] = list(itertools.islice(reversed(self.buffer), missed))
+                    batch.reverse()
+                    cursor = batch[-1][0]
+                    yield batch
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.subscribers -= 1
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+读接口响应缓存
+=====================================
+
+按 路径 + 查询参数（+ Accept-Encoding）缓存 GET 响应体，每条路由单独设置有效期与 Cache-Control：
+1. 有效期内的重复请求直接返回缓存，不再调用路由函数
+2. 响应带强 ETag（响应体摘要），If-None-Match 命中时返回 304
+3. 同一个键同时只有一个请求重新计算，其余等待结果
+4. 抓取作业完成、配置修改等写操作调用 invalidate() 清空
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    """一条路由的缓存策略"""
+    path: str
+    ttl: float
+    cache_control: str
+
+
+@dataclass
+class CachedResponse:
+    """缓存的响应"""
+    body: bytes
+    headers: List[Tuple[bytes, bytes]]
+    etag: bytes
+    expires_at: float
+
+
+class ResponseCache:
+    """按路由规则缓存的 GET 响应（同一进程内所有请求共享）"""
+
+    def __init__(self, rules: List[CacheRule], max_entries: int = 1024):
+        self.rules = {rule.path: rule for rule in rules}
+        self.max_entries = max_entries
+        self.entries: Dict[str, CachedResponse] = {}
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._generation = 0
+
+    def invalidate(self, prefix: str = ""):
+        """清空以 prefix 开头的缓存（默认全部），可以在事件循环之外的线程中调用"""
+        self._generation += 1
+        self.entries = {k: v for k, v in list(self.entries.items()) if not k.startswith(prefix)}
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+    async def handle(self, app, scope, receive, send):
+        """处理一个请求：命中缓存直接返回，否则交给 app 计算"""
+        rule = self.rules.get(scope.get("path")) if scope["type"] == "http" else None
+        if rule is None or scope["method"] != "GET":
+            await app(scope, receive, send)
+            return
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        key = f"{scope['path']}?{'&'.join(sorted(query.split('&')))}" if query else scope["path"]
+        # 压缩在缓存内层完成，不同 Accept-Encoding 各存一份（Vary: Accept-Encoding）
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding")
+        if accept_encoding:
+            key += "|" + accept_encoding.decode("latin-1")
+
+        entry = self._fresh(key)
+        if entry is None and key in self._pending:
+            # 同一个键正在计算，等它的结果
+            entry = await asyncio.shield(self._pending[key])
+            if entry is None:
+                await app(scope, receive, send)
+                return
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            try:
+                entry = await self._fill(app, key, rule, scope, receive, send)
+            finally:
+                future.set_result(entry)
+                del self._pending[key]
+            if entry is None:
+                # 非 200 响应已原样发出，不缓存
+                return
+
+        await self._respond(entry, rule, scope, send)
+
+    def _fresh(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+    async def _fill(self, app, key: str, rule: CacheRule, scope, receive, send) -> Optional[CachedResponse]:
+        """调用路由计算响应；200 时缓存并返回，其他状态码直接转发"""
+        start_message = None
+        chunks = []
+        passthrough = False
+        generation = self._generation
+
+        async def capture(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+            elif passthrough:
+                await send(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await app(scope, receive, capture)
+        if passthrough or start_message is None:
+            return None
+
+        body = b"".join(chunks)
+        headers = [(name, value) for name, value in start_message.get("headers", [])
+                   if name.lower() not in (b"content-length", b"etag", b"cache-control")]
+        entry = CachedResponse(
+            body=body,
+            headers=headers,
+            etag=b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"',
+            expires_at=time.monotonic() + rule.ttl
+        )
+        # 计算期间发生过失效的结果不入缓存，本次请求仍然返回它
+        if generation == self._generation:
+            if len(self.entries) >= self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+            self.entries[key] = entry
+        return entry
+
+    async def _respond(self, entry: CachedResponse, rule: CacheRule, scope, send):
+        headers = dict(scope["headers"])
+        not_modified = _etag_matches(headers.get(b"if-none-match"), entry.etag)
+        response_headers = entry.headers + [
+            (b"etag", entry.etag),
+            (b"cache-control", rule.cache_control.encode()),
+        ]
+        if not_modified:
+            response_headers = [(n, v) for n, v in response_headers if n.lower() != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": response_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        response_headers.append((b"content-length", str(len(entry.body)).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+class ResponseCacheMiddleware:
+    """把 ResponseCache 挂到应用上的 ASGI 中间件"""
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        await self.cache.handle(self.app, scope, receive, send)
+
+
+def _etag_matches(if_none_match: Optional[bytes], etag: bytes) -> bool:
+    """If-None-Match 是否包含当前 ETag（支持逗号分隔的多个值和 *）"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(b",")]
+    return b"*" in candidates or etag in candidates
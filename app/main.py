@@ -16,53 +16,168 @@
 import asyncio
 import os
 import sys
+import threading
 from pathlib import Path
+from typing import Any, Dict, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
 import logging
 from contextlib import asynccontextmanager
 
-# 添加项目路径
+# 添加项目路径（code 目录放在最前：标准库也有名为 code 的模块，code.main 会导入失败）
 sys.path.append(str(Path(__file__).parent.parent))
-sys.path.append(str(Path(__file__).parent.parent / "code"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "code"))
 
-# 导入数据抓取模块
-from code.main import MainCoordinator, Platform
-from code.database import DatabaseManager
-from code.config import ConfigManager
+# 数据抓取模块（code/main.py、code/database.py）在首次创建组件时才导入
+from app.broadcast import Broadcaster
+from app.cache import CacheRule, ResponseCache, ResponseCacheMiddleware
+from app.compression import CompressionMiddleware
+from app.ratelimit import RateLimiter, RateLimitMiddleware, RateLimitRule
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 全局变量
+# 作业执行方式：inline 在本进程执行抓取作业（单 worker）；scheduler 表示多 worker 部署，
+# 本进程只提交和查询作业，作业执行与产品库定期备份/维护由独立的调度进程负责
+JOB_RUNNER = os.environ.get("JOB_RUNNER", "inline")
+
+# 核心组件（每个 worker 进程各一份）：启动时不创建，由 get_*/ensure_* 在首次使用时创建，
+# lifespan 在后台预热；/health 不依赖它们，进程启动后立即可以应答
 coordinator = None
 db_manager = None
+_init_lock = threading.Lock()
+
+# 读接口响应缓存（每个 worker 进程一份）：本进程执行的抓取作业结束、配置修改时清空；
+# 多 worker 部署时作业在调度进程结束，各 worker 的缓存按有效期过期
+response_cache = ResponseCache([
+    CacheRule("/api/v1/status", ttl=5, cache_control="public, max-age=5"),
+    CacheRule("/api/v1/statistics", ttl=60, cache_control="public, max-age=60"),
+    CacheRule("/api/v1/products", ttl=30, cache_control="public, max-age=30"),
+    # 看板聚合：产品库按时间桶缓存结果，这里再省去序列化并支持 304
+    CacheRule("/api/v1/analytics/platforms", ttl=60, cache_control="public, max-age=60"),
+    CacheRule("/api/v1/analytics/categories", ttl=60, cache_control="public, max-age=60"),
+    CacheRule("/api/v1/analytics/prices", ttl=60, cache_control="public, max-age=60"),
+    CacheRule("/api/v1/analytics/ranking", ttl=60, cache_control="public, max-age=60"),
+    # 配置可能含密钥：只允许浏览器缓存，且每次用 ETag 验证
+    CacheRule("/api/v1/config", ttl=300, cache_control="private, no-cache"),
+])
+
+# 看板实时推送（每个 worker 进程一份）：单 worker 时由本进程的写入与任务直接发布；
+# 多 worker 部署时事件统一写入协调器数据库的 events 表，各 worker 每 EVENT_POLL_INTERVAL 秒读取后发布
+broadcaster = Broadcaster()
+EVENT_POLL_INTERVAL = float(os.environ.get("EVENT_POLL_INTERVAL", 1.0))
+_event_relay: Optional[asyncio.Task] = None
+
+def _publish_event(event_type: str, data: Dict[str, Any]):
+    """发布产品库变化：多 worker 部署时写入事件表，由各 worker 转发"""
+    if JOB_RUNNER == "scheduler":
+        get_coordinator().db_manager.save_event(event_type, data)
+    else:
+        broadcaster.publish(event_type, data)
+
+# 写接口限流（每个 worker 进程一份）：每个客户端每分钟最多提交 6 个抓取作业（可突发 3 个）、
+# 修改配置每秒 1 次（可突发 10 次）；部署在反向代理之后时设置 TRUST_PROXY_HEADERS=1 按 X-Forwarded-For 识别客户端
+rate_limiter = RateLimiter([
+    RateLimitRule("/api/v1/scrape/", rate=6 / 60, burst=3),
+    RateLimitRule("/api/v1/config", rate=1.0, burst=10),
+], trust_forwarded=os.environ.get("TRUST_PROXY_HEADERS") == "1")
+
+def get_db_manager():
+    """产品数据库管理器（首次调用时创建）"""
+    global db_manager
+    if db_manager is None:
+        with _init_lock:
+            if db_manager is None:
+                from database import DatabaseManager, DatabaseConfig
+                db_config = DatabaseConfig(db_path=os.environ.get("PRODUCTS_DB_PATH", DatabaseConfig.db_path))
+                if JOB_RUNNER == "scheduler":
+                    db_config.auto_backup = False
+                    db_config.optimize_interval_hours = 0
+                instance = DatabaseManager(db_config)
+                instance.listeners.append(_publish_event)
+                db_manager = instance
+    return db_manager
+
+def get_coordinator():
+    """抓取协调器（首次调用时创建，作业队列由 ensure_coordinator 在事件循环中启动）"""
+    global coordinator
+    if coordinator is None:
+        with _init_lock:
+            if coordinator is None:
+                from main import MainCoordinator
+                instance = MainCoordinator()
+                instance.job_queue.listeners.append(lambda job: response_cache.invalidate())
+                # 本进程执行的任务与作业推送给看板（任务完成回调在任务线程中执行）
+                instance.listeners.append(broadcaster.publish)
+                instance.job_queue.listeners.append(lambda job: broadcaster.publish('job_finished', job.snapshot()))
+                # 修改配置、配置文件热加载后清空缓存（热加载回调在检查线程中执行）
+                instance.config.subscribe(lambda snapshot: response_cache.invalidate())
+                instance.config.watch()
+                coordinator = instance
+    return coordinator
+
+async def ensure_db_manager():
+    """异步获取产品数据库管理器，首次创建在线程池中进行"""
+    return db_manager or await asyncio.to_thread(get_db_manager)
+
+async def ensure_coordinator():
+    """异步获取协调器，并启动后台作业队列（单 worker 时在本进程执行并恢复上次未完成的作业）"""
+    global _event_relay
+    instance = coordinator or await asyncio.to_thread(get_coordinator)
+    await instance.job_queue.start(run_jobs=JOB_RUNNER != "scheduler")
+    if JOB_RUNNER == "scheduler" and _event_relay is None:
+        _event_relay = asyncio.create_task(_relay_events(instance.db_manager))
+    return instance
+
+async def _relay_events(events_db):
+    """多 worker 部署：把调度进程及其他 worker 写入事件表的事件发布给本进程的推送连接"""
+    last_seq = await asyncio.to_thread(events_db.last_event_seq)
+    while True:
+        await asyncio.sleep(EVENT_POLL_INTERVAL)
+        try:
+            for event in await asyncio.to_thread(events_db.get_events, last_seq):
+                broadcaster.publish(event['type'], event['data'])
+                last_seq = event['seq']
+        except Exception as e:
+            logger.error(f"读取推送事件失败: {e}")
+
+async def _warm_up():
+    """启动后在后台创建组件，第一个业务请求通常不用再等初始化"""
+    try:
+        await ensure_db_manager()
+        await ensure_coordinator()
+        logger.info(f"✅ 核心组件初始化完成 (pid={os.getpid()}, "
+                    f"作业执行: {'调度进程' if JOB_RUNNER == 'scheduler' else '本进程'})")
+    except Exception as e:
+        # 首次业务请求时会重试初始化
+        logger.error(f"❌ 核心组件初始化失败: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    global coordinator, db_manager
-    
-    # 启动时初始化
+    global _event_relay
     logger.info("🚀 启动时尚数据分析Web应用")
+    broadcaster.bind(asyncio.get_running_loop())
+    warm_up = asyncio.create_task(_warm_up())
     
-    try:
-        # 初始化核心组件
-        config_manager = ConfigManager()
-        db_manager = DatabaseManager(config_manager)
-        coordinator = MainCoordinator()
-        
-        logger.info("✅ 核心组件初始化完成")
-        
-        yield
-        
-    except Exception as e:
-        logger.error(f"❌ 应用启动失败: {e}")
-        raise
+    yield
+    
+    # 先结束推送连接；预热未完成时等它结束，再关闭已创建的组件
+    broadcaster.close()
+    await asyncio.gather(warm_up, return_exceptions=True)
+    if _event_relay is not None:
+        _event_relay.cancel()
+        await asyncio.gather(_event_relay, return_exceptions=True)
+        _event_relay = None
+    if coordinator is not None:
+        await coordinator.job_queue.stop()
+        coordinator.config.stop_watching()
+        coordinator.config.flush()
+    if db_manager is not None:
+        db_manager.close()
     
     # 关闭时清理
     logger.info("🔄 应用关闭")
@@ -75,6 +190,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# 中间件由外到内：CORS → 限流 → 响应缓存 → 压缩 → 路由
+# 压缩在缓存内层，命中缓存时直接返回压缩好的响应体；命中缓存的响应与 429 同样带 CORS 头
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -117,11 +238,13 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "fashion-data-analysis",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "worker_pid": os.getpid()
     }
 
 if __name__ == "__main__":
     # 本地开发模式
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(
         "app.main:app",
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写接口限流
+=====================================
+
+按客户端的令牌桶限制提交抓取作业、修改配置等写请求的频率：
+1. 每条规则按路径前缀与方法匹配，单独设置补充速率与突发容量
+2. 每个 (规则, 客户端) 一个令牌桶，只保存令牌数与更新时间，请求到达时按经过的时间补充
+3. 令牌不足时直接返回 429 和 Retry-After（等到下一个令牌的秒数），不调用路由
+4. 客户端数超过上限时清理已补满的桶（与新桶等价），内存有界
+
+每个 worker 进程各自计数，多 worker 部署时单个客户端的实际上限为 worker 数倍。
+"""
+
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """一类写请求的限流策略"""
+    path: str                           # 路径前缀
+    rate: float                         # 每秒补充的令牌数
+    burst: int                          # 令牌桶容量（允许的突发请求数）
+    methods: Tuple[str, ...] = ("POST",)
+
+
+class RateLimiter:
+    """按客户端的令牌桶限流（同一进程内所有请求共享）"""
+
+    def __init__(self, rules: List[RateLimitRule], max_clients: int = 10000, trust_forwarded: bool = False):
+        """
+        Args:
+            rules: 限流规则，按顺序匹配第一条
+            max_clients: 保存的令牌桶数上限
+            trust_forwarded: 以 X-Forwarded-For 的第一个地址识别客户端（部署在反向代理之后时开启）
+        """
+        self.rules = rules
+        self.max_clients = max_clients
+        self.trust_forwarded = trust_forwarded
+        # (规则路径, 客户端) → (令牌数, 更新时间)
+        self.buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.allowed = 0
+        self.limited = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"clients": len(self.buckets), "allowed": self.allowed, "limited": self.limited}
+
+    def match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if method in rule.methods and path.startswith(rule.path):
+                return rule
+        return None
+
+    def acquire(self, rule: RateLimitRule, client: str, now: Optional[float] = None) -> float:
+        """取一个令牌：成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic() if now is None else now
+        key = (rule.path, client)
+        tokens, updated = self.buckets.get(key, (rule.burst, now))
+        tokens = min(rule.burst, tokens + (now - updated) * rule.rate)
+        allowed = tokens >= 1
+        self.buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self.buckets) > self.max_clients:
+            self._prune(now)
+        if allowed:
+            self.allowed += 1
+            return 0.0
+        self.limited += 1
+        return (1 - tokens) / rule.rate
+
+    def _prune(self, now: float):
+        """删除已补满的令牌桶；仍超过上限时删除最早创建的"""
+        rates = {rule.path: rule for rule in self.rules}
+        for key, (tokens, updated) in list(self.buckets.items()):
+            rule = rates.get(key[0])
+            if rule is None or tokens + (now - updated) * rule.rate >= rule.burst:
+                del self.buckets[key]
+        while len(self.buckets) > self.max_clients:
+            self.buckets.pop(next(iter(self.buckets)))
+
+    def client_id(self, scope) -> str:
+        if self.trust_forwarded:
+            forwarded = dict(scope["headers"]).get(b"x-forwarded-for")
+            if forwarded:
+                return forwarded.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def handle(self, app, scope, receive, send):
+        """处理一个请求：令牌不足时返回 429，否则交给 app"""
+        rule = self.match(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if rule is None:
+            await app(scope, receive, send)
+            return
+
+        wait = self.acquire(rule, self.client_id(scope))
+        if not wait:
+            await app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "请求过于频繁，请稍后重试"}, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": 429, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(wait)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """把 RateLimiter 挂到应用上的 ASGI 中间件"""
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        await self.limiter.handle(self.app, scope, receive, send)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 响应序列化
+=====================================
+
+1. FastJSONResponse：有 orjson 时用 orjson 序列化，没有时退回标准库 json
+2. stream_json：大结果集分块序列化，边生成边发送，不在内存中拼出整个响应体
+
+路由直接返回这两种响应对象，跳过 FastAPI 对返回值逐字段 jsonable_encoder 的转换。
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """orjson / json 不认识的类型（Decimal、集合、Path 等）"""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"),
+                      default=lambda v: v.isoformat() if isinstance(v, datetime) else _default(v)
+                      ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson 序列化的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def envelope(data: Any, success: bool = True) -> Dict[str, Any]:
+    """接口统一的外层结构"""
+    return {"success": success, "data": data, "timestamp": datetime.now().isoformat()}
+
+
+def json_chunks(data: Dict[str, Any], key: str, items: List[Any], chunk_size: int = 1000) -> Iterator[bytes]:
+    """
+    分块生成 {"success": true, "data": {...data, key: [items...]}, "timestamp": ...}
+
+    Args:
+        data: data 中除列表外的字段
+        key: 列表字段名
+        items: 列表内容，每 chunk_size 条序列化一次
+    """
+    head = dumps(envelope(data))
+    # 在 data 对象结尾的 },"timestamp":...} 之前接上列表
+    data_end = head.rindex(b'},"timestamp"')
+    yield head[:data_end] + (b"," if data else b"") + dumps(key) + b":["
+    for start in range(0, len(items), chunk_size):
+        chunk = dumps(items[start:start + chunk_size])[1:-1]
+        yield (b"," if start else b"") + chunk
+    yield b"]" + head[data_end:]
+
+
+def stream_json(data: Dict[str, Any], key: str, items: List[Any], chunk_size: int = 1000,
+                status_code: int = 200) -> StreamingResponse:
+    """分块序列化的流式 JSON 响应（格式见 json_chunks）"""
+    return StreamingResponse(json_chunks(data, key, items, chunk_size),
+                             status_code=status_code, media_type="application/json")
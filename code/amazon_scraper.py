@@ -38,10 +38,11 @@ import aiohttp
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import hashlib
 import os
+import sys
 from pathlib import Path
 
 # 配置日志
@@ -55,8 +56,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 大批量持有的记录类型使用 __slots__（Python 3.10+ 才支持 slots 参数）
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class ProductData:
     """产品数据结构"""
     asin: str
@@ -79,8 +83,18 @@ class ProductData:
     timestamp: str
     
     def to_dict(self) -> Dict:
-        """转换为字典格式"""
-        return asdict(self)
+        """转换为字典格式（浅拷贝，不像 asdict 那样深拷贝列表字段）"""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+    
+    def to_row(self) -> Tuple:
+        """按 products 表列顺序转换为数据库行（不含 hash）"""
+        return (
+            self.asin, self.title, self.price, self.original_price,
+            self.rating, self.review_count, self.brand, self.category,
+            self.availability, self.image_url, self.detail_page_url,
+            self.seller_name, self.seller_link, json.dumps(self.features),
+            self.description, self.rank, self.bestseller_flag, self.timestamp
+        )
 
 
 class Config:
@@ -216,14 +230,7 @@ class DatabaseManager:
                         rank, bestseller_flag, timestamp, hash,
                         updated_at
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    product.asin, product.title, product.price, product.original_price,
-                    product.rating, product.review_count, product.brand, product.category,
-                    product.availability, product.image_url, product.detail_page_url,
-                    product.seller_name, product.seller_link, json.dumps(product.features),
-                    product.description, product.rank, product.bestseller_flag,
-                    product.timestamp, product_hash
-                ))
+                """, product.to_row() + (product_hash,))
                 
                 conn.commit()
                 logger.debug(f"产品 {product.asin} 保存成功")
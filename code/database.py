@@ -15,17 +15,22 @@ import sqlite3
 import json
 import logging
 import os
+import re
 import shutil
 import threading
 import time
 from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any, Union, Tuple
+from typing import Optional, List, Dict, Any, Union, Tuple, Deque, Callable
 from pathlib import Path
 from dataclasses import dataclass
-from queue import Queue, Empty
+from collections import deque
 import hashlib
 
+from database_analytics import ANALYTICS_INDEX_COLUMNS, ProductAnalytics
+from database_backup import BackupCatalog
+from database_partitions import MonthlyPartitions, PartitionSpec, month_key, shift_month
+
 
 # 配置日志
 logging.basicConfig(
@@ -39,66 +44,475 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 按负载类型调优的连接参数：cached_statements 传给 sqlite3.connect，其余为 PRAGMA
+PERFORMANCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # 批量写入：大页缓存，减少自动检查点次数
+    'ingest': {
+        'cached_statements': 256,
+        'cache_size': -65536,  # 64MB
+        'mmap_size': 268435456,  # 256MB
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 10000,
+        'busy_timeout': 30000
+    },
+    # 在线查询：内存映射读，短忙等待尽快失败
+    'serve': {
+        'cached_statements': 512,
+        'cache_size': -32768,  # 32MB
+        'mmap_size': 536870912,  # 512MB
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,
+        'busy_timeout': 5000
+    },
+    # 统计分析：大缓存与大内存映射，容忍长时间等待
+    'analytics': {
+        'cached_statements': 128,
+        'cache_size': -262144,  # 256MB
+        'mmap_size': 2147483648,  # 2GB
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,
+        'busy_timeout': 60000
+    }
+}
+
+
+# 按月分区存储的时间序列表
+PARTITIONED_TABLES: Tuple[PartitionSpec, ...] = (
+    PartitionSpec(
+        name='price_history',
+        time_column='recorded_at',
+        columns=(
+            ('id', "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ('product_id', "INTEGER"),
+            ('price', "DECIMAL(10,2) NOT NULL"),
+            ('original_price', "DECIMAL(10,2)"),
+            ('discount_percent', "INTEGER"),
+            ('recorded_at', "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+            ('min_price', "DECIMAL(10,2)"),
+            ('max_price', "DECIMAL(10,2)"),
+            ('is_compacted', "BOOLEAN DEFAULT 0"),
+        ),
+        indexes=(('product_date', "product_id, recorded_at"), ('date', "recorded_at")),
+        constraints=("FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE",)
+    ),
+    PartitionSpec(
+        name='scrape_logs',
+        time_column='started_at',
+        columns=(
+            ('id', "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ('platform', "TEXT NOT NULL"),
+            ('category', "TEXT NOT NULL"),
+            ('task_type', "TEXT NOT NULL"),
+            ('status', "TEXT NOT NULL"),
+            ('records_found', "INTEGER DEFAULT 0"),
+            ('records_saved', "INTEGER DEFAULT 0"),
+            ('error_message', "TEXT"),
+            ('started_at', "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+            ('completed_at', "TIMESTAMP"),
+            ('duration_seconds', "INTEGER"),
+            ('user_agent', "TEXT"),
+            ('ip_address', "TEXT"),
+            ('session_id', "TEXT"),
+        ),
+        indexes=(('platform_date', "platform, started_at"), ('status', "status, started_at"),
+                 ('type', "task_type"))
+    ),
+)
+
+
+# 每日价格趋势（按天分组，一天只落在一个月分区内）
+PRICE_TRENDS_SELECT = """DATE(recorded_at) AS date,
+    ROUND(AVG(price), 2) AS avg_price,
+    COUNT(DISTINCT product_id) AS product_count,
+    ROUND(AVG(discount_percent), 1) AS avg_discount"""
+
+
 @dataclass
 class DatabaseConfig:
     """数据库配置"""
     db_path: str = "data/products.db"
     backup_dir: str = "backup"
-    connection_pool_size: int = 10
+    connection_pool_size: int = 10  # 只读连接上限，另有一个专用写连接
+    pool_idle_timeout_seconds: float = 300.0  # 空闲读连接回收时间
+    pool_leak_threshold_seconds: float = 30.0  # 连接占用超过该秒数记为疑似泄漏
+    performance_profile: Optional[str] = 'serve'  # PERFORMANCE_PROFILES 中的名称，None 只设置基础 PRAGMA
+    optimize_interval_hours: float = 6  # 定期执行 PRAGMA optimize 的间隔，0 表示关闭
     backup_retention_days: int = 7
     auto_backup: bool = True
     backup_interval_hours: int = 24
+    backup_pages_per_step: int = 1024  # 分步备份每步复制页数
+    backup_step_sleep: float = 0.05  # 分步备份步间休眠秒数，让出数据库锁
+    backup_compression: Optional[str] = None  # 'zstd' 需安装 zstandard
+    incremental_backup_interval_minutes: int = 0  # 两次全量之间的增量备份间隔，0 表示关闭
+    stats_cache_ttl_seconds: float = 5.0  # get_database_stats 快照缓存时长，0 表示不缓存
+    price_heartbeat_daily: bool = True  # 价格未变化时每天仍保留一条心跳记录
+    price_history_raw_days: int = 30  # 超过该天数的价格历史压缩为每日 min/max/close
+    price_history_retention_months: int = 24  # 价格历史月分区保留月数，0 表示永久保留
+    scrape_logs_retention_months: int = 6  # 爬取日志月分区保留月数，0 表示永久保留
+    partition_archive: bool = True  # 过期分区删除前归档到 {backup_dir}/partitions/
+    search_max_candidates: int = 5000  # 全文搜索参与 BM25 排序的最新命中数上限，0 表示不限
+    analytics_bucket_seconds: float = 300  # 看板聚合结果按该长度的时间桶缓存，0 表示不缓存
+    allowed_platforms: Tuple[str, ...] = ('tiktok', 'amazon')  # 产品写入前校验的平台枚举
+    allowed_categories: Tuple[str, ...] = ('tshirt', 'hoodie', 'sweatshirt')  # 产品写入前校验的分类枚举
+
+
+class ProductValidationError(ValueError):
+    """产品数据未通过写入前校验，rejected 中列出每个不合格行及全部原因"""
+    
+    def __init__(self, rejected: List[Dict[str, Any]]):
+        self.rejected = rejected
+        super().__init__("; ".join(
+            f"{item['product_url'] or '#' + str(item['index'])}: {', '.join(item['errors'])}"
+            for item in rejected
+        ))
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图（毫秒）"""
+    
+    BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def record(self, value_ms: float):
+        """记录一次耗时（调用方负责加锁）"""
+        index = 0
+        while index < len(self.BOUNDS_MS) and value_ms > self.BOUNDS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """按分桶上界估算分位数"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return float(self.BOUNDS_MS[index]) if index < len(self.BOUNDS_MS) else self.max_ms
+        return self.max_ms
+    
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}"]
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': self.percentile(0.50),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': {label: n for label, n in zip(labels, self.buckets) if n}
+        }
 
 
 class ConnectionPool:
-    """简单的SQLite连接池"""
+    """
+    SQLite连接池
+    
+    - 写连接：单个读写连接，同一时间只借给一个线程（同线程可重入），
+      避免多个写连接在数据库锁上互相重试
+    - 读连接：mode=ro + query_only 的只读连接，按需创建直至 pool_size，
+      空闲超过 idle_timeout 秒后回收
+    - 记录等待时间与占用时长直方图，占用超过 leak_threshold 秒的连接视为疑似泄漏
+    """
     
-    def __init__(self, db_path: str, pool_size: int = 10):
+    def __init__(self, db_path: str, pool_size: int = 10,
+                 idle_timeout: float = 300.0, leak_threshold: float = 30.0,
+                 profile: Optional[str] = None):
+        if profile is not None and profile not in PERFORMANCE_PROFILES:
+            raise ValueError(f"未知的性能配置: {profile}，可选: {', '.join(PERFORMANCE_PROFILES)}")
         self.db_path = db_path
+        self.profile = profile
+        self._pragmas = dict(PERFORMANCE_PROFILES.get(profile, {}))
+        self._cached_statements = self._pragmas.pop('cached_statements', 128)
         self.pool_size = pool_size
-        self._connections = Queue(maxsize=pool_size)
+        self.idle_timeout = idle_timeout
+        self.leak_threshold = leak_threshold
         self._lock = threading.Lock()
+        self._state_changed = threading.Condition(self._lock)
+        self._checked_out = 0
+        self._paused = False
+        
+        # 写连接及其持有者
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_owner: Optional[int] = None
+        self._writer_depth = 0
+        
+        # 空闲读连接 [(连接, 归还时间)]，后进先出，最久未用的在队头被回收
+        self._idle_readers: List[Tuple[sqlite3.Connection, float]] = []
+        self._open_readers = 0
+        self._read_waiters: Deque[threading.Condition] = deque()
+        
+        # 借出记录 {id(conn): (角色, 线程名, 借出时间)}
+        self._active: Dict[int, Tuple[str, str, float]] = {}
+        self._reported_leaks = set()
+        self._last_leak_scan = 0.0
+        self._histograms = {
+            role: {'wait': LatencyHistogram(), 'hold': LatencyHistogram()}
+            for role in ('read', 'write')
+        }
+        self._counters = {'readers_created': 0, 'readers_reaped': 0, 'timeouts': 0, 'leaks_detected': 0}
         
-        # 预创建连接
-        for _ in range(pool_size):
-            conn = self._create_connection()
-            self._connections.put(conn)
+        # 写连接立即创建，以便建库和开启WAL；读连接按需创建
+        self._writer = self._create_connection()
     
     def _create_connection(self) -> sqlite3.Connection:
         """创建新的数据库连接"""
         conn = sqlite3.connect(
             self.db_path,
             check_same_thread=False,
-            timeout=30.0
+            timeout=30.0,
+            cached_statements=self._cached_statements
         )
         conn.row_factory = sqlite3.Row  # 启用字典式访问
         conn.execute("PRAGMA foreign_keys = ON")  # 启用外键约束
         conn.execute("PRAGMA journal_mode = WAL")  # 启用WAL模式提高并发性
         conn.execute("PRAGMA synchronous = NORMAL")  # 平衡性能和数据安全
+        self._apply_profile(conn)
         return conn
     
+    def _create_reader(self) -> sqlite3.Connection:
+        """创建只读连接"""
+        conn = sqlite3.connect(
+            f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=30.0,
+            cached_statements=self._cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        self._apply_profile(conn)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+    
+    def _apply_profile(self, conn: sqlite3.Connection):
+        """应用性能配置中的 PRAGMA"""
+        for name, value in self._pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+    
+    @property
+    def checked_out(self) -> int:
+        """当前借出的连接数"""
+        with self._lock:
+            return self._checked_out
+    
+    def _notify(self):
+        """唤醒等待写连接/排空的线程和排在最前的读等待者（调用方持有锁）"""
+        self._state_changed.notify_all()
+        if self._read_waiters:
+            self._read_waiters[0].notify()
+    
+    def _wait(self, ready, deadline: float, role: str, condition: threading.Condition = None):
+        """在锁内等待 ready() 成立且连接池未暂停，超时抛出 RuntimeError"""
+        condition = condition or self._state_changed
+        while self._paused or not ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not condition.wait(remaining):
+                if not self._paused and ready():
+                    break
+                self._counters['timeouts'] += 1
+                suspects = self._find_leaks(time.monotonic())
+                detail = f"，疑似泄漏: {suspects}" if suspects else ""
+                logger.error(f"获取{role}连接超时（已借出 {self._checked_out}）{detail}")
+                raise RuntimeError("数据库连接池已满")
+    
+    def _checkout(self, conn: sqlite3.Connection, role: str, waited_ms: float) -> float:
+        """登记借出（调用方持有锁）"""
+        now = time.monotonic()
+        self._checked_out += 1
+        self._active[id(conn)] = (role, threading.current_thread().name, now)
+        self._histograms[role]['wait'].record(waited_ms)
+        # 每秒最多扫描一次长时间未归还的连接
+        if now - self._last_leak_scan > 1.0:
+            self._last_leak_scan = now
+            self._find_leaks(now)
+        return now
+    
+    def _checkin(self, conn: sqlite3.Connection, role: str, since: float):
+        """登记归还（调用方持有锁）"""
+        held = time.monotonic() - since
+        self._checked_out -= 1
+        self._active.pop(id(conn), None)
+        self._reported_leaks.discard(id(conn))
+        self._histograms[role]['hold'].record(held * 1000)
+        if held > self.leak_threshold:
+            logger.warning(f"{role}连接被线程 {threading.current_thread().name} 占用 {held:.1f}s")
+    
+    def _find_leaks(self, now: float) -> List[Dict[str, Any]]:
+        """返回占用超过 leak_threshold 的连接，首次发现时记录日志（调用方持有锁）"""
+        leaks = []
+        for key, (role, thread_name, since) in self._active.items():
+            held = now - since
+            if held > self.leak_threshold:
+                leaks.append({'role': role, 'thread': thread_name, 'held_seconds': round(held, 1)})
+                if key not in self._reported_leaks:
+                    self._reported_leaks.add(key)
+                    self._counters['leaks_detected'] += 1
+                    logger.warning(f"疑似连接泄漏: {role}连接被线程 {thread_name} 占用 {held:.1f}s")
+        return leaks
+    
+    def _reap_idle(self, now: float):
+        """关闭空闲超时的读连接（调用方持有锁）"""
+        while self._idle_readers and now - self._idle_readers[0][1] > self.idle_timeout:
+            conn, _ = self._idle_readers.pop(0)
+            conn.close()
+            self._open_readers -= 1
+            self._counters['readers_reaped'] += 1
+    
     @contextmanager
     def get_connection(self, timeout: float = 30.0):
-        """获取数据库连接"""
-        conn = None
+        """获取写连接（连接池暂停期间等待恢复）"""
+        me = threading.get_ident()
+        with self._lock:
+            if self._writer_owner == me:
+                # 同一线程嵌套获取
+                self._writer_depth += 1
+                conn = self._writer
+                reentrant = True
+            else:
+                reentrant = False
+        
+        if reentrant:
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    self._writer_depth -= 1
+            return
+        
+        start = time.monotonic()
+        with self._state_changed:
+            self._wait(lambda: self._writer_owner is None, start + timeout, "写")
+            if self._writer is None:
+                self._writer = self._create_connection()
+            conn = self._writer
+            self._writer_owner = me
+            self._writer_depth = 1
+            since = self._checkout(conn, 'write', (time.monotonic() - start) * 1000)
         try:
-            conn = self._connections.get(timeout=timeout)
             yield conn
-        except Empty:
-            logger.error("连接池已满，无法获取连接")
-            raise RuntimeError("数据库连接池已满")
         except Exception as e:
             logger.error(f"数据库连接错误: {e}")
-            if conn:
+            conn.rollback()
+            raise
+        finally:
+            if conn.in_transaction:
+                logger.warning("写连接归还时仍有未提交的事务，已回滚")
                 conn.rollback()
+            with self._state_changed:
+                self._writer_owner = None
+                self._writer_depth = 0
+                self._checkin(conn, 'write', since)
+                self._notify()
+    
+    @contextmanager
+    def read_connection(self, timeout: float = 30.0):
+        """获取只读连接，池中无空闲连接且未达上限时新建"""
+        start = time.monotonic()
+        with self._state_changed:
+            # 读等待者按先来后到排队，避免高并发下个别线程长期拿不到连接
+            turn = threading.Condition(self._lock)
+            self._read_waiters.append(turn)
+            try:
+                self._wait(lambda: self._read_waiters[0] is turn
+                           and (self._idle_readers or self._open_readers < self.pool_size),
+                           start + timeout, "读", turn)
+            finally:
+                self._read_waiters.remove(turn)
+                self._notify()
+            now = time.monotonic()
+            self._reap_idle(now)
+            if self._idle_readers:
+                conn = self._idle_readers.pop()[0]
+            else:
+                conn = None
+                self._open_readers += 1
+        
+        if conn is None:
+            try:
+                conn = self._create_reader()
+            except Exception:
+                with self._state_changed:
+                    self._open_readers -= 1
+                    self._notify()
+                raise
+            with self._lock:
+                self._counters['readers_created'] += 1
+        
+        with self._lock:
+            since = self._checkout(conn, 'read', (time.monotonic() - start) * 1000)
+        try:
+            yield conn
+        except Exception as e:
+            logger.error(f"数据库连接错误: {e}")
             raise
         finally:
-            if conn:
-                try:
-                    self._connections.put_nowait(conn)
-                except:
-                    # 连接池满时关闭连接
-                    conn.close()
+            if conn.in_transaction:
+                conn.rollback()
+            with self._state_changed:
+                self._checkin(conn, 'read', since)
+                self._idle_readers.append((conn, time.monotonic()))
+                self._notify()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """连接池指标：连接数、等待/占用直方图、疑似泄漏"""
+        with self._lock:
+            return {
+                'checked_out': self._checked_out,
+                'open_readers': self._open_readers,
+                'idle_readers': len(self._idle_readers),
+                'max_readers': self.pool_size,
+                'writer_busy': self._writer_owner is not None,
+                **self._counters,
+                'read_wait_ms': self._histograms['read']['wait'].snapshot(),
+                'read_hold_ms': self._histograms['read']['hold'].snapshot(),
+                'write_wait_ms': self._histograms['write']['wait'].snapshot(),
+                'write_hold_ms': self._histograms['write']['hold'].snapshot(),
+                'leaks': self._find_leaks(time.monotonic())
+            }
+    
+    def drain(self, timeout: float = 30.0):
+        """
+        暂停借出新连接，等待已借出的连接全部归还后关闭所有连接
+        
+        Args:
+            timeout: 等待归还的最长秒数，超时后恢复连接池并抛出 TimeoutError
+        """
+        with self._state_changed:
+            self._paused = True
+            if not self._state_changed.wait_for(lambda: self._checked_out == 0, timeout):
+                self._paused = False
+                self._notify()
+                raise TimeoutError(f"仍有 {self._checked_out} 个连接未归还")
+        self.close_all()
+    
+    def reopen(self):
+        """重新创建写连接并恢复借出，读连接按需重建"""
+        self.close_all()
+        with self._state_changed:
+            self._writer = self._create_connection()
+            self._paused = False
+            self._notify()
+    
+    def close_all(self):
+        """关闭写连接（未借出时）和所有空闲读连接"""
+        with self._lock:
+            idle = [conn for conn, _ in self._idle_readers]
+            self._open_readers -= len(idle)
+            self._idle_readers = []
+            if self._writer is not None and self._writer_owner is None:
+                idle.append(self._writer)
+                self._writer = None
+        for conn in idle:
+            conn.close()
 
 
 class DatabaseManager:
@@ -120,7 +534,35 @@ class DatabaseManager:
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         
         # 初始化连接池
-        self.pool = ConnectionPool(str(self.db_path), self.config.connection_pool_size)
+        self.pool = ConnectionPool(
+            str(self.db_path),
+            self.config.connection_pool_size,
+            idle_timeout=self.config.pool_idle_timeout_seconds,
+            leak_threshold=self.config.pool_leak_threshold_seconds,
+            profile=self.config.performance_profile
+        )
+        
+        # 备份目录（分步快照、增量差异与清单）
+        self.backups = BackupCatalog(
+            self.backup_dir,
+            compression=self.config.backup_compression,
+            pages_per_step=self.config.backup_pages_per_step,
+            step_sleep=self.config.backup_step_sleep
+        )
+        self.last_backup_metrics: Dict[str, Any] = {}
+        
+        # 按月分区的时间序列表
+        self.partitions = {spec.name: MonthlyPartitions(spec) for spec in PARTITIONED_TABLES}
+        
+        # 看板聚合查询（平台对比、分类明细、价格分布、排行）
+        self.analytics = ProductAnalytics(self.pool.read_connection, self.config.analytics_bucket_seconds)
+        
+        # 数据变化回调 (事件类型, 数据)：新产品 products_added、价格变化 price_changed，提交后在写入线程中调用
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        
+        # 统计信息快照缓存 (过期时间, 统计信息)
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._stats_lock = threading.Lock()
         
         # 初始化数据库表结构
         self._init_database()
@@ -128,11 +570,19 @@ class DatabaseManager:
         # 启动自动备份任务
         if self.config.auto_backup:
             self._start_auto_backup()
+        
+        # 启动定期统计信息优化
+        self.last_optimize: Dict[str, Any] = {}
+        self._closing = threading.Event()
+        if self.config.optimize_interval_hours > 0:
+            self._start_auto_optimize()
     
     def _init_database(self):
         """初始化数据库表结构"""
         with self.pool.get_connection() as conn:
             cursor = conn.cursor()
+            # 建表、分区与触发器放在同一个写事务里：多个进程同时启动时依次初始化，不会交错执行 DDL
+            cursor.execute("BEGIN IMMEDIATE")
             
             # 创建产品主表
             cursor.execute("""
@@ -204,51 +654,12 @@ class DatabaseManager:
                 )
             """)
             
-            # 创建价格历史表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS price_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER,
-                    
-                    -- 价格数据
-                    price DECIMAL(10,2) NOT NULL,
-                    original_price DECIMAL(10,2),
-                    discount_percent INTEGER,
-                    
-                    -- 时间信息
-                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    
-                    FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
-                )
-            """)
+            # 旧库升级：价格历史压缩字段
+            self._migrate_price_history(cursor)
             
-            # 创建爬取任务日志表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scrape_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    
-                    -- 任务信息
-                    platform TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    task_type TEXT NOT NULL,
-                    
-                    -- 执行结果
-                    status TEXT NOT NULL,
-                    records_found INTEGER DEFAULT 0,
-                    records_saved INTEGER DEFAULT 0,
-                    error_message TEXT,
-                    
-                    -- 时间信息
-                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    completed_at TIMESTAMP,
-                    duration_seconds INTEGER,
-                    
-                    -- 元数据
-                    user_agent TEXT,
-                    ip_address TEXT,
-                    session_id TEXT
-                )
-            """)
+            # 价格历史、爬取日志按月分区（旧版单表首次启动时迁移）
+            for partitions in self.partitions.values():
+                partitions.setup(cursor)
             
             # 创建索引
             self._create_indexes(cursor)
@@ -256,81 +667,299 @@ class DatabaseManager:
             # 添加约束
             self._add_constraints(cursor)
             
+            # 行数计数器
+            self._init_counters(cursor)
+            
+            # 全文搜索索引
+            self._init_search_index(cursor)
+            
             conn.commit()
+            
+            # 从未分析过的库先做一次有限扫描的 ANALYZE，让规划器有统计信息可用
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if not cursor.fetchone():
+                cursor.execute("PRAGMA analysis_limit = 400")
+                cursor.execute("ANALYZE")
+                conn.commit()
             logger.info("数据库初始化完成")
     
+    def _migrate_price_history(self, cursor: sqlite3.Cursor):
+        """为旧版单表结构的价格历史补充每日压缩所需字段（随后迁移到月分区）"""
+        cursor.execute("SELECT type FROM sqlite_master WHERE name = 'price_history'")
+        row = cursor.fetchone()
+        if row is None or row[0] != 'table':
+            return
+        cursor.execute("PRAGMA table_info(price_history)")
+        existing = {row[1] for row in cursor.fetchall()}
+        columns = {
+            'min_price': "DECIMAL(10,2)",
+            'max_price': "DECIMAL(10,2)",
+            'is_compacted': "BOOLEAN DEFAULT 0"
+        }
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE price_history ADD COLUMN {name} {definition}")
+    
     def _create_indexes(self, cursor: sqlite3.Cursor):
         """创建数据库索引"""
         indexes = [
             # 产品表索引
             "CREATE INDEX IF NOT EXISTS idx_products_platform_category ON products(platform, category)",
             "CREATE INDEX IF NOT EXISTS idx_products_last_updated ON products(last_updated_at)",
-            "CREATE INDEX IF NOT EXISTS idx_products_active ON products(is_active, platform)",
             "CREATE INDEX IF NOT EXISTS idx_products_url ON products(product_url)",
-            
-            # 价格历史表索引
-            "CREATE INDEX IF NOT EXISTS idx_price_history_product_date ON price_history(product_id, recorded_at)",
-            "CREATE INDEX IF NOT EXISTS idx_price_history_date ON price_history(recorded_at)",
+            "CREATE INDEX IF NOT EXISTS idx_products_first_seen ON products(first_seen_at)",
+            # 看板聚合只读这个覆盖索引，不回表读取整行
+            f"CREATE INDEX IF NOT EXISTS idx_products_analytics ON products({ANALYTICS_INDEX_COLUMNS})",
             
             # 热度评论表索引
-            "CREATE INDEX IF NOT EXISTS idx_hot_comments_product ON hot_comments(product_id)",
+            # (product_id, likes_count, captured_at) 覆盖按产品取前 N 条的排序，窗口查询无需临时排序
+            "CREATE INDEX IF NOT EXISTS idx_hot_comments_product_likes "
+            "ON hot_comments(product_id, likes_count DESC, captured_at DESC)",
             "CREATE INDEX IF NOT EXISTS idx_hot_comments_likes ON hot_comments(likes_count DESC)",
             "CREATE INDEX IF NOT EXISTS idx_hot_comments_date ON hot_comments(captured_at)",
             
-            # 爬取日志表索引
-            "CREATE INDEX IF NOT EXISTS idx_scrape_logs_platform_date ON scrape_logs(platform, started_at)",
-            "CREATE INDEX IF NOT EXISTS idx_scrape_logs_status ON scrape_logs(status, started_at)",
-            "CREATE INDEX IF NOT EXISTS idx_scrape_logs_type ON scrape_logs(task_type)"
+            # 价格历史、爬取日志的索引建在各月分区上（PARTITIONED_TABLES）
         ]
         
         for index_sql in indexes:
             cursor.execute(index_sql)
         
+        # 旧版单列索引已被 idx_hot_comments_product_likes 的前缀覆盖
+        cursor.execute("DROP INDEX IF EXISTS idx_hot_comments_product")
+        # (is_active, platform) 是 idx_products_analytics 的前缀
+        cursor.execute("DROP INDEX IF EXISTS idx_products_active")
+        
         logger.info("数据库索引创建完成")
     
+    # 旧版本逐行校验的触发器，校验已改为写入前的批量校验
+    LEGACY_VALIDATION_TRIGGERS = (
+        'products_price_validation',
+        'products_rating_validation',
+        'products_platform_validation',
+        'products_category_validation',
+    )
+    
     def _add_constraints(self, cursor: sqlite3.Cursor):
-        """添加数据约束"""
-        constraints = [
-            # 检查价格必须为正数
-            "CREATE TABLE IF NOT EXISTS products_price_check AS SELECT * FROM products WHERE 1=0",
-            "CREATE TRIGGER IF NOT EXISTS products_price_validation "
-            "BEFORE INSERT ON products "
-            "WHEN NEW.price IS NOT NULL AND NEW.price <= 0 "
-            "BEGIN SELECT RAISE(ABORT, '价格必须大于0'); END;",
-            
-            # 检查评分范围
-            "CREATE TRIGGER IF NOT EXISTS products_rating_validation "
-            "BEFORE INSERT ON products "
-            "WHEN NEW.rating IS NOT NULL AND (NEW.rating < 0 OR NEW.rating > 5) "
-            "BEGIN SELECT RAISE(ABORT, '评分必须在0-5之间'); END;",
-            
-            # 检查平台枚举值
-            "CREATE TRIGGER IF NOT EXISTS products_platform_validation "
-            "BEFORE INSERT ON products "
-            "WHEN NEW.platform NOT IN ('tiktok', 'amazon') "
-            "BEGIN SELECT RAISE(ABORT, '平台必须是tiktok或amazon'); END;",
-            
-            # 检查分类枚举值
-            "CREATE TRIGGER IF NOT EXISTS products_category_validation "
-            "BEFORE INSERT ON products "
-            "WHEN NEW.category NOT IN ('tshirt', 'hoodie', 'sweatshirt') "
-            "BEGIN SELECT RAISE(ABORT, '分类必须是tshirt、hoodie或sweatshirt'); END;"
+        """移除旧版逐行校验触发器及误建的 products_price_check 表，并缓存产品表字段"""
+        for trigger in self.LEGACY_VALIDATION_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE IF EXISTS products_price_check")
+        
+        cursor.execute("PRAGMA table_info(products)")
+        self._product_columns = frozenset(row[1] for row in cursor.fetchall())
+    
+    def validate_products(self, products: List[Dict[str, Any]]
+                          ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        批量校验产品数据，一次返回全部不合格行而不是遇到第一条就中止
+        
+        平台和分类的允许值来自 DatabaseConfig.allowed_platforms / allowed_categories。
+        
+        Args:
+            products: 产品数据列表
+            
+        Returns:
+            (合格行 [(序号, 产品)], 不合格行 [{'index', 'product_url', 'errors'}])
+        """
+        platforms = frozenset(self.config.allowed_platforms)
+        categories = frozenset(self.config.allowed_categories)
+        columns = self._product_columns
+        valid, rejected = [], []
+        
+        for index, product in enumerate(products):
+            errors = []
+            for field in ('product_name', 'platform', 'category', 'product_url'):
+                if not product.get(field):
+                    errors.append(f"缺少必填字段 {field}")
+            
+            unknown = product.keys() - columns
+            if unknown:
+                errors.append(f"未知字段: {', '.join(sorted(unknown))}")
+            
+            price = product.get('price')
+            if price is not None:
+                if not isinstance(price, (int, float)):
+                    errors.append("价格必须是数字")
+                elif price <= 0:
+                    errors.append("价格必须大于0")
+            
+            rating = product.get('rating')
+            if rating is not None:
+                if not isinstance(rating, (int, float)):
+                    errors.append("评分必须是数字")
+                elif not 0 <= rating <= 5:
+                    errors.append("评分必须在0-5之间")
+            
+            if product.get('platform') and product['platform'] not in platforms:
+                errors.append(f"平台必须是{'、'.join(self.config.allowed_platforms)}之一")
+            if product.get('category') and product['category'] not in categories:
+                errors.append(f"分类必须是{'、'.join(self.config.allowed_categories)}之一")
+            
+            if errors:
+                rejected.append({'index': index, 'product_url': product.get('product_url'), 'errors': errors})
+            else:
+                valid.append((index, product))
+        
+        return valid, rejected
+    
+    # 由触发器维护的行数计数器：名称 -> (表, 过滤条件)
+    COUNTERS = {
+        'products': ('products', ''),
+        'active_products': ('products', 'WHERE is_active = 1'),
+        'hot_comments': ('hot_comments', ''),
+        'price_history': ('price_history', ''),
+        'scrape_logs': ('scrape_logs', ''),
+    }
+    
+    def _init_counters(self, cursor: sqlite3.Cursor):
+        """创建计数器表及维护触发器，缺失的计数器按当前数据初始化一次"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS table_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        cursor.execute("SELECT name FROM table_counters")
+        existing = {row[0] for row in cursor.fetchall()}
+        for name, (table, where) in self.COUNTERS.items():
+            if name not in existing:
+                cursor.execute(f"INSERT INTO table_counters (name, value) SELECT ?, COUNT(*) FROM {table} {where}",
+                               (name,))
+        
+        triggers = [
+            """CREATE TRIGGER IF NOT EXISTS counters_products_insert AFTER INSERT ON products BEGIN
+                UPDATE table_counters SET value = value + 1 WHERE name = 'products';
+                UPDATE table_counters SET value = value + (NEW.is_active IS 1) WHERE name = 'active_products';
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS counters_products_delete AFTER DELETE ON products BEGIN
+                UPDATE table_counters SET value = value - 1 WHERE name = 'products';
+                UPDATE table_counters SET value = value - (OLD.is_active IS 1) WHERE name = 'active_products';
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS counters_products_active AFTER UPDATE OF is_active ON products
+            WHEN (OLD.is_active IS 1) != (NEW.is_active IS 1) BEGIN
+                UPDATE table_counters SET value = value + (NEW.is_active IS 1) - (OLD.is_active IS 1)
+                WHERE name = 'active_products';
+            END""",
         ]
+        # 分区表的计数器触发器由各分区维护（MonthlyPartitions.rebuild）
+        for table in ('hot_comments',):
+            triggers.append(f"""CREATE TRIGGER IF NOT EXISTS counters_{table}_insert AFTER INSERT ON {table} BEGIN
+                UPDATE table_counters SET value = value + 1 WHERE name = '{table}';
+            END""")
+            triggers.append(f"""CREATE TRIGGER IF NOT EXISTS counters_{table}_delete AFTER DELETE ON {table} BEGIN
+                UPDATE table_counters SET value = value - 1 WHERE name = '{table}';
+            END""")
         
-        for constraint_sql in constraints:
-            try:
-                cursor.execute(constraint_sql)
-            except sqlite3.Error as e:
-                logger.warning(f"约束创建失败: {e}")
+        for trigger_sql in triggers:
+            cursor.execute(trigger_sql)
+    
+    def _init_search_index(self, cursor: sqlite3.Cursor):
+        """
+        创建 products_fts 全文索引（rowid 即产品ID）及待同步队列
+        
+        逐行触发器直接写 FTS5 时每行都会刷新一次索引段，批量写入极慢；因此触发器只把
+        变化的产品ID记入 products_fts_pending，由 sync_search_index 集合式批量重建。
+        当前 SQLite 未编译 FTS5 时 search_enabled 为 False，search_products 退化为 LIKE 查询。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                    product_name, keywords, comments,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 不可用，搜索将使用 LIKE 查询: {e}")
+            self.search_enabled = False
+            return
+        self.search_enabled = True
+        
+        cursor.execute("CREATE TABLE IF NOT EXISTS products_fts_pending (product_id INTEGER PRIMARY KEY)")
+        if not exists:
+            cursor.execute("INSERT OR IGNORE INTO products_fts_pending (product_id) SELECT id FROM products")
+        
+        triggers = [
+            """CREATE TRIGGER IF NOT EXISTS fts_products_insert AFTER INSERT ON products BEGIN
+                INSERT OR IGNORE INTO products_fts_pending (product_id) VALUES (NEW.id);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS fts_products_update AFTER UPDATE OF product_name, keywords ON products
+            WHEN OLD.product_name IS NOT NEW.product_name OR OLD.keywords IS NOT NEW.keywords BEGIN
+                INSERT OR IGNORE INTO products_fts_pending (product_id) VALUES (NEW.id);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS fts_products_delete AFTER DELETE ON products BEGIN
+                INSERT OR IGNORE INTO products_fts_pending (product_id) VALUES (OLD.id);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS fts_comments_insert AFTER INSERT ON hot_comments BEGIN
+                INSERT OR IGNORE INTO products_fts_pending (product_id) VALUES (NEW.product_id);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS fts_comments_update AFTER UPDATE OF comment_text ON hot_comments BEGIN
+                INSERT OR IGNORE INTO products_fts_pending (product_id) VALUES (NEW.product_id);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS fts_comments_delete AFTER DELETE ON hot_comments BEGIN
+                INSERT OR IGNORE INTO products_fts_pending (product_id) VALUES (OLD.product_id);
+            END""",
+        ]
+        for trigger_sql in triggers:
+            cursor.execute(trigger_sql)
+        
+        self._sync_search_index(cursor)
+    
+    def _sync_search_index(self, cursor: sqlite3.Cursor) -> int:
+        """按待同步队列集合式重建全文索引行，返回处理的产品数（调用方负责提交）"""
+        if not self.search_enabled:
+            return 0
+        cursor.execute("SELECT COUNT(*) FROM products_fts_pending")
+        pending = cursor.fetchone()[0]
+        if not pending:
+            return 0
+        
+        cursor.execute("DELETE FROM products_fts WHERE rowid IN (SELECT product_id FROM products_fts_pending)")
+        cursor.execute("""
+            INSERT INTO products_fts (rowid, product_name, keywords, comments)
+            SELECT p.id, p.product_name, p.keywords,
+                   (SELECT group_concat(c.comment_text, ' ') FROM hot_comments c WHERE c.product_id = p.id)
+            FROM products_fts_pending q
+            JOIN products p ON p.id = q.product_id
+        """)
+        cursor.execute("DELETE FROM products_fts_pending")
+        return pending
+    
+    def sync_search_index(self) -> int:
+        """
+        把待同步队列中的产品变化写入全文索引
+        
+        写入产品/评论的方法结束时和 search_products 查询前会自动调用。
+        
+        Returns:
+            同步的产品数
+        """
+        with self.pool.get_connection() as conn:
+            synced = self._sync_search_index(conn.cursor())
+            conn.commit()
+        return synced
     
     def _start_auto_backup(self):
-        """启动自动备份任务"""
+        """启动自动备份任务：按周期全量快照，期间按配置做增量备份"""
+        full_interval = self.config.backup_interval_hours * 3600
+        incremental_interval = self.config.incremental_backup_interval_minutes * 60
+        
         def backup_task():
+            last_full = time.time()
             while True:
                 try:
-                    time.sleep(self.config.backup_interval_hours * 3600)
-                    self.create_backup()
-                    self.cleanup_old_backups()
+                    time.sleep(min(incremental_interval or full_interval, full_interval))
+                    if time.time() - last_full >= full_interval:
+                        self.create_backup()
+                        self.cleanup_old_backups()
+                        if self.config.price_history_raw_days > 0:
+                            self.compact_price_history()
+                        last_full = time.time()
+                    else:
+                        self.create_incremental_backup()
                 except Exception as e:
                     logger.error(f"自动备份任务错误: {e}")
         
@@ -340,6 +969,32 @@ class DatabaseManager:
     
     # ==================== 产品管理方法 ====================
     
+    @staticmethod
+    def _encode_product(product_data: Dict[str, Any]) -> Dict[str, Any]:
+        """列表字段序列化为JSON"""
+        for field in ('image_urls', 'keywords'):
+            if field in product_data and isinstance(product_data[field], list):
+                product_data[field] = json.dumps(product_data[field])
+        return product_data
+    
+    # 推送事件中最多列出的产品数（count 为实际总数）
+    EVENT_SAMPLE_SIZE = 20
+    
+    def _emit(self, event_type: str, data: Dict[str, Any]):
+        """通知数据变化回调，回调出错不影响写入"""
+        for listener in self.listeners:
+            try:
+                listener(event_type, data)
+            except Exception as e:
+                logger.error(f"数据变化回调失败: {e}")
+    
+    @staticmethod
+    def _event_product(product: Dict[str, Any], **extra) -> Dict[str, Any]:
+        """推送事件中的产品摘要"""
+        summary = {k: product.get(k) for k in ('product_name', 'platform', 'category', 'price', 'product_url')}
+        summary.update(extra)
+        return summary
+    
     def insert_product(self, product_data: Dict[str, Any]) -> int:
         """
         插入新产品记录
@@ -349,13 +1004,17 @@ class DatabaseManager:
             
         Returns:
             新产品ID
+            
+        Raises:
+            ProductValidationError: 数据未通过校验
         """
         try:
             # 处理JSON字段
-            if 'image_urls' in product_data and isinstance(product_data['image_urls'], list):
-                product_data['image_urls'] = json.dumps(product_data['image_urls'])
-            if 'keywords' in product_data and isinstance(product_data['keywords'], list):
-                product_data['keywords'] = json.dumps(product_data['keywords'])
+            self._encode_product(product_data)
+            
+            _, rejected = self.validate_products([product_data])
+            if rejected:
+                raise ProductValidationError(rejected)
             
             # 检查产品URL是否已存在
             with self.pool.get_connection() as conn:
@@ -375,6 +1034,7 @@ class DatabaseManager:
                         UPDATE products SET {', '.join(update_fields)}
                         WHERE product_url = ?
                     """, update_values)
+                    self._sync_search_index(cursor)
                     conn.commit()
                     logger.info(f"产品已更新: {product_data['product_url']}")
                     return existing[0]
@@ -388,14 +1048,98 @@ class DatabaseManager:
                         INSERT INTO products ({columns}) VALUES ({placeholders})
                     """, values)
                     product_id = cursor.lastrowid
+                    self._sync_search_index(cursor)
                     conn.commit()
                     logger.info(f"新产品已插入: ID {product_id}")
+                    self._emit('products_added', {
+                        'count': 1, 'products': [self._event_product(product_data, id=product_id)]
+                    })
                     return product_id
                     
         except Exception as e:
             logger.error(f"插入产品失败: {e}")
             raise
     
+    def insert_products(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        批量插入或更新产品（按 product_url 去重），单个事务提交
+        
+        先对整批数据做校验，不合格行全部列在 rejected 中返回，其余行照常写入；
+        批内重复的 product_url 以最后一条为准。
+        
+        Args:
+            products: 产品数据列表
+            
+        Returns:
+            {'received', 'inserted', 'updated', 'rejected': [{'index', 'product_url', 'errors'}]}
+        """
+        valid, rejected = self.validate_products([self._encode_product(dict(p)) for p in products])
+        result = {'received': len(products), 'inserted': 0, 'updated': 0, 'rejected': rejected}
+        if rejected:
+            logger.warning(f"批量写入产品: {len(rejected)}/{len(products)} 条未通过校验")
+        
+        by_url = {product['product_url']: product for _, product in valid}
+        if not by_url:
+            return result
+        
+        try:
+            with self.pool.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("CREATE TEMP TABLE IF NOT EXISTS product_urls (product_url TEXT PRIMARY KEY)")
+                cursor.execute("DELETE FROM product_urls")
+                cursor.executemany("INSERT INTO product_urls (product_url) VALUES (?)",
+                                   ((url,) for url in by_url))
+                cursor.execute("""
+                    SELECT DISTINCT p.product_url FROM products p
+                    JOIN product_urls u ON u.product_url = p.product_url
+                """)
+                existing = {row[0] for row in cursor.fetchall()}
+                cursor.execute("DELETE FROM product_urls")
+                
+                # 字段组合相同的行一起 executemany
+                now = datetime.now().isoformat()
+                inserts: Dict[Tuple[str, ...], List[tuple]] = {}
+                updates: Dict[Tuple[str, ...], List[tuple]] = {}
+                for url, product in by_url.items():
+                    if url in existing:
+                        fields = tuple(k for k in product
+                                       if k not in ('product_url', 'last_updated_at')) + ('last_updated_at',)
+                        updates.setdefault(fields, []).append(
+                            tuple(product[k] for k in fields[:-1]) + (now, url))
+                    else:
+                        fields = tuple(product)
+                        inserts.setdefault(fields, []).append(tuple(product[k] for k in fields))
+                
+                for fields, rows in inserts.items():
+                    cursor.executemany(f"""
+                        INSERT INTO products ({', '.join(fields)})
+                        VALUES ({', '.join('?' for _ in fields)})
+                    """, rows)
+                    result['inserted'] += len(rows)
+                for fields, rows in updates.items():
+                    cursor.executemany(f"""
+                        UPDATE products SET {', '.join(f"{k} = ?" for k in fields)}
+                        WHERE product_url = ?
+                    """, rows)
+                    result['updated'] += len(rows)
+                
+                self._sync_search_index(cursor)
+                conn.commit()
+            
+            logger.info(f"批量写入产品: 新增 {result['inserted']}, 更新 {result['updated']}, "
+                        f"拒绝 {len(rejected)}")
+            if result['inserted'] and self.listeners:
+                added = (product for url, product in by_url.items() if url not in existing)
+                self._emit('products_added', {
+                    'count': result['inserted'],
+                    'products': [self._event_product(p) for _, p in zip(range(self.EVENT_SAMPLE_SIZE), added)]
+                })
+            return result
+            
+        except Exception as e:
+            logger.error(f"批量写入产品失败: {e}")
+            raise
+    
     def get_products(self, 
                     platform: str = None, 
                     category: str = None,
@@ -414,7 +1158,7 @@ class DatabaseManager:
             产品列表
         """
         try:
-            with self.pool.get_connection() as conn:
+            with self.pool.read_connection() as conn:
                 cursor = conn.cursor()
                 
                 where_clauses = ["is_active = 1"]
@@ -437,69 +1181,233 @@ class DatabaseManager:
                     LIMIT ? OFFSET ?
                 """, params + [limit, offset])
                 
-                products = []
-                for row in cursor.fetchall():
-                    product = dict(row)
-                    # 解析JSON字段
-                    if product['image_urls']:
-                        try:
-                            product['image_urls'] = json.loads(product['image_urls'])
-                        except:
-                            pass
-                    if product['keywords']:
-                        try:
-                            product['keywords'] = json.loads(product['keywords'])
-                        except:
-                            pass
-                    products.append(product)
-                
-                return products
+                return [self._decode_product(row) for row in cursor.fetchall()]
                 
         except Exception as e:
             logger.error(f"获取产品列表失败: {e}")
             return []
     
+    @staticmethod
+    def _decode_product(row: sqlite3.Row) -> Dict[str, Any]:
+        """行转字典并解析JSON字段"""
+        product = dict(row)
+        for field in ('image_urls', 'keywords'):
+            if product.get(field):
+                try:
+                    product[field] = json.loads(product[field])
+                except:
+                    pass
+        return product
+    
+    # 搜索排序权重：产品名 > 关键词 > 热评
+    SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+    
+    @staticmethod
+    def _fts_query(text: str, prefix: bool) -> Optional[str]:
+        """把用户输入转成 FTS5 查询：词语逐个加引号（AND），最后一个词按前缀匹配"""
+        terms = re.findall(r"\w+", text)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        if prefix:
+            quoted[-1] += '*'
+        return ' '.join(quoted)
+    
+    def search_products(self,
+                        query: str,
+                        platform: str = None,
+                        category: str = None,
+                        limit: int = 20,
+                        offset: int = 0,
+                        prefix: bool = True) -> List[Dict[str, Any]]:
+        """
+        全文搜索产品名、关键词和热评，按 BM25 相关度排序
+        
+        命中数超过 search_max_candidates 时只在最新的这些命中中排序，保证常见词查询延迟有上限。
+        
+        Args:
+            query: 搜索词，多个词之间为 AND 关系
+            platform: 平台过滤
+            category: 分类过滤
+            limit: 限制数量
+            offset: 偏移量
+            prefix: 最后一个词是否按前缀匹配（边输入边搜索）
+            
+        Returns:
+            产品列表，每项附带 score（越小越相关）
+        """
+        fts_query = self._fts_query(query, prefix)
+        if fts_query is None:
+            return []
+        
+        where_clauses = ["p.is_active = 1"]
+        params: List[Any] = []
+        if platform:
+            where_clauses.append("p.platform = ?")
+            params.append(platform)
+        if category:
+            where_clauses.append("p.category = ?")
+            params.append(category)
+        
+        try:
+            if self.search_enabled:
+                with self.pool.read_connection() as conn:
+                    pending = conn.execute("SELECT EXISTS (SELECT 1 FROM products_fts_pending)").fetchone()[0]
+                if pending:
+                    self.sync_search_index()
+            
+            with self.pool.read_connection() as conn:
+                if self.search_enabled:
+                    # 常见词可能命中大量产品，只对最新的 search_max_candidates 个命中计算 BM25
+                    min_rowid = 0
+                    if self.config.search_max_candidates > 0:
+                        row = conn.execute("""
+                            SELECT rowid FROM products_fts WHERE products_fts MATCH ?
+                            ORDER BY rowid DESC LIMIT 1 OFFSET ?
+                        """, (fts_query, self.config.search_max_candidates - 1)).fetchone()
+                        if row:
+                            min_rowid = row[0]
+                    
+                    weights = ', '.join(str(w) for w in self.SEARCH_WEIGHTS)
+                    cursor = conn.execute(f"""
+                        SELECT p.*, bm25(products_fts, {weights}) AS score
+                        FROM products_fts
+                        JOIN products p ON p.id = products_fts.rowid
+                        WHERE products_fts MATCH ? AND products_fts.rowid >= ?
+                          AND {' AND '.join(where_clauses)}
+                        ORDER BY score
+                        LIMIT ? OFFSET ?
+                    """, [fts_query, min_rowid] + params + [limit, offset])
+                else:
+                    # 当前 SQLite 不支持 FTS5 时退化为 LIKE 扫描
+                    for term in re.findall(r"\w+", query):
+                        where_clauses.append("(p.product_name LIKE ? OR p.keywords LIKE ?)")
+                        params.extend([f"%{term}%"] * 2)
+                    cursor = conn.execute(f"""
+                        SELECT p.*, NULL AS score FROM products p
+                        WHERE {' AND '.join(where_clauses)}
+                        ORDER BY p.last_updated_at DESC
+                        LIMIT ? OFFSET ?
+                    """, params + [limit, offset])
+                
+                return [self._decode_product(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logger.error(f"搜索产品失败: {e}")
+            return []
+    
     def update_product_price(self, product_id: int, price: float, original_price: float = None):
         """
-        更新产品价格并记录到历史表
+        更新产品价格，价格变化时记录到历史表
         
         Args:
             product_id: 产品ID
             price: 新价格
             original_price: 原价
         """
+        result = self.update_product_prices([(product_id, price, original_price)])
+        logger.info(f"产品价格已更新: 产品ID {product_id}, 价格 {price}, "
+                    f"历史记录 {result['history_written']} 条")
+    
+    def update_product_prices(self,
+                              updates: List[Tuple[int, float, Optional[float]]],
+                              heartbeat: bool = None) -> Dict[str, int]:
+        """
+        批量更新产品价格，只为真实变化（或当日首次心跳）写入价格历史
+        
+        与当前价格的比较、历史写入和产品更新均为集合语句，整批只提交一次。
+        
+        Args:
+            updates: (产品ID, 新价格, 原价) 列表，原价为None时保留原值；同一产品以最后一条为准
+            heartbeat: 价格未变化时是否仍为当日写入一条心跳记录，默认取配置
+            
+        Returns:
+            统计信息：received、updated、history_written
+        """
+        if heartbeat is None:
+            heartbeat = self.config.price_heartbeat_daily
+        
+        # 今天必定落在当月分区
+        history = self._current_partition('price_history')
+        heartbeat_clause = f"""
+            OR NOT EXISTS (
+                SELECT 1 FROM {history} h
+                WHERE h.product_id = u.product_id AND h.recorded_at >= date('now')
+            )
+        """ if heartbeat else ""
+        
         try:
             with self.pool.get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS price_updates (
+                        product_id INTEGER PRIMARY KEY,
+                        price DECIMAL(10,2) NOT NULL,
+                        original_price DECIMAL(10,2)
+                    )
+                """)
+                cursor.execute("DELETE FROM price_updates")
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO price_updates (product_id, price, original_price) VALUES (?, ?, ?)",
+                    [(u[0], u[1], u[2] if len(u) > 2 else None) for u in updates]
+                )
                 
-                # 更新产品价格
-                update_data = {
-                    'price': price,
-                    'last_updated_at': datetime.now().isoformat()
-                }
-                if original_price:
-                    update_data['original_price'] = original_price
-                
-                placeholders = ', '.join([f"{k} = ?" for k in update_data.keys()])
-                values = list(update_data.values()) + [product_id]
-                
-                cursor.execute(f"UPDATE products SET {placeholders} WHERE id = ?", values)
+                # 推送用：更新前后价格不同的产品（只在有订阅时查询）
+                changes = None
+                if self.listeners:
+                    cursor.execute("""
+                        SELECT u.product_id, p.price, u.price FROM price_updates u
+                        JOIN products p ON p.id = u.product_id
+                        WHERE p.price IS NOT u.price
+                    """)
+                    changes = cursor.fetchall()
                 
-                # 记录到价格历史表
-                discount_percent = None
-                if original_price and original_price > 0:
-                    discount_percent = int((original_price - price) / original_price * 100)
+                # 先写历史（需与更新前的当前价格比较）
+                cursor.execute(f"""
+                    INSERT INTO {history} (product_id, price, original_price, discount_percent)
+                    SELECT u.product_id, u.price,
+                           COALESCE(u.original_price, p.original_price),
+                           CASE WHEN COALESCE(u.original_price, p.original_price) > 0
+                                THEN CAST((COALESCE(u.original_price, p.original_price) - u.price) * 100
+                                          / COALESCE(u.original_price, p.original_price) AS INTEGER)
+                           END
+                    FROM price_updates u
+                    JOIN products p ON p.id = u.product_id
+                    WHERE p.price IS NOT u.price
+                       OR p.original_price IS NOT COALESCE(u.original_price, p.original_price)
+                       {heartbeat_clause}
+                """)
+                history_written = cursor.rowcount
                 
                 cursor.execute("""
-                    INSERT INTO price_history (product_id, price, original_price, discount_percent)
-                    VALUES (?, ?, ?, ?)
-                """, (product_id, price, original_price, discount_percent))
+                    UPDATE products SET
+                        price = (SELECT u.price FROM price_updates u WHERE u.product_id = products.id),
+                        original_price = COALESCE(
+                            (SELECT u.original_price FROM price_updates u WHERE u.product_id = products.id),
+                            original_price
+                        ),
+                        last_updated_at = ?
+                    WHERE id IN (SELECT product_id FROM price_updates)
+                """, (datetime.now().isoformat(),))
+                updated = cursor.rowcount
                 
+                cursor.execute("DELETE FROM price_updates")
                 conn.commit()
-                logger.info(f"产品价格已更新: 产品ID {product_id}, 价格 {price}")
+                
+                if changes:
+                    self._emit('price_changed', {
+                        'count': len(changes),
+                        'changes': [{'product_id': row[0], 'old_price': row[1], 'price': row[2]}
+                                    for row in changes[:self.EVENT_SAMPLE_SIZE]]
+                    })
+                return {
+                    'received': len(updates),
+                    'updated': updated,
+                    'history_written': history_written
+                }
                 
         except Exception as e:
-            logger.error(f"更新产品价格失败: {e}")
+            logger.error(f"批量更新产品价格失败: {e}")
             raise
     
     def delete_product(self, product_id: int, soft_delete: bool = True):
@@ -519,6 +1427,7 @@ class DatabaseManager:
                 else:
                     cursor.execute("DELETE FROM products WHERE id = ?", (product_id,))
                 
+                self._sync_search_index(cursor)
                 conn.commit()
                 logger.info(f"产品已删除: ID {product_id}")
                 
@@ -536,28 +1445,58 @@ class DatabaseManager:
             product_id: 产品ID
             comment_data: 评论数据
         """
+        result = self.insert_hot_comments([dict(comment_data, product_id=product_id)])
+        if not result['inserted']:
+            raise ValueError(f"热度评论未写入: 产品ID {product_id} 不存在或评论内容为空")
+        logger.info(f"热度评论已插入: 产品ID {product_id}")
+    
+    def insert_hot_comments(self, comments: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        批量插入热度评论，单个事务提交
+        
+        缺少 product_id / comment_text 或产品不存在的评论会被跳过，不影响其余评论写入。
+        
+        Args:
+            comments: 评论数据列表，每条需包含 product_id
+            
+        Returns:
+            {'received', 'inserted', 'skipped'}
+        """
+        rows = [(
+            comment.get('product_id'),
+            comment.get('comment_text'),
+            comment.get('comment_author'),
+            comment.get('author_followers'),
+            comment.get('likes_count') or 0,
+            comment.get('replies_count') or 0,
+            comment.get('comment_date'),
+            comment.get('product_id')
+        ) for comment in comments if comment.get('product_id') is not None and comment.get('comment_text') is not None]
+        result = {'received': len(comments), 'inserted': 0, 'skipped': len(comments)}
+        if not rows:
+            return result
+        
         try:
             with self.pool.get_connection() as conn:
                 cursor = conn.cursor()
-                
-                cursor.execute("""
+                cursor.executemany("""
                     INSERT INTO hot_comments (
                         product_id, comment_text, comment_author, author_followers,
                         likes_count, replies_count, comment_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    product_id,
-                    comment_data.get('comment_text'),
-                    comment_data.get('comment_author'),
-                    comment_data.get('author_followers'),
-                    comment_data.get('likes_count', 0),
-                    comment_data.get('replies_count', 0),
-                    comment_data.get('comment_date')
-                ))
+                    )
+                    SELECT ?, ?, ?, ?, ?, ?, ?
+                    WHERE EXISTS (SELECT 1 FROM products WHERE id = ?)
+                """, rows)
+                result['inserted'] = cursor.rowcount
+                result['skipped'] = len(comments) - result['inserted']
                 
+                self._sync_search_index(cursor)
                 conn.commit()
-                logger.info(f"热度评论已插入: 产品ID {product_id}")
-                
+            
+            if len(comments) > 1:
+                logger.info(f"批量写入热度评论: 新增 {result['inserted']}, 跳过 {result['skipped']}")
+            return result
+            
         except Exception as e:
             logger.error(f"插入热度评论失败: {e}")
             raise
@@ -574,7 +1513,7 @@ class DatabaseManager:
             评论列表
         """
         try:
-            with self.pool.get_connection() as conn:
+            with self.pool.read_connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -590,6 +1529,51 @@ class DatabaseManager:
             logger.error(f"获取热度评论失败: {e}")
             return []
     
+    def get_hot_comments_for_products(self, product_ids: List[int],
+                                      limit_per_product: int = 5) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        一次查询获取多个产品各自的前 N 条热度评论
+        
+        每个产品在 idx_hot_comments_product_likes 索引上只读取前 N 条，
+        耗时与产品的评论总数无关，回表也只取这 N 条。
+        
+        Args:
+            product_ids: 产品ID列表
+            limit_per_product: 每个产品返回的评论数
+            
+        Returns:
+            {产品ID: 评论列表}，没有评论的产品对应空列表
+        """
+        ids = list(dict.fromkeys(int(pid) for pid in product_ids))
+        result: Dict[int, List[Dict[str, Any]]] = {pid: [] for pid in ids}
+        if not ids or limit_per_product <= 0:
+            return result
+        
+        try:
+            with self.pool.read_connection() as conn:
+                cursor = conn.cursor()
+                # SQLite 旧版本单条语句最多 999 个参数
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    cursor.execute(f"""
+                        WITH requested(product_id) AS (VALUES {', '.join('(?)' for _ in chunk)})
+                        SELECT hc.* FROM requested r
+                        JOIN hot_comments hc ON hc.id IN (
+                            SELECT id FROM hot_comments
+                            WHERE product_id = r.product_id
+                            ORDER BY likes_count DESC, captured_at DESC
+                            LIMIT ?
+                        )
+                        ORDER BY hc.product_id, hc.likes_count DESC, hc.captured_at DESC, hc.id
+                    """, (*chunk, limit_per_product))
+                    for row in cursor.fetchall():
+                        result[row['product_id']].append(dict(row))
+            return result
+            
+        except Exception as e:
+            logger.error(f"批量获取热度评论失败: {e}")
+            return result
+    
     # ==================== 价格历史方法 ====================
     
     def get_price_history(self, product_id: int, days: int = 30) -> List[Dict[str, Any]]:
@@ -601,17 +1585,23 @@ class DatabaseManager:
             days: 查询天数
             
         Returns:
-            价格历史记录
+            价格历史记录（已压缩的日期为每日一条，price 为收盘价）
         """
+        tables = self.partitions['price_history'].tables_since(days)
+        union = self.partitions['price_history'].union_sql(
+            tables,
+            """id, product_id, price, original_price, discount_percent,
+               COALESCE(min_price, price) AS min_price,
+               COALESCE(max_price, price) AS max_price,
+               is_compacted, recorded_at""",
+            "product_id = ? AND recorded_at >= datetime('now', ?)"
+        )
         try:
-            with self.pool.get_connection() as conn:
+            with self.pool.read_connection() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT * FROM price_history 
-                    WHERE product_id = ? AND recorded_at >= datetime('now', '-{} days')
-                    ORDER BY recorded_at ASC
-                """.format(days), (product_id,))
+                cursor.execute(f"{union} ORDER BY recorded_at ASC",
+                               (product_id, f'-{int(days)} days') * len(tables))
                 
                 return [dict(row) for row in cursor.fetchall()]
                 
@@ -619,6 +1609,120 @@ class DatabaseManager:
             logger.error(f"获取价格历史失败: {e}")
             return []
     
+    def get_price_trends(self, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        获取近期每日价格趋势（看板使用）
+        
+        Args:
+            days: 查询天数
+            
+        Returns:
+            按日期升序的 date、avg_price、product_count、avg_discount
+        """
+        try:
+            with self.pool.read_connection() as conn:
+                cursor = conn.cursor()
+                sql, parts = self.partitions['price_history'].grouped_sql(
+                    cursor, days, PRICE_TRENDS_SELECT, "recorded_at >= date('now', ?)",
+                    "DATE(recorded_at)", "product_id, price, discount_percent, recorded_at"
+                )
+                cursor.execute(f"{sql} ORDER BY date ASC", (f'-{int(days)} days',) * parts)
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logger.error(f"获取价格趋势失败: {e}")
+            return []
+    
+    def compact_price_history(self, older_than_days: int = None) -> Dict[str, int]:
+        """
+        将较早的价格历史按产品和日期压缩为每日一条（min/max/close）
+        
+        Args:
+            older_than_days: 早于该天数（按整天计）的记录参与压缩，默认取配置
+            
+        Returns:
+            统计信息：days_compacted、rows_removed
+        """
+        if older_than_days is None:
+            older_than_days = self.config.price_history_raw_days
+        
+        try:
+            with self.pool.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT date('now', ?)", (f'-{int(older_than_days)} days',))
+                cutoff = cursor.fetchone()[0]
+                cutoff_month = cutoff[:4] + cutoff[5:7]
+                
+                # 同一产品日只会落在一个分区内，逐个分区压缩即可
+                partitions = self.partitions['price_history']
+                tables = [partitions.table(m) for m in partitions.months if m <= cutoff_month]
+                days_compacted = rows_removed = 0
+                for table in tables + [partitions.default_table]:
+                    days, rows = self._compact_price_partition(cursor, table, cutoff)
+                    days_compacted += days
+                    rows_removed += rows
+                conn.commit()
+                
+                logger.info(f"价格历史压缩完成: {days_compacted} 个产品日, 删除 {rows_removed} 条记录")
+                return {'days_compacted': days_compacted, 'rows_removed': rows_removed}
+                
+        except Exception as e:
+            logger.error(f"压缩价格历史失败: {e}")
+            raise
+    
+    @staticmethod
+    def _compact_price_partition(cursor: sqlite3.Cursor, table: str, cutoff: str) -> Tuple[int, int]:
+        """压缩一个价格历史分区中早于 cutoff 的记录，返回 (压缩的产品日数, 删除的行数)"""
+        cursor.execute("DROP TABLE IF EXISTS temp.price_compaction")
+        # 显式声明列类型，保证关联子查询能走临时表索引
+        cursor.execute("""
+            CREATE TEMP TABLE price_compaction (
+                product_id INTEGER, day TEXT,
+                min_price REAL, max_price REAL, last_id INTEGER
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO price_compaction
+            SELECT product_id, DATE(recorded_at) AS day,
+                   MIN(price) AS min_price, MAX(price) AS max_price,
+                   MAX(id) AS last_id
+            FROM {table}
+            WHERE recorded_at < ? AND is_compacted = 0
+            GROUP BY product_id, DATE(recorded_at)
+            HAVING COUNT(*) > 1
+        """, (cutoff,))
+        if not cursor.rowcount:
+            cursor.execute("DROP TABLE temp.price_compaction")
+            return 0, 0
+        cursor.execute("CREATE INDEX temp.idx_price_compaction_day ON price_compaction(product_id, day)")
+        cursor.execute("CREATE INDEX temp.idx_price_compaction_last ON price_compaction(last_id)")
+        
+        cursor.execute(f"""
+            DELETE FROM {table}
+            WHERE recorded_at < ? AND is_compacted = 0
+              AND EXISTS (
+                  SELECT 1 FROM price_compaction c
+                  WHERE c.product_id = {table}.product_id
+                    AND c.day = DATE({table}.recorded_at)
+                    AND c.last_id != {table}.id
+              )
+        """, (cutoff,))
+        rows_removed = cursor.rowcount
+        
+        # 保留每日最后一条作为收盘价，补充当日最低/最高价
+        cursor.execute(f"""
+            UPDATE {table} SET
+                min_price = (SELECT c.min_price FROM price_compaction c WHERE c.last_id = {table}.id),
+                max_price = (SELECT c.max_price FROM price_compaction c WHERE c.last_id = {table}.id),
+                is_compacted = 1
+            WHERE id IN (SELECT last_id FROM price_compaction)
+        """)
+        days_compacted = cursor.rowcount
+        
+        cursor.execute("DROP TABLE temp.price_compaction")
+        return days_compacted, rows_removed
+    
     # ==================== 爬取日志方法 ====================
     
     def insert_scrape_log(self, log_data: Dict[str, Any]) -> int:
@@ -631,12 +1735,13 @@ class DatabaseManager:
         Returns:
             日志ID
         """
+        table = self._current_partition('scrape_logs')
         try:
             with self.pool.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    INSERT INTO scrape_logs (
+                cursor.execute(f"""
+                    INSERT INTO {table} (
                         platform, category, task_type, status, records_found,
                         records_saved, error_message, user_agent, ip_address, session_id
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -685,7 +1790,13 @@ class DatabaseManager:
                 set_clause = ', '.join([f"{k} = ?" for k in kwargs.keys()])
                 values = list(kwargs.values()) + [log_id]
                 
-                cursor.execute(f"UPDATE scrape_logs SET {set_clause} WHERE id = ?", values)
+                # 月分区由ID直接定位；迁移前的旧ID逐个分区查找
+                partitions = self.partitions['scrape_logs']
+                located = partitions.locate(log_id)
+                for table in [located] if located else reversed(partitions.tables()):
+                    cursor.execute(f"UPDATE {table} SET {set_clause} WHERE id = ?", values)
+                    if cursor.rowcount:
+                        break
                 conn.commit()
                 
         except Exception as e:
@@ -710,7 +1821,7 @@ class DatabaseManager:
             日志列表
         """
         try:
-            with self.pool.get_connection() as conn:
+            with self.pool.read_connection() as conn:
                 cursor = conn.cursor()
                 
                 where_clauses = ["started_at >= datetime('now', '-{} days')".format(days)]
@@ -725,13 +1836,14 @@ class DatabaseManager:
                     params.append(status)
                 
                 where_sql = " AND ".join(where_clauses)
+                tables = self.partitions['scrape_logs'].tables_since(days)
+                union = self.partitions['scrape_logs'].union_sql(tables, "*", where_sql)
                 
                 cursor.execute(f"""
-                    SELECT * FROM scrape_logs 
-                    WHERE {where_sql}
+                    {union}
                     ORDER BY started_at DESC
                     LIMIT ?
-                """, params + [limit])
+                """, params * len(tables) + [limit])
                 
                 return [dict(row) for row in cursor.fetchall()]
                 
@@ -739,11 +1851,80 @@ class DatabaseManager:
             logger.error(f"获取爬取日志失败: {e}")
             return []
     
+    # ==================== 分区维护方法 ====================
+    
+    def _current_partition(self, name: str) -> str:
+        """当月分区表名；跨月后首次写入时先单独建好分区并提交，读连接随后即可查询"""
+        partitions = self.partitions[name]
+        month = month_key()
+        if month not in partitions.months:
+            with self.pool.get_connection() as conn:
+                partitions.ensure(conn.cursor(), month)
+                conn.commit()
+        return partitions.table(month)
+    
+    def maintain_partitions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        分区维护：默认分区中的行移入对应月分区，预建下月分区，
+        过期的月分区整表归档（partition_archive）后 DROP
+        
+        Returns:
+            {表名: {'absorbed', 'created', 'archived', 'dropped', 'rows_dropped'}}
+        """
+        retention = {
+            'price_history': self.config.price_history_retention_months,
+            'scrape_logs': self.config.scrape_logs_retention_months
+        }
+        archive_dir = self.backup_dir / "partitions"
+        report = {}
+        
+        try:
+            with self.pool.get_connection() as conn:
+                cursor = conn.cursor()
+                for name, partitions in self.partitions.items():
+                    existing = set(partitions.tables())
+                    result = {'absorbed': partitions.absorb_default(cursor), 'created': [],
+                              'archived': [], 'dropped': [], 'rows_dropped': 0}
+                    for month in (month_key(), shift_month(month_key(), 1)):
+                        partitions.ensure(cursor, month)
+                    result['created'] = [t for t in partitions.tables() if t not in existing]
+                    conn.commit()
+                    
+                    for month in partitions.expired(retention[name]):
+                        if self.config.partition_archive:
+                            result['archived'].append(str(partitions.archive(conn, month, archive_dir)))
+                        result['rows_dropped'] += partitions.drop(cursor, month)
+                        result['dropped'].append(partitions.table(month))
+                        conn.commit()
+                    report[name] = result
+            
+            with self._stats_lock:
+                self._stats_cache = None
+            logger.info(f"分区维护完成: {report}")
+            return report
+            
+        except Exception as e:
+            logger.error(f"分区维护失败: {e}")
+            raise
+    
+    def get_partition_info(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        各分区表的物理分区行数及时间范围
+        
+        Returns:
+            {表名: [{'table', 'rows', 'first', 'last'}]}
+        """
+        with self.pool.read_connection() as conn:
+            cursor = conn.cursor()
+            return {name: partitions.describe(cursor) for name, partitions in self.partitions.items()}
+    
     # ==================== 备份与恢复方法 ====================
     
     def create_backup(self, backup_name: str = None) -> str:
         """
-        创建数据库备份
+        创建数据库全量备份
+        
+        使用专用连接分步复制，不占用连接池；指标保存在 last_backup_metrics 与备份清单中。
         
         Args:
             backup_name: 备份文件名（可选）
@@ -756,58 +1937,139 @@ class DatabaseManager:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 backup_name = f"products_backup_{timestamp}.db"
             
-            backup_path = self.backup_dir / backup_name
+            entry = self.backups.create_full(str(self.db_path), backup_name)
+            self.last_backup_metrics = entry['metrics']
+            backup_path = self.backup_dir / entry['file']
             
-            with self.pool.get_connection() as conn:
-                backup_conn = sqlite3.connect(str(backup_path))
-                conn.backup(backup_conn)
-                backup_conn.close()
-            
-            logger.info(f"数据库备份已创建: {backup_path}")
+            logger.info(f"数据库备份已创建: {backup_path} ({self._format_backup_metrics(entry['metrics'])})")
             return str(backup_path)
             
         except Exception as e:
             logger.error(f"创建备份失败: {e}")
             raise
     
-    def restore_backup(self, backup_path: str):
+    def create_incremental_backup(self, backup_name: str = None) -> str:
+        """
+        创建增量备份，只归档自上次备份以来变化的页；尚无全量快照时创建全量备份
+        
+        Args:
+            backup_name: 备份文件名（可选）
+            
+        Returns:
+            备份文件路径
+        """
+        if self.backups.latest_chain() is None:
+            return self.create_backup()
+        
+        try:
+            if backup_name is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                backup_name = f"products_incremental_{timestamp}"
+            
+            entry = self.backups.create_incremental(str(self.db_path), backup_name)
+            self.last_backup_metrics = entry['metrics']
+            backup_path = self.backup_dir / entry['file']
+            
+            logger.info(f"增量备份已创建: {backup_path} "
+                        f"(变化页 {entry['metrics']['changed_pages']}, "
+                        f"{self._format_backup_metrics(entry['metrics'])})")
+            return str(backup_path)
+            
+        except Exception as e:
+            logger.error(f"创建增量备份失败: {e}")
+            raise
+    
+    @staticmethod
+    def _format_backup_metrics(metrics: Dict[str, Any]) -> str:
+        return (f"{metrics['pages']} 页, {metrics['duration_seconds']}s, "
+                f"{metrics['throughput_mb_s']} MB/s, 单步最长锁占用 {metrics['max_step_ms']}ms, "
+                f"重启 {metrics['restarts']} 次")
+    
+    def restore_backup(self, backup_path: str, drain_timeout: float = 30.0):
         """
         从备份恢复数据库
         
+        先通过 SQLite 备份API在原库旁生成新库并校验，再等待借出的连接归还，
+        原子替换数据库文件后重新打开连接池。失败时原库保持不变。
+        
         Args:
-            backup_path: 备份文件路径
+            backup_path: 备份文件路径（全量 .db/.zst 或清单中的增量备份）
+            drain_timeout: 等待借出连接归还的最长秒数
         """
+        staging = self.db_path.with_name(self.db_path.name + ".restoring")
         try:
             backup_file = Path(backup_path)
             if not backup_file.exists():
                 raise FileNotFoundError(f"备份文件不存在: {backup_path}")
             
-            # 关闭所有连接
-            while not self.pool._connections.empty():
-                try:
-                    conn = self.pool._connections.get_nowait()
-                    conn.close()
-                except:
-                    break
+            start = time.perf_counter()
+            self._build_restore_staging(backup_file, staging)
             
-            # 复制备份文件
-            shutil.copy2(backup_path, self.db_path)
+            # 等待所有借出的连接归还并关闭后再替换文件
+            self.pool.drain(drain_timeout)
+            try:
+                for suffix in ("-wal", "-shm"):
+                    sidecar = self.db_path.with_name(self.db_path.name + suffix)
+                    if sidecar.exists():
+                        sidecar.unlink()
+                os.replace(staging, self.db_path)
+            finally:
+                self.pool.reopen()
             
-            # 重新初始化连接池
-            self.pool = ConnectionPool(str(self.db_path), self.config.connection_pool_size)
+            # 旧版本备份可能缺少新增的表结构
+            self._init_database()
+            self._stats_cache = None
+            self.analytics.invalidate()
             
-            logger.info(f"数据库已从备份恢复: {backup_path}")
+            logger.info(f"数据库已从备份恢复: {backup_path} ({time.perf_counter() - start:.2f}s)")
             
         except Exception as e:
             logger.error(f"恢复备份失败: {e}")
             raise
+        finally:
+            if staging.exists():
+                staging.unlink()
+    
+    def _build_restore_staging(self, backup_file: Path, staging: Path):
+        """在数据库旁生成待替换的新库并做完整性检查"""
+        if staging.exists():
+            staging.unlink()
+        
+        entry = next((e for e in self.backups.load_manifest() if e['file'] == backup_file.name), None)
+        if (entry is not None and backup_file.parent.resolve() == self.backup_dir.resolve()
+                and (entry['type'] != 'full' or backup_file.suffix == '.zst')):
+            # 压缩或增量备份直接还原到新库位置
+            self.backups.materialize(backup_file.name, str(staging))
+        else:
+            src = sqlite3.connect(f"file:{backup_file}?mode=ro", uri=True)
+            dst = sqlite3.connect(str(staging))
+            try:
+                src.backup(dst)
+            finally:
+                src.close()
+                dst.close()
+        
+        conn = sqlite3.connect(str(staging))
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"备份文件校验失败: {result}")
+            conn.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            conn.close()
     
     def cleanup_old_backups(self):
-        """清理过期的备份文件"""
+        """清理过期的备份文件（按备份链整体清理，始终保留最近一条链）"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=self.config.backup_retention_days)
+            for name in self.backups.cleanup(self.config.backup_retention_days):
+                logger.info(f"删除过期备份: {name}")
             
+            # 清单之外的旧版备份文件仍按修改时间清理
+            managed = {entry['file'] for entry in self.backups.load_manifest()}
+            cutoff_date = datetime.now() - timedelta(days=self.config.backup_retention_days)
             for backup_file in self.backup_dir.glob("products_backup_*.db"):
+                if backup_file.name in managed:
+                    continue
                 if backup_file.stat().st_mtime < cutoff_date.timestamp():
                     backup_file.unlink()
                     logger.info(f"删除过期备份: {backup_file}")
@@ -815,15 +2077,25 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"清理过期备份失败: {e}")
     
-    def get_database_stats(self) -> Dict[str, Any]:
+    def get_database_stats(self, use_cache: bool = True) -> Dict[str, Any]:
         """
         获取数据库统计信息
         
+        记录数来自触发器维护的计数器，今日统计使用可走索引的时间范围查询，
+        结果在 stats_cache_ttl_seconds 内复用。
+        
+        Args:
+            use_cache: 是否使用快照缓存
+            
         Returns:
             统计信息字典
         """
+        with self._stats_lock:
+            if use_cache and self._stats_cache and self._stats_cache[0] > time.monotonic():
+                return dict(self._stats_cache[1])
+        
         try:
-            with self.pool.get_connection() as conn:
+            with self.pool.read_connection() as conn:
                 cursor = conn.cursor()
                 
                 # 数据库大小
@@ -834,41 +2106,98 @@ class DatabaseManager:
                 db_size_mb = (page_size * page_count) / 1024 / 1024
                 
                 # 各类记录数量
+                cursor.execute("SELECT name, value FROM table_counters")
+                counters = dict(cursor.fetchall())
                 stats = {}
                 for table in ['products', 'hot_comments', 'price_history', 'scrape_logs']:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    stats[f"{table}_count"] = cursor.fetchone()[0]
+                    stats[f"{table}_count"] = counters.get(table, 0)
                 
                 # 今日新增记录
-                cursor.execute("SELECT COUNT(*) FROM products WHERE DATE(first_seen_at) = DATE('now')")
+                cursor.execute("""
+                    SELECT COUNT(*) FROM products
+                    WHERE first_seen_at >= date('now') AND first_seen_at < date('now', '+1 day')
+                """)
                 stats['today_new_products'] = cursor.fetchone()[0]
                 
                 # 活跃产品数量
-                cursor.execute("SELECT COUNT(*) FROM products WHERE is_active = 1")
-                stats['active_products'] = cursor.fetchone()[0]
+                stats['active_products'] = counters.get('active_products', 0)
                 
-                # 最近失败任务数
-                cursor.execute("SELECT COUNT(*) FROM scrape_logs WHERE status = 'failed' AND DATE(started_at) = DATE('now')")
-                stats['today_failed_tasks'] = cursor.fetchone()[0]
+                # 最近失败任务数（只查今天所在的分区）
+                cursor.execute("SELECT SUM(n) FROM (" + self.partitions['scrape_logs'].union_sql(
+                    self.partitions['scrape_logs'].tables_since(0), "COUNT(*) AS n",
+                    "status = 'failed' AND started_at >= date('now') AND started_at < date('now', '+1 day')"
+                ) + ")")
+                stats['today_failed_tasks'] = cursor.fetchone()[0] or 0
                 
                 stats['database_size_mb'] = round(db_size_mb, 2)
                 
-                return stats
+            with self._stats_lock:
+                self._stats_cache = (time.monotonic() + self.config.stats_cache_ttl_seconds, stats)
+            return dict(stats)
                 
         except Exception as e:
             logger.error(f"获取数据库统计信息失败: {e}")
             return {}
     
+    def optimize(self, analyze: bool = False) -> Dict[str, Any]:
+        """
+        更新查询规划器统计信息
+        
+        PRAGMA optimize 只对统计信息过期的表执行 ANALYZE（analysis_limit 限制
+        每个索引的扫描行数）；analyze=True 时对全库执行完整 ANALYZE。
+        
+        Args:
+            analyze: 是否执行完整 ANALYZE
+            
+        Returns:
+            {'mode': ..., 'duration_ms': ..., 'finished_at': ...}
+        """
+        start = time.perf_counter()
+        with self.pool.get_connection() as conn:
+            if analyze:
+                conn.execute("ANALYZE")
+            else:
+                conn.execute("PRAGMA analysis_limit = 400")
+                conn.execute("PRAGMA optimize")
+            conn.commit()
+        
+        self.last_optimize = {
+            'mode': 'analyze' if analyze else 'optimize',
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+            'finished_at': datetime.now().isoformat()
+        }
+        logger.info(f"数据库统计信息已更新: {self.last_optimize}")
+        return self.last_optimize
+    
+    def _start_auto_optimize(self):
+        """启动定期维护任务：分区维护后执行 PRAGMA optimize"""
+        interval = self.config.optimize_interval_hours * 3600
+        
+        def optimize_task():
+            while not self._closing.wait(interval):
+                try:
+                    self.maintain_partitions()
+                except Exception as e:
+                    logger.error(f"分区维护失败: {e}")
+                try:
+                    self.optimize()
+                except Exception as e:
+                    logger.error(f"数据库统计信息优化失败: {e}")
+        
+        optimize_thread = threading.Thread(target=optimize_task, daemon=True)
+        optimize_thread.start()
+        logger.info(f"定期统计信息优化已启动，间隔: {self.config.optimize_interval_hours}小时")
+    
     def close(self):
         """关闭数据库连接"""
         try:
+            self._closing.set()
+            # 关闭前按 SQLite 建议执行一次 optimize
+            if self.config.optimize_interval_hours > 0:
+                self.optimize()
+            
             # 关闭连接池中的所有连接
-            while not self.pool._connections.empty():
-                try:
-                    conn = self.pool._connections.get_nowait()
-                    conn.close()
-                except:
-                    break
+            self.pool.close_all()
             logger.info("数据库连接已关闭")
         except Exception as e:
             logger.error(f"关闭数据库连接失败: {e}")
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+产品聚合分析模块
+
+为 DatabaseManager 提供看板用的服务端聚合，前端不再下载全量产品在浏览器中汇总：
+- 平台对比、分类明细：共用一次按 (平台, 分类) 分组的扫描
+- 价格分布直方图：在索引上按价格区间做范围计数，并由直方图估算分位数
+- 热度排行：先在索引上取前 N 个产品ID，再回表读取展示字段
+- 聚合只读覆盖索引 idx_products_analytics（ANALYTICS_INDEX_COLUMNS），不读取整行
+- 结果按时间桶缓存：同一时间桶内的重复请求直接返回，进入下一个桶后首次请求重新计算
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 聚合用到的全部列，建成覆盖索引（is_active、platform 在前，可按平台过滤）
+ANALYTICS_INDEX_COLUMNS = "is_active, platform, category, price, rating, sales_count, like_count, view_count"
+
+# 排行指标 → 排序表达式（popularity 与导出脚本 top_products 的算法一致）
+RANKING_METRICS: Dict[str, str] = {
+    'popularity': "sales_count * 0.6 + rating * 0.4",
+    'sales': "sales_count",
+    'rating': "rating",
+    'likes': "like_count",
+    'views': "view_count",
+}
+
+# 排行返回的展示字段
+RANKING_FIELDS = ('id', 'product_name', 'platform', 'category', 'price', 'original_price', 'sales_count',
+                  'rating', 'review_count', 'main_image_url', 'store_name', 'like_count', 'share_count')
+
+# (平台, 分类) 分组的合计字段，顺序与 _group_rows 的查询一致
+_GROUP_FIELDS = ('count', 'price_count', 'price_sum', 'min_price', 'max_price',
+                 'rating_count', 'rating_sum', 'sales', 'likes', 'views')
+
+
+def _merge(groups: List[Tuple]) -> Dict[str, Any]:
+    """合并若干 (平台, 分类) 分组的合计，得到计数、均值与总量"""
+    totals = dict.fromkeys(_GROUP_FIELDS, 0)
+    totals['min_price'] = totals['max_price'] = None
+    for group in groups:
+        for name, value in zip(_GROUP_FIELDS, group[2:]):
+            if value is None:
+                continue
+            if name == 'min_price':
+                totals[name] = value if totals[name] is None else min(totals[name], value)
+            elif name == 'max_price':
+                totals[name] = value if totals[name] is None else max(totals[name], value)
+            else:
+                totals[name] += value
+    return {
+        'product_count': totals['count'],
+        'avg_price': round(totals['price_sum'] / totals['price_count'], 2) if totals['price_count'] else None,
+        'min_price': totals['min_price'],
+        'max_price': totals['max_price'],
+        'avg_rating': round(totals['rating_sum'] / totals['rating_count'], 2) if totals['rating_count'] else None,
+        'total_sales': totals['sales'],
+        'total_likes': totals['likes'],
+        'total_views': totals['views'],
+    }
+
+
+def _share(part: int, total: int) -> float:
+    return round(part / total, 4) if total else 0.0
+
+
+def estimate_percentile(bins: List[Dict[str, Any]], q: float) -> Optional[float]:
+    """由直方图估算分位数（在所在区间内线性插值）"""
+    total = sum(b['count'] for b in bins)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for b in bins:
+        if b['count'] and seen + b['count'] >= target:
+            return round(b['lower'] + (b['upper'] - b['lower']) * (target - seen) / b['count'], 2)
+        seen += b['count']
+    return bins[-1]['upper']
+
+
+class ProductAnalytics:
+    """产品聚合查询与按时间桶的结果缓存"""
+
+    def __init__(self, read_connection: Callable, bucket_seconds: float = 300):
+        """
+        Args:
+            read_connection: 返回只读连接上下文管理器的函数（ConnectionPool.read_connection）
+            bucket_seconds: 时间桶长度（秒），0 表示不缓存
+        """
+        self._read_connection = read_connection
+        self.bucket_seconds = bucket_seconds
+        self._bucket: Optional[int] = None
+        self._cache: Dict[Tuple, Any] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """清空缓存（恢复备份等整库变化之后）"""
+        with self._lock:
+            self._cache.clear()
+            self._key_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses,
+                    'bucket_seconds': self.bucket_seconds}
+
+    def _cached(self, key: Tuple, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        按时间桶缓存 compute 的结果；同一个键并发未命中时只计算一次
+
+        返回的是缓存中的对象，调用方只做序列化，不要修改。
+        """
+        if self.bucket_seconds <= 0:
+            return compute()
+        bucket = int(time.time() // self.bucket_seconds)
+        with self._lock:
+            if bucket != self._bucket:
+                self._bucket = bucket
+                self._cache.clear()
+                self._key_locks.clear()
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if self._bucket == bucket and key in self._cache:
+                    self.hits += 1
+                    return self._cache[key]
+            result = compute()
+            result['bucket_start'] = datetime.fromtimestamp(bucket * self.bucket_seconds).isoformat()
+            with self._lock:
+                self.misses += 1
+                if self._bucket == bucket:
+                    self._cache[key] = result
+            return result
+
+    @staticmethod
+    def _filters(platform: Optional[str], category: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses = ["is_active = 1"]
+        params: List[Any] = []
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        return " AND ".join(clauses), params
+
+    def _group_rows(self) -> List[Tuple]:
+        """活跃产品按 (平台, 分类) 分组的合计（平台对比、分类明细、直方图的价格范围共用）"""
+        def compute():
+            with self._read_connection() as conn:
+                rows = conn.execute("""
+                    SELECT platform, category, COUNT(*), COUNT(price), SUM(price), MIN(price), MAX(price),
+                           COUNT(rating), SUM(rating), SUM(sales_count), SUM(like_count), SUM(view_count)
+                    FROM products
+                    WHERE is_active = 1
+                    GROUP BY platform, category
+                """).fetchall()
+            return {'groups': [tuple(row) for row in rows]}
+        return self._cached(('groups',), compute)['groups']
+
+    def platform_comparison(self) -> Dict[str, Any]:
+        """各平台的产品数、占比、均价、价格范围、平均评分与销量/点赞/浏览总量"""
+        def compute():
+            groups = self._group_rows()
+            total = _merge(groups)
+            platforms = sorted({g[0] for g in groups})
+            return {
+                'total': total,
+                'platforms': [
+                    dict(platform=platform, share=_share(summary['product_count'], total['product_count']),
+                         **summary)
+                    for platform in platforms
+                    for summary in [_merge([g for g in groups if g[0] == platform])]
+                ],
+                'generated_at': datetime.now().isoformat()
+            }
+        return self._cached(('platforms',), compute)
+
+    def category_breakdown(self, platform: Optional[str] = None) -> Dict[str, Any]:
+        """
+        各分类的汇总（可只看一个平台）
+
+        不指定平台时每个分类另附各平台的明细，前端的分类对比图直接使用。
+        """
+        def compute():
+            groups = [g for g in self._group_rows() if not platform or g[0] == platform]
+            total = _merge(groups)
+            categories = []
+            for category in sorted({g[1] for g in groups}):
+                in_category = [g for g in groups if g[1] == category]
+                summary = _merge(in_category)
+                entry = dict(category=category, share=_share(summary['product_count'], total['product_count']),
+                             **summary)
+                if not platform:
+                    entry['platforms'] = {g[0]: _merge([g]) for g in in_category}
+                categories.append(entry)
+            return {
+                'platform': platform,
+                'total': total,
+                'categories': categories,
+                'generated_at': datetime.now().isoformat()
+            }
+        return self._cached(('categories', platform), compute)
+
+    def price_distribution(self, bins: int = 20, platform: Optional[str] = None, category: Optional[str] = None,
+                           min_price: Optional[float] = None, max_price: Optional[float] = None) -> Dict[str, Any]:
+        """
+        价格分布直方图：[min_price, max_price] 等分为 bins 个区间，每个区间按平台计数
+
+        未指定价格范围时取筛选范围内的最低、最高价（来自分组合计，不另做扫描）。
+        """
+        def compute():
+            groups = [g for g in self._group_rows()
+                      if (not platform or g[0] == platform) and (not category or g[1] == category)]
+            summary = _merge(groups)
+            lower = summary['min_price'] if min_price is None else min_price
+            upper = summary['max_price'] if max_price is None else max_price
+            result = {'platform': platform, 'category': category, 'bins': [], 'product_count': 0,
+                      'min_price': lower, 'max_price': upper, 'bin_width': None, 'percentiles': {},
+                      'generated_at': datetime.now().isoformat()}
+            if lower is None or upper is None or upper < lower:
+                return result
+
+            width = (upper - lower) / bins or 1.0
+            edges = [lower + i * width for i in range(bins)] + [upper]
+            histogram = [{'lower': round(edges[i], 2), 'upper': round(edges[i + 1], 2),
+                          'count': 0, 'platforms': {}} for i in range(bins)]
+            # 每个 (平台, 分类) 的价格在索引中有序：逐区间做范围计数，只扫描区间内的索引项，
+            # 比 GROUP BY 区间号（需要临时B树排序）快一个数量级
+            with self._read_connection() as conn:
+                for group_platform, group_category in sorted({g[:2] for g in groups}):
+                    for i, entry in enumerate(histogram):
+                        count = conn.execute(f"""
+                            SELECT COUNT(*) FROM products
+                            WHERE is_active = 1 AND platform = ? AND category = ?
+                              AND price >= ? AND price {'<=' if i == bins - 1 else '<'} ?
+                        """, (group_platform, group_category, edges[i], edges[i + 1])).fetchone()[0]
+                        if count:
+                            entry['count'] += count
+                            entry['platforms'][group_platform] = entry['platforms'].get(group_platform, 0) + count
+            result.update(
+                bins=histogram,
+                product_count=sum(b['count'] for b in histogram),
+                bin_width=round(width, 4),
+                percentiles={f"p{int(q * 100)}": estimate_percentile(histogram, q) for q in (0.25, 0.5, 0.75, 0.9)}
+            )
+            return result
+        return self._cached(('prices', bins, platform, category, min_price, max_price), compute)
+
+    def ranking(self, metric: str = 'popularity', limit: int = 20,
+                platform: Optional[str] = None, category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        按热度指标排行（RANKING_METRICS）
+
+        子查询只读覆盖索引取前 limit 个产品ID与得分，外层按ID回表读取展示字段。
+        """
+        if metric not in RANKING_METRICS:
+            raise ValueError(f"不支持的排行指标: {metric}，可选: {', '.join(RANKING_METRICS)}")
+        expression = RANKING_METRICS[metric]
+
+        def compute():
+            where, params = self._filters(platform, category)
+            fields = ", ".join(f"p.{name}" for name in RANKING_FIELDS)
+            with self._read_connection() as conn:
+                rows = conn.execute(f"""
+                    SELECT {fields}, t.score
+                    FROM (
+                        SELECT id, {expression} AS score FROM products
+                        WHERE {where} AND {expression} IS NOT NULL
+                        ORDER BY score DESC
+                        LIMIT ?
+                    ) t
+                    JOIN products p ON p.id = t.id
+                    ORDER BY t.score DESC, p.id
+                """, params + [limit]).fetchall()
+            products = []
+            for rank, row in enumerate(rows, 1):
+                product = dict(row)
+                product['rank'] = rank
+                product['score'] = round(product['score'], 2)
+                products.append(product)
+            return {'metric': metric, 'platform': platform, 'category': category, 'products': products,
+                    'generated_at': datetime.now().isoformat()}
+        return self._cached(('ranking', metric, limit, platform, category), compute)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 在线备份模块
+
+为 DatabaseManager 提供不阻塞写入的备份能力：
+- 分步备份：使用专用连接按页分批复制，步间休眠，让出数据库锁
+- 可选 zstd 压缩（需安装 zstandard）
+- 增量备份：两次全量快照之间只归档发生变化的页（页级差异）
+- 备份目录清单（backup_manifest.json）记录备份链与每次备份的吞吐、锁占用指标
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import struct
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "backup_manifest.json"
+DELTA_MAGIC = b"SQLDELTA"
+_DELTA_HEADER = struct.Struct("<8sIII")  # magic, page_size, page_count, changed_pages
+_PAGE_NUMBER = struct.Struct("<I")
+_DIGEST_SIZE = 16
+
+
+class BackupRestartLimitError(RuntimeError):
+    """分步备份因源库持续被修改而反复重启"""
+
+
+def zstd_available() -> bool:
+    """是否可用 zstd 压缩"""
+    return zstandard is not None
+
+
+def stepped_copy(src_path: str, dst_path: str, pages_per_step: int = 1024,
+                 step_sleep: float = 0.05, max_restarts: int = 3) -> Dict[str, Any]:
+    """
+    使用专用连接分步复制数据库
+
+    WAL 模式下先在备份连接上开启读事务固定快照：写入不受阻塞，备份也不会因并发写入重启。
+    其他模式下源库在备份期间被修改时，SQLite 会从头重新开始复制；
+    超过 max_restarts 次后改为单步复制，保证备份能够完成。
+
+    Args:
+        src_path: 源数据库路径
+        dst_path: 目标文件路径
+        pages_per_step: 每步复制页数（-1 表示一次复制全部）
+        step_sleep: 步间休眠秒数
+        max_restarts: 允许的最大重启次数
+
+    Returns:
+        备份指标：页数、步数、重启次数、耗时、吞吐量、单步最长锁占用等
+    """
+    metrics = {'steps': 0, 'restarts': 0, 'max_step_ms': 0.0, 'locked_ms': 0.0}
+    state = {'last': None, 'remaining': None}
+
+    def progress(status, remaining, total):
+        now = time.perf_counter()
+        step_ms = (now - state['last']) * 1000
+        if metrics['steps']:
+            step_ms -= step_sleep * 1000
+        state['last'] = now
+        metrics['steps'] += 1
+        metrics['pages'] = total
+        metrics['max_step_ms'] = max(metrics['max_step_ms'], step_ms)
+        metrics['locked_ms'] += step_ms
+        if state['remaining'] is not None and remaining > state['remaining']:
+            metrics['restarts'] += 1
+            if metrics['restarts'] > max_restarts:
+                raise BackupRestartLimitError()
+        state['remaining'] = remaining
+
+    start = time.perf_counter()
+    src = sqlite3.connect(src_path, timeout=30.0, isolation_level=None)
+    try:
+        metrics['snapshot_pinned'] = src.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        if metrics['snapshot_pinned']:
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        dst = sqlite3.connect(dst_path)
+        try:
+            state['last'] = time.perf_counter()
+            try:
+                src.backup(dst, pages=pages_per_step, progress=progress, sleep=step_sleep)
+            except BackupRestartLimitError:
+                logger.warning(f"分步备份重启 {metrics['restarts']} 次，改为单步复制")
+                state['last'], state['remaining'] = time.perf_counter(), None
+                src.backup(dst, pages=-1, progress=progress)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+    duration = time.perf_counter() - start
+    size = os.path.getsize(dst_path)
+    metrics.update({
+        'bytes': size,
+        'duration_seconds': round(duration, 3),
+        'throughput_mb_s': round(size / 1024 / 1024 / duration, 2) if duration else None,
+        'max_step_ms': round(metrics['max_step_ms'], 2),
+        'locked_ms': round(metrics['locked_ms'], 2)
+    })
+    return metrics
+
+
+def _open_write(path: Path, compress: bool):
+    """打开写入流，压缩时包装为 zstd 流"""
+    f = open(path, 'wb')
+    if compress:
+        return zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=True)
+    return f
+
+
+def _open_read(path: Path):
+    """打开读取流，.zst 文件自动解压"""
+    f = open(path, 'rb')
+    if path.suffix == '.zst':
+        if zstandard is None:
+            f.close()
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    return f
+
+
+def _read_exact(stream, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            raise EOFError("备份文件不完整")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _page_size(db_path: Path) -> int:
+    """从数据库文件头读取页大小"""
+    with open(db_path, 'rb') as f:
+        header = f.read(100)
+    size = struct.unpack('>H', header[16:18])[0]
+    return 65536 if size == 1 else size
+
+
+def _iter_pages(db_path: Path, page_size: int):
+    with open(db_path, 'rb') as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                break
+            yield page
+
+
+def _digest(page: bytes) -> bytes:
+    return hashlib.blake2b(page, digest_size=_DIGEST_SIZE).digest()
+
+
+class BackupCatalog:
+    """备份目录：全量快照、增量差异文件及清单"""
+
+    def __init__(self, backup_dir: Path, compression: Optional[str] = None,
+                 pages_per_step: int = 1024, step_sleep: float = 0.05):
+        self.backup_dir = Path(backup_dir)
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.compress = compression == 'zstd'
+        if self.compress and not zstd_available():
+            logger.warning("未安装 zstandard，备份将不压缩")
+            self.compress = False
+        self.manifest_path = self.backup_dir / MANIFEST_NAME
+
+    # ---------- 清单 ----------
+
+    def load_manifest(self) -> List[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return []
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, entries: List[Dict[str, Any]]):
+        tmp = self.manifest_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.manifest_path)
+
+    def _record(self, entry: Dict[str, Any]):
+        entries = self.load_manifest()
+        entries.append(entry)
+        self._save_manifest(entries)
+
+    def latest_chain(self) -> Optional[str]:
+        """最近一条备份链（以全量快照名标识）"""
+        for entry in reversed(self.load_manifest()):
+            if entry['type'] == 'full':
+                return entry['chain']
+        return None
+
+    def _hashes_path(self, chain: str) -> Path:
+        return self.backup_dir / f"{chain}.pagehashes"
+
+    # ---------- 备份 ----------
+
+    def _finish(self, raw_path: Path, final_name: str) -> Path:
+        """按配置压缩快照，返回最终文件路径"""
+        if not self.compress:
+            if raw_path.name != final_name:
+                os.replace(raw_path, self.backup_dir / final_name)
+            return self.backup_dir / final_name
+        final_path = self.backup_dir / f"{final_name}.zst"
+        with open(raw_path, 'rb') as src, _open_write(final_path, True) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        raw_path.unlink()
+        return final_path
+
+    def create_full(self, db_path: str, backup_name: str) -> Dict[str, Any]:
+        """
+        创建全量快照并开启新的备份链
+
+        Returns:
+            清单条目（含文件名与指标）
+        """
+        raw_path = self.backup_dir / f"{backup_name}.partial"
+        metrics = stepped_copy(db_path, str(raw_path), self.pages_per_step, self.step_sleep)
+
+        # 记录每页摘要，供后续增量比较
+        page_size = _page_size(raw_path)
+        with open(self._hashes_path(backup_name), 'wb') as f:
+            for page in _iter_pages(raw_path, page_size):
+                f.write(_digest(page))
+
+        final_path = self._finish(raw_path, backup_name)
+        metrics['stored_bytes'] = final_path.stat().st_size
+        entry = {
+            'file': final_path.name,
+            'type': 'full',
+            'chain': backup_name,
+            'created_at': datetime.now().isoformat(),
+            'metrics': metrics
+        }
+        self._record(entry)
+        return entry
+
+    def create_incremental(self, db_path: str, backup_name: str) -> Dict[str, Any]:
+        """
+        创建增量备份：只保存相对上一次备份发生变化的页
+
+        Returns:
+            清单条目；不存在全量快照时抛出 FileNotFoundError
+        """
+        chain = self.latest_chain()
+        if chain is None or not self._hashes_path(chain).exists():
+            raise FileNotFoundError("不存在可用的全量快照，无法创建增量备份")
+
+        snapshot = self.backup_dir / f"{backup_name}.snapshot"
+        metrics = stepped_copy(db_path, str(snapshot), self.pages_per_step, self.step_sleep)
+
+        hashes_path = self._hashes_path(chain)
+        previous = hashes_path.read_bytes()
+        page_size = _page_size(snapshot)
+        page_count = snapshot.stat().st_size // page_size
+
+        delta_name = f"{backup_name}.delta" + ('.zst' if self.compress else '')
+        delta_path = self.backup_dir / delta_name
+        changed = []
+        new_hashes = bytearray()
+        for pgno, page in enumerate(_iter_pages(snapshot, page_size)):
+            digest = _digest(page)
+            new_hashes += digest
+            if previous[pgno * _DIGEST_SIZE:(pgno + 1) * _DIGEST_SIZE] != digest:
+                changed.append(pgno)
+
+        with open(snapshot, 'rb') as src, _open_write(delta_path, self.compress) as out:
+            out.write(_DELTA_HEADER.pack(DELTA_MAGIC, page_size, page_count, len(changed)))
+            for pgno in changed:
+                src.seek(pgno * page_size)
+                out.write(_PAGE_NUMBER.pack(pgno))
+                out.write(src.read(page_size))
+        snapshot.unlink()
+
+        tmp_hashes = hashes_path.with_suffix('.tmp')
+        tmp_hashes.write_bytes(bytes(new_hashes))
+        os.replace(tmp_hashes, hashes_path)
+
+        metrics['changed_pages'] = len(changed)
+        metrics['stored_bytes'] = delta_path.stat().st_size
+        entry = {
+            'file': delta_name,
+            'type': 'incremental',
+            'chain': chain,
+            'created_at': datetime.now().isoformat(),
+            'metrics': metrics
+        }
+        self._record(entry)
+        return entry
+
+    # ---------- 还原 ----------
+
+    def materialize(self, backup_file: str, output_path: str) -> str:
+        """
+        将某个备份（全量或增量）还原为完整的数据库文件
+
+        Args:
+            backup_file: 清单中的备份文件名
+            output_path: 输出数据库路径
+
+        Returns:
+            输出路径
+        """
+        entries = self.load_manifest()
+        target = next((e for e in entries if e['file'] == backup_file), None)
+        if target is None:
+            raise FileNotFoundError(f"备份不在清单中: {backup_file}")
+
+        chain = [e for e in entries if e['chain'] == target['chain']]
+        chain = chain[:chain.index(target) + 1]
+
+        base = self.backup_dir / chain[0]['file']
+        if base.suffix == '.zst':
+            with _open_read(base) as src, open(output_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        else:
+            shutil.copyfile(base, output_path)
+
+        for entry in chain[1:]:
+            self._apply_delta(self.backup_dir / entry['file'], output_path)
+        return output_path
+
+    @staticmethod
+    def _apply_delta(delta_path: Path, output_path: str):
+        with _open_read(delta_path) as src, open(output_path, 'r+b') as dst:
+            magic, page_size, page_count, changed = _DELTA_HEADER.unpack(
+                _read_exact(src, _DELTA_HEADER.size)
+            )
+            if magic != DELTA_MAGIC:
+                raise ValueError(f"无效的增量备份文件: {delta_path}")
+            dst.truncate(page_count * page_size)
+            for _ in range(changed):
+                pgno = _PAGE_NUMBER.unpack(_read_exact(src, _PAGE_NUMBER.size))[0]
+                dst.seek(pgno * page_size)
+                dst.write(_read_exact(src, page_size))
+
+    # ---------- 清理 ----------
+
+    def cleanup(self, retention_days: int) -> List[str]:
+        """
+        按备份链清理过期备份：整条链最新备份过期才删除，且始终保留最近一条链
+
+        Returns:
+            已删除的文件名
+        """
+        entries = self.load_manifest()
+        latest = self.latest_chain()
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+
+        newest_by_chain = {}
+        for entry in entries:
+            newest_by_chain[entry['chain']] = max(
+                newest_by_chain.get(entry['chain'], ''), entry['created_at']
+            )
+        expired = {chain for chain, newest in newest_by_chain.items()
+                   if chain != latest and newest < cutoff}
+
+        removed = []
+        for entry in entries:
+            if entry['chain'] in expired:
+                (self.backup_dir / entry['file']).unlink(missing_ok=True)
+                removed.append(entry['file'])
+        for chain in expired:
+            hashes = self._hashes_path(chain)
+            if hashes.exists():
+                hashes.unlink()
+
+        if removed:
+            self._save_manifest([e for e in entries if e['chain'] not in expired])
+        return removed
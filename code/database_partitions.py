@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 按月分区模块
+
+为 DatabaseManager 提供只增不改的时间序列表（price_history、scrape_logs）的分区存储：
+- 每月一张物理表 {表名}_YYYYMM，另有 {表名}_default 接收没有对应月分区的行
+- 原表名改为 UNION ALL 视图，INSTEAD OF 触发器把视图上的增删改路由到分区，
+  导出脚本和临时 SQL 无需修改
+- DatabaseManager 的查询只拼接与时间范围重叠的分区
+- 保留期外的分区整表归档（独立 SQLite 文件）后 DROP，不逐行 DELETE
+- 月分区的自增ID从 YYYYMM * ID_SPAN 开始，全局唯一，且可由ID直接定位分区
+"""
+
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ID_SPAN = 10 ** 9  # 每个月分区可分配的ID数量
+
+
+def month_key(moment: datetime = None) -> str:
+    """UTC 时间所在月份，格式 YYYYMM（与 CURRENT_TIMESTAMP 一致按 UTC 划分）"""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.strftime('%Y%m')
+
+
+def shift_month(month: str, months: int) -> str:
+    """月份加减"""
+    index = int(month[:4]) * 12 + int(month[4:]) - 1 + months
+    return f"{index // 12:04d}{index % 12 + 1:02d}"
+
+
+def month_bounds(month: str) -> Tuple[str, str]:
+    """
+    月份的 [起, 止) 文本范围 ('YYYY-MM', 下月 'YYYY-MM')
+
+    文本时间落在该范围内当且仅当 month_expr 取值为该月，范围条件可走时间列索引。
+    """
+    end = shift_month(month, 1)
+    return f"{month[:4]}-{month[4:]}", f"{end[:4]}-{end[4:]}"
+
+
+def month_expr(value: str) -> str:
+    """SQL 表达式：文本时间的 YYYY-MM 前缀去掉连字符，非 'YYYY-MM...' 格式得到的值不是合法月份"""
+    return f"replace(substr({value}, 1, 7), '-', '')"
+
+
+def _valid_month(value: Any) -> bool:
+    return isinstance(value, str) and len(value) == 6 and value.isdigit() and 1 <= int(value[4:]) <= 12
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """分区表定义"""
+    name: str
+    time_column: str
+    columns: Tuple[Tuple[str, str], ...]  # (列名, 类型及约束)，第一列为 INTEGER PRIMARY KEY AUTOINCREMENT
+    indexes: Tuple[Tuple[str, str], ...] = ()  # (索引名后缀, 索引列)
+    constraints: Tuple[str, ...] = ()  # 表级约束，如外键
+
+    @property
+    def column_names(self) -> List[str]:
+        return [name for name, _ in self.columns]
+
+    def defaults(self) -> Dict[str, str]:
+        """列默认值表达式（视图触发器中补齐省略的列）"""
+        result = {}
+        for name, definition in self.columns:
+            upper = definition.upper()
+            if ' DEFAULT ' in f" {upper} ":
+                result[name] = definition[upper.index('DEFAULT') + len('DEFAULT'):].split()[0]
+        return result
+
+
+class MonthlyPartitions:
+    """一张分区表的物理分区、视图与路由触发器"""
+
+    def __init__(self, spec: PartitionSpec):
+        self.spec = spec
+        self.default_table = f"{spec.name}_default"
+        self._months: List[str] = []
+        self._lock = threading.Lock()
+
+    # ---------- 命名与查询 ----------
+
+    def table(self, month: str) -> str:
+        return f"{self.spec.name}_{month}"
+
+    @property
+    def months(self) -> List[str]:
+        with self._lock:
+            return list(self._months)
+
+    def tables(self) -> List[str]:
+        """全部物理分区（默认分区在最后）"""
+        return [self.table(m) for m in self.months] + [self.default_table]
+
+    def tables_since(self, days: float) -> List[str]:
+        """与最近 days 天重叠的分区（始终包含默认分区）"""
+        start = month_key(datetime.now(timezone.utc) - timedelta(days=days))
+        return [self.table(m) for m in self.months if m >= start] + [self.default_table]
+
+    def locate(self, row_id: int) -> Optional[str]:
+        """按ID定位所在的月分区；迁移前的旧ID无法定位时返回 None"""
+        month = str(int(row_id) // ID_SPAN)
+        if len(month) == 6 and month in self.months:
+            return self.table(month)
+        return None
+
+    def union_sql(self, tables: List[str], select: str, where: str = "") -> str:
+        """逐个分区执行相同的 SELECT ... WHERE，UNION ALL 拼接"""
+        where_sql = f" WHERE {where}" if where else ""
+        return " UNION ALL ".join(f"SELECT {select} FROM {table}{where_sql}" for table in tables)
+
+    def grouped_sql(self, cursor: sqlite3.Cursor, days: float, select: str, where: str,
+                    group_by: str, columns: str) -> Tuple[str, int]:
+        """
+        近 days 天的分组聚合查询（分组键不跨月，例如按天）
+
+        默认分区为空时逐个月分区聚合后 UNION ALL，明细行不经过拼接；否则同一组可能
+        跨表，先拼接 columns 列再聚合。
+
+        Returns:
+            (SQL, where 子句重复次数)，调用方按次数重复 where 的参数
+        """
+        tables = self.tables_since(days)
+        cursor.execute(f"SELECT 1 FROM {self.default_table} LIMIT 1")
+        if cursor.fetchone() is None:
+            months = tables[:-1] or tables
+            return " UNION ALL ".join(
+                f"SELECT {select} FROM {table} WHERE {where} GROUP BY {group_by}" for table in months
+            ), len(months)
+        return (f"SELECT {select} FROM ({self.union_sql(tables, columns, where)}) GROUP BY {group_by}",
+                len(tables))
+
+    # ---------- 结构 ----------
+
+    def _create_table_sql(self, table: str, schema: str = "", constraints: bool = True) -> str:
+        body = [f"{name} {definition}" for name, definition in self.spec.columns]
+        if constraints:
+            body.extend(self.spec.constraints)
+        return f"CREATE TABLE IF NOT EXISTS {schema}{table} (\n    " + ",\n    ".join(body) + "\n)"
+
+    def _create_partition(self, cursor: sqlite3.Cursor, table: str, first_id: int):
+        cursor.execute(self._create_table_sql(table))
+        for suffix, columns in self.spec.indexes:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix} ON {table}({columns})")
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        row = cursor.fetchone()
+        if row is None or row[0] < first_id:
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, first_id))
+
+    def load(self, cursor: sqlite3.Cursor):
+        """从 sqlite_master 读取现有月分区"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+                       (f"{self.spec.name}_[0-9][0-9][0-9][0-9][0-9][0-9]",))
+        with self._lock:
+            self._months = sorted(row[0][-6:] for row in cursor.fetchall())
+
+    def setup(self, cursor: sqlite3.Cursor) -> int:
+        """
+        建立分区结构：旧版单表按月迁入分区后删除，确保默认分区和当月分区存在
+
+        Returns:
+            从旧版单表迁移的行数
+        """
+        cursor.execute("SELECT type FROM sqlite_master WHERE name = ?", (self.spec.name,))
+        row = cursor.fetchone()
+        legacy = row is not None and row[0] == 'table'
+        self.load(cursor)
+
+        migrated = 0
+        if legacy:
+            migrated = self._migrate_legacy(cursor)
+        else:
+            self._create_partition(cursor, self.default_table, 0)
+
+        current = month_key()
+        if current not in self.months:
+            self._create_partition(cursor, self.table(current), int(current) * ID_SPAN)
+            self.load(cursor)
+        self.rebuild(cursor)
+        return migrated
+
+    def _migrate_legacy(self, cursor: sqlite3.Cursor) -> int:
+        """旧版单表逐月整段复制到分区（保留原ID），随后整表删除"""
+        name, column = self.spec.name, self.spec.time_column
+        columns = ", ".join(self.spec.column_names)
+        cursor.execute(f"SELECT COUNT(*) FROM {name}")
+        total = cursor.fetchone()[0]
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        legacy_seq = row[0] if row else 0
+
+        cursor.execute(f"SELECT DISTINCT {month_expr(column)} FROM {name}")
+        months = sorted(m for (m,) in cursor.fetchall() if _valid_month(m))
+        for month in months:
+            table = self.table(month)
+            self._create_partition(cursor, table, int(month) * ID_SPAN)
+            start, end = month_bounds(month)
+            cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {name} "
+                           f"WHERE {column} >= ? AND {column} < ?", (start, end))
+
+        # 时间为空或格式异常的行进入默认分区，新行的ID接在旧版单表之后
+        self._create_partition(cursor, self.default_table, legacy_seq)
+        placeholders = ", ".join("?" for _ in months) or "''"
+        cursor.execute(f"INSERT INTO {self.default_table} ({columns}) SELECT {columns} FROM {name} "
+                       f"WHERE COALESCE({month_expr(column)}, '') NOT IN ({placeholders})", months)
+
+        cursor.execute(f"DROP TABLE {name}")
+        self.load(cursor)
+        logger.info(f"{name} 已迁移为按月分区: {total} 行, {len(months)} 个月分区")
+        return total
+
+    def rebuild(self, cursor: sqlite3.Cursor):
+        """按当前分区重建计数器触发器、UNION ALL 视图及视图上的路由触发器"""
+        name, column = self.spec.name, self.spec.time_column
+        names = self.spec.column_names
+        tables = self.tables()
+
+        for table in tables:
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS counters_{table}_insert AFTER INSERT ON {table} BEGIN
+                UPDATE table_counters SET value = value + 1 WHERE name = '{name}';
+            END""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS counters_{table}_delete AFTER DELETE ON {table} BEGIN
+                UPDATE table_counters SET value = value - 1 WHERE name = '{name}';
+            END""")
+
+        cursor.execute(f"DROP VIEW IF EXISTS {name}")
+        cursor.execute(f"CREATE VIEW {name} AS " + self.union_sql(tables, ", ".join(names)))
+
+        # 视图上省略的列补齐表默认值
+        defaults = self.spec.defaults()
+        values = [f"COALESCE(NEW.{c}, {defaults[c]})" if c in defaults else f"NEW.{c}" for c in names]
+        key = f"COALESCE({month_expr(values[names.index(column)])}, '')"
+        months = self.months
+        target = f"({', '.join(names)}) SELECT {', '.join(values)}"
+        inserts = [f"INSERT INTO {self.table(m)} {target} WHERE {key} = '{m}';" for m in months]
+        known = ", ".join(f"'{m}'" for m in months) or "''"
+        inserts.append(f"INSERT INTO {self.default_table} {target} WHERE {key} NOT IN ({known});")
+        cursor.execute(f"CREATE TRIGGER {name}_insert INSTEAD OF INSERT ON {name} BEGIN\n"
+                       + "\n".join(inserts) + "\nEND")
+
+        assignments = ", ".join(f"{c} = NEW.{c}" for c in names[1:])
+        cursor.execute(f"CREATE TRIGGER {name}_update INSTEAD OF UPDATE ON {name} BEGIN\n"
+                       + "\n".join(f"UPDATE {t} SET {assignments} WHERE {names[0]} = OLD.{names[0]};"
+                                   for t in tables) + "\nEND")
+        cursor.execute(f"CREATE TRIGGER {name}_delete INSTEAD OF DELETE ON {name} BEGIN\n"
+                       + "\n".join(f"DELETE FROM {t} WHERE {names[0]} = OLD.{names[0]};" for t in tables)
+                       + "\nEND")
+
+    def ensure(self, cursor: sqlite3.Cursor, month: str) -> Tuple[str, bool]:
+        """
+        确保月分区存在（调用方负责提交）
+
+        Returns:
+            (分区表名, 是否新建)
+        """
+        table = self.table(month)
+        if month in self.months:
+            return table, False
+        self._create_partition(cursor, table, int(month) * ID_SPAN)
+        with self._lock:
+            self._months = sorted(set(self._months) | {month})
+        self.rebuild(cursor)
+        logger.info(f"新建分区: {table}")
+        return table, True
+
+    def absorb_default(self, cursor: sqlite3.Cursor) -> int:
+        """把默认分区中的行整段移入对应的月分区（调用方负责提交），返回移动行数"""
+        column = self.spec.time_column
+        columns = ", ".join(self.spec.column_names)
+        cursor.execute(f"SELECT DISTINCT {month_expr(column)} FROM {self.default_table}")
+        moved = 0
+        for month in sorted(m for (m,) in cursor.fetchall() if _valid_month(m)):
+            table, _ = self.ensure(cursor, month)
+            start, end = month_bounds(month)
+            cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {self.default_table} "
+                           f"WHERE {column} >= ? AND {column} < ?", (start, end))
+            moved += cursor.rowcount
+            cursor.execute(f"DELETE FROM {self.default_table} WHERE {column} >= ? AND {column} < ?",
+                           (start, end))
+        return moved
+
+    def expired(self, retention_months: int) -> List[str]:
+        """早于保留期的月分区（当月往前 retention_months 个月之前），0 表示永久保留"""
+        if retention_months <= 0:
+            return []
+        cutoff = shift_month(month_key(), -int(retention_months))
+        return [m for m in self.months if m < cutoff]
+
+    def archive(self, conn: sqlite3.Connection, month: str, archive_dir: Path) -> Path:
+        """
+        把月分区复制到独立的 SQLite 文件 {archive_dir}/{分区表名}.db
+
+        使用写连接执行（ATTACH 需在事务之外），复制与随后的 DROP 之间不会有新行写入。
+        """
+        table = self.table(month)
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path = archive_dir / f"{table}.db"
+        conn.commit()
+        conn.execute("ATTACH DATABASE ? AS partition_archive", (str(path),))
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS partition_archive.{table}")
+            # 归档库中没有被引用的父表，不带外键
+            conn.execute(self._create_table_sql(table, schema="partition_archive.", constraints=False))
+            conn.execute(f"INSERT INTO partition_archive.{table} SELECT * FROM main.{table}")
+            conn.commit()
+        finally:
+            conn.execute("DETACH DATABASE partition_archive")
+        return path
+
+    def drop(self, cursor: sqlite3.Cursor, month: str) -> int:
+        """整表删除月分区并扣减计数器（调用方负责提交），返回删除的行数"""
+        table = self.table(month)
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        rows = cursor.fetchone()[0]
+        cursor.execute("UPDATE table_counters SET value = value - ? WHERE name = ?", (rows, self.spec.name))
+        # 部分发行版编译时默认 secure_delete=ON，DROP 会把每个释放的页清零重写；
+        # 过期分区已归档，FAST 模式只清零不额外增加 I/O 的页
+        cursor.execute("PRAGMA secure_delete")
+        secure_delete = cursor.fetchone()[0]
+        cursor.execute("PRAGMA secure_delete = FAST")
+        try:
+            cursor.execute(f"DROP TABLE {table}")
+        finally:
+            cursor.execute(f"PRAGMA secure_delete = {int(secure_delete)}")
+        with self._lock:
+            self._months = [m for m in self._months if m != month]
+        self.rebuild(cursor)
+        return rows
+
+    def describe(self, cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+        """各分区的行数及时间范围"""
+        column = self.spec.time_column
+        result = []
+        for table in self.tables():
+            cursor.execute(f"SELECT COUNT(*), MIN({column}), MAX({column}) FROM {table}")
+            rows, first, last = cursor.fetchone()
+            result.append({'table': table, 'rows': rows, 'first': first, 'last': last})
+        return result
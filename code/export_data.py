@@ -10,6 +10,9 @@ import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from database import PARTITIONED_TABLES, PRICE_TRENDS_SELECT
+from database_partitions import MonthlyPartitions
+
 def export_data(db_path, output_dir):
     """导出数据库数据到JSON文件"""
     
@@ -85,18 +88,15 @@ def export_data(db_path, output_dir):
         with open(output_path / "top_products.json", "w", encoding='utf-8') as f:
             json.dump(top_products, f, ensure_ascii=False, indent=2, default=str)
         
-        # 4. 导出价格历史趋势
+        # 4. 导出价格历史趋势（逐个月分区按天聚合，不经过 price_history 视图）
         print("导出价格趋势...")
-        cursor.execute("""
-            SELECT DATE(ph.recorded_at) as date,
-                   ROUND(AVG(ph.price), 2) as avg_price,
-                   COUNT(ph.id) as product_count,
-                   ROUND(AVG(ph.discount_percent), 1) as avg_discount
-            FROM price_history ph
-            WHERE ph.recorded_at >= date('now', '-30 days')
-            GROUP BY DATE(ph.recorded_at)
-            ORDER BY date ASC
-        """)
+        price_history = MonthlyPartitions(next(s for s in PARTITIONED_TABLES if s.name == 'price_history'))
+        price_history.load(cursor)
+        trends_sql, _ = price_history.grouped_sql(
+            cursor, 30, PRICE_TRENDS_SELECT, "recorded_at >= date('now', '-30 days')",
+            "DATE(recorded_at)", "product_id, price, discount_percent, recorded_at"
+        )
+        cursor.execute(f"{trends_sql} ORDER BY date ASC")
         price_trends = [dict(row) for row in cursor.fetchall()]
         
         with open(output_path / "price_trends.json", "w", encoding='utf-8') as f:
@@ -146,10 +146,11 @@ def export_data(db_path, output_dir):
         
         # 6. 导出热门评论
         print("导出热门评论...")
+        # CROSS JOIN 固定由评论表驱动，沿 idx_hot_comments_likes 取到 100 条即停止，无需全量排序
         cursor.execute("""
             SELECT hc.*, p.product_name, p.platform
             FROM hot_comments hc
-            JOIN products p ON hc.product_id = p.id
+            CROSS JOIN products p ON hc.product_id = p.id
             WHERE p.is_active = 1
             ORDER BY hc.likes_count DESC
             LIMIT 100
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频文案文本提取模块
+
+对视频标题/描述只做一次预编译正则扫描，同时得到：
+- 话题标签（#hashtag）
+- 电商产品链接与短链接
+- 链接所属电商平台
+
+供 TikHubAPIClient、WebScraper 与 ProductLinkValidator 共用。
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# 支持识别的电商平台（按域名主体匹配）
+SHOP_PLATFORMS = ('amazon', 'ebay', 'shopify', 'etsy', 'aliexpress', 'temu', 'shein')
+
+# 短链接域名
+SHORT_LINK_DOMAINS = ('bit.ly', 'tinyurl.com', 'cutt.ly')
+
+_SHOP_ALTERNATION = '|'.join(SHOP_PLATFORMS)
+_SHORT_ALTERNATION = '|'.join(re.escape(d) for d in SHORT_LINK_DOMAINS)
+
+# 单次扫描的组合模式：电商链接 | 短链接 | 话题标签
+_TOKEN_PATTERN = re.compile(
+    rf"""
+    (?P<shop_link>https?://(?:www\.)?(?P<platform>{_SHOP_ALTERNATION})\.com/\S+)
+    | (?P<short_link>(?:{_SHORT_ALTERNATION})/\S+)
+    | (?P<hashtag>\#\w+)
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+_PLATFORM_PATTERN = re.compile(rf"({_SHOP_ALTERNATION})\.", re.IGNORECASE)
+
+
+@dataclass
+class ExtractionResult:
+    """单段文本的提取结果"""
+    hashtags: List[str] = field(default_factory=list)
+    product_links: List[str] = field(default_factory=list)
+    link_platforms: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def platform(self) -> str:
+        """文本中首个可识别的电商平台，无链接时为 'unknown'"""
+        for platform in self.link_platforms.values():
+            if platform != 'other':
+                return platform
+        return 'other' if self.product_links else 'unknown'
+
+
+def extract(text: str) -> ExtractionResult:
+    """
+    一次扫描提取话题标签、产品链接及平台
+
+    Args:
+        text: 视频标题或描述
+
+    Returns:
+        提取结果（列表均已去重并保持出现顺序）
+    """
+    result = ExtractionResult()
+    if not text:
+        return result
+
+    hashtags = {}
+    links = {}
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'hashtag':
+            hashtags.setdefault(match.group('hashtag'), None)
+        elif kind == 'short_link':
+            links.setdefault(match.group('short_link'), 'other')
+        else:
+            links.setdefault(match.group('shop_link'), match.group('platform').lower())
+
+    result.hashtags = list(hashtags)
+    result.product_links = list(links)
+    result.link_platforms = links
+    return result
+
+
+def extract_hashtags(text: str) -> List[str]:
+    """提取话题标签"""
+    return extract(text).hashtags
+
+
+def extract_product_links(text: str) -> List[str]:
+    """提取产品链接"""
+    return extract(text).product_links
+
+
+def detect_platform(url: str) -> str:
+    """检测链接所属电商平台，未识别时返回 'other'"""
+    match = _PLATFORM_PATTERN.search(url)
+    return match.group(1).lower() if match else 'other'
+
+
+def is_short_link(host: str) -> bool:
+    """判断主机名是否为短链接服务"""
+    host = host.lower()
+    return host in SHORT_LINK_DOMAINS or host.endswith(
+        tuple('.' + d for d in SHORT_LINK_DOMAINS)
+    )
@@ -23,16 +23,22 @@ Amazon与TikTok数据抓取主协调脚本
 import argparse
 import asyncio
 import concurrent.futures
+import copy
+import functools
 import json
 import logging
+import math
 import sqlite3
+import threading
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional, Any, Tuple
 import yaml
 from enum import Enum
 import sys
@@ -41,7 +47,8 @@ import os
 # 添加项目根目录到Python路径
 sys.path.append(str(Path(__file__).parent))
 
-# 配置日志
+# 配置日志（日志目录不存在时先创建，否则导入本模块即失败）
+os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -53,6 +60,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 大批量持有的记录类型使用 __slots__（Python 3.10+ 才支持 slots 参数）
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 
 class Platform(Enum):
     """平台枚举"""
@@ -70,7 +80,7 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ScrapingTask:
     """抓取任务数据结构"""
     task_id: str
@@ -90,9 +100,25 @@ class ScrapingTask:
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now()
+    
+    def to_row(self) -> Tuple:
+        """按 tasks 表列顺序转换为数据库行"""
+        return (
+            self.task_id, self.platform.value, self.category,
+            json.dumps(self.keywords, ensure_ascii=False), self.max_pages,
+            self.retry_count, self.max_retries, self.status.value,
+            self.created_at.isoformat() if self.created_at else None,
+            self.started_at.isoformat() if self.started_at else None,
+            self.completed_at.isoformat() if self.completed_at else None,
+            self.error_message, self.data_count
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """浅拷贝转换为字典"""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ScrapingResult:
     """抓取结果数据结构"""
     task_id: str
@@ -107,14 +133,180 @@ class ScrapingResult:
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.now()
+    
+    def to_row(self) -> Tuple:
+        """按 results 表列顺序转换为数据库行"""
+        return (
+            self.task_id, self.platform.value, self.success,
+            json.dumps(self.data, ensure_ascii=False) if self.data else None,
+            self.error_message, self.execution_time, self.items_found,
+            self.timestamp.isoformat()
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """浅拷贝转换为字典（data 列表不做深拷贝）"""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+
+@dataclass
+class ScrapeJob:
+    """后台抓取作业（一次 /scrape 请求，包含多个抓取任务）"""
+    job_id: str
+    kind: str                      # platform / all
+    params: Dict[str, Any]
+    status: TaskStatus = TaskStatus.PENDING
+    stage: str = "queued"          # queued / scraping / integrating / reporting / done
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    failed_tasks: int = 0
+    items_found: int = 0
+    result: Dict[str, Any] = None
+    error_message: str = ""
+    created_at: datetime = None
+    started_at: datetime = None
+    completed_at: datetime = None
+    
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now()
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in (TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.CANCELLED)
+    
+    def to_row(self) -> Tuple:
+        """按 jobs 表列顺序转换为数据库行"""
+        return (
+            # 参数按键排序序列化：相同参数的作业行内容一致，提交时据此合并
+            self.job_id, self.kind, json.dumps(self.params, ensure_ascii=False, sort_keys=True),
+            self.status.value, self.stage, self.total_tasks, self.completed_tasks,
+            self.failed_tasks, self.items_found,
+            json.dumps(self.result, ensure_ascii=False) if self.result is not None else None,
+            self.error_message,
+            self.created_at.isoformat() if self.created_at else None,
+            self.started_at.isoformat() if self.started_at else None,
+            self.completed_at.isoformat() if self.completed_at else None
+        )
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "ScrapeJob":
+        """由 jobs 表的一行还原"""
+        def parse_time(value):
+            return datetime.fromisoformat(value) if value else None
+        
+        return cls(
+            job_id=row['job_id'],
+            kind=row['kind'],
+            params=json.loads(row['params']),
+            status=TaskStatus(row['status']),
+            stage=row['stage'],
+            total_tasks=row['total_tasks'],
+            completed_tasks=row['completed_tasks'],
+            failed_tasks=row['failed_tasks'],
+            items_found=row['items_found'],
+            result=json.loads(row['result']) if row['result'] else None,
+            error_message=row['error_message'] or "",
+            created_at=parse_time(row['created_at']),
+            started_at=parse_time(row['started_at']),
+            completed_at=parse_time(row['completed_at'])
+        )
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """可直接序列化为JSON的进度快照（API 与 SSE 使用）"""
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status.value,
+            "stage": self.stage,
+            "total_tasks": self.total_tasks,
+            "completed_tasks": self.completed_tasks,
+            "failed_tasks": self.failed_tasks,
+            "items_found": self.items_found,
+            "result": self.result,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class ConfigSnapshot:
+    """
+    配置快照：加载时把嵌套配置展开成 "a.b.c" → 值 的只读映射，查找一次字典访问
+    
+    中间层的键（如 "scraping.amazon"）也保留，对应整个子配置。
+    叶子值的类型与默认配置不一致时（如 YAML 中写成字符串的数字）按默认配置的类型转换。
+    """
+    
+    __slots__ = ("values", "version")
+    
+    def __init__(self, config: Dict[str, Any], version: int = 0,
+                 defaults: Optional[Dict[str, Any]] = None):
+        flat: Dict[str, Any] = {}
+        self._flatten(copy.deepcopy(config), "", flat, defaults or {})
+        self.values = MappingProxyType(flat)
+        self.version = version
+    
+    @classmethod
+    def _flatten(cls, node: Dict[str, Any], prefix: str, flat: Dict[str, Any],
+                 defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """展开 node 到 flat，返回类型转换后的子配置"""
+        result = {}
+        for key, value in node.items():
+            path = f"{prefix}{key}"
+            if isinstance(value, dict):
+                value = cls._flatten(value, f"{path}.", flat, defaults)
+            elif path in defaults:
+                value = cls._coerce(path, value, defaults[path])
+            flat[path] = result[key] = value
+        return result
+    
+    @staticmethod
+    def _coerce(path: str, value: Any, default: Any) -> Any:
+        """字符串按默认值的类型（bool / int / float）转换，整数转为浮点；无法转换时保留原值"""
+        expected = type(default)
+        try:
+            if expected is float and type(value) is int:
+                return float(value)
+            if isinstance(value, str) and expected in (bool, int, float):
+                text = value.strip().lower()
+                if expected is not bool:
+                    return expected(text)
+                if text in ("true", "yes", "on", "1"):
+                    return True
+                if text in ("false", "no", "off", "0"):
+                    return False
+                raise ValueError(value)
+        except ValueError:
+            logger.warning(f"配置项类型不符，保留原值: {path}={value!r}（应为 {expected.__name__}）")
+        return value
+    
+    def get(self, key: str, default=None):
+        """获取配置项"""
+        return self.values.get(key, default)
 
 
 class ConfigManager:
-    """配置管理器"""
+    """
+    配置管理器
+    
+    读取走 ConfigSnapshot（O(1) 查找）；热点代码通过 subscribe 在配置变化时一次性绑定所需的值。
+    update 修改后立即生效，写文件合并到 save_delay 秒后一次完成；
+    watch 在后台线程轮询配置文件，文件被外部修改时重新加载。
+    """
     
-    def __init__(self, config_file: str = "config/config.yaml"):
+    def __init__(self, config_file: str = "config/config.yaml", save_delay: float = 1.0):
         self.config_file = config_file
+        self.save_delay = save_delay
         self.config = self._load_config()
+        self._defaults = ConfigSnapshot(self._get_default_config()).values
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[ConfigSnapshot], None]] = []
+        self._save_timer: Optional[threading.Timer] = None
+        self._watch_stop: Optional[threading.Event] = None
+        self._file_state = self._stat_file()
+        self.snapshot = ConfigSnapshot(self.config, 0, self._defaults)
     
     def _load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
@@ -168,6 +360,11 @@ class ConfigManager:
                 "backoff_factor": 2,
                 "retry_delay": 5
             },
+            "jobs": {
+                "max_workers": 2,
+                "poll_interval": 1.0,
+                "max_pending": 10
+            },
             "monitoring": {
                 "log_level": "INFO",
                 "performance_tracking": True,
@@ -178,31 +375,153 @@ class ConfigManager:
             }
         }
     
+    def _stat_file(self) -> Optional[Tuple[int, int]]:
+        """配置文件的 (修改时间, 大小)，文件不存在时为 None"""
+        try:
+            stat = os.stat(self.config_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+    
     def get(self, key: str, default=None):
         """获取配置项"""
-        keys = key.split('.')
-        value = self.config
+        return self.snapshot.values.get(key, default)
+    
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]):
+        """注册配置变化回调：update、save、热加载之后以新快照调用"""
+        self._subscribers.append(callback)
+    
+    def _publish(self):
+        """由 self.config 重建快照并通知订阅者（调用方持有锁）"""
+        self.snapshot = ConfigSnapshot(self.config, self.snapshot.version + 1, self._defaults)
+        for callback in list(self._subscribers):
+            try:
+                callback(self.snapshot)
+            except Exception as e:
+                logger.error(f"配置变化回调失败: {e}")
+    
+    def update(self, key: str, value: Any) -> Any:
+        """
+        修改配置项并立即生效，save_delay 秒内的多次修改合并为一次写文件
         
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        Args:
+            key: 点分路径，中间层不存在时创建
+            value: 新值
+            
+        Returns:
+            快照中的新值（已按默认配置的类型转换）
+        """
+        with self._lock:
+            keys = key.split('.')
+            node = self.config
+            for k in keys[:-1]:
+                if not isinstance(node.get(k), dict):
+                    node[k] = {}
+                node = node[k]
+            node[keys[-1]] = value
+            self._publish()
+            
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self.flush)
+                self._save_timer.name = "config-save"
+                self._save_timer.start()
+            return self.snapshot.get(key)
+    
+    def flush(self):
+        """立即写入 update 尚未保存的修改"""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+            if timer is None:
+                return
+            timer.cancel()
+            self._write()
     
     def save(self):
-        """保存配置"""
+        """保存配置（直接修改 self.config 之后调用，快照随之更新）"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._publish()
+            self._write()
+    
+    def _write(self):
+        """写入配置文件（先写临时文件再替换，热加载不会读到写了一半的文件）"""
         try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
+            os.makedirs(os.path.dirname(self.config_file) or ".", exist_ok=True)
+            temp_file = f"{self.config_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
+            os.replace(temp_file, self.config_file)
+            self._file_state = self._stat_file()
         except Exception as e:
             logger.error(f"保存配置文件失败: {e}")
+    
+    def reload_if_changed(self) -> bool:
+        """
+        配置文件被外部修改时重新加载
+        
+        解析失败时保留当前配置；本进程还有未写入的修改时以本进程为准（稍后写入会覆盖文件）。
+        
+        Returns:
+            是否加载了新配置
+        """
+        previous = self._file_state
+        state = self._stat_file()
+        if state is None or state == previous:
+            return False
+        
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            if not isinstance(config, dict):
+                raise ValueError("配置文件顶层必须是映射")
+        except Exception as e:
+            logger.error(f"重新加载配置文件失败，继续使用当前配置: {e}")
+            self._file_state = state  # 同一份文件不重复报错
+            return False
+        
+        with self._lock:
+            # 解析期间本进程写过文件，以写入的内容为准
+            if self._file_state != previous or self._save_timer is not None:
+                return False
+            self.config = config
+            self._file_state = state
+            self._publish()
+        logger.info(f"配置文件已重新加载: {self.config_file} (版本 {self.snapshot.version})")
+        return True
+    
+    def watch(self, interval: float = 2.0):
+        """启动后台线程每 interval 秒检查一次配置文件（重复调用无效果）"""
+        with self._lock:
+            if self._watch_stop is not None:
+                return
+            self._watch_stop = stop = threading.Event()
+        
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    logger.error(f"检查配置文件失败: {e}")
+        
+        threading.Thread(target=run, name="config-watch", daemon=True).start()
+    
+    def stop_watching(self):
+        """停止检查配置文件"""
+        with self._lock:
+            if self._watch_stop is not None:
+                self._watch_stop.set()
+                self._watch_stop = None
 
 
 class DatabaseManager:
     """数据库管理器"""
     
+    # events 表保留的事件数，每写入 EVENT_TRIM_EVERY 个事件清理一次更早的
+    EVENT_RETENTION = 10000
+    EVENT_TRIM_EVERY = 100
+    
     def __init__(self, config: ConfigManager):
         self.config = config
         self.db_path = config.get("database.path", "data/scraping.db")
@@ -215,6 +534,9 @@ class DatabaseManager:
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
             
+            # Web worker 与调度进程同时读写（WAL 下读不阻塞写）
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # 创建任务表
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS tasks (
@@ -271,6 +593,37 @@ class DatabaseManager:
                 )
             ''')
             
+            # 创建后台作业表（/scrape 请求提交的作业，重启后恢复）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    total_tasks INTEGER DEFAULT 0,
+                    completed_tasks INTEGER DEFAULT 0,
+                    failed_tasks INTEGER DEFAULT 0,
+                    items_found INTEGER DEFAULT 0,
+                    result TEXT,
+                    error_message TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    completed_at TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)')
+            
+            # 创建推送事件表（调度进程写入，Web worker 按序号读取后推送给看板）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            
             # 创建统计表
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS statistics (
@@ -299,16 +652,109 @@ class DatabaseManager:
                  max_retries, status, created_at, started_at, completed_at, 
                  error_message, data_count)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                task.task_id, task.platform.value, task.category,
-                json.dumps(task.keywords, ensure_ascii=False), task.max_pages,
-                task.retry_count, task.max_retries, task.status.value,
-                task.created_at.isoformat() if task.created_at else None,
-                task.started_at.isoformat() if task.started_at else None,
-                task.completed_at.isoformat() if task.completed_at else None,
-                task.error_message, task.data_count
-            ))
+            ''', task.to_row())
+            conn.commit()
+    
+    def save_job(self, job: ScrapeJob):
+        """保存作业状态"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO jobs
+                (job_id, kind, params, status, stage, total_tasks, completed_tasks,
+                 failed_tasks, items_found, result, error_message, created_at,
+                 started_at, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', job.to_row())
+            conn.commit()
+    
+    def admit_job(self, job: ScrapeJob, max_pending: int) -> Tuple[Optional[ScrapeJob], int]:
+        """
+        提交作业前的准入检查与保存（多进程间互斥）
+        
+        已有类型、参数相同的待执行或执行中作业时返回该作业，不保存 job；否则待执行作业
+        少于 max_pending 时保存 job。
+        
+        Returns:
+            (相同的已有作业或 None, 保存前的待执行作业数)
+        """
+        row = job.to_row()
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) AND kind = ? AND params = ? "
+                "ORDER BY created_at LIMIT 1",
+                (TaskStatus.PENDING.value, TaskStatus.RUNNING.value, job.kind, row[2])
+            ).fetchone()
+            pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?",
+                                   (TaskStatus.PENDING.value,)).fetchone()[0]
+            if existing is None and pending < max_pending:
+                conn.execute('''
+                    INSERT INTO jobs
+                    (job_id, kind, params, status, stage, total_tasks, completed_tasks,
+                     failed_tasks, items_found, result, error_message, created_at,
+                     started_at, completed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', row)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return (ScrapeJob.from_row(existing) if existing is not None else None), pending
+    
+    def claim_next_job(self) -> Optional[ScrapeJob]:
+        """领取最早提交的待执行作业并置为 running（多进程间互斥）"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (TaskStatus.PENDING.value,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = ? WHERE job_id = ?",
+                             (TaskStatus.RUNNING.value, row['job_id']))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        
+        if row is None:
+            return None
+        job = ScrapeJob.from_row(row)
+        job.status = TaskStatus.RUNNING
+        return job
+    
+    def requeue_interrupted_jobs(self) -> int:
+        """执行中被中断（进程退出）的作业重置为待执行，返回作业数"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('''
+                UPDATE jobs
+                SET status = ?, stage = 'queued', total_tasks = 0, completed_tasks = 0,
+                    failed_tasks = 0, items_found = 0, started_at = NULL
+                WHERE status = ?
+            ''', (TaskStatus.PENDING.value, TaskStatus.RUNNING.value))
             conn.commit()
+            return cursor.rowcount
+    
+    def get_jobs(self, statuses: Optional[List[TaskStatus]] = None,
+                 job_id: Optional[str] = None, limit: int = 50) -> List[ScrapeJob]:
+        """按状态或ID读取作业，最新的在前"""
+        conditions, params = [], []
+        if statuses:
+            conditions.append(f"status IN ({','.join('?' * len(statuses))})")
+            params.extend(s.value for s in statuses)
+        if job_id:
+            conditions.append("job_id = ?")
+            params.append(job_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [ScrapeJob.from_row(row) for row in rows]
     
     def save_result(self, result: ScrapingResult):
         """保存结果"""
@@ -319,12 +765,7 @@ class DatabaseManager:
                 (task_id, platform, success, data, error_message, execution_time, 
                  items_found, timestamp)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                result.task_id, result.platform.value, result.success,
-                json.dumps(result.data, ensure_ascii=False) if result.data else None,
-                result.error_message, result.execution_time, result.items_found,
-                result.timestamp.isoformat()
-            ))
+            ''', result.to_row())
             conn.commit()
     
     def save_products(self, products: List[Dict[str, Any]], platform: Platform):
@@ -360,6 +801,33 @@ class DatabaseManager:
                     continue
             conn.commit()
     
+    def save_event(self, event_type: str, data: Dict[str, Any]) -> int:
+        """记录一个推送事件，返回事件序号"""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            seq = conn.execute(
+                "INSERT INTO events (type, data, created_at) VALUES (?, ?, ?)",
+                (event_type, json.dumps(data, ensure_ascii=False, default=str), datetime.now().isoformat())
+            ).lastrowid
+            if seq % self.EVENT_TRIM_EVERY == 0:
+                conn.execute("DELETE FROM events WHERE seq <= ?", (seq - self.EVENT_RETENTION,))
+            conn.commit()
+        return seq
+    
+    def get_events(self, after_seq: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """序号大于 after_seq 的事件，按序号升序"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT seq, type, data, created_at FROM events WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after_seq, limit)
+            ).fetchall()
+        return [{'seq': seq, 'type': event_type, 'data': json.loads(data), 'created_at': created_at}
+                for seq, event_type, data, created_at in rows]
+    
+    def last_event_seq(self) -> int:
+        """最新事件的序号，没有事件时为 0"""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+    
     def update_statistics(self, date: str, platform: Platform, 
                          total_tasks: int, successful_tasks: int, 
                          failed_tasks: int, total_items: int, avg_time: float):
@@ -397,6 +865,11 @@ class AmazonScraper:
     
     def __init__(self, config: ConfigManager):
         self.config = config
+        self._apply_config(config)
+        config.subscribe(self._apply_config)
+    
+    def _apply_config(self, config):
+        """绑定配置值（初始化及配置变化时调用；并发上限只在协调器创建时生效）"""
         self.enabled = config.get("scraping.amazon.enabled", True)
         self.max_concurrent = config.get("scraping.amazon.max_concurrent", 3)
         self.request_delay = config.get("scraping.amazon.request_delay", 1.0)
@@ -462,6 +935,11 @@ class TikTokScraper:
     
     def __init__(self, config: ConfigManager):
         self.config = config
+        self._apply_config(config)
+        config.subscribe(self._apply_config)
+    
+    def _apply_config(self, config):
+        """绑定配置值（初始化及配置变化时调用；并发上限只在协调器创建时生效）"""
         self.enabled = config.get("scraping.tiktok.enabled", True)
         self.max_concurrent = config.get("scraping.tiktok.max_concurrent", 2)
         self.request_delay = config.get("scraping.tiktok.request_delay", 2.0)
@@ -601,6 +1079,13 @@ class PerformanceMonitor:
     def __init__(self, config: ConfigManager):
         self.config = config
         self.performance_data = []
+        self._apply_config(config)
+        config.subscribe(self._apply_config)
+    
+    def _apply_config(self, config):
+        """绑定告警阈值（初始化及配置变化时调用），逐条记录的检查不再查配置"""
+        self.failure_threshold = config.get("monitoring.alert_thresholds.failure_rate", 0.3)
+        self.response_time_threshold = config.get("monitoring.alert_thresholds.avg_response_time", 30)
     
     def record_execution(self, platform: Platform, execution_time: float, 
                         success: bool, items_count: int):
@@ -619,10 +1104,7 @@ class PerformanceMonitor:
     
     def _check_performance_alerts(self, record: Dict[str, Any]):
         """检查性能告警"""
-        failure_threshold = self.config.get("monitoring.alert_thresholds.failure_rate", 0.3)
-        response_time_threshold = self.config.get("monitoring.alert_thresholds.avg_response_time", 30)
-        
-        if record["execution_time"] > response_time_threshold:
+        if record["execution_time"] > self.response_time_threshold:
             logger.warning(f"响应时间过长: {record['platform']} - {record['execution_time']:.2f}秒")
     
     def get_performance_summary(self, hours: int = 24) -> Dict[str, Any]:
@@ -648,6 +1130,257 @@ class PerformanceMonitor:
         return summary
 
 
+class JobQueueFull(Exception):
+    """待执行作业已达上限，retry_after 秒后再提交"""
+    
+    def __init__(self, pending: int, retry_after: int):
+        super().__init__(f"待执行作业已达上限 ({pending} 个)，请 {retry_after} 秒后重试")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """后台作业队列
+    
+    /scrape 请求提交作业后立即返回作业ID。作业保存在协调器数据库的 jobs 表中，由执行作业的
+    进程按提交顺序领取、固定数量的工作协程执行：单进程部署时就是 Web 进程本身，多 worker
+    部署时 Web 进程只提交和查询，由独立的调度进程（main.py scheduler）执行。
+    作业状态每次变化都写入数据库，进程重启后未完成的作业重新排队。
+    """
+    
+    # 订阅者队列长度，消费慢时丢弃最旧的快照（只有最新进度有意义）
+    SUBSCRIBER_BUFFER = 16
+    FINISHED = ("success", "failed", "cancelled")
+    
+    # 没有已完成作业可参考时估算的作业时长（秒）
+    DEFAULT_JOB_SECONDS = 30
+    
+    def __init__(self, coordinator: "MainCoordinator", max_workers: int = 2, poll_interval: float = 1.0,
+                 max_pending: int = 10):
+        self.coordinator = coordinator
+        self.db_manager = coordinator.db_manager
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        # 待执行作业上限：执行中的作业数由 max_workers 限制，排队的超过该数时拒绝新提交
+        self.max_pending = max(1, max_pending)
+        self.run_jobs = False
+        self.jobs: Dict[str, ScrapeJob] = {}  # 本进程正在执行的作业
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        # 本进程执行的作业结束时回调（例如清空接口响应缓存）
+        self.listeners: List[Callable[[ScrapeJob], None]] = []
+    
+    async def start(self, run_jobs: bool = True):
+        """
+        启动作业队列
+        
+        Args:
+            run_jobs: 是否在本进程执行作业；False 时只提交和查询，作业由调度进程执行
+        """
+        if self._workers:
+            return
+        
+        self.run_jobs = run_jobs
+        if not run_jobs:
+            return
+        
+        # 执行中被中断的作业从头重跑（同一时间只应有一个进程执行作业）
+        requeued = self.db_manager.requeue_interrupted_jobs()
+        if requeued:
+            logger.info(f"恢复中断的作业: {requeued} 个")
+        
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+    
+    async def stop(self):
+        """停止工作协程（执行中的作业保持 running 状态，下次启动时重跑）"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    def submit(self, kind: str, params: Dict[str, Any]) -> ScrapeJob:
+        """提交作业，立即返回（相同的作业未结束时返回该作业）"""
+        return self.admit(kind, params)[0]
+    
+    def admit(self, kind: str, params: Dict[str, Any]) -> Tuple[ScrapeJob, bool]:
+        """
+        提交作业，立即返回 (作业, 是否合并到已有作业)
+        
+        类型、参数相同的作业还在排队或执行时不新建作业，直接返回它；待执行作业达到
+        max_pending 时抛出 JobQueueFull。
+        """
+        if kind not in ("platform", "all"):
+            raise ValueError(f"未知的作业类型: {kind}")
+        
+        job = ScrapeJob(job_id=uuid.uuid4().hex, kind=kind, params=params)
+        existing, pending = self.db_manager.admit_job(job, self.max_pending)
+        if existing is not None:
+            logger.info(f"合并到相同的作业: {existing.job_id} ({kind})")
+            return self.jobs.get(existing.job_id, existing), True
+        if pending >= self.max_pending:
+            raise JobQueueFull(pending, self._retry_after())
+        
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info(f"提交作业: {job.job_id} ({kind})")
+        return job, False
+    
+    def _retry_after(self) -> int:
+        """按最近完成作业的平均时长估算排队作业减少一个所需的秒数"""
+        durations = [
+            (job.completed_at - job.started_at).total_seconds()
+            for job in self.db_manager.get_jobs([TaskStatus.SUCCESS, TaskStatus.FAILED], limit=20)
+            if job.started_at and job.completed_at
+        ]
+        average = sum(durations) / len(durations) if durations else self.DEFAULT_JOB_SECONDS
+        return max(1, min(600, math.ceil(average / self.max_workers)))
+    
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        """获取作业（本进程执行中的取内存中的最新状态）"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            jobs = self.db_manager.get_jobs(job_id=job_id, limit=1)
+            job = jobs[0] if jobs else None
+        return job
+    
+    def list_jobs(self, status: Optional[TaskStatus] = None, limit: int = 50) -> List[ScrapeJob]:
+        """最近的作业列表"""
+        return self.db_manager.get_jobs([status] if status else None, limit=limit)
+    
+    async def subscribe(self, job_id: str, heartbeat: float = 15.0):
+        """逐个产出作业进度快照，直到作业结束
+        
+        本进程执行的作业由 _publish 直接推送；其他进程执行的作业每 poll_interval 秒读库一次。
+        超过 heartbeat 秒没有新进度时产出 None，便于调用方发送保活消息。
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        
+        queue = asyncio.Queue(maxsize=self.SUBSCRIBER_BUFFER)
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            snapshot = job.snapshot()
+            yield snapshot
+            idle = 0.0
+            while snapshot["status"] not in self.FINISHED:
+                local = job_id in self.jobs
+                wait = heartbeat if local else min(self.poll_interval, heartbeat)
+                try:
+                    update = await asyncio.wait_for(queue.get(), wait)
+                except asyncio.TimeoutError:
+                    update = None
+                    if not local:
+                        stored = self.get(job_id)
+                        if stored is not None and stored.snapshot() != snapshot:
+                            update = stored.snapshot()
+                
+                if update is not None:
+                    snapshot = update
+                    idle = 0.0
+                    yield snapshot
+                else:
+                    idle += wait
+                    if idle >= heartbeat:
+                        idle = 0.0
+                        yield None
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+    
+    def _publish(self, job: ScrapeJob):
+        """持久化作业状态并推送给订阅者"""
+        self.db_manager.save_job(job)
+        snapshot = job.snapshot()
+        for queue in self._subscribers.get(job.job_id, []):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+    
+    def _progress(self, job: ScrapeJob, stage: Optional[str] = None,
+                  total_tasks: Optional[int] = None, result: Optional[ScrapingResult] = None):
+        """协调器进度回调"""
+        if stage is not None:
+            job.stage = stage
+        if total_tasks is not None:
+            job.total_tasks = total_tasks
+        if result is not None:
+            job.completed_tasks += 1
+            if result.success:
+                job.items_found += result.items_found
+            else:
+                job.failed_tasks += 1
+        self._publish(job)
+    
+    async def _worker(self):
+        while True:
+            # 先清除唤醒标记再领取，领取后提交的作业会再次唤醒；其他进程提交的作业靠轮询发现
+            self._wakeup.clear()
+            job = self.db_manager.claim_next_job()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            self.jobs[job.job_id] = job
+            await self._run(job)
+    
+    async def _run(self, job: ScrapeJob):
+        """执行一个已领取（running）的作业"""
+        params = job.params
+        progress = functools.partial(self._progress, job)
+        job.started_at = datetime.now()
+        self._publish(job)
+        
+        try:
+            if job.kind == "platform":
+                platform = Platform(params["platform"])
+                results = {platform: await self.coordinator.scrape_platform(
+                    platform, params["categories"], params["keywords"], params["max_pages"],
+                    progress=progress
+                )}
+            else:
+                results = await self.coordinator.scrape_all_platforms(
+                    params["categories"], params["keywords"], params["max_pages"],
+                    progress=progress
+                )
+            
+            job.result = {
+                "platforms": {
+                    platform.value: {
+                        "tasks": len(platform_results),
+                        "successful_tasks": len([r for r in platform_results if r.success]),
+                        "items_found": sum(r.items_found for r in platform_results if r.success)
+                    }
+                    for platform, platform_results in results.items()
+                }
+            }
+            job.status = TaskStatus.SUCCESS
+        except Exception as e:
+            logger.error(f"作业执行失败: {job.job_id}, 错误: {e}")
+            job.status = TaskStatus.FAILED
+            job.error_message = str(e)
+        
+        job.stage = "done"
+        job.completed_at = datetime.now()
+        self._publish(job)
+        self.jobs.pop(job.job_id, None)
+        logger.info(f"作业完成: {job.job_id}, 状态: {job.status.value}")
+        
+        for listener in self.listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"作业完成回调失败: {e}")
+
+
 class MainCoordinator:
     """主协调器"""
     
@@ -659,13 +1392,28 @@ class MainCoordinator:
         self.data_integrator = DataIntegrator(self.db_manager)
         self.performance_monitor = PerformanceMonitor(self.config)
         
+        # 各平台同时执行的任务数上限（跨作业共享）
+        self._platform_slots = {
+            Platform.AMAZON: threading.BoundedSemaphore(max(1, self.amazon_scraper.max_concurrent)),
+            Platform.TIKTOK: threading.BoundedSemaphore(max(1, self.tiktok_scraper.max_concurrent))
+        }
+        self.job_queue = JobQueue(
+            self,
+            max_workers=self.config.get("jobs.max_workers", 2),
+            poll_interval=self.config.get("jobs.poll_interval", 1.0),
+            max_pending=self.config.get("jobs.max_pending", 10)
+        )
+        # 任务完成回调 (事件类型, 数据)，在执行任务的线程中调用（例如推送给看板）
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        
         # 创建日志目录
         os.makedirs("logs", exist_ok=True)
     
     def create_task(self, platform: Platform, category: str, 
                    keywords: List[str], max_pages: int = 5) -> ScrapingTask:
         """创建抓取任务"""
-        task_id = f"{platform.value}_{category}_{int(time.time())}"
+        # 同一秒内可能有多个作业创建相同类别的任务，加随机后缀避免覆盖
+        task_id = f"{platform.value}_{category}_{int(time.time())}_{uuid.uuid4().hex[:6]}"
         
         task = ScrapingTask(
             task_id=task_id,
@@ -731,41 +1479,71 @@ class MainCoordinator:
             self.db_manager.save_products(result.data, task.platform)
         
         logger.info(f"任务完成: {task.task_id}, 状态: {task.status.value}")
+        self._emit('task_completed', {
+            'task_id': task.task_id,
+            'platform': task.platform.value,
+            'category': task.category,
+            'status': task.status.value,
+            'items_found': result.items_found,
+            'execution_time': result.execution_time,
+            'error_message': task.error_message
+        })
         return result
     
+    def _emit(self, event_type: str, data: Dict[str, Any]):
+        """通知任务完成回调，回调出错不影响任务"""
+        for listener in self.listeners:
+            try:
+                listener(event_type, data)
+            except Exception as e:
+                logger.error(f"任务完成回调失败: {e}")
+    
+    def _run_task_in_thread(self, task: ScrapingTask) -> ScrapingResult:
+        """在线程池中执行单个任务，先占用该平台的并发名额"""
+        with self._platform_slots[task.platform]:
+            return asyncio.run(self.execute_single_task(task))
+    
     async def execute_multiple_tasks(self, tasks: List[ScrapingTask], 
-                                   max_workers: int = 5) -> List[ScrapingResult]:
-        """并发执行多个任务"""
+                                   max_workers: int = 5,
+                                   progress: Optional[Callable[..., None]] = None) -> List[ScrapingResult]:
+        """并发执行多个任务
+        
+        任务在线程池中执行，等待期间不阻塞事件循环；每完成一个任务调用一次 progress(result=...)。
+        """
         results = []
+        loop = asyncio.get_running_loop()
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_task = {
-                executor.submit(asyncio.run, self.execute_single_task(task)): task 
-                for task in tasks
-            }
-            
-            # 收集结果
-            for future in as_completed(future_to_task):
-                task = future_to_task[future]
+            async def run(task: ScrapingTask) -> ScrapingResult:
                 try:
-                    result = future.result()
-                    results.append(result)
+                    return await loop.run_in_executor(executor, self._run_task_in_thread, task)
                 except Exception as e:
                     logger.error(f"任务执行异常: {task.task_id}, 错误: {e}")
-                    results.append(ScrapingResult(
+                    return ScrapingResult(
                         task_id=task.task_id,
                         platform=task.platform,
                         success=False,
                         data=[],
                         error_message=str(e)
-                    ))
+                    )
+            
+            # 按完成顺序收集结果
+            for future in asyncio.as_completed([run(task) for task in tasks]):
+                result = await future
+                results.append(result)
+                if progress:
+                    progress(result=result)
         
         return results
     
     async def scrape_platform(self, platform: Platform, categories: List[str],
-                            keywords: List[str], max_pages: int = 5) -> List[ScrapingResult]:
-        """抓取指定平台"""
+                            keywords: List[str], max_pages: int = 5,
+                            progress: Optional[Callable[..., None]] = None) -> List[ScrapingResult]:
+        """抓取指定平台
+        
+        progress 为可选的进度回调，按阶段以关键字参数调用：
+        stage（阶段名）、total_tasks（任务总数）、result（刚完成的任务结果）。
+        """
         logger.info(f"开始抓取平台: {platform.value}")
         
         # 创建任务
@@ -775,16 +1553,21 @@ class MainCoordinator:
             tasks.append(task)
         
         # 执行任务
-        results = await self.execute_multiple_tasks(tasks)
+        if progress:
+            progress(stage="scraping", total_tasks=len(tasks))
+        results = await self.execute_multiple_tasks(tasks, progress=progress)
         
         # 生成统计报告
+        if progress:
+            progress(stage="reporting")
         self._generate_platform_report(platform, results)
         
         return results
     
     async def scrape_all_platforms(self, categories: List[str],
-                                 keywords: List[str], max_pages: int = 5) -> Dict[Platform, List[ScrapingResult]]:
-        """抓取所有平台"""
+                                 keywords: List[str], max_pages: int = 5,
+                                 progress: Optional[Callable[..., None]] = None) -> Dict[Platform, List[ScrapingResult]]:
+        """抓取所有平台（progress 含义同 scrape_platform）"""
         logger.info("开始抓取所有平台")
         
         results = {}
@@ -813,7 +1596,9 @@ class MainCoordinator:
         for platform_tasks in tasks_by_platform.values():
             all_tasks.extend(platform_tasks)
         
-        all_results = await self.execute_multiple_tasks(all_tasks)
+        if progress:
+            progress(stage="scraping", total_tasks=len(all_tasks))
+        all_results = await self.execute_multiple_tasks(all_tasks, progress=progress)
         
         # 按平台分组结果
         for result in all_results:
@@ -824,9 +1609,13 @@ class MainCoordinator:
         
         # 数据整合
         if results:
+            if progress:
+                progress(stage="integrating")
             self._integrate_data(results)
         
         # 生成综合报告
+        if progress:
+            progress(stage="reporting")
         self._generate_comprehensive_report(results)
         
         return results
@@ -930,6 +1719,7 @@ class MainCoordinator:
     def _save_integration_report(self, integrated_data: Dict[str, Any]):
         """保存整合报告"""
         report_file = f"reports/integration_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        os.makedirs("reports", exist_ok=True)
         
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump(integrated_data, f, ensure_ascii=False, indent=2)
@@ -978,6 +1768,9 @@ def main():
     # status命令
     status_parser = subparsers.add_parser('status', help='查看系统状态')
     
+    # scheduler命令（多 worker 部署时唯一执行抓取作业和数据库定期维护的进程）
+    scheduler_parser = subparsers.add_parser('scheduler', help='运行作业调度进程')
+    
     # config命令
     config_parser = subparsers.add_parser('config', help='配置管理')
     config_subparsers = config_parser.add_subparsers(dest='config_command')
@@ -999,6 +1792,8 @@ def main():
         asyncio.run(handle_scrape(coordinator, args))
     elif args.command == 'status':
         handle_status(coordinator)
+    elif args.command == 'scheduler':
+        asyncio.run(handle_scheduler(coordinator))
     elif args.command == 'config':
         handle_config(coordinator, args)
 
@@ -1032,6 +1827,41 @@ async def handle_scrape(coordinator: MainCoordinator, args):
         print(f"抓取失败: {e}")
 
 
+async def handle_scheduler(coordinator: MainCoordinator):
+    """处理调度命令：执行 Web worker 提交的作业，负责产品库的定期备份与维护，直到收到退出信号"""
+    import signal
+    import database
+    
+    # 产品库的备份、分区维护线程只在调度进程中运行，Web worker 中关闭
+    product_db = database.DatabaseManager(database.DatabaseConfig(
+        db_path=os.environ.get("PRODUCTS_DB_PATH", database.DatabaseConfig.db_path)
+    ))
+    
+    # 任务完成、作业结束、产品变化写入 events 表，由 Web worker 推送给看板
+    coordinator.listeners.append(coordinator.db_manager.save_event)
+    coordinator.job_queue.listeners.append(
+        lambda job: coordinator.db_manager.save_event('job_finished', job.snapshot()))
+    product_db.listeners.append(coordinator.db_manager.save_event)
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    await coordinator.job_queue.start()
+    # Web worker 修改的配置写入文件后由这里热加载
+    coordinator.config.watch()
+    logger.info(f"作业调度进程已启动 (pid={os.getpid()}, 工作协程={coordinator.job_queue.max_workers})")
+    try:
+        await stop.wait()
+    finally:
+        await coordinator.job_queue.stop()
+        coordinator.config.stop_watching()
+        coordinator.config.flush()
+        product_db.close()
+        logger.info("作业调度进程已退出")
+
+
 def handle_status(coordinator: MainCoordinator):
     """处理状态命令"""
     try:
@@ -1099,17 +1929,8 @@ def handle_config(coordinator: MainCoordinator, args):
                 value = float(value)
             
             # 更新配置
-            keys = key.split('.')
-            config = coordinator.config.config
-            
-            # 导航到目标位置
-            for k in keys[:-1]:
-                if k not in config:
-                    config[k] = {}
-                config = config[k]
-            
-            config[keys[-1]] = value
-            coordinator.config.save()
+            coordinator.config.update(key, value)
+            coordinator.config.flush()
             
             print(f"配置已更新: {key} = {value}")
             
@@ -0,0 +1,880 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库管理器测试用例
+================
+
+验证价格批量更新、历史压缩等数据库核心逻辑。
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+# 添加项目根目录到Python路径
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import database_backup
+from database_partitions import ID_SPAN, month_key, shift_month
+from database import DatabaseConfig, DatabaseManager, PERFORMANCE_PROFILES, ProductValidationError
+
+
+def make_product(i: int, **overrides) -> dict:
+    """构造测试产品"""
+    data = {
+        'product_name': f"Product {i}",
+        'platform': 'amazon',
+        'category': 'tshirt',
+        'price': 20.0,
+        'original_price': 25.0,
+        'product_url': f"https://amazon.com/product/{i}"
+    }
+    data.update(overrides)
+    return data
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """使用临时数据库的测试基类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=os.path.join(self.temp_dir, "products.db"),
+            backup_dir=os.path.join(self.temp_dir, "backup"),
+            connection_pool_size=2,
+            auto_backup=False
+        )
+        self.db = DatabaseManager(self.config)
+
+    def tearDown(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def query(self, sql, params=()):
+        with sqlite3.connect(self.config.db_path) as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+class TestPriceUpdates(DatabaseTestCase):
+    """测试批量价格更新"""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [self.db.insert_product(make_product(i)) for i in range(3)]
+
+    def test_only_changes_recorded(self):
+        """测试只记录价格变化"""
+        result = self.db.update_product_prices(
+            [(self.ids[0], 18.0, None), (self.ids[1], 20.0, None), (self.ids[2], 20.0, 30.0)],
+            heartbeat=False
+        )
+
+        self.assertEqual(result, {'received': 3, 'updated': 3, 'history_written': 2})
+        rows = self.query("SELECT product_id, price, original_price, discount_percent FROM price_history "
+                          "ORDER BY product_id")
+        self.assertEqual(rows, [(self.ids[0], 18.0, 25.0, 28), (self.ids[2], 20.0, 30.0, 33)])
+        self.assertEqual(self.query("SELECT price FROM products WHERE id = ?", (self.ids[0],)), [(18.0,)])
+
+    def test_daily_heartbeat(self):
+        """测试价格未变化时每天只写一条心跳"""
+        updates = [(product_id, 20.0, None) for product_id in self.ids]
+
+        self.assertEqual(self.db.update_product_prices(updates)['history_written'], 3)
+        self.assertEqual(self.db.update_product_prices(updates)['history_written'], 0)
+
+    def test_single_update_delegates(self):
+        """测试单条更新不再重复写入相同价格"""
+        self.db.update_product_price(self.ids[0], 15.0, 25.0)
+        self.db.update_product_price(self.ids[0], 15.0, 25.0)
+
+        history = self.db.get_price_history(self.ids[0])
+        self.assertEqual([row['price'] for row in history], [15.0])
+
+
+class TestPriceHistoryCompaction(DatabaseTestCase):
+    """测试价格历史压缩"""
+
+    def test_compacts_old_days(self):
+        """测试旧记录压缩为每日 min/max/close"""
+        product_id = self.db.insert_product(make_product(1))
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO price_history (product_id, price, recorded_at) VALUES (?, ?, datetime('now', ?))",
+                [(product_id, 20.0, '-40 days'), (product_id, 15.0, '-40 days'),
+                 (product_id, 18.0, '-40 days'), (product_id, 22.0, '-39 days'),
+                 (product_id, 19.0, '-1 days'), (product_id, 21.0, '-1 days')]
+            )
+
+        result = self.db.compact_price_history(older_than_days=30)
+
+        self.assertEqual(result, {'days_compacted': 1, 'rows_removed': 2})
+        history = self.db.get_price_history(product_id, days=60)
+        self.assertEqual(len(history), 4)
+        self.assertEqual((history[0]['price'], history[0]['min_price'], history[0]['max_price']),
+                         (18.0, 15.0, 20.0))
+        self.assertEqual(history[1]['min_price'], 22.0)
+
+        # 重复执行不再变化
+        self.assertEqual(self.db.compact_price_history(older_than_days=30),
+                         {'days_compacted': 0, 'rows_removed': 0})
+
+
+class TestPartitions(DatabaseTestCase):
+    """测试价格历史、爬取日志按月分区"""
+
+    LOG = {'platform': 'amazon', 'category': 'tshirt', 'task_type': 'scrape', 'status': 'running'}
+
+    def _old_month(self, months_ago: int) -> str:
+        month = shift_month(month_key(), -months_ago)
+        return f"{month[:4]}-{month[4:]}-15 12:00:00"
+
+    def test_writes_go_to_current_partition(self):
+        """测试新日志写入当月分区，ID 可定位分区"""
+        log_id = self.db.insert_scrape_log(self.LOG)
+        self.db.update_scrape_log(log_id, status='completed')
+
+        self.assertEqual(str(log_id // ID_SPAN), month_key())
+        self.assertEqual(self.query(f"SELECT status FROM scrape_logs_{month_key()}"), [('completed',)])
+        self.assertEqual([log['id'] for log in self.db.get_scrape_logs(days=1)], [log_id])
+        self.assertEqual(self.query("SELECT type FROM sqlite_master WHERE name = 'scrape_logs'"), [('view',)])
+
+    def test_view_routes_and_maintenance_absorbs_default(self):
+        """测试视图插入落入默认分区，维护时整段移入新建的月分区"""
+        product_id = self.db.insert_product(make_product(1))
+        old = self._old_month(2)
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("INSERT INTO price_history (product_id, price, recorded_at) VALUES (?, 9.5, ?)",
+                         (product_id, old))
+        self.assertEqual(self.query("SELECT COUNT(*) FROM price_history_default")[0][0], 1)
+
+        report = self.db.maintain_partitions()
+
+        old_table = f"price_history_{old[:4]}{old[5:7]}"
+        self.assertEqual(report['price_history']['absorbed'], 1)
+        self.assertIn(old_table, report['price_history']['created'])
+        self.assertEqual(self.query(f"SELECT price, is_compacted FROM {old_table}"), [(9.5, 0)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM price_history_default")[0][0], 0)
+        self.assertEqual(len(self.db.get_price_history(product_id, days=120)), 1)
+        self.assertEqual(self.db.get_database_stats(use_cache=False)['price_history_count'], 1)
+
+    def test_price_trends_aggregate_per_partition(self):
+        """测试每日价格趋势逐分区聚合，默认分区有数据时结果不变"""
+        ids = [self.db.insert_product(make_product(i)) for i in range(3)]
+        expected_sql = """
+            SELECT DATE(recorded_at) AS date, ROUND(AVG(price), 2) AS avg_price,
+                   COUNT(DISTINCT product_id) AS product_count,
+                   ROUND(AVG(discount_percent), 1) AS avg_discount
+            FROM price_history WHERE recorded_at >= date('now', '-30 days')
+            GROUP BY DATE(recorded_at) ORDER BY date
+        """
+        self.db.maintain_partitions()  # 预建上月分区
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("INSERT INTO price_history (product_id, price, discount_percent, recorded_at) "
+                             "VALUES (?, ?, 10, datetime('now', ?))",
+                             [(pid, 10 + pid, f'-{days} days') for pid in ids for days in (0, 1, 20)])
+        trends = self.db.get_price_trends(30)
+        self.assertEqual([tuple(t.values()) for t in trends], self.query(expected_sql))
+        self.assertEqual(trends[-1]['product_count'], 3)
+
+        # 默认分区中有与月分区同一天的行时，先合并再聚合
+        extra = self.db.insert_product(make_product(3))
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("INSERT INTO price_history_default (product_id, price, recorded_at) "
+                         "VALUES (?, 1.0, datetime('now'))", (extra,))
+        trends = self.db.get_price_trends(30)
+        self.assertEqual([tuple(t.values()) for t in trends], self.query(expected_sql))
+        self.assertEqual(trends[-1]['product_count'], 4)
+
+    def test_retention_archives_and_drops_partition(self):
+        """测试过期分区归档后整表删除，计数器同步扣减"""
+        self.config.scrape_logs_retention_months = 2
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("INSERT INTO scrape_logs (platform, category, task_type, status, started_at) "
+                             "VALUES ('amazon', 'tshirt', 'scrape', 'completed', ?)",
+                             [(self._old_month(5),), (self._old_month(5),), (self._old_month(1),)])
+        self.db.insert_scrape_log(self.LOG)
+
+        report = self.db.maintain_partitions()['scrape_logs']
+
+        expired = f"scrape_logs_{shift_month(month_key(), -5)}"
+        self.assertEqual(report['dropped'], [expired])
+        self.assertEqual(report['rows_dropped'], 2)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM sqlite_master WHERE name = ?", (expired,))[0][0], 0)
+        with sqlite3.connect(report['archived'][0]) as archive:
+            self.assertEqual(archive.execute(f"SELECT COUNT(*) FROM {expired}").fetchone()[0], 2)
+        self.assertEqual(self.db.get_database_stats(use_cache=False)['scrape_logs_count'], 2)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM scrape_logs")[0][0], 2)
+
+    def test_migrates_legacy_tables(self):
+        """测试旧版单表首次启动时按月迁入分区并保留ID"""
+        self.db.close()
+        os.remove(self.config.db_path)
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE price_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER,
+                    price DECIMAL(10,2) NOT NULL, original_price DECIMAL(10,2),
+                    discount_percent INTEGER, recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE TABLE scrape_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, platform TEXT NOT NULL, category TEXT NOT NULL,
+                    task_type TEXT NOT NULL, status TEXT NOT NULL, records_found INTEGER DEFAULT 0,
+                    records_saved INTEGER DEFAULT 0, error_message TEXT,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, completed_at TIMESTAMP,
+                    duration_seconds INTEGER, user_agent TEXT, ip_address TEXT, session_id TEXT
+                );
+            """)
+            conn.executemany("INSERT INTO price_history (product_id, price, recorded_at) VALUES (NULL, ?, ?)",
+                             [(10.0, self._old_month(3)), (11.0, self._old_month(1)), (12.0, 'garbage')])
+            conn.execute("INSERT INTO scrape_logs (platform, category, task_type, status) "
+                         "VALUES ('amazon', 'tshirt', 'scrape', 'running')")
+
+        self.db = DatabaseManager(self.config)
+
+        self.assertEqual(self.query("SELECT id, price FROM price_history ORDER BY id"),
+                         [(1, 10.0), (2, 11.0), (3, 12.0)])
+        self.assertEqual(self.query("SELECT id FROM price_history_default"), [(3,)])
+        self.assertEqual(self.query("SELECT type FROM sqlite_master WHERE name = 'price_history'"), [('view',)])
+        self.db.update_scrape_log(1, status='completed')
+        self.assertEqual(self.query("SELECT status FROM scrape_logs"), [('completed',)])
+        stats = self.db.get_database_stats(use_cache=False)
+        self.assertEqual((stats['price_history_count'], stats['scrape_logs_count']), (3, 1))
+
+
+class TestDatabaseStats(DatabaseTestCase):
+    """测试统计信息计数器与缓存"""
+
+    def _exact(self):
+        return {
+            'products_count': self.query("SELECT COUNT(*) FROM products")[0][0],
+            'active_products': self.query("SELECT COUNT(*) FROM products WHERE is_active = 1")[0][0],
+            'hot_comments_count': self.query("SELECT COUNT(*) FROM hot_comments")[0][0],
+            'price_history_count': self.query("SELECT COUNT(*) FROM price_history")[0][0],
+        }
+
+    def test_counters_follow_writes(self):
+        """测试计数器随插入、软删除、级联删除同步更新"""
+        ids = [self.db.insert_product(make_product(i)) for i in range(4)]
+        for product_id in ids:
+            self.db.insert_hot_comment(product_id, {'comment_text': 'nice'})
+            self.db.update_product_price(product_id, 10.0)
+        self.db.delete_product(ids[0])
+        self.db.delete_product(ids[0])
+        self.db.delete_product(ids[1], soft_delete=False)
+
+        stats = self.db.get_database_stats(use_cache=False)
+
+        self.assertEqual({k: stats[k] for k in self._exact()}, self._exact())
+        self.assertEqual(stats['active_products'], 2)
+        self.assertEqual(stats['today_new_products'], 3)
+
+    def test_counters_seeded_for_existing_database(self):
+        """测试旧数据库升级时按现有数据初始化计数器"""
+        self.db.insert_product(make_product(1))
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("DELETE FROM table_counters")
+
+        self.db.close()
+        self.db = DatabaseManager(self.config)
+
+        self.assertEqual(self.db.get_database_stats()['products_count'], 1)
+
+    def test_today_failed_tasks(self):
+        """测试今日失败任务统计"""
+        log = {'platform': 'amazon', 'category': 'tshirt', 'task_type': 'scrape', 'status': 'failed'}
+        self.db.insert_scrape_log(log)
+        log_id = self.db.insert_scrape_log(dict(log, status='running'))
+        self.db.update_scrape_log(log_id, status='failed')
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("INSERT INTO scrape_logs (platform, category, task_type, status, started_at) "
+                         "VALUES ('amazon', 'tshirt', 'scrape', 'failed', datetime('now', '-2 days'))")
+
+        self.assertEqual(self.db.get_database_stats()['today_failed_tasks'], 2)
+
+    def test_snapshot_cache(self):
+        """测试统计快照在有效期内复用"""
+        self.config.stats_cache_ttl_seconds = 60
+        self.assertEqual(self.db.get_database_stats()['products_count'], 0)
+        self.db.insert_product(make_product(1))
+
+        self.assertEqual(self.db.get_database_stats()['products_count'], 0)
+        self.assertEqual(self.db.get_database_stats(use_cache=False)['products_count'], 1)
+
+
+class TestBackups(DatabaseTestCase):
+    """测试分步备份与增量备份"""
+
+    def setUp(self):
+        super().setUp()
+        self.config.backup_pages_per_step = 2
+        self.config.backup_step_sleep = 0
+        self.db.backups.pages_per_step = 2
+        self.db.backups.step_sleep = 0
+        for i in range(50):
+            self.db.insert_product(make_product(i, notes='x' * 500))
+
+    def _names(self, path):
+        with sqlite3.connect(path) as conn:
+            return [row[0] for row in conn.execute("SELECT product_name FROM products ORDER BY id")]
+
+    def test_full_backup_metrics(self):
+        """测试全量备份分步完成并记录指标"""
+        path = self.db.create_backup()
+
+        metrics = self.db.last_backup_metrics
+        self.assertGreater(metrics['steps'], 1)
+        self.assertGreater(metrics['throughput_mb_s'], 0)
+        self.assertIn('max_step_ms', metrics)
+        self.assertEqual(self._names(path), self._names(self.config.db_path))
+
+    def test_incremental_chain_restores(self):
+        """测试增量备份只保存变化页且可还原到对应时间点"""
+        self.db.create_backup("base.db")
+        self.db.insert_product(make_product(100))
+        first = self.db.create_incremental_backup("inc1")
+        expected_after_first = self._names(self.config.db_path)
+        self.db.delete_product(1, soft_delete=False)
+        self.db.create_incremental_backup("inc2")
+
+        entries = self.db.backups.load_manifest()
+        self.assertEqual([e['type'] for e in entries], ['full', 'incremental', 'incremental'])
+        self.assertLess(entries[1]['metrics']['changed_pages'], entries[0]['metrics']['pages'])
+
+        output = os.path.join(self.temp_dir, "restored.db")
+        self.db.backups.materialize(Path(first).name, output)
+        self.assertEqual(self._names(output), expected_after_first)
+
+        self.db.backups.materialize("inc2.delta", output)
+        self.assertEqual(self._names(output), self._names(self.config.db_path))
+
+    def test_incremental_without_base_creates_full(self):
+        """测试没有全量快照时增量备份退化为全量"""
+        self.db.create_incremental_backup()
+        self.assertEqual(self.db.backups.load_manifest()[0]['type'], 'full')
+
+    def test_cleanup_keeps_latest_chain(self):
+        """测试按链清理过期备份"""
+        self.db.create_backup("old.db")
+        self.db.create_incremental_backup("old_inc")
+        self.db.create_backup("new.db")
+        entries = self.db.backups.load_manifest()
+        for entry in entries:
+            entry['created_at'] = '2000-01-01T00:00:00'
+        self.db.backups._save_manifest(entries)
+
+        self.db.cleanup_old_backups()
+
+        self.assertEqual([e['file'] for e in self.db.backups.load_manifest()], ['new.db'])
+        self.assertFalse(os.path.exists(os.path.join(self.config.backup_dir, "old_inc.delta")))
+
+    @unittest.skipUnless(database_backup.zstd_available(), "未安装 zstandard")
+    def test_zstd_compression(self):
+        """测试 zstd 压缩备份可还原"""
+        self.db.backups.compress = True
+        self.db.create_backup("base.db")
+        self.db.create_incremental_backup("inc")
+
+        output = os.path.join(self.temp_dir, "restored.db")
+        self.db.backups.materialize("inc.delta.zst", output)
+        self.assertEqual(self._names(output), self._names(self.config.db_path))
+
+
+class TestRestore(DatabaseTestCase):
+    """测试备份恢复"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.insert_product(make_product(1))
+        self.backup_path = self.db.create_backup("base.db")
+        self.db.insert_product(make_product(2))
+
+    def _count(self):
+        return len(self.db.get_products())
+
+    def test_restore_full_backup(self):
+        """测试恢复全量备份后连接池可用"""
+        self.assertEqual(self._count(), 2)
+
+        self.db.restore_backup(self.backup_path)
+
+        self.assertEqual(self._count(), 1)
+        self.assertFalse(os.path.exists(self.config.db_path + ".restoring"))
+        self.db.insert_product(make_product(3))
+        self.assertEqual(self._count(), 2)
+
+    def test_restore_incremental_backup(self):
+        """测试恢复增量备份"""
+        path = self.db.create_incremental_backup("inc")
+        self.db.insert_product(make_product(3))
+
+        self.db.restore_backup(path)
+
+        self.assertEqual(self._count(), 2)
+
+    def test_waits_for_checked_out_connection(self):
+        """测试恢复等待借出的连接归还"""
+        released = []
+
+        def hold():
+            with self.db.pool.get_connection():
+                time.sleep(0.3)
+                released.append(time.monotonic())
+
+        worker = threading.Thread(target=hold)
+        worker.start()
+        time.sleep(0.05)
+        self.db.restore_backup(self.backup_path)
+        swapped = time.monotonic()
+        worker.join()
+
+        self.assertLessEqual(released[0], swapped)
+        self.assertEqual(self.db.pool.checked_out, 0)
+        self.assertEqual(self._count(), 1)
+
+    def test_drain_timeout_keeps_database(self):
+        """测试等待超时时保留原数据库"""
+        with self.db.pool.get_connection():
+            with self.assertRaises(TimeoutError):
+                self.db.restore_backup(self.backup_path, drain_timeout=0.1)
+        self.assertEqual(self._count(), 2)
+
+    def test_rejects_corrupt_backup(self):
+        """测试损坏的备份文件不会替换原库"""
+        corrupt = os.path.join(self.temp_dir, "corrupt.db")
+        with open(corrupt, 'wb') as f:
+            f.write(b'not a database' * 100)
+
+        with self.assertRaises(sqlite3.DatabaseError):
+            self.db.restore_backup(corrupt)
+        self.assertEqual(self._count(), 2)
+
+
+class TestProductValidation(DatabaseTestCase):
+    """测试产品写入前的批量校验"""
+
+    def test_batch_reports_all_rejected_rows(self):
+        """测试整批校验，一次返回全部不合格行及原因"""
+        products = [
+            make_product(1),
+            make_product(2, price=-1, rating=7),
+            make_product(3, platform='shein'),
+            make_product(4, category='jeans', product_url=None),
+            make_product(5, colour='red'),
+            make_product(6, rating=4.5),
+        ]
+
+        result = self.db.insert_products(products)
+
+        self.assertEqual(result['inserted'], 2)
+        self.assertEqual([item['index'] for item in result['rejected']], [1, 2, 3, 4])
+        self.assertEqual(result['rejected'][0]['errors'], ['价格必须大于0', '评分必须在0-5之间'])
+        self.assertEqual(len(result['rejected'][2]['errors']), 2)
+        self.assertEqual(self.db.get_database_stats(use_cache=False)['products_count'], 2)
+
+    def test_batch_upserts_by_url(self):
+        """测试批量写入按 product_url 更新已存在的产品"""
+        self.db.insert_product(make_product(1, price=10.0))
+
+        result = self.db.insert_products([
+            make_product(1, price=12.0, keywords=['a']),
+            make_product(2),
+            make_product(2, price=30.0),
+        ])
+
+        self.assertEqual((result['inserted'], result['updated']), (1, 1))
+        prices = dict(self.query("SELECT product_url, price FROM products"))
+        self.assertEqual(prices, {"https://amazon.com/product/1": 12.0,
+                                  "https://amazon.com/product/2": 30.0})
+
+    def test_enums_from_config(self):
+        """测试平台、分类枚举来自配置"""
+        self.config.allowed_platforms = ('tiktok', 'amazon', 'shein')
+        self.assertEqual(self.db.insert_products([make_product(1, platform='shein')])['inserted'], 1)
+
+    def test_single_insert_raises(self):
+        """测试单条写入校验失败时抛出异常且不写入"""
+        with self.assertRaises(ProductValidationError) as ctx:
+            self.db.insert_product(make_product(1, price=0))
+        self.assertEqual(ctx.exception.rejected[0]['errors'], ['价格必须大于0'])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM products")[0][0], 0)
+
+    def test_legacy_triggers_removed(self):
+        """测试旧版校验触发器和 products_price_check 表被移除"""
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("CREATE TABLE products_price_check AS SELECT * FROM products WHERE 1=0")
+            conn.execute("CREATE TRIGGER products_price_validation BEFORE INSERT ON products "
+                         "WHEN NEW.price <= 0 BEGIN SELECT RAISE(ABORT, 'x'); END")
+        self.db.close()
+        self.db = DatabaseManager(self.config)
+
+        names = {row[0] for row in self.query("SELECT name FROM sqlite_master")}
+        self.assertNotIn('products_price_check', names)
+        self.assertNotIn('products_price_validation', names)
+
+
+class TestSearch(DatabaseTestCase):
+    """测试全文搜索"""
+
+    def setUp(self):
+        super().setUp()
+        self.hoodie = self.db.insert_product(make_product(
+            1, product_name="Oversized Vintage Hoodie", category='hoodie', keywords=['streetwear']))
+        self.tee = self.db.insert_product(make_product(
+            2, product_name="Graphic Tee", keywords=['vintage', 'cotton']))
+        self.other = self.db.insert_product(make_product(
+            3, product_name="Plain Sweatshirt", category='sweatshirt', platform='tiktok'))
+
+    def _ids(self, *args, **kwargs):
+        return [p['id'] for p in self.db.search_products(*args, **kwargs)]
+
+    def test_bm25_ranks_name_above_keywords(self):
+        """测试产品名命中排在关键词命中之前"""
+        self.assertEqual(self._ids("vintage"), [self.hoodie, self.tee])
+
+    def test_prefix_matching(self):
+        """测试最后一个词前缀匹配"""
+        self.assertEqual(self._ids("hood"), [self.hoodie])
+        self.assertEqual(self._ids("hood", prefix=False), [])
+        self.assertEqual(self._ids("graphic te"), [self.tee])
+
+    def test_filters_and_inactive(self):
+        """测试平台/分类过滤及排除已删除产品"""
+        self.assertEqual(self._ids("vintage", category='tshirt'), [self.tee])
+        self.db.delete_product(self.tee)
+        self.assertEqual(self._ids("vintage"), [self.hoodie])
+
+    def test_index_follows_updates_and_comments(self):
+        """测试产品更新、评论增删同步到索引"""
+        self.db.insert_product(make_product(3, product_name="Cozy Fleece Sweatshirt",
+                                            category='sweatshirt', platform='tiktok'))
+        self.assertEqual(self._ids("fleece"), [self.other])
+        self.assertEqual(self._ids("plain"), [])
+
+        self.db.insert_hot_comment(self.tee, {'comment_text': 'runs small, order a size up'})
+        self.assertEqual(self._ids("runs small"), [self.tee])
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("DELETE FROM hot_comments")
+        self.assertEqual(self._ids("small"), [])
+
+        self.db.delete_product(self.other, soft_delete=False)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM products_fts")[0][0], 2)
+
+    def test_backfill_existing_database(self):
+        """测试旧数据库升级时回填索引"""
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("DROP TABLE products_fts")
+        self.db.close()
+        self.db = DatabaseManager(self.config)
+
+        self.assertEqual(self._ids("sweatshirt"), [self.other])
+
+    def test_candidate_cap_keeps_newest_matches(self):
+        """测试命中过多时只在最新的命中中排序"""
+        self.config.search_max_candidates = 2
+        newest = self.db.insert_product(make_product(4, product_name="Vintage Tee"))
+
+        self.assertEqual(sorted(self._ids("vintage")), [self.tee, newest])
+
+    def test_query_syntax_is_escaped(self):
+        """测试用户输入中的 FTS 语法字符不会导致错误"""
+        self.assertEqual(self._ids('hoodie" OR *'), [])
+        self.assertEqual(self._ids('"hoodie"'), [self.hoodie])
+        self.assertEqual(self._ids('   '), [])
+
+
+class TestHotComments(DatabaseTestCase):
+    """测试热度评论批量写入与按产品取前 N 条"""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [self.db.insert_product(make_product(i)) for i in range(3)]
+
+    def test_bulk_insert_skips_invalid(self):
+        """测试批量写入跳过缺少内容或产品不存在的评论"""
+        result = self.db.insert_hot_comments([
+            {'product_id': self.ids[0], 'comment_text': 'a', 'likes_count': 3},
+            {'product_id': self.ids[1], 'comment_text': 'b'},
+            {'product_id': self.ids[1]},
+            {'product_id': 9999, 'comment_text': 'ghost'},
+        ])
+        self.assertEqual(result, {'received': 4, 'inserted': 2, 'skipped': 2})
+        self.assertEqual(self.query("SELECT COUNT(*) FROM hot_comments")[0][0], 2)
+        with self.assertRaises(ValueError):
+            self.db.insert_hot_comment(9999, {'comment_text': 'ghost'})
+
+    def test_top_n_per_product(self):
+        """测试一次查询返回每个产品点赞最多的前 N 条"""
+        self.db.insert_hot_comments([
+            {'product_id': pid, 'comment_text': f"{pid}-{likes}", 'likes_count': likes}
+            for pid in self.ids[:2] for likes in (5, 50, 20, 1)
+        ])
+        top = self.db.get_hot_comments_for_products(self.ids + [self.ids[0]], limit_per_product=2)
+        self.assertEqual(list(top), self.ids)
+        for pid in self.ids[:2]:
+            self.assertEqual([c['likes_count'] for c in top[pid]], [50, 20])
+            self.assertEqual(top[pid], self.db.get_hot_comments(pid, limit=2))
+        self.assertEqual(top[self.ids[2]], [])
+
+    def test_top_n_uses_covering_index(self):
+        """测试按产品取前 N 条只读取复合索引、无需排序"""
+        plan = " ".join(row[3] for row in self.query("""
+            EXPLAIN QUERY PLAN
+            SELECT id FROM hot_comments WHERE product_id = 1
+            ORDER BY likes_count DESC, captured_at DESC LIMIT 5
+        """))
+        self.assertIn("COVERING INDEX idx_hot_comments_product_likes", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TestConnectionPool(DatabaseTestCase):
+    """测试读写分离连接池"""
+
+    def test_readers_created_lazily_and_read_only(self):
+        """测试只读连接按需创建且拒绝写入"""
+        self.assertEqual(self.db.pool.metrics()['open_readers'], 0)
+
+        with self.db.pool.read_connection() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM products")
+
+        metrics = self.db.pool.metrics()
+        self.assertEqual(metrics['open_readers'], 1)
+        self.assertEqual(metrics['idle_readers'], 1)
+
+    def test_readers_limited_to_pool_size(self):
+        """测试只读连接不超过上限，超时抛出 RuntimeError"""
+        with self.db.pool.read_connection(), self.db.pool.read_connection():
+            with self.assertRaises(RuntimeError):
+                with self.db.pool.read_connection(timeout=0.05):
+                    pass
+        self.assertEqual(self.db.pool.metrics()['timeouts'], 1)
+
+    def test_single_writer(self):
+        """测试写连接同一时间只借给一个线程，同线程可重入"""
+        with self.db.pool.get_connection() as outer:
+            with self.db.pool.get_connection() as inner:
+                self.assertIs(inner, outer)
+
+            result = []
+            worker = threading.Thread(target=lambda: result.append(
+                self._try_writer(timeout=0.05)))
+            worker.start()
+            worker.join()
+            self.assertEqual(result, [False])
+
+        self.assertTrue(self._try_writer(timeout=0.05))
+        self.assertEqual(self.db.pool.checked_out, 0)
+
+    def _try_writer(self, timeout):
+        try:
+            with self.db.pool.get_connection(timeout=timeout):
+                return True
+        except RuntimeError:
+            return False
+
+    def test_uncommitted_write_rolled_back(self):
+        """测试写连接归还时回滚未提交的事务"""
+        with self.db.pool.get_connection() as conn:
+            conn.execute("INSERT INTO products (product_name, platform, category, price, product_url) "
+                         "VALUES ('x', 'amazon', 'tshirt', 1.0, 'https://amazon.com/x')")
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM products")[0][0], 0)
+
+    def test_idle_readers_reaped(self):
+        """测试空闲读连接超时回收"""
+        self.db.pool.idle_timeout = 0.05
+        with self.db.pool.read_connection(), self.db.pool.read_connection():
+            pass
+        time.sleep(0.1)
+        with self.db.pool.read_connection():
+            pass
+
+        metrics = self.db.pool.metrics()
+        self.assertEqual(metrics['readers_reaped'], 2)
+        self.assertEqual(metrics['open_readers'], 1)
+
+    def test_leak_detection_and_histograms(self):
+        """测试长时间占用的连接被记为疑似泄漏，并记录直方图"""
+        self.db.pool.leak_threshold = 0.05
+        with self.db.pool.get_connection():
+            time.sleep(0.1)
+            leaks = self.db.pool.metrics()['leaks']
+        self.assertEqual([leak['role'] for leak in leaks], ['write'])
+
+        metrics = self.db.pool.metrics()
+        self.assertEqual(metrics['leaks'], [])
+        self.assertEqual(metrics['leaks_detected'], 1)
+        self.assertGreaterEqual(metrics['write_hold_ms']['max_ms'], 100)
+        self.assertGreater(metrics['write_wait_ms']['count'], 0)
+
+    def test_reads_see_committed_writes(self):
+        """测试只读连接能读到写连接已提交的数据"""
+        product_id = self.db.insert_product(make_product(1))
+        self.db.update_product_price(product_id, 15.0)
+
+        self.assertEqual(self.db.get_products()[0]['price'], 15.0)
+        self.assertEqual(len(self.db.get_price_history(product_id)), 1)
+
+
+class TestPerformanceProfiles(DatabaseTestCase):
+    """测试按负载选择的连接性能配置"""
+
+    def _pragma(self, conn, name):
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_profile_applied_to_writer_and_readers(self):
+        """测试写连接与只读连接都应用性能配置"""
+        self.db.close()
+        self.config.performance_profile = 'ingest'
+        self.db = DatabaseManager(self.config)
+        expected = PERFORMANCE_PROFILES['ingest']
+
+        with self.db.pool.get_connection() as conn:
+            self.assertEqual(self._pragma(conn, 'cache_size'), expected['cache_size'])
+            self.assertEqual(self._pragma(conn, 'wal_autocheckpoint'), expected['wal_autocheckpoint'])
+            self.assertEqual(self._pragma(conn, 'busy_timeout'), expected['busy_timeout'])
+            self.assertEqual(self._pragma(conn, 'temp_store'), 2)
+        with self.db.pool.read_connection() as conn:
+            self.assertEqual(self._pragma(conn, 'cache_size'), expected['cache_size'])
+            self.assertEqual(self._pragma(conn, 'query_only'), 1)
+
+    def test_without_profile_uses_sqlite_defaults(self):
+        """测试不指定配置时保持 SQLite 默认参数"""
+        self.db.close()
+        self.config.performance_profile = None
+        self.db = DatabaseManager(self.config)
+
+        with self.db.pool.get_connection() as conn:
+            self.assertEqual(self._pragma(conn, 'temp_store'), 0)
+            self.assertEqual(self._pragma(conn, 'journal_mode'), 'wal')
+
+    def test_unknown_profile_rejected(self):
+        """测试未知配置名称报错"""
+        self.config.performance_profile = 'turbo'
+        with self.assertRaises(ValueError):
+            DatabaseManager(self.config)
+
+    def test_optimize(self):
+        """测试更新查询规划器统计信息"""
+        for i in range(20):
+            self.db.insert_product(make_product(i))
+
+        self.assertEqual(self.db.optimize()['mode'], 'optimize')
+        self.assertEqual(self.db.optimize(analyze=True)['mode'], 'analyze')
+        self.assertTrue(self.query("SELECT COUNT(*) FROM sqlite_stat1")[0][0] > 0)
+        self.assertEqual(self.db.last_optimize['mode'], 'analyze')
+
+
+
+class TestChangeEvents(DatabaseTestCase):
+    """测试产品库数据变化回调"""
+
+    def setUp(self):
+        super().setUp()
+        self.events = []
+        self.db.listeners.append(lambda event_type, data: self.events.append((event_type, data)))
+
+    def test_products_added_only_for_new_products(self):
+        """测试批量写入只对新增产品发出事件"""
+        self.db.insert_products([make_product(i) for i in range(3)])
+        self.db.insert_products([make_product(i, price=30.0) for i in range(4)])
+
+        self.assertEqual([(t, d['count']) for t, d in self.events], [('products_added', 3), ('products_added', 1)])
+        self.assertEqual(self.events[1][1]['products'][0]['product_url'], "https://amazon.com/product/3")
+
+    def test_price_changed_lists_changed_products(self):
+        """测试价格事件只包含价格实际变化的产品，回调异常不影响写入"""
+        ids = [self.db.insert_product(make_product(i)) for i in range(3)]
+        self.db.listeners.insert(0, Mock(side_effect=RuntimeError("boom")))
+        self.events.clear()
+
+        result = self.db.update_product_prices([(ids[0], 18.0, None), (ids[1], 20.0, None)])
+
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(self.events, [('price_changed', {
+            'count': 1, 'changes': [{'product_id': ids[0], 'old_price': 20.0, 'price': 18.0}]})])
+
+
+class TestAnalytics(DatabaseTestCase):
+    """测试看板聚合查询与时间桶缓存"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.insert_products([
+            make_product(i, platform=('tiktok', 'amazon')[i % 2], category=('tshirt', 'hoodie', 'sweatshirt')[i % 3],
+                         price=10.0 + i, rating=3.0 + (i % 3) * 0.5, sales_count=i * 10, like_count=100 - i)
+            for i in range(30)
+        ])
+        self.db.delete_product(1)
+
+    def test_platform_comparison_and_categories(self):
+        """测试平台对比、分类明细与直接 SQL 汇总一致"""
+        data = self.db.analytics.platform_comparison()
+        expected = {row[0]: row[1:] for row in self.query(
+            "SELECT platform, COUNT(*), ROUND(AVG(price), 2), SUM(sales_count) FROM products "
+            "WHERE is_active = 1 GROUP BY platform")}
+
+        self.assertEqual(data['total']['product_count'], 29)
+        for entry in data['platforms']:
+            self.assertEqual((entry['product_count'], entry['avg_price'], entry['total_sales']),
+                             expected[entry['platform']])
+        self.assertAlmostEqual(sum(entry['share'] for entry in data['platforms']), 1.0)
+
+        categories = self.db.analytics.category_breakdown()
+        self.assertEqual(sum(c['product_count'] for c in categories['categories']), 29)
+        hoodie = next(c for c in categories['categories'] if c['category'] == 'hoodie')
+        self.assertEqual(hoodie['platforms']['amazon']['product_count'], self.query(
+            "SELECT COUNT(*) FROM products WHERE is_active = 1 AND category = 'hoodie' AND platform = 'amazon'")[0][0])
+        self.assertEqual(self.db.analytics.category_breakdown('tiktok')['total']['product_count'], 14)
+
+    def test_price_distribution(self):
+        """测试价格直方图覆盖全部价格，最高价落在最后一个区间"""
+        data = self.db.analytics.price_distribution(bins=4)
+
+        self.assertEqual(len(data['bins']), 4)
+        self.assertEqual((data['min_price'], data['max_price']), (11.0, 39.0))
+        self.assertEqual(sum(b['count'] for b in data['bins']), 29)
+        self.assertEqual(data['bins'][-1]['upper'], 39.0)
+        self.assertTrue(data['bins'][-1]['count'] > 0)
+        self.assertTrue(11.0 < data['percentiles']['p50'] < 39.0)
+
+        filtered = self.db.analytics.price_distribution(bins=2, platform='amazon', min_price=0, max_price=20)
+        self.assertEqual(filtered['product_count'], self.query(
+            "SELECT COUNT(*) FROM products WHERE is_active = 1 AND platform = 'amazon' AND price <= 20")[0][0])
+
+    def test_ranking(self):
+        """测试排行顺序，且排序只读覆盖索引"""
+        ranking = self.db.analytics.ranking('likes', limit=3, platform='amazon')
+
+        self.assertEqual([p['id'] for p in ranking['products']], [r[0] for r in self.query(
+            "SELECT id FROM products WHERE is_active = 1 AND platform = 'amazon' ORDER BY like_count DESC LIMIT 3")])
+        self.assertEqual([p['rank'] for p in ranking['products']], [1, 2, 3])
+        with self.assertRaises(ValueError):
+            self.db.analytics.ranking('price')
+
+        plan = self.query("EXPLAIN QUERY PLAN SELECT id, sales_count * 0.6 + rating * 0.4 AS score FROM products "
+                          "WHERE is_active = 1 ORDER BY score DESC LIMIT 10")
+        self.assertIn('COVERING INDEX idx_products_analytics', ' '.join(row[-1] for row in plan))
+
+    def test_time_bucket_cache(self):
+        """测试同一时间桶内复用结果，进入下一个桶后重新计算"""
+        from unittest.mock import patch
+        analytics = self.db.analytics
+        with patch('database_analytics.time.time', return_value=1_000_000.0):
+            first = analytics.platform_comparison()
+            self.db.delete_product(2)
+            self.assertIs(analytics.platform_comparison(), first)
+        with patch('database_analytics.time.time', return_value=1_000_000.0 + analytics.bucket_seconds):
+            self.assertEqual(analytics.platform_comparison()['total']['product_count'], 28)
+        self.assertEqual(first['total']['product_count'], 29)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -23,8 +23,8 @@ sys.path.append(str(Path(__file__).parent))
 
 from main import (
     MainCoordinator, Platform, TaskStatus, 
-    ScrapingTask, ScrapingResult, 
-    ConfigManager, DatabaseManager, DataIntegrator
+    ScrapingTask, ScrapingResult, ScrapeJob, JobQueue, JobQueueFull,
+    ConfigManager, DatabaseManager, DataIntegrator, PerformanceMonitor
 )
 
 
@@ -70,6 +70,57 @@ class TestConfigManager(unittest.TestCase):
         self.assertIsNone(config_manager.get("non.existent.key"))
         self.assertEqual(config_manager.get("non.existent.key", "default"), "default")
 
+    def test_snapshot_flattens_and_coerces(self):
+        """测试快照展开中间层并按默认配置的类型转换"""
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write("scraping:\n  amazon:\n    max_concurrent: '5'\n    enabled: 'off'\n"
+                    "jobs:\n  poll_interval: 2\n")
+        config_manager = ConfigManager(self.config_file)
+
+        self.assertEqual(config_manager.get("scraping.amazon.max_concurrent"), 5)
+        self.assertIs(config_manager.get("scraping.amazon.enabled"), False)
+        self.assertIsInstance(config_manager.get("jobs.poll_interval"), float)
+        self.assertEqual(config_manager.get("scraping.amazon"), {"max_concurrent": 5, "enabled": False})
+        with self.assertRaises(TypeError):
+            config_manager.snapshot.values["jobs.poll_interval"] = 1.0
+
+    def test_update_debounces_writes(self):
+        """测试 update 立即生效、多次修改合并为一次写文件"""
+        config_manager = ConfigManager(self.config_file, save_delay=60)
+        received = []
+        config_manager.subscribe(received.append)
+
+        with patch.object(config_manager, '_write', wraps=config_manager._write) as write:
+            for delay in (3, 4, 5):
+                config_manager.update("scraping.amazon.request_delay", delay)
+            config_manager.update("custom.section.flag", True)
+            self.assertEqual(write.call_count, 0)
+            config_manager.flush()
+            config_manager.flush()
+            self.assertEqual(write.call_count, 1)
+
+        self.assertEqual(config_manager.get("scraping.amazon.request_delay"), 5.0)
+        self.assertEqual(len(received), 4)
+        self.assertTrue(ConfigManager(self.config_file).get("custom.section.flag"))
+
+    def test_reload_if_changed(self):
+        """测试配置文件被外部修改后重新加载，解析失败时保留当前配置"""
+        config_manager = ConfigManager(self.config_file)
+        monitor = PerformanceMonitor(config_manager)
+        self.assertFalse(config_manager.reload_if_changed())
+
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write("monitoring:\n  alert_thresholds:\n    avg_response_time: 12\n")
+        os.utime(self.config_file, ns=(0, 1))
+        self.assertTrue(config_manager.reload_if_changed())
+        self.assertEqual(monitor.response_time_threshold, 12)
+
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write("monitoring: [unclosed\n")
+        os.utime(self.config_file, ns=(0, 2))
+        self.assertFalse(config_manager.reload_if_changed())
+        self.assertEqual(config_manager.get("monitoring.alert_thresholds.avg_response_time"), 12)
+
 
 class TestDatabaseManager(unittest.TestCase):
     """测试数据库管理器"""
@@ -152,6 +203,42 @@ class TestDatabaseManager(unittest.TestCase):
             self.assertEqual(row[3], 19.99)
 
 
+class TestEventLog(unittest.TestCase):
+    """测试推送事件表"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config = ConfigManager(os.path.join(self.temp_dir, "config.yaml"))
+        config.config["database"]["path"] = os.path.join(self.temp_dir, "test.db")
+        config.save()
+        self.db_manager = DatabaseManager(config)
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_events_read_in_order_after_seq(self):
+        """按序号读取之后的事件"""
+        self.assertEqual(self.db_manager.last_event_seq(), 0)
+        first = self.db_manager.save_event("task_completed", {"task_id": "t1", "items_found": 3})
+        second = self.db_manager.save_event("job_finished", {"job_id": "j1"})
+        
+        events = self.db_manager.get_events(first)
+        self.assertEqual([(e["seq"], e["type"], e["data"]) for e in events],
+                         [(second, "job_finished", {"job_id": "j1"})])
+        self.assertEqual(len(self.db_manager.get_events(0)), 2)
+        self.assertEqual(self.db_manager.last_event_seq(), second)
+    
+    def test_old_events_trimmed(self):
+        """只保留最近的事件"""
+        with patch.object(DatabaseManager, "EVENT_RETENTION", 5), patch.object(DatabaseManager, "EVENT_TRIM_EVERY", 10):
+            for i in range(20):
+                self.db_manager.save_event("task_completed", {"i": i})
+        
+        events = self.db_manager.get_events(0)
+        self.assertEqual([e["data"]["i"] for e in events], list(range(15, 20)))
+
+
 class TestDataIntegrator(unittest.TestCase):
     """测试数据整合器"""
     
@@ -377,6 +464,185 @@ class TestAsyncFunctions(unittest.TestCase):
         self.assertEqual(len(failed), 1)
 
 
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    """测试后台作业队列"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config = ConfigManager(os.path.join(self.temp_dir, "config.yaml"))
+        config.config["database"]["path"] = os.path.join(self.temp_dir, "test.db")
+        config.save()
+        self.db_manager = DatabaseManager(config)
+        self.release = asyncio.Event()
+        self.release.set()
+        
+        # 只替换抓取流程，作业队列与数据库使用真实实现
+        self.coordinator = Mock(db_manager=self.db_manager)
+        self.coordinator.scrape_platform = self._fake_scrape_platform
+        self.queue = JobQueue(self.coordinator, max_workers=1)
+    
+    async def asyncTearDown(self):
+        await self.queue.stop()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    async def _fake_scrape_platform(self, platform, categories, keywords, max_pages, progress=None):
+        progress(stage="scraping", total_tasks=len(categories))
+        results = []
+        for i, category in enumerate(categories):
+            await self.release.wait()
+            result = ScrapingResult(f"task{i}", platform, i % 2 == 0, [], items_found=10)
+            results.append(result)
+            progress(result=result)
+        progress(stage="reporting")
+        return results
+    
+    async def _wait_finished(self, job_id: str) -> ScrapeJob:
+        for _ in range(200):
+            job = self.queue.get(job_id)
+            if job.finished:
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"作业未完成: {job_id}")
+    
+    def _params(self, categories=("T-Shirt", "Hoodie", "Sweatshirt")):
+        return {"platform": "amazon", "categories": list(categories), "keywords": ["print"], "max_pages": 1}
+    
+    async def test_submit_returns_before_job_runs(self):
+        """提交立即返回，作业完成后进度与结果持久化"""
+        await self.queue.start()
+        self.release.clear()
+        
+        job = self.queue.submit("platform", self._params())
+        self.assertEqual(job.status, TaskStatus.PENDING)
+        
+        self.release.set()
+        job = await self._wait_finished(job.job_id)
+        self.assertEqual(job.status, TaskStatus.SUCCESS)
+        self.assertEqual(job.stage, "done")
+        self.assertEqual((job.total_tasks, job.completed_tasks, job.failed_tasks), (3, 3, 1))
+        self.assertEqual(job.items_found, 20)
+        self.assertEqual(job.result["platforms"]["amazon"]["successful_tasks"], 2)
+        
+        # 完成后从数据库读取
+        self.assertNotIn(job.job_id, self.queue.jobs)
+        stored = self.db_manager.get_jobs(job_id=job.job_id)[0]
+        self.assertEqual(stored.snapshot(), job.snapshot())
+    
+    async def test_failed_job(self):
+        """抓取异常时作业标记为失败"""
+        await self.queue.start()
+        job = self.queue.submit("platform", dict(self._params(), platform="unknown"))
+        job = await self._wait_finished(job.job_id)
+        self.assertEqual(job.status, TaskStatus.FAILED)
+        self.assertIn("unknown", job.error_message)
+    
+    async def test_listeners_called_when_job_finishes(self):
+        """作业结束后通知回调（回调异常不影响作业状态）"""
+        finished = []
+        self.queue.listeners.append(lambda job: finished.append(job.job_id))
+        self.queue.listeners.append(Mock(side_effect=RuntimeError("boom")))
+        await self.queue.start()
+        
+        job = self.queue.submit("platform", self._params())
+        job = await self._wait_finished(job.job_id)
+        self.assertEqual(job.status, TaskStatus.SUCCESS)
+        for _ in range(100):
+            if finished:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(finished, [job.job_id])
+    
+    async def test_resumes_unfinished_jobs_after_restart(self):
+        """重启后重新执行中断的作业"""
+        interrupted = ScrapeJob(job_id="interrupted", kind="platform", params=self._params(),
+                                status=TaskStatus.RUNNING, stage="scraping",
+                                total_tasks=3, completed_tasks=1, items_found=10)
+        self.db_manager.save_job(interrupted)
+        
+        await self.queue.start()
+        job = await self._wait_finished("interrupted")
+        self.assertEqual(job.status, TaskStatus.SUCCESS)
+        self.assertEqual((job.completed_tasks, job.items_found), (3, 20))
+    
+    async def test_subscribe_streams_progress(self):
+        """订阅者按顺序收到各阶段进度，作业结束后迭代结束"""
+        await self.queue.start()
+        self.release.clear()
+        job = self.queue.submit("platform", self._params(categories=["T-Shirt"]))
+        
+        snapshots = []
+        async def collect():
+            async for snapshot in self.queue.subscribe(job.job_id, heartbeat=0.05):
+                snapshots.append(snapshot)
+        
+        collector = asyncio.create_task(collect())
+        await asyncio.sleep(0.1)
+        self.release.set()
+        await asyncio.wait_for(collector, 2)
+        
+        stages = [s["stage"] for s in snapshots if s is not None]
+        self.assertEqual(stages[-1], "done")
+        self.assertIn("scraping", stages)
+        self.assertIn(None, snapshots)  # 等待期间的保活
+        self.assertEqual(snapshots[-1]["status"], "success")
+        self.assertEqual(snapshots[-1]["items_found"], 10)
+        self.assertEqual(self.queue._subscribers, {})
+
+    async def test_scheduler_runs_jobs_submitted_by_web_worker(self):
+        """多 worker 部署：web 进程只提交作业，调度进程从共享数据库领取执行"""
+        web_coordinator = Mock(db_manager=DatabaseManager(self.db_manager.config))
+        web_queue = JobQueue(web_coordinator, max_workers=1, poll_interval=0.05)
+        await web_queue.start(run_jobs=False)
+
+        job = web_queue.submit("platform", self._params())
+        await asyncio.sleep(0.1)
+        self.assertEqual(web_queue.get(job.job_id).status, TaskStatus.PENDING)
+        web_coordinator.scrape_platform.assert_not_called()
+
+        self.queue.poll_interval = 0.05
+        await self.queue.start()
+        snapshots = [s async for s in web_queue.subscribe(job.job_id, heartbeat=1.0) if s is not None]
+        self.assertEqual(snapshots[-1]["status"], "success")
+        self.assertEqual(snapshots[-1]["completed_tasks"], 3)
+        self.assertNotIn(job.job_id, web_queue.jobs)
+        await web_queue.stop()
+    
+    async def test_identical_jobs_coalesced(self):
+        """相同参数的作业未结束时合并，参数不同或已结束时新建"""
+        job, coalesced = self.queue.admit("platform", self._params())
+        self.assertFalse(coalesced)
+        
+        same, coalesced = self.queue.admit("platform", dict(reversed(list(self._params().items()))))
+        self.assertTrue(coalesced)
+        self.assertEqual(same.job_id, job.job_id)
+        other, coalesced = self.queue.admit("platform", self._params(["Hoodie"]))
+        self.assertFalse(coalesced)
+        self.assertEqual(len(self.db_manager.get_jobs()), 2)
+        
+        await self.queue.start()
+        await self._wait_finished(job.job_id)
+        again, coalesced = self.queue.admit("platform", self._params())
+        self.assertFalse(coalesced)
+        self.assertNotEqual(again.job_id, job.job_id)
+    
+    async def test_pending_jobs_capped(self):
+        """待执行作业达到上限时拒绝新提交并给出重试时间"""
+        self.queue.max_pending = 2
+        self.queue.admit("platform", self._params(["T-Shirt"]))
+        self.queue.admit("platform", self._params(["Hoodie"]))
+        
+        with self.assertRaises(JobQueueFull) as context:
+            self.queue.admit("platform", self._params(["Sweatshirt"]))
+        self.assertEqual(context.exception.pending, 2)
+        self.assertEqual(context.exception.retry_after, JobQueue.DEFAULT_JOB_SECONDS // self.queue.max_workers)
+        # 相同的作业仍可合并
+        self.assertTrue(self.queue.admit("platform", self._params(["Hoodie"]))[1])
+        self.assertEqual(len(self.db_manager.get_jobs()), 2)
+
+
 def run_tests():
     """运行所有测试"""
     # 创建测试套件
@@ -386,9 +652,11 @@ def run_tests():
     test_classes = [
         TestConfigManager,
         TestDatabaseManager,
+        TestEventLog,
         TestDataIntegrator,
         TestMainCoordinator,
-        TestAsyncFunctions
+        TestAsyncFunctions,
+        TestJobQueue
     ]
     
     for test_class in test_classes:
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TikTok抓取脚本测试用例
+================
+
+验证链接验证缓存、数据库读写等不依赖网络的核心逻辑。
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# 添加项目根目录到Python路径
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+import link_extractor
+from tiktok_scraper import (
+    DatabaseManager, ProductLinkValidator, ScrapingConfig, TikHubAPIClient, TikTokVideo,
+    upload_timestamp
+)
+
+
+def make_video(video_id: str, hashtags=None, **overrides) -> TikTokVideo:
+    """构造测试视频"""
+    data = dict(
+        video_id=video_id, title=f"title {video_id}", description="", author="a",
+        author_id="a1", author_followers=0, author_following=0, likes=0, comments=0,
+        shares=0, views=0, hashtags=hashtags or [], music_info="", product_links=[],
+        product_images=[], upload_time="", region="US", language="en",
+        scraped_at="2025-01-01T00:00:00", source="tikhub_api", data_hash=""
+    )
+    data.update(overrides)
+    return TikTokVideo(**data)
+
+
+class TestLinkExtractor(unittest.TestCase):
+    """测试文案提取"""
+
+    def test_single_scan_extracts_all(self):
+        """测试一次扫描同时提取标签、链接和平台"""
+        text = ("New drop #hoodie #OOTD https://www.amazon.com/dp/B01?tag=x "
+                "also https://bit.ly/abc #hoodie")
+        result = link_extractor.extract(text)
+
+        self.assertEqual(result.hashtags, ['#hoodie', '#OOTD'])
+        self.assertEqual(result.product_links, ['https://www.amazon.com/dp/B01?tag=x', 'bit.ly/abc'])
+        self.assertEqual(result.link_platforms['bit.ly/abc'], 'other')
+        self.assertEqual(result.platform, 'amazon')
+
+    def test_empty_text(self):
+        """测试空文本"""
+        result = link_extractor.extract('')
+        self.assertEqual(result.hashtags, [])
+        self.assertEqual(result.product_links, [])
+        self.assertEqual(result.platform, 'unknown')
+
+    def test_detect_platform(self):
+        """测试平台识别"""
+        self.assertEqual(link_extractor.detect_platform('https://WWW.Etsy.com/listing/1'), 'etsy')
+        self.assertEqual(link_extractor.detect_platform('https://example.com/x'), 'other')
+
+
+class TestVideoStorage(unittest.TestCase):
+    """测试视频存储与标签关系表"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "tiktok_test.db")
+        self.db_manager = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _hashtags(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return sorted(conn.execute("SELECT hashtag, video_id FROM video_hashtags").fetchall())
+
+    def test_save_video_maintains_hashtags(self):
+        """测试保存视频时同步维护标签关系"""
+        self.db_manager.save_video(make_video("v1", ["#ootd", "#hoodie"]))
+        self.db_manager.save_video(make_video("v1", ["#ootd"]))
+
+        self.assertEqual(self._hashtags(), [("#ootd", "v1")])
+
+    def test_backfill_from_json(self):
+        """测试旧数据库升级时回填标签关系"""
+        self.db_manager.save_video(make_video("v1", ["#ootd", "#hoodie"]))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM video_hashtags")
+
+        DatabaseManager(self.db_path)
+
+        self.assertEqual(self._hashtags(), [("#hoodie", "v1"), ("#ootd", "v1")])
+
+
+class TestIncrementalSweep(unittest.TestCase):
+    """测试增量抓取水位线"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_manager = DatabaseManager(os.path.join(self.temp_dir, "tiktok_test.db"))
+        self.client = TikHubAPIClient("test-key")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _mock_pages(self, pages):
+        """按顺序返回分页数据，每页为 create_time 列表"""
+        responses = []
+        for i, times in enumerate(pages):
+            response = MagicMock()
+            response.json.return_value = {'code': 0, 'data': {
+                'videos': [{'id': f"p{i}v{t}", 'desc': '#ootd', 'create_time': t} for t in times],
+                'has_more': i < len(pages) - 1,
+                'cursor': (i + 1) * 2
+            }}
+            responses.append(response)
+        self.client.session.get = MagicMock(side_effect=responses)
+
+    def test_watermark_only_advances(self):
+        """测试水位线只前进不后退"""
+        self.assertIsNone(self.db_manager.get_watermark("#ootd", "tikhub_api"))
+        self.db_manager.save_watermark("#ootd", "tikhub_api", 200.0, fetches_saved=3)
+        self.db_manager.save_watermark("#ootd", "tikhub_api", 100.0, fetches_saved=2)
+        self.db_manager.save_watermark("#ootd", "tikhub_api", None)
+
+        self.assertEqual(self.db_manager.get_watermark("#ootd", "tikhub_api"), 200.0)
+        self.assertIsNone(self.db_manager.get_watermark("#ootd", "web_scraper"))
+
+    def test_stops_at_watermark(self):
+        """测试翻页遇到已抓取内容即停止"""
+        self._mock_pages([[500, 400], [300, 150], [100, 50]])
+
+        videos, stats = self.client.search_new_videos_by_hashtag(
+            "#ootd", max_results=8, since=200, page_size=2
+        )
+
+        self.assertEqual([v['upload_time'] for v in videos], [500, 400, 300])
+        self.assertEqual(stats['pages_fetched'], 2)
+        self.assertEqual(stats['pages_saved'], 2)
+        self.assertTrue(stats['stopped_at_watermark'])
+        self.assertEqual(self.client.session.get.call_args.kwargs['params']['cursor'], 2)
+
+    def test_full_sweep_without_watermark(self):
+        """测试无水位线时完整翻页"""
+        self._mock_pages([[500, 400], [300, 150]])
+
+        videos, stats = self.client.search_new_videos_by_hashtag("#ootd", max_results=8, page_size=2)
+
+        self.assertEqual(len(videos), 4)
+        self.assertEqual(stats['pages_saved'], 0)
+        self.assertFalse(stats['stopped_at_watermark'])
+
+    def test_upload_timestamp(self):
+        """测试上传时间统一为epoch秒"""
+        self.assertEqual(upload_timestamp(1700000000), 1700000000.0)
+        self.assertEqual(upload_timestamp("1700000000"), 1700000000.0)
+        self.assertEqual(upload_timestamp("2025-01-01T00:00:00Z"), 1735689600.0)
+        self.assertIsNone(upload_timestamp(""))
+        self.assertIsNone(upload_timestamp("not a time"))
+
+
+class TestProductLinkValidator(unittest.TestCase):
+    """测试产品链接验证器"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "tiktok_test.db")
+        self.db_manager = DatabaseManager(self.db_path)
+        self.validator = ProductLinkValidator(self.db_manager, ScrapingConfig())
+        self.requested = []
+
+        async def fake_validate(session, url, global_limit, domain_limits):
+            self.requested.append(url)
+            final_url = "https://www.amazon.com/dp/B000" if "bit.ly" in url else url
+            if self.validator.is_short_link(url):
+                self.validator._resolved[url] = final_url
+            return {
+                'url': url,
+                'is_valid': 'broken' not in url,
+                'status_code': 404 if 'broken' in url else 200,
+                'final_url': final_url,
+                'content_type': 'text/html',
+                'platform': self.validator._detect_platform(final_url),
+                'confidence_score': 0.8
+            }
+
+        self.validator._validate_link_async = fake_validate
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_deduplicates_and_caches(self):
+        """测试去重与缓存命中"""
+        urls = ["https://www.amazon.com/dp/1", "bit.ly/abc", "https://www.amazon.com/dp/1"]
+
+        results = self.validator.batch_validate(urls)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(self.requested), 2)
+
+        results = self.validator.batch_validate(urls)
+        self.assertEqual(len(self.requested), 2)
+        self.assertTrue(all(r.get('cached') for r in results))
+        self.assertEqual(results[1]['platform'], 'amazon')
+
+    def test_short_link_resolution_persisted(self):
+        """测试短链接最终地址被持久化"""
+        self.validator.batch_validate(["bit.ly/abc"])
+
+        resolutions = self.db_manager.get_resolutions(["bit.ly/abc"])
+        self.assertEqual(resolutions["bit.ly/abc"], "https://www.amazon.com/dp/B000")
+
+    def test_negative_cache_expires_sooner(self):
+        """测试无效链接使用较短的缓存时长"""
+        self.validator.config.link_negative_cache_ttl_hours = 1
+        self.validator.batch_validate(["https://broken.example.com/x", "https://www.ebay.com/itm/1"])
+
+        with sqlite3.connect(self.db_path) as conn:
+            rows = dict(conn.execute(
+                "SELECT url, expires_at - checked_at FROM link_validation_cache"
+            ).fetchall())
+
+        self.assertAlmostEqual(rows["https://broken.example.com/x"], 3600, delta=1)
+        self.assertAlmostEqual(
+            rows["https://www.ebay.com/itm/1"],
+            self.validator.config.link_cache_ttl_hours * 3600, delta=1
+        )
+
+        # 过期后重新验证
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE link_validation_cache SET expires_at = ?", (time.time() - 1,))
+        self.validator.batch_validate(["https://broken.example.com/x"])
+        self.assertEqual(self.requested.count("https://broken.example.com/x"), 2)
+
+    def test_save_product_extractions_bulk(self):
+        """测试批量写入产品链接提取结果"""
+        rows = [
+            ("v1", "https://www.amazon.com/dp/1", "product_link", True, "amazon", 0.8, "2025-01-01"),
+            ("v2", "bit.ly/abc", "affiliate_link", False, "other", 0.0, "2025-01-01"),
+        ]
+        self.assertEqual(self.db_manager.save_product_extractions(rows), 2)
+        # 重复写入同一视频同一链接时覆盖而非累加
+        self.db_manager.save_product_extractions(rows[:1])
+
+        with sqlite3.connect(self.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM product_extractions").fetchone()[0]
+        self.assertEqual(count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -26,20 +26,30 @@ import requests
 import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from urllib.parse import urljoin, urlparse, parse_qs
 import random
+import sys
+import asyncio
+import aiohttp
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
+
+import link_extractor
+
+# selenium 只有浏览器抓取器用到，创建浏览器时才导入（见 _load_selenium）
+webdriver = By = WebDriverWait = EC = Options = None
+
+
+def _load_selenium():
+    """首次创建浏览器时导入 selenium"""
+    global webdriver, By, WebDriverWait, EC, Options
+    if webdriver is None:
+        from selenium import webdriver as _webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.chrome.options import Options
+        webdriver = _webdriver
 
 # 配置日志
 logging.basicConfig(
@@ -52,7 +62,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# 大批量持有的记录类型使用 __slots__（Python 3.10+ 才支持 slots 参数）
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class TikTokVideo:
     """TikTok视频数据结构"""
     video_id: str
@@ -83,6 +96,22 @@ class TikTokVideo:
             # 生成数据哈希用于去重
             content = f"{self.video_id}{self.title}{self.description}"
             self.data_hash = hashlib.md5(content.encode()).hexdigest()
+    
+    def to_dict(self) -> Dict:
+        """浅拷贝转换为字典（不像 asdict 那样深拷贝列表字段）"""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+    
+    def to_row(self) -> Tuple:
+        """按 videos 表列顺序转换为数据库行"""
+        return (
+            self.video_id, self.title, self.description, self.author,
+            self.author_id, self.author_followers, self.author_following,
+            self.likes, self.comments, self.shares, self.views,
+            json.dumps(self.hashtags), self.music_info,
+            json.dumps(self.product_links), json.dumps(self.product_images),
+            self.upload_time, self.region, self.language, self.scraped_at,
+            self.source, self.data_hash
+        )
 
 @dataclass
 class ScrapingConfig:
@@ -110,6 +139,15 @@ class ScrapingConfig:
     enable_ocr: bool = False
     ocr_languages: str = "eng+chi_sim"
     
+    # 增量抓取：按标签/来源记录已抓取的最新上传时间，遇到旧内容即停止翻页
+    incremental_sweeps: bool = True
+    
+    # 链接验证配置
+    link_validation_concurrency: int = 20  # 全局并发上限
+    link_validation_per_domain: int = 4  # 单域名并发上限
+    link_cache_ttl_hours: int = 168  # 有效链接缓存时长
+    link_negative_cache_ttl_hours: int = 6  # 无效链接缓存时长（负缓存）
+    
     def __post_init__(self):
         if self.target_hashtags is None:
             self.target_hashtags = [
@@ -195,12 +233,85 @@ class DatabaseManager:
                     )
                 """)
                 
+                cursor.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_product_extractions_video_url
+                    ON product_extractions (video_id, extracted_url)
+                """)
+                
+                # 链接验证缓存（含负缓存），按过期时间淘汰
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS link_validation_cache (
+                        url TEXT PRIMARY KEY,
+                        is_valid BOOLEAN,
+                        status_code INTEGER,
+                        final_url TEXT,
+                        content_type TEXT,
+                        platform TEXT,
+                        confidence_score REAL,
+                        error TEXT,
+                        checked_at REAL,
+                        expires_at REAL
+                    )
+                """)
+                
+                # 视频读取索引（data_hash 已由 UNIQUE 约束建立索引）
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_scraped_at ON videos (scraped_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_source ON videos (source)")
+                
+                # 规范化的视频-标签关系表，用于按标签聚合
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS video_hashtags (
+                        hashtag TEXT NOT NULL,
+                        video_id TEXT NOT NULL,
+                        PRIMARY KEY (hashtag, video_id)
+                    ) WITHOUT ROWID
+                """)
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_video_hashtags_video ON video_hashtags (video_id)"
+                )
+                self._backfill_video_hashtags(cursor)
+                
+                # 增量抓取水位线（每个标签、每个来源一行）
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS sweep_watermarks (
+                        hashtag TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        newest_upload_ts REAL,
+                        last_swept_at TEXT,
+                        fetches_saved INTEGER DEFAULT 0,
+                        PRIMARY KEY (hashtag, source)
+                    )
+                """)
+                
+                # 短链接重定向结果记忆
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS url_resolutions (
+                        source_url TEXT PRIMARY KEY,
+                        final_url TEXT NOT NULL,
+                        resolved_at REAL
+                    )
+                """)
+                
                 conn.commit()
                 logger.info("数据库初始化完成")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
             raise
     
+    def _backfill_video_hashtags(self, cursor: sqlite3.Cursor):
+        """旧数据库首次升级时，用JSON1从 videos.hashtags 回填标签关系表"""
+        cursor.execute("SELECT 1 FROM video_hashtags LIMIT 1")
+        if cursor.fetchone():
+            return
+        cursor.execute("""
+            INSERT OR IGNORE INTO video_hashtags (hashtag, video_id)
+            SELECT DISTINCT tag.value, v.video_id
+            FROM videos v, json_each(v.hashtags) tag
+            WHERE json_valid(v.hashtags) AND tag.type = 'text'
+        """)
+        if cursor.rowcount > 0:
+            logger.info(f"已回填 {cursor.rowcount} 条视频标签记录")
+    
     def save_video(self, video: TikTokVideo) -> bool:
         """保存视频数据"""
         try:
@@ -213,15 +324,12 @@ class DatabaseManager:
                      music_info, product_links, product_images, upload_time, region, 
                      language, scraped_at, source, data_hash, updated_at)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    video.video_id, video.title, video.description, video.author,
-                    video.author_id, video.author_followers, video.author_following,
-                    video.likes, video.comments, video.shares, video.views,
-                    json.dumps(video.hashtags), video.music_info,
-                    json.dumps(video.product_links), json.dumps(video.product_images),
-                    video.upload_time, video.region, video.language, video.scraped_at,
-                    video.source, video.data_hash
-                ))
+                """, video.to_row())
+                cursor.execute("DELETE FROM video_hashtags WHERE video_id = ?", (video.video_id,))
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO video_hashtags (hashtag, video_id) VALUES (?, ?)",
+                    [(tag, video.video_id) for tag in video.hashtags]
+                )
                 conn.commit()
                 return True
         except Exception as e:
@@ -239,6 +347,156 @@ class DatabaseManager:
             logger.error(f"检查重复数据失败: {e}")
             return False
     
+    def get_watermark(self, hashtag: str, source: str) -> Optional[float]:
+        """获取标签在某来源下已抓取到的最新上传时间（epoch秒）"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT newest_upload_ts FROM sweep_watermarks WHERE hashtag = ? AND source = ?",
+                    (hashtag, source)
+                )
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error(f"读取抓取水位线失败: {e}")
+            return None
+    
+    def save_watermark(self, hashtag: str, source: str, newest_upload_ts: Optional[float],
+                       fetches_saved: int = 0):
+        """推进水位线（只前进不后退）并累计节省的请求数"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT INTO sweep_watermarks
+                    (hashtag, source, newest_upload_ts, last_swept_at, fetches_saved)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (hashtag, source) DO UPDATE SET
+                        newest_upload_ts = MAX(COALESCE(newest_upload_ts, excluded.newest_upload_ts),
+                                               COALESCE(excluded.newest_upload_ts, newest_upload_ts)),
+                        last_swept_at = excluded.last_swept_at,
+                        fetches_saved = fetches_saved + excluded.fetches_saved
+                """, (hashtag, source, newest_upload_ts, datetime.now().isoformat(), fetches_saved))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存抓取水位线失败: {e}")
+    
+    def get_cached_validations(self, urls: List[str]) -> Dict[str, Dict]:
+        """批量读取未过期的链接验证缓存"""
+        cached = {}
+        if not urls:
+            return cached
+        try:
+            now = time.time()
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                # 分批查询，避免超过SQLite变量数上限
+                for i in range(0, len(urls), 500):
+                    chunk = urls[i:i + 500]
+                    placeholders = ', '.join('?' for _ in chunk)
+                    cursor.execute(f"""
+                        SELECT url, is_valid, status_code, final_url, content_type,
+                               platform, confidence_score, error
+                        FROM link_validation_cache
+                        WHERE url IN ({placeholders}) AND expires_at > ?
+                    """, (*chunk, now))
+                    for row in cursor.fetchall():
+                        result = dict(row)
+                        result['is_valid'] = bool(result['is_valid'])
+                        if not result['error']:
+                            result.pop('error')
+                        result['cached'] = True
+                        cached[row['url']] = result
+        except Exception as e:
+            logger.error(f"读取链接验证缓存失败: {e}")
+        return cached
+    
+    def save_validations(self, results: List[Dict], ttl_hours: float,
+                         negative_ttl_hours: float):
+        """批量写入链接验证缓存，无效结果使用较短的TTL"""
+        if not results:
+            return
+        try:
+            now = time.time()
+            rows = []
+            for r in results:
+                ttl = ttl_hours if r.get('is_valid') else negative_ttl_hours
+                rows.append((
+                    r['url'], r.get('is_valid', False), r.get('status_code', 0),
+                    r.get('final_url', r['url']), r.get('content_type', ''),
+                    r.get('platform', 'unknown'), r.get('confidence_score', 0.0),
+                    r.get('error'), now, now + ttl * 3600
+                ))
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO link_validation_cache
+                    (url, is_valid, status_code, final_url, content_type, platform,
+                     confidence_score, error, checked_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"写入链接验证缓存失败: {e}")
+    
+    def get_resolutions(self, urls: List[str]) -> Dict[str, str]:
+        """读取已记忆的短链接最终地址"""
+        resolutions = {}
+        if not urls:
+            return resolutions
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for i in range(0, len(urls), 500):
+                    chunk = urls[i:i + 500]
+                    placeholders = ', '.join('?' for _ in chunk)
+                    cursor.execute(f"""
+                        SELECT source_url, final_url FROM url_resolutions
+                        WHERE source_url IN ({placeholders})
+                    """, chunk)
+                    resolutions.update(dict(cursor.fetchall()))
+        except Exception as e:
+            logger.error(f"读取短链接解析记录失败: {e}")
+        return resolutions
+    
+    def save_resolutions(self, resolutions: Dict[str, str]):
+        """批量记忆短链接最终地址"""
+        if not resolutions:
+            return
+        try:
+            now = time.time()
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO url_resolutions (source_url, final_url, resolved_at)
+                    VALUES (?, ?, ?)
+                """, [(src, dst, now) for src, dst in resolutions.items()])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"保存短链接解析记录失败: {e}")
+    
+    def save_product_extractions(self, rows: List[Tuple]) -> int:
+        """
+        批量写入产品链接提取结果
+        
+        rows: (video_id, extracted_url, url_type, is_valid, platform,
+               confidence_score, extracted_at)
+        """
+        if not rows:
+            return 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO product_extractions
+                    (video_id, extracted_url, url_type, is_valid, platform,
+                     confidence_score, extracted_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+            return len(rows)
+        except Exception as e:
+            logger.error(f"保存产品链接提取结果失败: {e}")
+            return 0
+    
     def log_operation(self, source: str, operation: str, status: str, 
                      details: str = "", items_processed: int = 0, 
                      errors_count: int = 0, duration_seconds: float = 0):
@@ -259,6 +517,21 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"记录操作日志失败: {e}")
 
+def upload_timestamp(value) -> Optional[float]:
+    """将 upload_time（epoch数字、数字字符串或ISO时间）统一为epoch秒，无法解析时返回None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
 class TikHubAPIClient:
     """TikHub API客户端"""
     
@@ -274,32 +547,73 @@ class TikHubAPIClient:
     
     def search_videos_by_hashtag(self, hashtag: str, max_results: int = 100) -> List[Dict]:
         """根据标签搜索视频"""
+        videos, _ = self.search_new_videos_by_hashtag(hashtag, max_results)
+        return videos
+    
+    def search_new_videos_by_hashtag(self, hashtag: str, max_results: int = 100,
+                                     since: Optional[float] = None,
+                                     page_size: int = 50) -> Tuple[List[Dict], Dict]:
+        """
+        分页搜索标签视频
+        
+        Args:
+            hashtag: 标签
+            max_results: 最大结果数
+            since: 水位线（epoch秒）；给定时按发布时间倒序翻页，遇到不晚于水位线的视频即停止
+            page_size: 每页数量
+            
+        Returns:
+            (视频列表, 翻页统计)
+        """
         videos = []
+        max_pages = max(1, -(-max_results // page_size))
+        stats = {'pages_fetched': 0, 'pages_saved': 0, 'stopped_at_watermark': False}
+        cursor = 0
+        
         try:
-            params = {
-                'platform': 'tiktok',
-                'type': 'search',
-                'keyword': hashtag,
-                'content_type': 'video',
-                'limit': min(max_results, 50),
-                'sort_by': 'popularity'
-            }
+            for _ in range(max_pages):
+                params = {
+                    'platform': 'tiktok',
+                    'type': 'search',
+                    'keyword': hashtag,
+                    'content_type': 'video',
+                    'limit': min(page_size, max_results - len(videos)),
+                    'cursor': cursor,
+                    'sort_by': 'create_time' if since is not None else 'popularity'
+                }
+                
+                response = self.session.get(f"{self.base_url}/search", params=params, timeout=30)
+                response.raise_for_status()
+                stats['pages_fetched'] += 1
+                
+                data = response.json()
+                if data.get('code') != 0 or 'data' not in data:
+                    break
+                
+                page = data['data']
+                for video_data in page.get('videos', []):
+                    video = self._parse_video_data(video_data)
+                    ts = upload_timestamp(video.get('upload_time'))
+                    if since is not None and ts is not None and ts <= since:
+                        stats['stopped_at_watermark'] = True
+                        break
+                    videos.append(video)
+                
+                if (stats['stopped_at_watermark'] or not page.get('has_more')
+                        or len(videos) >= max_results):
+                    break
+                cursor = page.get('cursor', cursor + page_size)
             
-            response = self.session.get(f"{self.base_url}/search", params=params, timeout=30)
-            response.raise_for_status()
+            if stats['stopped_at_watermark']:
+                stats['pages_saved'] = max_pages - stats['pages_fetched']
             
-            data = response.json()
-            if data.get('code') == 0 and 'data' in data:
-                videos_data = data['data'].get('videos', [])
-                for video_data in videos_data:
-                    videos.append(self._parse_video_data(video_data))
-                    
-            logger.info(f"TikHub API: 成功获取 {len(videos)} 个视频 (标签: {hashtag})")
+            logger.info(f"TikHub API: 成功获取 {len(videos)} 个视频 (标签: {hashtag}, "
+                        f"翻页 {stats['pages_fetched']}, 节省 {stats['pages_saved']})")
             
         except Exception as e:
             logger.error(f"TikHub API 搜索失败: {e}")
             
-        return videos
+        return videos, stats
     
     def get_video_details(self, video_id: str) -> Optional[Dict]:
         """获取视频详情"""
@@ -348,8 +662,12 @@ class TikHubAPIClient:
     def _parse_video_data(self, raw_data: Dict) -> Dict:
         """解析视频数据"""
         try:
-            # 提取产品链接
-            product_links = self._extract_product_links(raw_data.get('description', '') + ' ' + raw_data.get('title', ''))
+            # 单次扫描提取产品链接和标签
+            extracted = link_extractor.extract(' '.join(filter(None, (
+                raw_data.get('desc', ''),
+                raw_data.get('description', ''),
+                raw_data.get('title', '')
+            ))))
             
             return {
                 'video_id': raw_data.get('id', ''),
@@ -363,45 +681,19 @@ class TikHubAPIClient:
                 'comments': raw_data.get('stats', {}).get('comment_count', 0),
                 'shares': raw_data.get('stats', {}).get('share_count', 0),
                 'views': raw_data.get('stats', {}).get('play_count', 0),
-                'hashtags': self._extract_hashtags(raw_data.get('desc', '')),
+                'hashtags': extracted.hashtags,
                 'music_info': raw_data.get('music', {}).get('title', ''),
-                'product_links': product_links,
+                'product_links': extracted.product_links,
+                'product_images': [],
                 'upload_time': raw_data.get('create_time', ''),
                 'region': raw_data.get('region', 'US'),
                 'language': raw_data.get('language', 'en'),
-                'source': 'tikhub_api'
+                'source': 'tikhub_api',
+                'data_hash': ''
             }
         except Exception as e:
             logger.error(f"解析视频数据失败: {e}")
             return {}
-    
-    def _extract_hashtags(self, text: str) -> List[str]:
-        """从文本中提取标签"""
-        hashtags = re.findall(r'#\w+', text)
-        return list(set(hashtags))
-    
-    def _extract_product_links(self, text: str) -> List[str]:
-        """从文本中提取产品链接"""
-        # 常见电商平台链接模式
-        patterns = [
-            r'https?://(?:www\.)?amazon\.com/[^\s]+',
-            r'https?://(?:www\.)?ebay\.com/[^\s]+',
-            r'https?://(?:www\.)?shopify\.com/[^\s]+',
-            r'https?://(?:www\.)?etsy\.com/[^\s]+',
-            r'https?://(?:www\.)?aliexpress\.com/[^\s]+',
-            r'https?://(?:www\.)?temu\.com/[^\s]+',
-            r'https?://(?:www\.)?shein\.com/[^\s]+',
-            r'bit\.ly/[^\s]+',  # 短链接
-            r'tinyurl\.com/[^\s]+',
-            r'cutt\.ly/[^\s]+'
-        ]
-        
-        links = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            links.extend(matches)
-            
-        return list(set(links))
 
 class WebScraper:
     """网页爬虫"""
@@ -414,6 +706,7 @@ class WebScraper:
     def init_browser(self):
         """初始化浏览器"""
         try:
+            _load_selenium()
             chrome_options = Options()
             chrome_options.add_argument('--headless')
             chrome_options.add_argument('--no-sandbox')
@@ -504,8 +797,8 @@ class WebScraper:
             # 生成唯一ID（基于URL和标题）
             video_id = hashlib.md5(f"{title}{author}".encode()).hexdigest()[:16]
             
-            # 提取产品链接
-            product_links = self._extract_product_links(title)
+            # 单次扫描提取产品链接和标签
+            extracted = link_extractor.extract(title)
             
             return {
                 'video_id': video_id,
@@ -519,13 +812,15 @@ class WebScraper:
                 'comments': comments,
                 'shares': shares,
                 'views': 0,
-                'hashtags': self._extract_hashtags(title),
+                'hashtags': extracted.hashtags,
                 'music_info': '',
-                'product_links': product_links,
+                'product_links': extracted.product_links,
+                'product_images': [],
                 'upload_time': datetime.now().isoformat(),
                 'region': 'US',
                 'language': 'en',
-                'source': 'web_scraper'
+                'source': 'web_scraper',
+                'data_hash': ''
             }
             
         except Exception as e:
@@ -561,34 +856,6 @@ class WebScraper:
         else:
             return int(float(count_str))
     
-    def _extract_hashtags(self, text: str) -> List[str]:
-        """提取标签"""
-        hashtags = re.findall(r'#\w+', text)
-        return list(set(hashtags))
-    
-    def _extract_product_links(self, text: str) -> List[str]:
-        """提取产品链接"""
-        # 复用TikHub客户端的链接提取逻辑
-        patterns = [
-            r'https?://(?:www\.)?amazon\.com/[^\s]+',
-            r'https?://(?:www\.)?ebay\.com/[^\s]+',
-            r'https?://(?:www\.)?shopify\.com/[^\s]+',
-            r'https?://(?:www\.)?etsy\.com/[^\s]+',
-            r'https?://(?:www\.)?aliexpress\.com/[^\s]+',
-            r'https?://(?:www\.)?temu\.com/[^\s]+',
-            r'https?://(?:www\.)?shein\.com/[^\s]+',
-            r'bit\.ly/[^\s]+',
-            r'tinyurl\.com/[^\s]+',
-            r'cutt\.ly/[^\s]+'
-        ]
-        
-        links = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            links.extend(matches)
-            
-        return list(set(links))
-    
     def extract_product_images(self, video_url: str) -> List[str]:
         """从视频中提取商品图片（OCR）"""
         if not self.config.enable_ocr:
@@ -633,104 +900,169 @@ class WebScraper:
 class ProductLinkValidator:
     """产品链接验证器"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, db_manager: DatabaseManager = None, config: ScrapingConfig = None):
+        self.db_manager = db_manager
+        self.config = config or ScrapingConfig()
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # 进程内的短链接解析记忆，避免同一批次重复解析
+        self._resolved: Dict[str, str] = {}
     
     def validate_link(self, url: str) -> Dict:
         """验证链接有效性"""
         try:
-            response = self.session.head(url, timeout=10, allow_redirects=True)
+            response = self.session.head(self._normalize_url(url), timeout=10, allow_redirects=True)
+            content_type = response.headers.get('content-type', '')
             
             return {
                 'url': url,
                 'is_valid': response.status_code < 400,
                 'status_code': response.status_code,
                 'final_url': response.url,
-                'content_type': response.headers.get('content-type', ''),
+                'content_type': content_type,
                 'platform': self._detect_platform(url),
-                'confidence_score': self._calculate_confidence(response)
+                'confidence_score': self._calculate_confidence(
+                    response.status_code, content_type, response.url
+                )
             }
         except Exception as e:
-            return {
-                'url': url,
-                'is_valid': False,
-                'status_code': 0,
-                'final_url': url,
-                'content_type': '',
-                'platform': 'unknown',
-                'confidence_score': 0.0,
-                'error': str(e)
-            }
+            return self._error_result(url, e)
+    
+    def _normalize_url(self, url: str) -> str:
+        """补全缺失的协议头（短链接常以 bit.ly/xxx 形式出现）"""
+        if not re.match(r'^https?://', url, re.IGNORECASE):
+            return f"https://{url}"
+        return url
+    
+    def is_short_link(self, url: str) -> bool:
+        """判断是否为短链接"""
+        return link_extractor.is_short_link(urlparse(self._normalize_url(url)).netloc)
+    
+    def _error_result(self, url: str, error: Exception) -> Dict:
+        """构造验证失败结果"""
+        return {
+            'url': url,
+            'is_valid': False,
+            'status_code': 0,
+            'final_url': url,
+            'content_type': '',
+            'platform': 'unknown',
+            'confidence_score': 0.0,
+            'error': str(error) or error.__class__.__name__
+        }
     
     def _detect_platform(self, url: str) -> str:
         """检测电商平台"""
-        url_lower = url.lower()
-        if 'amazon.' in url_lower:
-            return 'amazon'
-        elif 'ebay.' in url_lower:
-            return 'ebay'
-        elif 'shopify.' in url_lower:
-            return 'shopify'
-        elif 'etsy.' in url_lower:
-            return 'etsy'
-        elif 'aliexpress.' in url_lower:
-            return 'aliexpress'
-        elif 'temu.' in url_lower:
-            return 'temu'
-        elif 'shein.' in url_lower:
-            return 'shein'
-        else:
-            return 'other'
+        return link_extractor.detect_platform(url)
     
-    def _calculate_confidence(self, response) -> float:
+    def _calculate_confidence(self, status_code: int, content_type: str, final_url: str) -> float:
         """计算置信度分数"""
         score = 0.0
         
         # 状态码评分
-        if response.status_code == 200:
+        if status_code == 200:
             score += 0.3
-        elif 200 <= response.status_code < 400:
+        elif 200 <= status_code < 400:
             score += 0.2
         
         # 内容类型评分
-        content_type = response.headers.get('content-type', '').lower()
+        content_type = content_type.lower()
         if 'text/html' in content_type:
             score += 0.2
         elif 'image' in content_type:
             score += 0.15
         
         # 平台评分
-        url_lower = response.url.lower()
+        url_lower = str(final_url).lower()
         if any(platform in url_lower for platform in ['amazon', 'ebay', 'shopify']):
             score += 0.3
         
         return min(score, 1.0)
     
-    def batch_validate(self, urls: List[str], max_workers: int = 10) -> List[Dict]:
-        """批量验证链接"""
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_url = {executor.submit(self.validate_link, url): url for url in urls}
+    async def _validate_link_async(self, session: aiohttp.ClientSession, url: str,
+                                   global_limit: asyncio.Semaphore,
+                                   domain_limits: Dict[str, asyncio.Semaphore]) -> Dict:
+        """异步验证单个链接，受全局和单域名并发上限约束"""
+        # 已记忆的短链接直接请求最终地址，跳过重定向链
+        target = self._resolved.get(url) or self._normalize_url(url)
+        domain = urlparse(target).netloc.lower()
+        if domain not in domain_limits:
+            domain_limits[domain] = asyncio.Semaphore(self.config.link_validation_per_domain)
+        
+        try:
+            async with global_limit, domain_limits[domain]:
+                async with session.head(target, allow_redirects=True) as response:
+                    final_url = str(response.url)
+                    content_type = response.headers.get('content-type', '')
+                    status_code = response.status
             
-            for future in as_completed(future_to_url):
-                try:
-                    result = future.result(timeout=15)
-                    results.append(result)
-                except Exception as e:
-                    url = future_to_url[future]
-                    results.append({
-                        'url': url,
-                        'is_valid': False,
-                        'status_code': 0,
-                        'platform': 'unknown',
-                        'confidence_score': 0.0,
-                        'error': str(e)
-                    })
+            if self.is_short_link(url) and final_url != target:
+                self._resolved[url] = final_url
+            
+            # 短链接按最终地址识别平台
+            platform_url = final_url if self.is_short_link(url) else url
+            return {
+                'url': url,
+                'is_valid': status_code < 400,
+                'status_code': status_code,
+                'final_url': final_url,
+                'content_type': content_type,
+                'platform': self._detect_platform(platform_url),
+                'confidence_score': self._calculate_confidence(status_code, content_type, final_url)
+            }
+        except Exception as e:
+            return self._error_result(url, e)
+    
+    async def batch_validate_async(self, urls: List[str], max_concurrency: int = None) -> List[Dict]:
+        """使用aiohttp并发验证链接"""
+        global_limit = asyncio.Semaphore(max_concurrency or self.config.link_validation_concurrency)
+        domain_limits: Dict[str, asyncio.Semaphore] = {}
+        timeout = aiohttp.ClientTimeout(total=15, connect=10)
+        
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout) as session:
+            return await asyncio.gather(*(
+                self._validate_link_async(session, url, global_limit, domain_limits)
+                for url in urls
+            ))
+    
+    def batch_validate(self, urls: List[str], max_workers: int = None) -> List[Dict]:
+        """
+        批量验证链接
+        
+        输入先去重，命中持久化缓存（含负缓存）的链接不再发起请求；
+        其余链接通过asyncio并发验证后批量写回缓存。
+        max_workers 保留以兼容旧调用，等同于全局并发上限。
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        
+        cached: Dict[str, Dict] = {}
+        if self.db_manager:
+            cached = self.db_manager.get_cached_validations(unique_urls)
+            short_links = [u for u in unique_urls if u not in cached and self.is_short_link(u)]
+            self._resolved.update(self.db_manager.get_resolutions(short_links))
         
-        return results
+        pending = [u for u in unique_urls if u not in cached]
+        fresh: List[Dict] = []
+        if pending:
+            known_resolutions = dict(self._resolved)
+            fresh = asyncio.run(self.batch_validate_async(pending, max_workers))
+            if self.db_manager:
+                self.db_manager.save_validations(
+                    fresh,
+                    self.config.link_cache_ttl_hours,
+                    self.config.link_negative_cache_ttl_hours
+                )
+                self.db_manager.save_resolutions({
+                    src: dst for src, dst in self._resolved.items()
+                    if known_resolutions.get(src) != dst
+                })
+        
+        logger.info(f"链接验证: 缓存命中 {len(cached)}, 实际请求 {len(pending)}")
+        results = {**cached, **{r['url']: r for r in fresh}}
+        return [results[u] for u in unique_urls]
 
 class TikTokClothingScraper:
     """TikTok服装数据抓取器主类"""
@@ -742,7 +1074,7 @@ class TikTokClothingScraper:
         # 初始化组件
         self.tikhub_client = None
         self.web_scraper = None
-        self.link_validator = ProductLinkValidator()
+        self.link_validator = ProductLinkValidator(self.db_manager, config)
         
         if config.tiktok_api_key:
             self.tikhub_client = TikHubAPIClient(config.tiktok_api_key)
@@ -759,6 +1091,7 @@ class TikTokClothingScraper:
         total_processed = 0
         total_errors = 0
         all_videos = []
+        incremental_stats = {'pages_fetched': 0, 'pages_saved': 0, 'hashtags_caught_up': 0}
         
         logger.info(f"开始抓取TikTok服装视频数据，源: {target_sources}")
         
@@ -767,14 +1100,29 @@ class TikTokClothingScraper:
             tag_videos = []
             tag_errors = 0
             
-            # TikHub API抓取
+            # TikHub API抓取（增量模式下从水位线之后开始）
             if 'tikhub_api' in target_sources and self.tikhub_client:
                 try:
-                    api_videos = self.tikhub_client.search_videos_by_hashtag(
-                        hashtag, max_videos_per_tag // 2
+                    since = (self.db_manager.get_watermark(hashtag, 'tikhub_api')
+                             if self.config.incremental_sweeps else None)
+                    api_videos, page_stats = self.tikhub_client.search_new_videos_by_hashtag(
+                        hashtag, max_videos_per_tag // 2, since=since
                     )
                     tag_videos.extend(api_videos)
                     logger.info(f"API获取 {len(api_videos)} 个视频")
+                    
+                    incremental_stats['pages_fetched'] += page_stats['pages_fetched']
+                    incremental_stats['pages_saved'] += page_stats['pages_saved']
+                    incremental_stats['hashtags_caught_up'] += int(page_stats['stopped_at_watermark'])
+                    if self.config.incremental_sweeps:
+                        newest = max(
+                            (ts for ts in (upload_timestamp(v.get('upload_time')) for v in api_videos)
+                             if ts is not None),
+                            default=None
+                        )
+                        self.db_manager.save_watermark(
+                            hashtag, 'tikhub_api', newest, page_stats['pages_saved']
+                        )
                 except Exception as e:
                     logger.error(f"TikHub API抓取失败: {e}")
                     tag_errors += 1
@@ -832,7 +1180,9 @@ class TikTokClothingScraper:
             source="combined",
             operation="scrape_clothing_videos",
             status="completed" if total_errors == 0 else "completed_with_errors",
-            details=f"Scraped clothing videos across {len(self.config.target_hashtags)} hashtags",
+            details=(f"Scraped clothing videos across {len(self.config.target_hashtags)} hashtags; "
+                     f"pages fetched {incremental_stats['pages_fetched']}, "
+                     f"pages saved {incremental_stats['pages_saved']}"),
             items_processed=total_processed,
             errors_count=total_errors,
             duration_seconds=duration
@@ -842,7 +1192,8 @@ class TikTokClothingScraper:
             'total_videos': total_processed,
             'total_errors': total_errors,
             'duration_seconds': duration,
-            'videos': [asdict(video) for video in all_videos]
+            'incremental': incremental_stats,
+            'videos': [video.to_dict() for video in all_videos]
         }
     
     def validate_product_links(self, videos: List[TikTokVideo] = None) -> Dict:
@@ -851,16 +1202,30 @@ class TikTokClothingScraper:
             # 从数据库获取最新的视频数据
             videos = self._get_recent_videos()
         
-        all_links = []
+        # 记录每个链接出现在哪些视频中，用于回写提取表
+        link_videos: Dict[str, List[str]] = {}
         for video in videos:
-            all_links.extend(video.product_links)
+            for link in video.product_links:
+                link_videos.setdefault(link, []).append(video.video_id)
         
-        # 去重
-        unique_links = list(set(all_links))
+        unique_links = list(link_videos)
         logger.info(f"开始验证 {len(unique_links)} 个产品链接")
         
         validation_results = self.link_validator.batch_validate(unique_links)
         
+        # 批量回写 product_extractions
+        extracted_at = datetime.now().isoformat()
+        extraction_rows = []
+        for result in validation_results:
+            url_type = ('affiliate_link' if self.link_validator.is_short_link(result['url'])
+                        else 'product_link')
+            for video_id in link_videos.get(result['url'], []):
+                extraction_rows.append((
+                    video_id, result['url'], url_type, result['is_valid'],
+                    result['platform'], result['confidence_score'], extracted_at
+                ))
+        self.db_manager.save_product_extractions(extraction_rows)
+        
         # 统计结果
         valid_count = sum(1 for r in validation_results if r['is_valid'])
         invalid_count = len(validation_results) - valid_count
@@ -916,46 +1281,34 @@ class TikTokClothingScraper:
             logger.error(f"提取时尚趋势失败: {e}")
             return {'error': str(e)}
     
+    # TikTokVideo 对应的 videos 表列（按名称读取，不依赖列顺序）
+    VIDEO_COLUMNS = (
+        'video_id', 'title', 'description', 'author', 'author_id', 'author_followers',
+        'author_following', 'likes', 'comments', 'shares', 'views', 'hashtags',
+        'music_info', 'product_links', 'product_images', 'upload_time', 'region',
+        'language', 'scraped_at', 'source', 'data_hash'
+    )
+    JSON_VIDEO_COLUMNS = ('hashtags', 'product_links', 'product_images')
+    
     def _get_recent_videos(self, hours: int = 24) -> List[TikTokVideo]:
         """获取最近的视频数据"""
         try:
+            # scraped_at 以 isoformat 写入，使用同格式的截止时间做范围查询以命中索引
+            cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
             with sqlite3.connect(self.config.database_path) as conn:
+                conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM videos 
-                    WHERE scraped_at > datetime('now', '-{} hours')
+                cursor.execute(f"""
+                    SELECT {', '.join(self.VIDEO_COLUMNS)} FROM videos 
+                    WHERE scraped_at > ?
                     ORDER BY scraped_at DESC
-                """.format(hours))
+                """, (cutoff,))
                 
-                rows = cursor.fetchall()
                 videos = []
-                
-                for row in rows:
-                    # 转换数据库行为TikTokVideo对象
-                    # 这里需要根据实际的列顺序来映射
-                    video_dict = {
-                        'video_id': row[1],
-                        'title': row[2],
-                        'description': row[3],
-                        'author': row[4],
-                        'author_id': row[5],
-                        'author_followers': row[6],
-                        'author_following': row[7],
-                        'likes': row[8],
-                        'comments': row[9],
-                        'shares': row[10],
-                        'views': row[11],
-                        'hashtags': json.loads(row[12]) if row[12] else [],
-                        'music_info': row[13],
-                        'product_links': json.loads(row[14]) if row[14] else [],
-                        'product_images': json.loads(row[15]) if row[15] else [],
-                        'upload_time': row[16],
-                        'region': row[17],
-                        'language': row[18],
-                        'scraped_at': row[19],
-                        'source': row[20],
-                        'data_hash': row[21]
-                    }
+                for row in cursor.fetchall():
+                    video_dict = dict(row)
+                    for column in self.JSON_VIDEO_COLUMNS:
+                        video_dict[column] = json.loads(video_dict[column]) if video_dict[column] else []
                     videos.append(TikTokVideo(**video_dict))
                 
                 return videos
@@ -974,7 +1327,10 @@ class TikTokClothingScraper:
                 cursor.execute("SELECT COUNT(*) FROM videos")
                 total_videos = cursor.fetchone()[0]
                 
-                cursor.execute("SELECT COUNT(*) FROM videos WHERE date(scraped_at) = date('now')")
+                today_start = datetime.now().replace(
+                    hour=0, minute=0, second=0, microsecond=0
+                ).isoformat()
+                cursor.execute("SELECT COUNT(*) FROM videos WHERE scraped_at >= ?", (today_start,))
                 today_videos = cursor.fetchone()[0]
                 
                 # 来源统计
@@ -986,23 +1342,15 @@ class TikTokClothingScraper:
                 """)
                 source_stats = dict(cursor.fetchall())
                 
-                # 标签统计
+                # 标签统计（按主键索引顺序分组）
                 cursor.execute("""
-                    SELECT hashtags, COUNT(*) as count 
-                    FROM videos 
-                    GROUP BY hashtags 
+                    SELECT hashtag, COUNT(*) as count 
+                    FROM video_hashtags 
+                    GROUP BY hashtag 
                     ORDER BY count DESC 
                     LIMIT 10
                 """)
-                hashtag_rows = cursor.fetchall()
-                hashtag_stats = {}
-                for row in hashtag_rows:
-                    try:
-                        hashtags = json.loads(row[0]) if row[0] else []
-                        for tag in hashtags:
-                            hashtag_stats[tag] = hashtag_stats.get(tag, 0) + row[1]
-                    except:
-                        continue
+                hashtag_stats = dict(cursor.fetchall())
                 
                 # 产品链接统计
                 cursor.execute("SELECT COUNT(*) FROM product_extractions WHERE is_valid = 1")
@@ -1023,8 +1371,7 @@ class TikTokClothingScraper:
                     'total_videos': total_videos,
                     'today_videos': today_videos,
                     'source_distribution': source_stats,
-                    'top_hashtags': dict(sorted(hashtag_stats.items(), 
-                                              key=lambda x: x[1], reverse=True)[:10]),
+                    'top_hashtags': hashtag_stats,
                     'product_links': {
                         'total': total_product_links,
                         'valid': valid_product_links,
@@ -20,21 +20,9 @@ try:
     
     # 启动应用
     if __name__ == "__main__":
-        port = int(os.environ.get("PORT", 8000))
-        print(f"🚀 启动时尚数据分析系统 - 端口 {port}")
-        print(f"📁 项目根目录: {project_root}")
-        print(f"🔗 访问地址: http://0.0.0.0:{port}")
-        print(f"📚 API文档: http://0.0.0.0:{port}/docs")
-        
-        import uvicorn
-        uvicorn.run(
-            "app.main:app", 
-            host="0.0.0.0", 
-            port=port, 
-            log_level="info",
-            reload=False,
-            workers=1
-        )
+        # 与 start_server.py 相同：WEB_CONCURRENCY > 1 时多 worker + 独立作业调度进程
+        from start_server import main as serve
+        serve()
         
 except ImportError as e:
     print(f"❌ 导入失败: {e}")
@@ -4,6 +4,7 @@
 =====================================
 """
 import os
+import subprocess
 import sys
 from pathlib import Path
 
@@ -16,26 +17,45 @@ sys.path.insert(0, str(project_root / "app"))
 from app.main import app
 import uvicorn
 
+def start_scheduler() -> subprocess.Popen:
+    """多 worker 部署时启动唯一的作业调度进程（执行抓取作业、产品库备份与维护）"""
+    return subprocess.Popen([sys.executable, str(project_root / "code" / "main.py"), "scheduler"])
+
 def main():
     """主启动函数"""
     port = int(os.environ.get("PORT", 8000))
     host = "0.0.0.0"
+    # WEB_CONCURRENCY > 1 时启动多个 uvicorn worker，抓取作业交给独立调度进程
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
     
     print("🚀 时尚数据分析系统启动中...")
     print(f"📍 项目路径: {project_root}")
     print(f"🌐 监听地址: {host}:{port}")
+    print(f"👷 Worker 数: {workers}")
     print(f"🔗 访问地址: http://localhost:{port}")
     print(f"📚 API文档: http://localhost:{port}/docs")
     
-    # 启动应用
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        log_level="info",
-        reload=False,
-        workers=1
-    )
+    scheduler = None
+    if workers > 1:
+        # worker 进程继承环境变量，只提交和查询作业
+        os.environ["JOB_RUNNER"] = "scheduler"
+        scheduler = start_scheduler()
+        print(f"🗓️ 作业调度进程: pid={scheduler.pid}")
+    
+    try:
+        # 启动应用
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            log_level="info",
+            reload=False,
+            workers=workers
+        )
+    finally:
+        if scheduler is not None:
+            scheduler.terminate()
+            scheduler.wait(timeout=30)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+看板聚合接口性能测试模块
+
+测试内容包括（100万个产品，进程内直接调用 ASGI 应用）：
+1. 各聚合接口的延迟：冷计算（清空时间桶缓存与响应缓存）、时间桶缓存命中、响应缓存命中
+2. 响应体大小：聚合接口与看板原先下载的全量产品列表（按 1 万个产品的序列化大小推算）
+3. 聚合查询是否只读覆盖索引 idx_products_analytics
+
+测试指标（100万个产品）：
+- 冷计算延迟 < 2s，时间桶缓存命中 < 20ms
+- 每个聚合响应体 < 16KB
+"""
+
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+ENDPOINTS = {
+    'platforms': "/api/v1/analytics/platforms",
+    'categories': "/api/v1/analytics/categories",
+    'prices': "/api/v1/analytics/prices?bins=20",
+    'ranking': "/api/v1/analytics/ranking?metric=popularity&limit=20",
+    'ranking_tiktok': "/api/v1/analytics/ranking?metric=likes&limit=20&platform=tiktok",
+}
+CATEGORIES = ['tshirt', 'hoodie', 'sweatshirt']
+
+
+class AnalyticsPerformanceTest:
+    """看板聚合接口性能测试类"""
+
+    def __init__(self, product_count: int = 1_000_000, repeat: int = 3):
+        self.product_count = product_count
+        self.repeat = repeat
+        self.rng = random.Random(29)
+        # 协调器的 config/、data/、logs/ 都是相对路径，在临时目录中运行
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        os.makedirs("logs")
+        os.environ["PRODUCTS_DB_PATH"] = str(Path(self.temp_dir) / "data" / "products.db")
+        os.environ["JOB_RUNNER"] = "inline"
+        import app.main as app_main
+        from app import responses
+        self.app_main = app_main
+        self.responses = responses
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """写入产品（与线上同一张表，含图片、关键词等宽字段）"""
+        logger.info(f"生成 {self.product_count} 个产品...")
+        db_manager = self.app_main.get_db_manager()
+        start = time.perf_counter()
+        with db_manager.pool.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO products (product_name, platform, category, price, original_price, sales_count,
+                                      rating, review_count, product_url, store_name, main_image_url,
+                                      image_urls, keywords, like_count, share_count, view_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, self._rows())
+            conn.commit()
+        db_manager.optimize(analyze=True)
+        self.test_results['setup'] = {
+            'products': self.product_count,
+            'insert_s': round(time.perf_counter() - start, 1),
+            'database_size_mb': db_manager.get_database_stats(use_cache=False)['database_size_mb']
+        }
+
+    def _rows(self):
+        for i in range(self.product_count):
+            price = round(self.rng.lognormvariate(3.2, 0.4), 2)
+            yield (f"Product {i} graphic print", self.rng.choice(['tiktok', 'amazon']), self.rng.choice(CATEGORIES),
+                   price, round(price * 1.3, 2), self.rng.randint(0, 50_000), round(self.rng.uniform(3, 5), 1),
+                   self.rng.randint(0, 9000), f"https://shop.test/p/{i}", f"store {i % 3000}",
+                   f"https://img.test/{i}/main.jpg", json.dumps([f"https://img.test/{i}/{n}.jpg" for n in range(4)]),
+                   json.dumps(['print', 'graphic', 'cotton']), self.rng.randint(0, 100_000),
+                   self.rng.randint(0, 5000), self.rng.randint(0, 1_000_000))
+
+    def test_query_plans(self):
+        """聚合查询只读覆盖索引"""
+        with self.app_main.get_db_manager().pool.read_connection() as conn:
+            plans = {
+                'groups': conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT platform, category, COUNT(*), SUM(price), SUM(rating), "
+                    "SUM(sales_count) FROM products WHERE is_active = 1 GROUP BY platform, category").fetchall(),
+                'ranking': conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT id, sales_count * 0.6 + rating * 0.4 AS score FROM products "
+                    "WHERE is_active = 1 ORDER BY score DESC LIMIT 20").fetchall()
+            }
+        self.test_results['query_plans'] = {
+            name: ' | '.join(row[-1] for row in plan) for name, plan in plans.items()
+        }
+        self.test_results['query_plans']['covering_index_match'] = all(
+            'COVERING INDEX idx_products_analytics' in ' '.join(row[-1] for row in plan) for plan in plans.values())
+
+    async def _latency_ms(self, client: httpx.AsyncClient, path: str, before=None) -> Dict[str, Any]:
+        timings = []
+        for _ in range(self.repeat):
+            if before:
+                before()
+            start = time.perf_counter()
+            resp = await client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert resp.status_code == 200, resp.text
+        return {'p50_ms': round(statistics.median(timings), 2), 'max_ms': round(max(timings), 2),
+                'bytes': len(resp.content)}
+
+    async def test_latency(self, client: httpx.AsyncClient):
+        """冷计算、时间桶缓存、响应缓存三种情况的延迟"""
+        analytics = self.app_main.get_db_manager().analytics
+        cache = self.app_main.response_cache
+        rules = cache.rules
+        for name, path in ENDPOINTS.items():
+            cache.rules = {}
+            cold = await self._latency_ms(client, path, before=analytics.invalidate)
+            bucket = await self._latency_ms(client, path)
+            cache.rules = rules
+            cache.invalidate()
+            await client.get(path)
+            http = await self._latency_ms(client, path)
+            self.test_results[name] = {
+                'cold': cold,
+                'bucket_cached': bucket,
+                'response_cached': http,
+                'cold_met': cold['p50_ms'] < 2000,
+                'cached_met': bucket['p50_ms'] < 20,
+                'payload_met': cold['bytes'] < 16 * 1024
+            }
+
+    def test_payload(self):
+        """看板原先下载的全量产品列表大小（序列化 1 万个产品后按比例推算）"""
+        sample = self.app_main.get_db_manager().get_products(limit=10_000)
+        sample_bytes = len(self.responses.dumps(sample))
+        full_mb = sample_bytes / len(sample) * self.product_count / 1024 / 1024
+        largest = max(self.test_results[name]['cold']['bytes'] for name in ENDPOINTS)
+        self.test_results['payload'] = {
+            'full_product_list_mb': round(full_mb, 1),
+            'largest_aggregate_kb': round(largest / 1024, 1),
+            'reduction_factor': round(full_mb * 1024 * 1024 / largest)
+        }
+
+    async def _run(self):
+        app = self.app_main.app
+        async with app.router.lifespan_context(app):
+            self.setup_test_data()
+            self.test_query_plans()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await self.test_latency(client)
+            self.test_payload()
+        return self.test_results
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        return asyncio.run(self._run())
+
+    def cleanup(self):
+        import shutil
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_analytics_performance_tests(product_count: int = 1_000_000):
+    """运行看板聚合接口性能测试的主函数"""
+    print("=" * 60)
+    print("看板聚合接口性能测试")
+    print("=" * 60)
+
+    tester = AnalyticsPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        os.chdir(tester.cwd)
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/analytics_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    run_analytics_performance_tests(count)
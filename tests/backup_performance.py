@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库备份性能测试模块
+
+测试内容包括：
+1. 旧版单步备份（占用连接池连接，一次复制全部页）期间的写入延迟
+2. 分步备份期间的写入延迟、备份吞吐量、单步最长锁占用
+3. 少量写入后增量备份的大小与耗时
+
+测试指标：
+- 分步备份期间写入 p99 延迟 < 50ms
+- 增量备份大小 < 全量备份的 10%
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+class BackupPerformanceTest:
+    """数据库备份性能测试类"""
+
+    def __init__(self, size_mb: int = 200):
+        self.size_mb = size_mb
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "backup_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False
+        )
+        self.db = DatabaseManager(self.config)
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """生成约 size_mb 大小的产品数据"""
+        logger.info(f"生成约 {self.size_mb} MB 测试数据...")
+        rows = self.size_mb * 1024 * 1024 // 1100
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO products (product_name, platform, category, price, product_url, notes)
+                VALUES (?, 'amazon', 'tshirt', 19.99, ?, ?)
+            """, ((f"product {i}", f"https://amazon.com/p/{i}", os.urandom(500).hex())
+                  for i in range(rows)))
+            conn.commit()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.test_results['setup'] = {
+            'rows': rows,
+            'db_size_mb': round(os.path.getsize(self.config.db_path) / 1024 / 1024, 1)
+        }
+
+    def _with_writer(self, backup: Callable[[], Any]) -> Dict[str, Any]:
+        """后台写线程持续小事务写入，统计备份期间的写入延迟"""
+        latencies = []
+        stop = threading.Event()
+
+        def writer():
+            conn = sqlite3.connect(self.config.db_path, timeout=30.0)
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                conn.execute("UPDATE products SET sales_count = ? WHERE id = ?", (i, i % 1000 + 1))
+                conn.commit()
+                latencies.append((time.perf_counter() - start) * 1000)
+                i += 1
+                time.sleep(0.005)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        start = time.perf_counter()
+        try:
+            backup()
+        finally:
+            duration = time.perf_counter() - start
+            stop.set()
+            thread.join()
+
+        latencies.sort()
+        return {
+            'backup_seconds': round(duration, 2),
+            'writes': len(latencies),
+            'write_p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+            'write_p99_ms': round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+            'write_max_ms': round(latencies[-1], 2) if latencies else None
+        }
+
+    def test_legacy_backup(self):
+        """旧版：占用连接池连接一次复制全部页"""
+        target = Path(self.temp_dir) / "legacy.db"
+
+        def legacy():
+            with self.db.pool.get_connection() as conn:
+                backup_conn = sqlite3.connect(str(target))
+                conn.backup(backup_conn)
+                backup_conn.close()
+
+        self.test_results['legacy_backup'] = self._with_writer(legacy)
+        target.unlink()
+
+    def test_stepped_backup(self):
+        """分步备份"""
+        result = self._with_writer(lambda: self.db.create_backup("stepped.db"))
+        metrics = self.db.last_backup_metrics
+        result.update({
+            'throughput_mb_s': metrics['throughput_mb_s'],
+            'steps': metrics['steps'],
+            'restarts': metrics['restarts'],
+            'snapshot_pinned': metrics['snapshot_pinned'],
+            'max_step_ms': metrics['max_step_ms'],
+            'p99_met': result['write_p99_ms'] is not None and result['write_p99_ms'] < 50
+        })
+        self.test_results['stepped_backup'] = result
+
+    def test_incremental_backup(self):
+        """少量写入后的增量备份"""
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("UPDATE products SET price = 9.99 WHERE id = ?",
+                             ((i,) for i in range(1, 2001)))
+        full = self.db.backups.load_manifest()[-1]['metrics']['stored_bytes']
+        path = self.db.create_incremental_backup()
+        metrics = self.db.last_backup_metrics
+        self.test_results['incremental_backup'] = {
+            'changed_pages': metrics['changed_pages'],
+            'full_mb': round(full / 1024 / 1024, 2),
+            'incremental_mb': round(os.path.getsize(path) / 1024 / 1024, 2),
+            'duration_seconds': metrics['duration_seconds'],
+            'size_met': os.path.getsize(path) < full * 0.1
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_legacy_backup()
+        self.test_stepped_backup()
+        self.test_incremental_backup()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_backup_performance_tests(size_mb: int = 200):
+    """运行备份性能测试的主函数"""
+    print("=" * 60)
+    print("数据库备份性能测试")
+    print("=" * 60)
+
+    tester = BackupPerformanceTest(size_mb)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/backup_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    run_backup_performance_tests(size)
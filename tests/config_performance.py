@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置读取与热加载性能测试模块
+
+测试内容包括：
+1. 单次查找耗时：逐层遍历嵌套字典（原实现）、快照查找（ConfigManager.get）、绑定后的属性读取
+2. 记录执行数据的热路径：PerformanceMonitor.record_execution 每条记录查两次告警阈值（原实现）与绑定阈值
+3. 连续修改配置：每次修改都写文件（save）与合并写入（update + flush）的耗时与写文件次数
+4. 热加载：外部修改配置文件到订阅者收到新快照的延迟，以及期间事件循环的最大停顿
+
+测试指标：
+- 快照查找比逐层遍历快 2 倍以上
+- 200 次连续修改只写 1 次文件
+- 热加载期间事件循环停顿 < 20ms
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from pathlib import Path
+from typing import Dict, Any
+from unittest.mock import patch
+import logging
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "code"))
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALERT_KEY = "monitoring.alert_thresholds.avg_response_time"
+
+
+def legacy_get(config: Dict[str, Any], key: str, default=None):
+    """原 ConfigManager.get：每次拆分点分路径并逐层遍历"""
+    value = config
+    try:
+        for k in key.split('.'):
+            value = value[k]
+        return value
+    except (KeyError, TypeError):
+        return default
+
+
+class ConfigPerformanceTest:
+    """配置读取与热加载性能测试类"""
+
+    def __init__(self, records: int = 100_000):
+        self.records = records
+        # 导入 main 会在工作目录下创建 logs/，在临时目录中运行
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.config_file = os.path.join(self.temp_dir, "config", "config.yaml")
+        import main
+        self.main = main
+        self.config = main.ConfigManager(self.config_file, save_delay=0.2)
+        self.test_results = {}
+
+    def _ns_per_call(self, func, number: int = 200_000) -> float:
+        return round(min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9, 1)
+
+    def test_lookup(self):
+        """三种方式读取同一个 4 层配置项"""
+        config = self.config
+        monitor = self.main.PerformanceMonitor(config)
+        legacy_ns = self._ns_per_call(lambda: legacy_get(config.config, ALERT_KEY, 30))
+        snapshot_ns = self._ns_per_call(lambda: config.get(ALERT_KEY, 30))
+        bound_ns = self._ns_per_call(lambda: monitor.response_time_threshold)
+        self.test_results['lookup'] = {
+            'legacy_ns': legacy_ns,
+            'snapshot_ns': snapshot_ns,
+            'bound_ns': bound_ns,
+            'speedup': round(legacy_ns / snapshot_ns, 1),
+            'values_match': legacy_get(config.config, ALERT_KEY) == config.get(ALERT_KEY)
+                            == monitor.response_time_threshold,
+            'speedup_met': legacy_ns >= snapshot_ns * 2
+        }
+
+    def test_record_execution(self):
+        """逐条记录执行数据（告警阈值按原实现每条查询两次 vs 绑定）"""
+        main = self.main
+        config = self.config
+
+        class LegacyMonitor(main.PerformanceMonitor):
+            def _check_performance_alerts(self, record):
+                failure_threshold = legacy_get(config.config, "monitoring.alert_thresholds.failure_rate", 0.3)
+                response_time_threshold = legacy_get(config.config, ALERT_KEY, 30)
+                if record["execution_time"] > response_time_threshold:
+                    main.logger.warning("响应时间过长")
+
+        results = {}
+        for name, cls in (('legacy', LegacyMonitor), ('bound', main.PerformanceMonitor)):
+            timings = []
+            for _ in range(3):
+                monitor = cls(config)
+                start = time.perf_counter()
+                for i in range(self.records):
+                    monitor.record_execution(main.Platform.AMAZON, 1.0 + i % 7, True, 20)
+                timings.append(time.perf_counter() - start)
+            results[name] = {'records_per_second': round(self.records / min(timings))}
+        results['speedup'] = round(results['bound']['records_per_second'] /
+                                   results['legacy']['records_per_second'], 2)
+        self.test_results['record_execution'] = results
+
+    def test_debounced_writes(self, updates: int = 200):
+        """连续修改配置：每次 save 与合并写入"""
+        config = self.config
+        results = {}
+        with patch.object(config, '_write', wraps=config._write) as write:
+            start = time.perf_counter()
+            for i in range(updates):
+                config.config["benchmark"] = i
+                config.save()
+            results['save_each'] = {'ms': round((time.perf_counter() - start) * 1000, 1),
+                                    'writes': write.call_count}
+
+            write.reset_mock()
+            start = time.perf_counter()
+            for i in range(updates):
+                config.update("benchmark", i)
+            elapsed = time.perf_counter() - start
+            config.flush()
+            results['debounced'] = {'ms': round(elapsed * 1000, 1), 'writes': write.call_count}
+
+        results['persisted_match'] = self.main.ConfigManager(self.config_file).get("benchmark") == updates - 1
+        results['single_write_met'] = results['debounced']['writes'] == 1
+        self.test_results['debounced_writes'] = results
+
+    async def _reload_latency(self, reloads: int, interval: float):
+        config = self.config
+        received = threading.Event()
+        config.subscribe(lambda snapshot: received.set())
+        config.watch(interval)
+
+        lag = []
+        stop = False
+
+        async def ticker():
+            # 每 1ms 醒一次，记录比预期晚了多久
+            while not stop:
+                expected = time.perf_counter() + 0.001
+                await asyncio.sleep(0.001)
+                lag.append(time.perf_counter() - expected)
+        ticking = asyncio.create_task(ticker())
+
+        latencies = []
+        try:
+            for i in range(reloads):
+                received.clear()
+                text = Path(self.config_file).read_text(encoding='utf-8')
+                Path(self.config_file).write_text(
+                    text.replace(f"avg_response_time: {30 + i}", f"avg_response_time: {31 + i}"),
+                    encoding='utf-8')
+                start = time.perf_counter()
+                while not received.is_set():
+                    await asyncio.sleep(0.001)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            stop = True
+            await ticking
+            config.stop_watching()
+        return latencies, lag
+
+    def test_hot_reload(self, reloads: int = 20, interval: float = 0.05):
+        """外部修改配置文件后热加载的延迟与事件循环停顿"""
+        self.config.update(ALERT_KEY, 30)
+        self.config.flush()
+        monitor = self.main.PerformanceMonitor(self.config)
+        latencies, lag = asyncio.run(self._reload_latency(reloads, interval))
+        max_lag_ms = max(lag) * 1000
+        self.test_results['hot_reload'] = {
+            'reloads': reloads,
+            'poll_interval_s': interval,
+            'latency_p50_ms': round(statistics.median(latencies) * 1000, 1),
+            'latency_max_ms': round(max(latencies) * 1000, 1),
+            'event_loop_max_lag_ms': round(max_lag_ms, 2),
+            'bound_value_match': monitor.response_time_threshold == 30 + reloads,
+            'event_loop_met': max_lag_ms < 20
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.test_lookup()
+        self.test_record_execution()
+        self.test_debounced_writes()
+        self.test_hot_reload()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_config_performance_tests(records: int = 100_000):
+    """运行配置读取与热加载性能测试的主函数"""
+    print("=" * 60)
+    print("配置读取与热加载性能测试")
+    print("=" * 60)
+
+    tester = ConfigPerformanceTest(records)
+    try:
+        results = tester.run_all_tests()
+        os.chdir(tester.cwd)
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/config_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run_config_performance_tests(count)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库连接池性能测试模块
+
+测试内容包括（50 个读线程 + 1 个写线程并发）：
+1. 旧版连接池（预创建 pool_size 个相同读写连接，Queue 阻塞获取）
+2. 读写分离连接池（单写连接 + 按需增长的只读连接）
+
+测试指标：
+- 读请求 p99 延迟、吞吐量、获取连接超时次数
+- 写请求 p99 延迟
+- 连接池等待/占用直方图
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Queue, Empty
+from typing import Dict, Any, List
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.CRITICAL)
+
+
+class LegacyPool:
+    """旧版连接池：预创建读写连接，读写共用"""
+
+    def __init__(self, db_path: str, pool_size: int):
+        self._connections = Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._connections.put(conn)
+
+    @contextmanager
+    def get_connection(self, timeout: float = 30.0):
+        try:
+            conn = self._connections.get(timeout=timeout)
+        except Empty:
+            raise RuntimeError("数据库连接池已满")
+        try:
+            yield conn
+        finally:
+            self._connections.put_nowait(conn)
+
+    read_connection = get_connection
+
+    def close_all(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))], 2)
+
+
+class ConnectionPoolPerformanceTest:
+    """连接池性能测试类"""
+
+    def __init__(self, readers: int = 50, duration: float = 5.0, product_count: int = 50_000):
+        self.readers = readers
+        self.duration = duration
+        self.product_count = product_count
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "pool_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            connection_pool_size=10,
+            auto_backup=False
+        )
+        self.db = DatabaseManager(self.config)
+        self.test_results = {}
+
+    def setup_test_data(self):
+        logger.info(f"生成 {self.product_count} 个产品...")
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO products (id, product_name, platform, category, price, product_url)
+                VALUES (?, ?, ?, 'tshirt', 19.99, ?)
+            """, ((i, f"product {i}", 'amazon' if i % 2 else 'tiktok', f"https://amazon.com/p/{i}")
+                  for i in range(1, self.product_count + 1)))
+
+    def _run(self, pool) -> Dict[str, Any]:
+        """50 读 + 1 写，持续 duration 秒"""
+        read_latencies, write_latencies = [], []
+        errors = {'read': 0, 'write': 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader(worker_id: int):
+            local, failed, i = [], 0, 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with pool.read_connection(timeout=5.0) as conn:
+                        conn.execute("SELECT * FROM products WHERE id = ?",
+                                     ((worker_id * 997 + i) % self.product_count + 1,)).fetchone()
+                        conn.execute("""
+                            SELECT id, product_name, price FROM products
+                            ORDER BY last_updated_at DESC LIMIT 20
+                        """).fetchall()
+                    local.append((time.perf_counter() - start) * 1000)
+                except Exception:
+                    failed += 1
+                i += 1
+            with lock:
+                read_latencies.extend(local)
+                errors['read'] += failed
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with pool.get_connection(timeout=5.0) as conn:
+                        conn.execute("UPDATE products SET price = ?, last_updated_at = CURRENT_TIMESTAMP "
+                                     "WHERE id = ?", (10 + i % 50, i % self.product_count + 1))
+                        conn.commit()
+                    write_latencies.append((time.perf_counter() - start) * 1000)
+                except Exception:
+                    errors['write'] += 1
+                i += 1
+                time.sleep(0.002)
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(self.readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(self.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'reads': len(read_latencies),
+            'reads_per_second': round(len(read_latencies) / self.duration),
+            'read_p50_ms': round(statistics.median(read_latencies), 2) if read_latencies else None,
+            'read_p99_ms': percentile(read_latencies, 0.99),
+            'writes': len(write_latencies),
+            'write_p99_ms': percentile(write_latencies, 0.99),
+            'read_errors': errors['read'],
+            'write_errors': errors['write']
+        }
+
+    def test_legacy_pool(self):
+        pool = LegacyPool(self.config.db_path, self.config.connection_pool_size)
+        try:
+            self.test_results['legacy_pool'] = self._run(pool)
+        finally:
+            pool.close_all()
+
+    def test_split_pool(self):
+        result = self._run(self.db.pool)
+        metrics = self.db.pool.metrics()
+        result.update({
+            'open_readers': metrics['open_readers'],
+            'read_wait_p99_ms': metrics['read_wait_ms']['p99_ms'],
+            'write_wait_p99_ms': metrics['write_wait_ms']['p99_ms'],
+            'read_hold_p99_ms': metrics['read_hold_ms']['p99_ms'],
+            'timeouts': metrics['timeouts'],
+            'leaks_detected': metrics['leaks_detected']
+        })
+        result['errors_met'] = result['read_errors'] == 0 and result['write_errors'] == 0
+        legacy = self.test_results.get('legacy_pool')
+        if legacy:
+            result['write_throughput_met'] = result['writes'] >= legacy['writes']
+        self.test_results['split_pool'] = result
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_legacy_pool()
+        self.test_split_pool()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_connection_pool_performance_tests(readers: int = 50, duration: float = 5.0):
+    """运行连接池性能测试的主函数"""
+    print("=" * 60)
+    print("数据库连接池性能测试")
+    print("=" * 60)
+
+    tester = ConnectionPoolPerformanceTest(readers, duration)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/connection_pool_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    run_connection_pool_performance_tests(readers)
@@ -8,6 +8,7 @@
 2. 大量数据查询速度
 3. 并发访问稳定性
 4. 索引优化效果
+5. 性能配置（ingest / serve / analytics）在写入与查询负载下的对比
 
 测试指标：
 - 数据库查询: < 100ms
@@ -30,7 +31,7 @@ import logging
 # 导入数据库管理器
 import sys
 sys.path.append(str(Path(__file__).parent.parent / "code"))
-from database import DatabaseManager, DatabaseConfig, create_sample_data
+from database import DatabaseManager, DatabaseConfig, PERFORMANCE_PROFILES, create_sample_data
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -314,6 +315,90 @@ class DatabasePerformanceTest:
         
         logger.info(f"索引优化: 性能提升 {improvement:.1f}%")
     
+    def test_profile_performance(self, product_count: int = 50000):
+        """对比各性能配置在写入与查询负载下的表现"""
+        logger.info("测试性能配置 (ingest / serve / analytics)...")
+        import tempfile
+        import shutil
+        
+        profile_results = {}
+        for profile in [None] + list(PERFORMANCE_PROFILES):
+            temp_dir = tempfile.mkdtemp()
+            manager = DatabaseManager(DatabaseConfig(
+                db_path=str(Path(temp_dir) / "profile.db"),
+                backup_dir=str(Path(temp_dir) / "backup"),
+                auto_backup=False,
+                optimize_interval_hours=0,
+                performance_profile=profile
+            ))
+            try:
+                # 写入负载：每批 500 行一个事务
+                rows = [(f"测试产品 {i}", random.choice(['tiktok', 'amazon']),
+                         random.choice(['tshirt', 'hoodie', 'sweatshirt']),
+                         round(random.uniform(15.99, 89.99), 2), random.randint(100, 10000),
+                         f"https://test.com/product/{i}", f"店铺 {i % 500}")
+                        for i in range(product_count)]
+                start_time = time.time()
+                for offset in range(0, product_count, 500):
+                    with manager.pool.get_connection() as conn:
+                        conn.executemany("""
+                            INSERT INTO products (product_name, platform, category, price, sales_count,
+                                                  product_url, store_name)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """, rows[offset:offset + 500])
+                        conn.commit()
+                insert_time = time.time() - start_time
+                manager.optimize(analyze=True)
+                
+                # 查询负载：点查询、列表页、聚合，各取 3 轮最好成绩
+                ids = [random.randint(1, product_count) for _ in range(5000)]
+                
+                def point_queries():
+                    with manager.pool.read_connection() as conn:
+                        for product_id in ids:
+                            conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
+                
+                def list_queries():
+                    for _ in range(20):
+                        manager.get_products(platform='tiktok', category='hoodie', limit=50)
+                
+                def aggregate_queries():
+                    with manager.pool.read_connection() as conn:
+                        for _ in range(5):
+                            conn.execute("""
+                                SELECT store_name, category, COUNT(*), AVG(price), SUM(sales_count)
+                                FROM products GROUP BY store_name, category
+                                ORDER BY SUM(sales_count) DESC
+                            """).fetchall()
+                
+                def best_of(func, rounds=3):
+                    timings = []
+                    for _ in range(rounds):
+                        start_time = time.time()
+                        func()
+                        timings.append(time.time() - start_time)
+                    return round(min(timings) * 1000, 2)
+                
+                profile_results[profile or 'baseline'] = {
+                    'insert_rate': round(product_count / insert_time),
+                    'point_query_ms': best_of(point_queries),
+                    'list_query_ms': best_of(list_queries),
+                    'aggregate_ms': best_of(aggregate_queries)
+                }
+            finally:
+                manager.close()
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            
+            logger.info(f"{profile or 'baseline'}: {profile_results[profile or 'baseline']}")
+        
+        baseline = profile_results['baseline']
+        profile_results['target_met'] = (
+            profile_results['ingest']['insert_rate'] >= baseline['insert_rate'] * 0.95
+            and profile_results['serve']['point_query_ms'] <= baseline['point_query_ms'] * 1.05
+            and profile_results['analytics']['aggregate_ms'] <= baseline['aggregate_ms'] * 1.05
+        )
+        self.test_results['profile_performance'] = profile_results
+    
     def test_memory_usage(self):
         """测试内存使用情况"""
         logger.info("测试内存使用情况...")
@@ -353,6 +438,7 @@ class DatabasePerformanceTest:
             self.test_query_performance()
             self.test_concurrent_access(10)
             self.test_index_performance()
+            self.test_profile_performance()
             self.test_memory_usage()
             
             logger.info("数据库性能测试完成")
@@ -401,6 +487,7 @@ class DatabasePerformanceTest:
             ),
             'concurrent_access': lambda results: results['target_met'],
             'index_performance': lambda results: results['target_met'],
+            'profile_performance': lambda results: results['target_met'],
             'memory_usage': lambda results: results['target_met']
         }
         
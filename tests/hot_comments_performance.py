@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热度评论性能测试模块
+
+测试内容包括：
+1. 逐条 insert_hot_comment 与 insert_hot_comments 批量写入吞吐量
+2. 加载 100 个产品详情卡片：逐个 get_hot_comments 与一次 get_hot_comments_for_products
+3. 导出点赞最多的 100 条评论（按点赞数全量排序 与 沿索引提前停止）
+
+测试指标（1万产品，每个产品 50 条评论）：
+- 批量写入比逐条写入快 10 倍以上
+- 100 个产品的前 5 条评论单次查询 p99 < 10ms，且快于逐个查询
+"""
+
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+LEGACY_EXPORT = """
+    SELECT hc.*, p.product_name, p.platform
+    FROM hot_comments hc
+    JOIN products p ON hc.product_id = p.id
+    WHERE p.is_active = 1
+    ORDER BY hc.likes_count DESC
+    LIMIT 100
+"""
+
+INDEXED_EXPORT = LEGACY_EXPORT.replace("JOIN products p", "CROSS JOIN products p")
+
+
+class HotCommentsPerformanceTest:
+    """热度评论性能测试类"""
+
+    def __init__(self, product_count: int = 10_000, comments_per_product: int = 50):
+        self.product_count = product_count
+        self.comments_per_product = comments_per_product
+        self.rng = random.Random(11)
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "comments_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False,
+            optimize_interval_hours=0
+        )
+        self.db = DatabaseManager(self.config)
+        self.test_results = {}
+
+    def setup_test_data(self):
+        logger.info(f"生成 {self.product_count} 个产品...")
+        with self.db.pool.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO products (id, product_name, platform, category, price, product_url, is_active)
+                VALUES (?, ?, 'amazon', 'tshirt', 19.99, ?, ?)
+            """, ((i, f"product {i}", f"https://amazon.com/p/{i}", int(i % 10 != 0))
+                  for i in range(1, self.product_count + 1)))
+            conn.commit()
+
+    def _comments(self, count: int) -> List[Dict[str, Any]]:
+        return [{
+            'product_id': self.rng.randint(1, self.product_count),
+            'comment_text': f"comment {i}",
+            'comment_author': f"user{i % 500}",
+            'likes_count': int(self.rng.paretovariate(1.2) * 10),
+            'replies_count': self.rng.randint(0, 30)
+        } for i in range(count)]
+
+    def test_ingest(self, sample: int = 2000):
+        """逐条写入（抽样）与整批写入全部评论"""
+        comments = self._comments(sample)
+        start = time.perf_counter()
+        for comment in comments:
+            self.db.insert_hot_comment(comment['product_id'], comment)
+        single_seconds = time.perf_counter() - start
+
+        total = self.product_count * self.comments_per_product - sample
+        comments = self._comments(total)
+        start = time.perf_counter()
+        result = self.db.insert_hot_comments(comments)
+        batch_seconds = time.perf_counter() - start
+
+        single_rate = sample / single_seconds
+        batch_rate = total / batch_seconds
+        self.test_results['ingest'] = {
+            'single_comments_per_second': round(single_rate),
+            'batch_comments': result['inserted'],
+            'batch_seconds': round(batch_seconds, 2),
+            'batch_comments_per_second': round(batch_rate),
+            'speedup': round(batch_rate / single_rate, 1),
+            'speedup_met': batch_rate > single_rate * 10
+        }
+
+    def _measure(self, func, repeat: int = 30) -> Dict[str, float]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 2)
+        }
+
+    def test_product_cards(self, cards: int = 100, per_product: int = 5):
+        """加载 cards 个产品卡片，每个取前 per_product 条评论"""
+        ids = self.rng.sample(range(1, self.product_count + 1), cards)
+
+        def one_by_one():
+            return {pid: self.db.get_hot_comments(pid, limit=per_product) for pid in ids}
+
+        def batched():
+            return self.db.get_hot_comments_for_products(ids, limit_per_product=per_product)
+
+        one_by_one_timing = self._measure(one_by_one)
+        batched_timing = self._measure(batched)
+        self.test_results['product_cards'] = {
+            'cards': cards,
+            'one_by_one': one_by_one_timing,
+            'batched': batched_timing,
+            'results_match': one_by_one() == batched(),
+            'batched_met': (batched_timing['p99_ms'] < 10 and
+                            batched_timing['p50_ms'] < one_by_one_timing['p50_ms'])
+        }
+
+    def test_export(self):
+        """导出点赞最多的 100 条评论"""
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            legacy = self._measure(lambda: conn.execute(LEGACY_EXPORT).fetchall(), repeat=10)
+            indexed = self._measure(lambda: conn.execute(INDEXED_EXPORT).fetchall(), repeat=10)
+            same = ([tuple(r) for r in conn.execute(LEGACY_EXPORT)] ==
+                    [tuple(r) for r in conn.execute(INDEXED_EXPORT)])
+        self.test_results['export'] = {
+            'sort_all_rows': legacy,
+            'walk_likes_index': indexed,
+            'results_match': same
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_ingest()
+        self.test_product_cards()
+        self.test_export()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_hot_comments_performance_tests(product_count: int = 10_000):
+    """运行热度评论性能测试的主函数"""
+    print("=" * 60)
+    print("热度评论性能测试")
+    print("=" * 60)
+
+    tester = HotCommentsPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/hot_comments_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    run_hot_comments_performance_tests(count)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 响应序列化与压缩性能测试模块
+
+测试内容包括（1万个产品的列表响应）：
+1. 序列化耗时：FastAPI 默认（jsonable_encoder + json）、FastJSONResponse（orjson）、json_chunks 分块
+2. 传输字节数与压缩耗时：原始、gzip、brotli（未安装 brotli 时跳过）
+3. 端到端 GET /api/v1/products?limit=10000：不压缩与 gzip 的延迟和实际传输字节数
+
+测试指标：
+- orjson 序列化比 FastAPI 默认快 3 倍以上
+- gzip 后的字节数不超过原始大小的 25%
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+ADJECTIVES = ['vintage', 'oversized', 'cropped', 'relaxed', 'slim', 'classic', 'retro', 'cozy']
+COLORS = ['black', 'white', 'navy', 'sage', 'burgundy', 'cream', 'charcoal', 'olive']
+TYPES = {'tshirt': 'tee', 'hoodie': 'hoodie', 'sweatshirt': 'crewneck'}
+
+
+class JsonCompressionPerformanceTest:
+    """API 响应序列化与压缩性能测试类"""
+
+    def __init__(self, product_count: int = 10_000):
+        self.product_count = product_count
+        self.rng = random.Random(17)
+        # 协调器的 config/、data/、logs/ 都是相对路径，在临时目录中运行
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        os.makedirs("logs")
+        os.environ["PRODUCTS_DB_PATH"] = str(Path(self.temp_dir) / "data" / "products.db")
+        os.environ["JOB_RUNNER"] = "inline"
+        import app.main as app_main
+        from app import compression, responses
+        self.app_main = app_main
+        self.compression = compression
+        self.responses = responses
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """写入产品（含图片、关键词等 JSON 字段），按接口的方式读出"""
+        logger.info(f"生成 {self.product_count} 个产品...")
+        with self.app_main.get_db_manager().pool.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO products (product_name, platform, category, price, original_price, sales_count,
+                                      rating, review_count, product_url, store_name, main_image_url,
+                                      image_urls, keywords, like_count, view_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, self._rows())
+            conn.commit()
+        self.products = self.app_main.get_db_manager().get_products(limit=self.product_count)
+        self.test_results['setup'] = {
+            'products': len(self.products),
+            'orjson_available': self.responses.orjson is not None,
+            'brotli_available': self.compression.brotli is not None
+        }
+
+    def _rows(self):
+        for i in range(self.product_count):
+            category = self.rng.choice(list(TYPES))
+            price = round(self.rng.uniform(9.99, 59.99), 2)
+            yield (f"{self.rng.choice(ADJECTIVES).title()} {self.rng.choice(COLORS).title()} {TYPES[category]} #{i}",
+                   self.rng.choice(['tiktok', 'amazon']), category, price, round(price * 1.3, 2),
+                   self.rng.randint(0, 50_000), round(self.rng.uniform(3, 5), 1), self.rng.randint(0, 9000),
+                   f"https://shop.test/p/{i}", f"store {i % 300}", f"https://img.test/{i}/main.jpg",
+                   json.dumps([f"https://img.test/{i}/{n}.jpg" for n in range(4)]),
+                   json.dumps(self.rng.sample(ADJECTIVES + COLORS, 4)),
+                   self.rng.randint(0, 100_000), self.rng.randint(0, 1_000_000))
+
+    def _measure(self, func, repeat: int = 10) -> Dict[str, float]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return {'p50_ms': round(statistics.median(timings), 2), 'max_ms': round(max(timings), 2)}
+
+    def test_serialization(self):
+        """三种序列化方式的耗时（同一份 data）"""
+        data = {"products": self.products, "total": len(self.products), "limit": self.product_count, "offset": 0}
+        payload = self.responses.envelope(data)
+
+        def fastapi_default():
+            return JSONResponse(jsonable_encoder(payload)).body
+
+        def fast_json():
+            return self.responses.FastJSONResponse(payload).body
+
+        def streamed():
+            meta = {k: v for k, v in data.items() if k != "products"}
+            return b"".join(self.responses.json_chunks(meta, "products", self.products))
+
+        default_timing = self._measure(fastapi_default)
+        fast_timing = self._measure(fast_json)
+        streamed_timing = self._measure(streamed)
+        self.body = fast_json()
+        expected = json.loads(fastapi_default())
+        self.test_results['serialization'] = {
+            'fastapi_default': default_timing,
+            'fast_json_response': fast_timing,
+            'json_chunks': streamed_timing,
+            'speedup': round(default_timing['p50_ms'] / fast_timing['p50_ms'], 1),
+            'results_match': json.loads(self.body) == expected,
+            'stream_match': json.loads(streamed())['data'] == expected['data'],
+            'speedup_met': default_timing['p50_ms'] >= fast_timing['p50_ms'] * 3
+        }
+
+    def test_compression(self):
+        """原始 / gzip / brotli 字节数与压缩耗时"""
+        raw = len(self.body)
+        results = {'raw_bytes': raw}
+        for name in ('gzip', 'br'):
+            if name == 'br' and self.compression.brotli is None:
+                results['br'] = None
+                continue
+            def compress():
+                compressor = self.compression._Compressor(name, gzip_level=6, brotli_quality=4)
+                return compressor.compress(self.body) + compressor.finish()
+            timing = self._measure(compress)
+            compressed = compress()
+            results[name] = dict(timing, bytes=len(compressed), ratio=round(len(compressed) / raw, 3))
+            if name == 'gzip':
+                results['gzip_roundtrip_match'] = gzip.decompress(compressed) == self.body
+        results['gzip_met'] = results['gzip']['ratio'] <= 0.25
+        self.test_results['compression'] = results
+
+    async def test_end_to_end(self):
+        """GET /api/v1/products?limit=10000（关闭响应缓存，每次都查询、序列化、压缩）"""
+        self.app_main.response_cache.rules = {}
+        path = f"/api/v1/products?limit={self.product_count}"
+        transport = httpx.ASGITransport(app=self.app_main.app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for name, encoding in (('identity', 'identity'), ('gzip', 'gzip')):
+                timings = []
+                for _ in range(10):
+                    start = time.perf_counter()
+                    resp = await client.get(path, headers={'Accept-Encoding': encoding})
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[name] = {
+                    'p50_ms': round(statistics.median(timings), 2),
+                    'wire_bytes': resp.num_bytes_downloaded,
+                    'content_encoding': resp.headers.get('content-encoding', 'identity'),
+                    'products': len(resp.json()['data']['products'])
+                }
+        results['products_match'] = all(results[n]['products'] == self.product_count for n in ('identity', 'gzip'))
+        self.test_results['end_to_end'] = results
+
+    async def _run(self):
+        app = self.app_main.app
+        async with app.router.lifespan_context(app):
+            self.setup_test_data()
+            self.test_serialization()
+            self.test_compression()
+            await self.test_end_to_end()
+        return self.test_results
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        return asyncio.run(self._run())
+
+    def cleanup(self):
+        import shutil
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_json_compression_performance_tests(product_count: int = 10_000):
+    """运行 API 响应序列化与压缩性能测试的主函数"""
+    print("=" * 60)
+    print("API 响应序列化与压缩性能测试")
+    print("=" * 60)
+
+    tester = JsonCompressionPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        os.chdir(tester.cwd)
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/json_compression_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    run_json_compression_performance_tests(count)
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格历史按月分区性能测试模块
+
+测试内容包括（同一批数据分别写入两种布局）：
+1. 旧版单表 price_history 与按月分区（24 个月分区 + UNION ALL 视图）的建表耗时、文件大小
+2. get_price_history（单产品近30天）p50 / p99 延迟
+3. 看板近30天价格趋势聚合：单表、经视图、get_price_trends（逐分区聚合）
+4. 保留期清理：单表逐行 DELETE 最早一个月 与 分区归档 + DROP TABLE
+
+测试指标（1亿条价格历史，10万产品）：
+- 分区版 get_price_history p99 < 5ms
+- get_price_trends 与单表聚合相差不超过 20%（两种布局都沿时间索引扫描近30天的行）
+- 保留期清理比逐行 DELETE 快 10 倍以上（不含归档）
+"""
+
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+from database_partitions import month_bounds, month_key, shift_month
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+logging.getLogger('database_partitions').setLevel(logging.WARNING)
+
+
+LEGACY_SCHEMA = """
+    CREATE TABLE price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER,
+        price DECIMAL(10,2) NOT NULL,
+        original_price DECIMAL(10,2),
+        discount_percent INTEGER,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        min_price DECIMAL(10,2),
+        max_price DECIMAL(10,2),
+        is_compacted BOOLEAN DEFAULT 0
+    )
+"""
+
+LEGACY_INDEXES = [
+    "CREATE INDEX idx_price_history_product_date ON price_history(product_id, recorded_at)",
+    "CREATE INDEX idx_price_history_date ON price_history(recorded_at)",
+]
+
+LEGACY_HISTORY = """
+    SELECT id, product_id, price, original_price, discount_percent,
+           COALESCE(min_price, price) AS min_price,
+           COALESCE(max_price, price) AS max_price,
+           is_compacted, recorded_at
+    FROM price_history
+    WHERE product_id = ? AND recorded_at >= datetime('now', '-30 days')
+    ORDER BY recorded_at ASC
+"""
+
+PRICE_TRENDS = """
+    SELECT DATE(recorded_at) AS date, ROUND(AVG(price), 2) AS avg_price,
+           COUNT(DISTINCT product_id) AS product_count,
+           ROUND(AVG(discount_percent), 1) AS avg_discount
+    FROM price_history
+    WHERE recorded_at >= date('now', '-30 days')
+    GROUP BY DATE(recorded_at)
+    ORDER BY date ASC
+"""
+
+# 一个月内均匀分布的价格记录，产品ID轮转
+GENERATE_MONTH = """
+    INSERT INTO {table} (product_id, price, recorded_at)
+    WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < :rows - 1)
+    SELECT n % :products + 1, 20 + (n % 97) / 10.0,
+           datetime(:start, '+' || CAST(n * :span / :rows AS INTEGER) || ' seconds')
+    FROM seq
+"""
+
+
+class PartitionPerformanceTest:
+    """价格历史分区性能测试类"""
+
+    def __init__(self, history_rows: int = 100_000_000, months: int = 24, product_count: int = 100_000):
+        self.history_rows = history_rows
+        self.months = [shift_month(month_key(), -i) for i in range(months - 1, -1, -1)]
+        self.product_count = product_count
+        self.rng = random.Random(5)
+        self.temp_dir = tempfile.mkdtemp()
+        self.legacy_path = str(Path(self.temp_dir) / "legacy.db")
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "partitioned.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False,
+            optimize_interval_hours=0,
+            price_history_retention_months=months - 1
+        )
+        self.db = DatabaseManager(self.config)
+        self.test_results = {}
+
+    def _fill(self, conn: sqlite3.Connection, table_for_month):
+        rows_per_month = self.history_rows // len(self.months)
+        for month in self.months:
+            start, end = month_bounds(month)
+            span = (time.mktime(time.strptime(end, '%Y-%m')) - time.mktime(time.strptime(start, '%Y-%m')))
+            conn.execute(GENERATE_MONTH.format(table=table_for_month(month)), {
+                'rows': rows_per_month, 'products': self.product_count,
+                'start': f"{start}-01", 'span': int(span)
+            })
+            conn.commit()
+
+    def setup_test_data(self):
+        """两种布局写入相同的数据"""
+        logger.info(f"生成旧版单表 {self.history_rows} 条价格历史...")
+        start = time.perf_counter()
+        with sqlite3.connect(self.legacy_path) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA cache_size = -262144")
+            conn.execute(LEGACY_SCHEMA)
+            self._fill(conn, lambda month: "price_history")
+            # 单表先写数据后建索引，已是单表布局最快的建法
+            for sql in LEGACY_INDEXES:
+                conn.execute(sql)
+            conn.execute("ANALYZE")
+        legacy_seconds = time.perf_counter() - start
+
+        logger.info(f"生成分区布局 {self.history_rows} 条价格历史...")
+        partitions = self.db.partitions['price_history']
+        start = time.perf_counter()
+        with self.db.pool.get_connection() as conn:
+            for month in self.months:
+                partitions.ensure(conn.cursor(), month)
+            conn.commit()
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.execute("PRAGMA cache_size = -262144")
+            self._fill(conn, partitions.table)
+            # 与单表一样让索引页连续（生产中两种布局的索引都是边写边建）
+            for month in self.months:
+                conn.execute(f"REINDEX {partitions.table(month)}")
+            conn.execute("ANALYZE")
+        partitioned_seconds = time.perf_counter() - start
+
+        self.test_results['setup'] = {
+            'history_rows': self.history_rows,
+            'partitions': len(self.months),
+            'legacy_load_seconds': round(legacy_seconds, 1),
+            'partitioned_load_seconds': round(partitioned_seconds, 1),
+            'legacy_size_mb': round(os.path.getsize(self.legacy_path) / 1024 / 1024),
+            'partitioned_size_mb': round(os.path.getsize(self.config.db_path) / 1024 / 1024)
+        }
+
+    def _measure(self, func, repeat: int) -> Dict[str, float]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings), 3),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3)
+        }
+
+    def test_queries(self, repeat: int = 500):
+        """单产品近30天历史与30天趋势聚合（同为直接执行SQL，另记录 get_price_history 接口耗时）"""
+        product_ids = [self.rng.randint(1, self.product_count) for _ in range(repeat)]
+        partitions = self.db.partitions['price_history']
+        tables = partitions.tables_since(30)
+        partitioned_sql = partitions.union_sql(
+            tables, "*", "product_id = ? AND recorded_at >= datetime('now', '-30 days')"
+        ) + " ORDER BY recorded_at ASC"
+
+        with sqlite3.connect(f"file:{self.legacy_path}?mode=ro", uri=True) as legacy:
+            ids = iter(product_ids)
+            legacy_history = self._measure(lambda: legacy.execute(LEGACY_HISTORY, (next(ids),)).fetchall(), repeat)
+            legacy_trends = self._measure(lambda: legacy.execute(PRICE_TRENDS).fetchall(), 5)
+            expected = [tuple(r[2:]) for r in legacy.execute(LEGACY_HISTORY, (product_ids[0],))]
+            expected_trends = [tuple(r) for r in legacy.execute(PRICE_TRENDS)]
+
+        with sqlite3.connect(f"file:{self.config.db_path}?mode=ro", uri=True) as conn:
+            ids = iter(product_ids)
+            partitioned_history = self._measure(
+                lambda: conn.execute(partitioned_sql, (next(ids),) * len(tables)).fetchall(), repeat)
+            view_trends = self._measure(lambda: conn.execute(PRICE_TRENDS).fetchall(), 5)
+        ids = iter(product_ids)
+        api_history = self._measure(lambda: self.db.get_price_history(next(ids)), repeat)
+        actual = [tuple(r.values())[2:] for r in self.db.get_price_history(product_ids[0])]
+        api_trends = self._measure(lambda: self.db.get_price_trends(30), 5)
+        actual_trends = [tuple(r.values()) for r in self.db.get_price_trends(30)]
+
+        self.test_results['queries'] = {
+            'partitions_scanned': len(tables),
+            'legacy_history': legacy_history,
+            'partitioned_history': partitioned_history,
+            'get_price_history_api': api_history,
+            'legacy_price_trends': legacy_trends,
+            'view_price_trends': view_trends,
+            'get_price_trends_api': api_trends,
+            'results_match': expected == actual,
+            'trends_match': expected_trends == actual_trends,
+            'p99_met': api_history['p99_ms'] < 5,
+            'trends_met': api_trends['p50_ms'] <= legacy_trends['p50_ms'] * 1.2
+        }
+
+    def test_retention(self):
+        """清理最早一个月：逐行 DELETE 与分区归档 + DROP"""
+        oldest = self.months[0]
+        _, end = month_bounds(oldest)
+        with sqlite3.connect(self.legacy_path) as conn:
+            start = time.perf_counter()
+            deleted = conn.execute("DELETE FROM price_history WHERE recorded_at < ?", (end,)).rowcount
+            conn.commit()
+            delete_seconds = time.perf_counter() - start
+
+        partitions = self.db.partitions['price_history']
+        with self.db.pool.get_connection() as conn:
+            start = time.perf_counter()
+            partitions.archive(conn, oldest, Path(self.temp_dir) / "archive")
+            archive_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            dropped = partitions.drop(conn.cursor(), oldest)
+            conn.commit()
+            drop_seconds = time.perf_counter() - start
+
+        self.test_results['retention'] = {
+            'rows_removed': deleted,
+            'legacy_delete_seconds': round(delete_seconds, 2),
+            'partition_archive_seconds': round(archive_seconds, 2),
+            'partition_drop_seconds': round(drop_seconds, 3),
+            'rows_match': dropped == deleted,
+            'retention_met': delete_seconds > drop_seconds * 10
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_queries()
+        self.test_retention()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_partition_performance_tests(history_rows: int = 100_000_000):
+    """运行价格历史分区性能测试的主函数"""
+    print("=" * 60)
+    print("价格历史按月分区性能测试")
+    print("=" * 60)
+
+    tester = PartitionPerformanceTest(history_rows)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/partition_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000_000
+    run_partition_performance_tests(rows)
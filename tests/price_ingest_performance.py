@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格批量写入性能测试模块
+
+测试内容包括：
+1. 每日重抓价格写入（旧版逐条更新+逐条提交 vs update_product_prices 集合语句）
+2. 价格历史增长量（只记录变化 + 每日心跳）
+3. 价格历史压缩及压缩后 get_price_history / price_trends 查询耗时
+
+测试指标（20万产品，约5%价格变化）：
+- 批量写入: > 20000 products/second
+- 第二次同日重抓写入的历史行数 ≈ 变化产品数
+"""
+
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+class PriceIngestPerformanceTest:
+    """价格批量写入性能测试类"""
+
+    def __init__(self, product_count: int = 200_000, change_rate: float = 0.05):
+        self.product_count = product_count
+        self.change_rate = change_rate
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "price_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False
+        )
+        self.db = DatabaseManager(self.config)
+        self.rng = random.Random(11)
+        self.prices = {}
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """批量生成产品数据"""
+        logger.info(f"生成 {self.product_count} 个产品...")
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO products (id, product_name, platform, category, price, original_price, product_url)
+                VALUES (?, ?, 'amazon', 'tshirt', ?, 40.0, ?)
+            """, ((i, f"product {i}", 20.0, f"https://amazon.com/p/{i}") for i in range(1, self.product_count + 1)))
+        self.prices = {i: 20.0 for i in range(1, self.product_count + 1)}
+
+    def _rescrape(self):
+        """模拟一次每日重抓：少量产品价格变化"""
+        updates = []
+        for product_id, price in self.prices.items():
+            if self.rng.random() < self.change_rate:
+                price = round(price * self.rng.uniform(0.8, 1.2), 2)
+                self.prices[product_id] = price
+            updates.append((product_id, price, None))
+        return updates
+
+    def _history_count(self) -> int:
+        with sqlite3.connect(self.config.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+
+    def test_legacy_ingest(self, sample: int = 5000):
+        """旧版逐条更新（抽样后按比例估算全量耗时）"""
+        updates = self._rescrape()[:sample]
+        with sqlite3.connect(self.config.db_path) as conn:
+            start = time.perf_counter()
+            for product_id, price, original_price in updates:
+                conn.execute("UPDATE products SET price = ?, last_updated_at = ? WHERE id = ?",
+                             (price, time.time(), product_id))
+                conn.execute("INSERT INTO price_history (product_id, price) VALUES (?, ?)",
+                             (product_id, price))
+                conn.commit()
+            elapsed = time.perf_counter() - start
+            conn.execute("DELETE FROM price_history")
+
+        self.test_results['legacy_ingest'] = {
+            'sampled_products': sample,
+            'products_per_second': round(sample / elapsed),
+            'estimated_full_seconds': round(elapsed * self.product_count / sample, 2),
+            'history_rows_per_rescrape': self.product_count
+        }
+
+    def test_batch_ingest(self):
+        """批量更新：首次（全部心跳）与同日再次重抓"""
+        first = self._rescrape()
+        start = time.perf_counter()
+        first_result = self.db.update_product_prices(first)
+        first_elapsed = time.perf_counter() - start
+
+        second = self._rescrape()
+        changed = sum(1 for product_id, price, _ in second if price != first[product_id - 1][1])
+        start = time.perf_counter()
+        second_result = self.db.update_product_prices(second)
+        second_elapsed = time.perf_counter() - start
+
+        self.test_results['batch_ingest'] = {
+            'first_seconds': round(first_elapsed, 2),
+            'first_history_rows': first_result['history_written'],
+            'rescrape_seconds': round(second_elapsed, 2),
+            'rescrape_changed_products': changed,
+            'rescrape_history_rows': second_result['history_written'],
+            'products_per_second': round(self.product_count / second_elapsed),
+            'throughput_met': self.product_count / second_elapsed > 20000,
+            'history_met': second_result['history_written'] == changed
+        }
+
+    def test_compaction(self, days: int = 60, rows_per_day: int = 3):
+        """模拟旧版逐次写入积累的历史（每天多行），压缩后查询"""
+        products = max(1, self.product_count // 20)
+        logger.info(f"生成 {products} 个产品 {days} 天的旧版价格历史...")
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO price_history (product_id, price, recorded_at) "
+                "VALUES (?, ?, datetime('now', ?, ?))",
+                ((product_id, round(20 + self.rng.random(), 2), f'-{day} days', f'-{hour} hours')
+                 for product_id in range(1, products + 1)
+                 for day in range(31, 31 + days)
+                 for hour in range(rows_per_day))
+            )
+        before = self._history_count()
+
+        def query_history():
+            start = time.perf_counter()
+            for product_id in range(1, 1001):
+                self.db.get_price_history(product_id, days=120)
+            return (time.perf_counter() - start) * 1000 / 1000
+
+        def query_trends():
+            with sqlite3.connect(self.config.db_path) as conn:
+                start = time.perf_counter()
+                conn.execute("""
+                    SELECT DATE(ph.recorded_at) as date, ROUND(AVG(ph.price), 2),
+                           COUNT(DISTINCT ph.product_id)
+                    FROM price_history ph
+                    WHERE ph.recorded_at >= date('now', '-120 days')
+                    GROUP BY DATE(ph.recorded_at)
+                """).fetchall()
+                return (time.perf_counter() - start) * 1000
+
+        history_before_ms, trends_before_ms = query_history(), query_trends()
+        start = time.perf_counter()
+        result = self.db.compact_price_history()
+        compact_seconds = time.perf_counter() - start
+        history_after_ms, trends_after_ms = query_history(), query_trends()
+
+        self.test_results['compaction'] = {
+            'rows_before': before,
+            'rows_after': self._history_count(),
+            **result,
+            'compact_seconds': round(compact_seconds, 2),
+            'get_price_history_ms_before': round(history_before_ms, 3),
+            'get_price_history_ms_after': round(history_after_ms, 3),
+            'price_trends_ms_before': round(trends_before_ms, 2),
+            'price_trends_ms_after': round(trends_after_ms, 2)
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_legacy_ingest()
+        self.test_batch_ingest()
+        self.test_compaction()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_price_ingest_performance_tests(product_count: int = 200_000):
+    """运行价格批量写入性能测试的主函数"""
+    print("=" * 60)
+    print("价格批量写入性能测试")
+    print("=" * 60)
+
+    tester = PriceIngestPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/price_ingest_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    run_price_ingest_performance_tests(count)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+产品批量写入性能测试模块
+
+测试内容包括：
+1. 带旧版逐行校验触发器 / 不带触发器的 executemany 写入吞吐量
+2. 旧版逐条 insert_product（查重 + 插入 + 提交，带触发器）
+3. insert_products（整批校验 + 集合式查重 + 单事务写入）
+
+测试指标（10万产品，1% 不合格数据）：
+- insert_products: > 20000 products/second
+- 一次返回全部不合格行
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+# 旧版 _add_constraints 安装的逐行校验触发器
+LEGACY_TRIGGERS = [
+    "CREATE TRIGGER products_price_validation BEFORE INSERT ON products "
+    "WHEN NEW.price IS NOT NULL AND NEW.price <= 0 "
+    "BEGIN SELECT RAISE(ABORT, '价格必须大于0'); END;",
+    "CREATE TRIGGER products_rating_validation BEFORE INSERT ON products "
+    "WHEN NEW.rating IS NOT NULL AND (NEW.rating < 0 OR NEW.rating > 5) "
+    "BEGIN SELECT RAISE(ABORT, '评分必须在0-5之间'); END;",
+    "CREATE TRIGGER products_platform_validation BEFORE INSERT ON products "
+    "WHEN NEW.platform NOT IN ('tiktok', 'amazon') "
+    "BEGIN SELECT RAISE(ABORT, '平台必须是tiktok或amazon'); END;",
+    "CREATE TRIGGER products_category_validation BEFORE INSERT ON products "
+    "WHEN NEW.category NOT IN ('tshirt', 'hoodie', 'sweatshirt') "
+    "BEGIN SELECT RAISE(ABORT, '分类必须是tshirt、hoodie或sweatshirt'); END;"
+]
+
+COLUMNS = ('product_name', 'platform', 'category', 'price', 'rating', 'sales_count', 'product_url', 'store_name')
+
+
+class ProductIngestPerformanceTest:
+    """产品批量写入性能测试类"""
+
+    def __init__(self, product_count: int = 100_000, invalid_rate: float = 0.01):
+        self.product_count = product_count
+        self.invalid_rate = invalid_rate
+        self.rng = random.Random(7)
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_results = {}
+
+    def _new_db(self, name: str) -> DatabaseManager:
+        return DatabaseManager(DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / f"{name}.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False,
+            optimize_interval_hours=0
+        ))
+
+    def _products(self, valid_only: bool = False) -> List[Dict[str, Any]]:
+        products = []
+        for i in range(self.product_count):
+            product = {
+                'product_name': f"product {i}",
+                'platform': self.rng.choice(['tiktok', 'amazon']),
+                'category': self.rng.choice(['tshirt', 'hoodie', 'sweatshirt']),
+                'price': round(self.rng.uniform(9.99, 59.99), 2),
+                'rating': round(self.rng.uniform(3.0, 5.0), 1),
+                'sales_count': self.rng.randint(0, 10000),
+                'product_url': f"https://shop.test/p/{i}",
+                'store_name': f"store {i % 300}"
+            }
+            if not valid_only and self.rng.random() < self.invalid_rate:
+                product['price'] = -1.0
+            products.append(product)
+        return products
+
+    def _executemany(self, db: DatabaseManager) -> float:
+        rows = [tuple(p[c] for c in COLUMNS) for p in self._products(valid_only=True)]
+        start = time.perf_counter()
+        with db.pool.get_connection() as conn:
+            conn.executemany(f"INSERT INTO products ({', '.join(COLUMNS)}) "
+                             f"VALUES ({', '.join('?' for _ in COLUMNS)})", rows)
+            conn.commit()
+        return time.perf_counter() - start
+
+    def test_trigger_overhead(self):
+        """同样的 executemany 在有/无逐行校验触发器时的吞吐量"""
+        with_db = self._new_db("with_triggers")
+        with with_db.pool.get_connection() as conn:
+            for sql in LEGACY_TRIGGERS:
+                conn.execute(sql)
+            conn.commit()
+        without_db = self._new_db("without_triggers")
+        try:
+            with_seconds = self._executemany(with_db)
+            without_seconds = self._executemany(without_db)
+        finally:
+            with_db.close()
+            without_db.close()
+
+        self.test_results['trigger_overhead'] = {
+            'with_triggers_per_second': round(self.product_count / with_seconds),
+            'without_triggers_per_second': round(self.product_count / without_seconds),
+            'trigger_overhead_percent': round((with_seconds - without_seconds) / without_seconds * 100, 1)
+        }
+
+    def test_legacy_insert(self, sample: int = 2000):
+        """旧版逐条写入（抽样，带触发器，遇到不合格行即抛异常）"""
+        db = self._new_db("legacy")
+        with db.pool.get_connection() as conn:
+            for sql in LEGACY_TRIGGERS:
+                conn.execute(sql)
+            conn.commit()
+        products = self._products()[:sample]
+        failures = 0
+        try:
+            with db.pool.get_connection() as conn:
+                start = time.perf_counter()
+                for product in products:
+                    try:
+                        conn.execute("SELECT id FROM products WHERE product_url = ?", (product['product_url'],))
+                        conn.execute(f"INSERT INTO products ({', '.join(COLUMNS)}) "
+                                     f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                                     tuple(product[c] for c in COLUMNS))
+                        conn.commit()
+                    except sqlite3.IntegrityError:
+                        failures += 1
+                elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+
+        self.test_results['legacy_insert'] = {
+            'sampled_products': sample,
+            'products_per_second': round(sample / elapsed),
+            'estimated_full_seconds': round(elapsed * self.product_count / sample, 2),
+            'rejected_one_by_one': failures
+        }
+
+    def test_batch_insert(self):
+        """insert_products：整批校验 + 单事务写入，随后整批重写（全部走更新）"""
+        db = self._new_db("batch")
+        products = self._products()
+        expected_rejected = sum(1 for p in products if p['price'] <= 0)
+        try:
+            start = time.perf_counter()
+            result = db.insert_products(products)
+            insert_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            again = db.insert_products(products)
+            update_seconds = time.perf_counter() - start
+        finally:
+            db.close()
+
+        self.test_results['batch_insert'] = {
+            'inserted': result['inserted'],
+            'rejected': len(result['rejected']),
+            'insert_seconds': round(insert_seconds, 2),
+            'products_per_second': round(self.product_count / insert_seconds),
+            'update_seconds': round(update_seconds, 2),
+            'updated': again['updated'],
+            'throughput_met': self.product_count / insert_seconds > 20000,
+            'rejected_met': len(result['rejected']) == expected_rejected
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.test_trigger_overhead()
+        self.test_legacy_insert()
+        self.test_batch_insert()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_product_ingest_performance_tests(product_count: int = 100_000):
+    """运行产品批量写入性能测试的主函数"""
+    print("=" * 60)
+    print("产品批量写入性能测试")
+    print("=" * 60)
+
+    tester = ProductIngestPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/product_ingest_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run_product_ingest_performance_tests(count)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+看板实时推送性能测试模块
+
+测试内容包括：
+1. 广播扇出（进程内）：10 与 1000 个订阅者时单次 publish 的耗时、发布到全部订阅者收到的延迟
+2. 慢客户端隔离：一个不读取的订阅者不影响其他订阅者的延迟，落后超过缓冲区后收到 resync，缓冲区长度不变
+3. 端到端（uvicorn + WebSocket 客户端）：产品库写入到所有客户端收到 products_added 的延迟，
+   以及与看板每 5 秒轮询产品列表相比每分钟的请求数与传输字节数
+
+测试指标：
+- publish 耗时与订阅者数量无关（1000 个订阅者时不超过 10 个时的 3 倍）
+- 1000 个订阅者的投递延迟 p99 < 100ms
+- 慢客户端存在时其他订阅者的延迟 p99 < 100ms，缓冲区不超过上限
+- 端到端延迟 p99 < 200ms
+"""
+
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 配置日志
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        'p50_ms': round(statistics.median(ordered) * 1000, 2),
+        'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2)
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RealtimePerformanceTest:
+    """看板实时推送性能测试类"""
+
+    def __init__(self, subscribers: int = 1000, events: int = 200, clients: int = 200):
+        self.subscribers = subscribers
+        self.events = events
+        self.clients = clients
+        # 协调器的 config/、data/、logs/ 都是相对路径，在临时目录中运行
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        os.makedirs("logs")
+        os.environ["PRODUCTS_DB_PATH"] = str(Path(self.temp_dir) / "data" / "products.db")
+        os.environ["JOB_RUNNER"] = "inline"
+        from app.broadcast import Broadcaster
+        self.Broadcaster = Broadcaster
+        self.test_results = {}
+
+    async def _fan_out(self, subscribers: int, slow: bool = False, buffer_size: int = 1024) -> Dict[str, Any]:
+        """subscribers 个订阅者逐批读取；slow 时另加一个订阅后从不读取的订阅者"""
+        broadcaster = self.Broadcaster(buffer_size=buffer_size)
+        broadcaster.bind(asyncio.get_running_loop())
+        latencies: List[float] = []
+        received = [0] * subscribers
+        # 第 n 个事件的序号为 base + n，按序号查发布时间（不在订阅者中解析 JSON，避免测量本身占满 CPU）
+        base = broadcaster.seq + 1
+        sent_at: List[float] = []
+
+        async def consume(index: int):
+            async for batch in broadcaster.subscribe():
+                now = time.perf_counter()
+                for seq, _, _ in batch or ():
+                    latencies.append(now - sent_at[seq - base])
+                    received[index] += 1
+
+        tasks = [asyncio.create_task(consume(i)) for i in range(subscribers)]
+        stalled = None
+        if slow:
+            # 取出第一批后不再读取，模拟卡住的客户端
+            stalled = broadcaster.subscribe()
+            waiting = asyncio.create_task(stalled.__anext__())
+        await asyncio.sleep(0.05)
+
+        publish_ns = []
+        for i in range(self.events):
+            sent_at.append(time.perf_counter())
+            start = time.perf_counter_ns()
+            broadcaster.publish('products_added', {'count': 1, 'products': [{'id': i, 'price': 19.9}]})
+            publish_ns.append(time.perf_counter_ns() - start)
+            # 每 10 个事件让出一次事件循环，相当于写入陆续到达
+            if i % 10 == 9:
+                await asyncio.sleep(0.005)
+        await asyncio.sleep(0.2)
+
+        result = {
+            'subscribers': subscribers,
+            'events': self.events,
+            'publish_us': round(statistics.median(publish_ns) / 1000, 2),
+            'delivered': sum(received),
+            'buffered': len(broadcaster.buffer),
+            **_percentiles(latencies)
+        }
+        if slow:
+            # 被卡住的订阅者继续读取时先收到 resync
+            await waiting
+            result['slow_client_first_event'] = json.loads((await stalled.__anext__())[0][1])['type']
+            await stalled.aclose()
+        broadcaster.close()
+        await asyncio.gather(*tasks)
+        return result
+
+    def test_fan_out(self):
+        """订阅者数量对 publish 耗时与投递延迟的影响"""
+        few = asyncio.run(self._fan_out(10))
+        many = asyncio.run(self._fan_out(self.subscribers))
+        self.test_results['fan_out'] = {
+            'few': few,
+            'many': many,
+            'all_delivered_match': many['delivered'] == self.subscribers * self.events,
+            'publish_constant_met': many['publish_us'] <= few['publish_us'] * 3,
+            'latency_met': many['p99_ms'] < 100
+        }
+
+    def test_slow_consumer(self):
+        """一个不读取的订阅者（缓冲区 64 个事件）"""
+        result = asyncio.run(self._fan_out(self.subscribers, slow=True, buffer_size=64))
+        self.test_results['slow_consumer'] = {
+            **result,
+            'others_delivered_match': result['delivered'] == self.subscribers * self.events,
+            'resync_match': result['slow_client_first_event'] == 'resync',
+            'bounded_buffer_met': result['buffered'] <= 64,
+            'latency_met': result['p99_ms'] < 100
+        }
+
+    async def _end_to_end(self) -> Dict[str, Any]:
+        import httpx
+        import uvicorn
+        import websockets
+        import app.main as app_main
+
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(app_main.app, port=port, log_level="warning", ws="websockets"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        db_manager = await app_main.ensure_db_manager()
+
+        latencies: List[float] = []
+        sent: Dict[str, float] = {}
+        push_bytes = 0
+        connections = [await websockets.connect(f"ws://127.0.0.1:{port}/api/v1/updates/ws")
+                       for _ in range(self.clients)]
+        for ws in connections:
+            await ws.recv()  # connected
+
+        async def listen(ws, expected: int):
+            nonlocal push_bytes
+            seen = 0
+            while seen < expected:
+                text = await ws.recv()
+                event = json.loads(text)
+                if event['type'] != 'products_added':
+                    continue
+                latencies.append(time.perf_counter() - sent[event['data']['products'][0]['product_url']])
+                push_bytes += len(text)
+                seen += 1
+
+        writes = 50
+        listeners = [asyncio.create_task(listen(ws, writes)) for ws in connections]
+        for i in range(writes):
+            url = f"https://shop.test/p/{i}"
+            sent[url] = time.perf_counter()
+            await asyncio.to_thread(db_manager.insert_products, [{
+                'product_name': f"Product {i}", 'platform': 'amazon', 'category': 'tshirt',
+                'price': 19.9, 'product_url': url}])
+            await asyncio.sleep(0.02)
+        await asyncio.wait_for(asyncio.gather(*listeners), 30)
+        for ws in connections:
+            await ws.close()
+
+        # 看板原先的轮询：每个客户端每 5 秒请求一次最新 50 个产品
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            poll_bytes = len((await client.get("/api/v1/products?limit=50")).content)
+
+        server.should_exit = True
+        await serving
+        event_bytes = push_bytes / len(latencies)
+        return {
+            'clients': self.clients,
+            'writes': writes,
+            'delivered': len(latencies),
+            **_percentiles(latencies),
+            'push_bytes_per_event': round(event_bytes),
+            # 每分钟：轮询 12 次/客户端；推送按每分钟 60 次写入估算
+            'polling_requests_per_min': self.clients * 12,
+            'polling_kb_per_min': round(self.clients * 12 * poll_bytes / 1024, 1),
+            'push_kb_per_min_at_1_write_per_s': round(self.clients * 60 * event_bytes / 1024, 1),
+            'all_delivered_match': len(latencies) == self.clients * writes,
+            'latency_met': _percentiles(latencies)['p99_ms'] < 200
+        }
+
+    def test_end_to_end(self):
+        """uvicorn + WebSocket 客户端"""
+        self.test_results['end_to_end'] = asyncio.run(self._end_to_end())
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.test_fan_out()
+        self.test_slow_consumer()
+        self.test_end_to_end()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_realtime_performance_tests(subscribers: int = 1000):
+    """运行看板实时推送性能测试的主函数"""
+    print("=" * 60)
+    print("看板实时推送性能测试")
+    print("=" * 60)
+
+    tester = RealtimePerformanceTest(subscribers)
+    try:
+        results = tester.run_all_tests()
+        os.chdir(tester.cwd)
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/realtime_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    run_realtime_performance_tests(count)
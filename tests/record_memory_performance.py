@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记录类型内存性能测试模块
+
+测试内容包括：
+1. 单条记录内存占用（__slots__ 记录 vs 普通 dataclass）
+2. 100万条视频抓取结果的峰值RSS（含最终转字典：to_dict vs asdict）
+
+对比对象：
+- TikTokVideo（tiktok_scraper）
+- ProductData（amazon_scraper）
+- ScrapingTask / ScrapingResult（main）
+
+每个峰值RSS场景在独立子进程中运行，互不影响。
+"""
+
+import dataclasses
+import json
+import resource
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _legacy_variant(cls):
+    """按相同字段构造不带 __slots__ 的普通 dataclass 作为对照"""
+    fields = [(f.name, f.type, f) for f in dataclasses.fields(cls)]
+    legacy = dataclasses.make_dataclass(f"Legacy{cls.__name__}", fields)
+    if hasattr(cls, '__post_init__'):
+        legacy.__post_init__ = cls.__post_init__
+    return legacy
+
+
+def _video_kwargs(i: int) -> Dict[str, Any]:
+    return dict(
+        video_id=f"v{i:08d}", title=f"title {i}", description=f"desc {i}",
+        author="author", author_id="a1", author_followers=1000, author_following=10,
+        likes=i, comments=0, shares=0, views=0, hashtags=["#ootd", "#hoodie"],
+        music_info="", product_links=[], product_images=[], upload_time="",
+        region="US", language="en", scraped_at="2025-01-01T00:00:00",
+        source="tikhub_api", data_hash=f"h{i:08d}"
+    )
+
+
+def _factories() -> Dict[str, Callable[[int], Any]]:
+    from tiktok_scraper import TikTokVideo
+    from amazon_scraper import ProductData
+    from main import ScrapingTask, ScrapingResult, Platform
+
+    def product_kwargs(i):
+        return dict(
+            asin=f"B{i:09d}", title=f"title {i}", price=19.99, original_price=None,
+            rating=4.5, review_count=10, brand="brand", category="tshirt",
+            availability="in stock", image_url="", detail_page_url="", seller_name="",
+            seller_link="", features=["cotton"], description="", rank=None,
+            bestseller_flag=False, timestamp="2025-01-01T00:00:00"
+        )
+
+    now = datetime.now()
+    return {
+        'TikTokVideo': lambda i, cls=TikTokVideo: cls(**_video_kwargs(i)),
+        'ProductData': lambda i, cls=ProductData: cls(**product_kwargs(i)),
+        'ScrapingTask': lambda i, cls=ScrapingTask: cls(
+            f"t{i}", Platform.AMAZON, "tshirt", ["print"], created_at=now),
+        'ScrapingResult': lambda i, cls=ScrapingResult: cls(
+            f"t{i}", Platform.AMAZON, True, [], timestamp=now),
+    }
+
+
+def _make(name: str, variant: str) -> Callable[[int], Any]:
+    """返回指定记录类型（slots 或 legacy）的构造函数"""
+    import tiktok_scraper
+    import amazon_scraper
+    import main
+    classes = {
+        'TikTokVideo': tiktok_scraper.TikTokVideo,
+        'ProductData': amazon_scraper.ProductData,
+        'ScrapingTask': main.ScrapingTask,
+        'ScrapingResult': main.ScrapingResult,
+    }
+    cls = classes[name] if variant == 'slots' else _legacy_variant(classes[name])
+    factory = _factories()[name]
+    return lambda i: factory(i, cls=cls)
+
+
+def measure_bytes_per_record(name: str, variant: str, count: int = 100_000) -> float:
+    """使用 tracemalloc 统计单条记录平均占用"""
+    make = _make(name, variant)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    records = [make(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del records
+    return total / count
+
+
+def _peak_rss_kb() -> int:
+    """当前进程峰值RSS（KB）；Linux 下读取 VmHWM，因 ru_maxrss 会跨 exec 继承父进程值"""
+    status = Path('/proc/self/status')
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child_peak_rss(variant: str, count: int) -> Dict[str, Any]:
+    """子进程：构造 count 条视频并转换为字典，报告峰值RSS"""
+    make = _make('TikTokVideo', variant)
+    videos = [make(i) for i in range(count)]
+    if variant == 'slots':
+        output = [video.to_dict() for video in videos]
+    else:
+        output = [dataclasses.asdict(video) for video in videos]
+    peak_kb = _peak_rss_kb()
+    return {'variant': variant, 'records': len(output), 'peak_rss_mb': round(peak_kb / 1024, 1)}
+
+
+class RecordMemoryPerformanceTest:
+    """记录类型内存性能测试类"""
+
+    def __init__(self, run_size: int = 1_000_000):
+        self.run_size = run_size
+        self.test_results = {}
+
+    def test_bytes_per_record(self):
+        """测试单条记录内存占用"""
+        for name in ('TikTokVideo', 'ProductData', 'ScrapingTask', 'ScrapingResult'):
+            legacy = measure_bytes_per_record(name, 'legacy')
+            slots = measure_bytes_per_record(name, 'slots')
+            self.test_results[f'{name}_bytes_per_record'] = {
+                'legacy': round(legacy, 1),
+                'slots': round(slots, 1),
+                'saving_percent': round((1 - slots / legacy) * 100, 1) if legacy else 0
+            }
+
+    def test_peak_rss(self):
+        """测试百万视频抓取结果的峰值RSS"""
+        logger.info(f"测试 {self.run_size} 条视频的峰值RSS...")
+        results = {}
+        for variant in ('legacy', 'slots'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', variant, str(self.run_size)],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            results[variant] = json.loads(output)['peak_rss_mb']
+        self.test_results['peak_rss_mb'] = {
+            'records': self.run_size,
+            **results,
+            'saving_percent': round((1 - results['slots'] / results['legacy']) * 100, 1)
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.test_bytes_per_record()
+        self.test_peak_rss()
+        return self.test_results
+
+
+def run_record_memory_performance_tests(run_size: int = 1_000_000):
+    """运行记录类型内存测试的主函数"""
+    print("=" * 60)
+    print("记录类型内存性能测试")
+    print("=" * 60)
+
+    if sys.version_info < (3, 10):
+        print("⚠️ Python < 3.10 不支持 dataclass slots，两种实现结果相同")
+
+    tester = RecordMemoryPerformanceTest(run_size)
+    results = tester.run_all_tests()
+
+    for test_name, values in results.items():
+        print(f"\n{test_name}:")
+        for key, value in values.items():
+            print(f"   {key}: {value}")
+
+    report_file = Path("tests/record_memory_performance_report.json")
+    report_file.parent.mkdir(exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 详细报告已保存: {report_file}")
+
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(child_peak_rss(sys.argv[2], int(sys.argv[3]))))
+    else:
+        size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+        run_record_memory_performance_tests(size)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+读接口响应缓存性能测试模块
+
+测试内容包括（进程内直接调用 ASGI 应用，不经过网络）：
+1. /status、/statistics、/config 关闭缓存与开启缓存的吞吐量（requests/sec）
+2. 带 If-None-Match 的条件请求：ETag 一致时返回 304 且不带响应体
+3. 抓取作业完成、修改配置后缓存失效，下一次请求重新计算
+
+测试指标（运行一天的协调器：2万条执行记录，90天统计）：
+- 开启缓存后 /status 吞吐量提升 5 倍以上
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+ENDPOINTS = {
+    'status': "/api/v1/status",
+    'statistics': "/api/v1/statistics?days=30",
+    'config': "/api/v1/config"
+}
+
+
+class ResponseCachePerformanceTest:
+    """读接口响应缓存性能测试类"""
+
+    def __init__(self, executions: int = 20_000, duration: float = 3.0):
+        self.executions = executions
+        self.duration = duration
+        self.rng = random.Random(13)
+        # 协调器的 config/、data/、logs/ 都是相对路径，在临时目录中运行
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        os.makedirs("logs")
+        os.environ["PRODUCTS_DB_PATH"] = str(Path(self.temp_dir) / "data" / "products.db")
+        os.environ["JOB_RUNNER"] = "inline"
+        import app.main as app_main
+        self.app_main = app_main
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """协调器内存中的执行记录与统计表"""
+        from main import Platform
+        coordinator = self.app_main.get_coordinator()
+        platforms = list(Platform)
+        now = datetime.now()
+        coordinator.performance_monitor.performance_data.extend({
+            "timestamp": now - timedelta(seconds=i * 4),
+            "platform": self.rng.choice(platforms).value,
+            "execution_time": self.rng.uniform(0.5, 20),
+            "success": self.rng.random() > 0.1,
+            "items_count": self.rng.randint(0, 60)
+        } for i in range(self.executions))
+
+        with sqlite3.connect(coordinator.db_manager.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO statistics (date, platform, total_tasks, successful_tasks, failed_tasks,
+                                        total_items, avg_execution_time, created_at)
+                VALUES (?, ?, 100, 90, 10, 4000, 6.5, ?)
+            """, (((now - timedelta(days=d)).date().isoformat(), p.value, now.isoformat())
+                  for d in range(90) for p in platforms))
+        self.test_results['setup'] = {
+            'performance_records': self.executions,
+            'statistics_days': 90
+        }
+
+    async def _throughput(self, client: httpx.AsyncClient, path: str, headers=None) -> Dict[str, Any]:
+        count = 0
+        statuses = set()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        while time.perf_counter() < deadline:
+            resp = await client.get(path, headers=headers)
+            statuses.add(resp.status_code)
+            count += 1
+        return {
+            'requests_per_second': round(count / (time.perf_counter() - start), 1),
+            'status_codes': sorted(statuses)
+        }
+
+    async def test_throughput(self, client: httpx.AsyncClient):
+        """关闭缓存、开启缓存、条件请求三种情况的吞吐量"""
+        cache = self.app_main.response_cache
+        rules = cache.rules
+        for name, path in ENDPOINTS.items():
+            cache.rules = {}
+            uncached = await self._throughput(client, path)
+            cache.rules = rules
+            cache.invalidate()
+            cached = await self._throughput(client, path)
+            etag = (await client.get(path)).headers['etag']
+            conditional = await self._throughput(client, path, {'If-None-Match': etag})
+            self.test_results[name] = {
+                'uncached': uncached,
+                'cached': cached,
+                'conditional_304': conditional,
+                'speedup': round(cached['requests_per_second'] / uncached['requests_per_second'], 1)
+            }
+        self.test_results['status']['speedup_met'] = self.test_results['status']['speedup'] >= 5
+
+    async def test_conditional_get(self, client: httpx.AsyncClient):
+        """ETag 与 304"""
+        first = await client.get(ENDPOINTS['status'])
+        etag = first.headers['etag']
+        not_modified = await client.get(ENDPOINTS['status'], headers={'If-None-Match': etag})
+        stale = await client.get(ENDPOINTS['status'], headers={'If-None-Match': '"stale"'})
+        self.test_results['conditional_get'] = {
+            'etag': etag,
+            'cache_control': first.headers['cache-control'],
+            'config_cache_control': (await client.get(ENDPOINTS['config'])).headers['cache-control'],
+            'not_modified_match': (not_modified.status_code == 304 and not_modified.content == b""
+                                   and not_modified.headers['etag'] == etag),
+            'stale_etag_match': stale.status_code == 200 and stale.content == first.content
+        }
+
+    async def test_invalidation(self, client: httpx.AsyncClient):
+        """作业完成与修改配置后缓存失效（替换抓取流程，只验证作业结束回调）"""
+        cache = self.app_main.response_cache
+        coordinator = self.app_main.get_coordinator()
+
+        async def fake_scrape_platform(platform, categories, keywords, max_pages, progress=None):
+            progress(stage="scraping", total_tasks=0)
+            return []
+        coordinator.scrape_platform = fake_scrape_platform
+
+        etag = (await client.get(ENDPOINTS['status'])).headers['etag']
+        resp = await client.post("/api/v1/scrape/platform", params={'platform': 'amazon'},
+                                 json={'categories': ['T-Shirt'], 'keywords': ['print'], 'max_pages': 1})
+        job_id = resp.json()['data']['job_id']
+        for _ in range(200):
+            if coordinator.job_queue.get(job_id).finished:
+                break
+            await asyncio.sleep(0.01)
+        misses = cache.misses
+        after_job = (await client.get(ENDPOINTS['status'])).headers['etag']
+        job_invalidated = cache.misses == misses + 1 and after_job != etag
+
+        await client.get(ENDPOINTS['config'])
+        misses = cache.misses
+        await client.post("/api/v1/config", params={'key': 'benchmark', 'value': 'on'})
+        config = (await client.get(ENDPOINTS['config'])).json()['data']
+        self.test_results['invalidation'] = {
+            'job_invalidated_match': job_invalidated,
+            'config_invalidated_match': cache.misses == misses + 1 and config.get('benchmark') == 'on'
+        }
+
+    async def _run(self):
+        app = self.app_main.app
+        async with app.router.lifespan_context(app):
+            self.setup_test_data()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await self.test_throughput(client)
+                await self.test_conditional_get(client)
+                await self.test_invalidation(client)
+        return self.test_results
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        return asyncio.run(self._run())
+
+    def cleanup(self):
+        import shutil
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_response_cache_performance_tests(executions: int = 20_000):
+    """运行读接口响应缓存性能测试的主函数"""
+    print("=" * 60)
+    print("读接口响应缓存性能测试")
+    print("=" * 60)
+
+    tester = ResponseCachePerformanceTest(executions)
+    try:
+        results = tester.run_all_tests()
+        os.chdir(tester.cwd)
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/response_cache_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    run_response_cache_performance_tests(count)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库恢复性能测试模块
+
+测试内容包括：
+1. 旧版恢复（逐个关闭空闲连接 + shutil.copy2 覆盖 + 重建连接池）
+2. 原子恢复（备份API生成新库 + 校验 + 等待连接归还 + 原子替换）
+3. 增量备份链恢复
+
+测试指标（1GB 数据库）：
+- 原子恢复吞吐量 > 100 MB/s
+- 恢复后数据与备份一致
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig, ConnectionPool
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+class RestorePerformanceTest:
+    """数据库恢复性能测试类"""
+
+    def __init__(self, size_mb: int = 1024):
+        self.size_mb = size_mb
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "restore_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            backup_step_sleep=0,
+            auto_backup=False
+        )
+        self.db = DatabaseManager(self.config)
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """生成约 size_mb 大小的数据库并做全量备份"""
+        logger.info(f"生成约 {self.size_mb} MB 测试数据...")
+        rows = self.size_mb * 1024 * 1024 // 1100
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO products (product_name, platform, category, price, product_url, notes)
+                VALUES (?, 'amazon', 'tshirt', 19.99, ?, ?)
+            """, ((f"product {i}", f"https://amazon.com/p/{i}", os.urandom(500).hex())
+                  for i in range(rows)))
+            conn.commit()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        self.rows = rows
+        self.backup_path = self.db.create_backup("base.db")
+        self.db_size_mb = os.path.getsize(self.config.db_path) / 1024 / 1024
+        self.test_results['setup'] = {'rows': rows, 'db_size_mb': round(self.db_size_mb, 1)}
+
+    def _count(self) -> int:
+        with self.db.pool.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def _dirty(self):
+        """恢复前写入部分新数据"""
+        with self.db.pool.get_connection() as conn:
+            conn.execute("DELETE FROM products WHERE id % 10 = 0")
+            conn.commit()
+
+    def test_legacy_restore(self):
+        """旧版恢复"""
+        self._dirty()
+        start = time.perf_counter()
+        self.db.pool.close_all()
+        shutil.copy2(self.backup_path, self.config.db_path)
+        self.db.pool = ConnectionPool(self.config.db_path, self.config.connection_pool_size)
+        elapsed = time.perf_counter() - start
+
+        self.test_results['legacy_restore'] = {
+            'seconds': round(elapsed, 2),
+            'throughput_mb_s': round(self.db_size_mb / elapsed, 1),
+            # 旧版不处理WAL，残留的-wal文件可能被重新应用到恢复后的库上
+            'rows_match': self._count() == self.rows
+        }
+
+    def test_atomic_restore(self):
+        """原子恢复"""
+        self._dirty()
+        start = time.perf_counter()
+        self.db.restore_backup(self.backup_path)
+        elapsed = time.perf_counter() - start
+
+        self.test_results['atomic_restore'] = {
+            'seconds': round(elapsed, 2),
+            'throughput_mb_s': round(self.db_size_mb / elapsed, 1),
+            'throughput_met': self.db_size_mb / elapsed > 100,
+            'rows_match': self._count() == self.rows
+        }
+
+    def test_incremental_restore(self):
+        """全量 + 增量链恢复"""
+        self._dirty()
+        path = self.db.create_incremental_backup()
+        expected = self._count()
+        with self.db.pool.get_connection() as conn:
+            conn.execute("DELETE FROM products WHERE id % 7 = 0")
+            conn.commit()
+
+        start = time.perf_counter()
+        self.db.restore_backup(path)
+        elapsed = time.perf_counter() - start
+
+        self.test_results['incremental_restore'] = {
+            'seconds': round(elapsed, 2),
+            'throughput_mb_s': round(self.db_size_mb / elapsed, 1),
+            'rows_match': self._count() == expected
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_legacy_restore()
+        self.test_atomic_restore()
+        self.test_incremental_restore()
+        return self.test_results
+
+    def cleanup(self):
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_restore_performance_tests(size_mb: int = 1024):
+    """运行恢复性能测试的主函数"""
+    print("=" * 60)
+    print("数据库恢复性能测试")
+    print("=" * 60)
+
+    tester = RestorePerformanceTest(size_mb)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/restore_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    run_restore_performance_tests(size)
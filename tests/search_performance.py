@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文搜索性能测试模块
+
+测试内容包括：
+1. 100万产品写入及全文索引批量同步耗时
+2. LIKE 全表扫描与 search_products（FTS5 + BM25）的查询延迟
+3. 常见词、罕见词、多词、前缀查询的 p50 / p99 延迟
+
+测试指标（100万产品）：
+- search_products p99 < 100ms（常见词取前20条）
+"""
+
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+ADJECTIVES = ['vintage', 'oversized', 'cropped', 'relaxed', 'slim', 'classic', 'retro', 'cozy', 'graphic', 'basic']
+MATERIALS = ['cotton', 'fleece', 'linen', 'polyester', 'organic', 'heavyweight', 'waffle', 'terry']
+COLORS = ['black', 'white', 'navy', 'sage', 'burgundy', 'cream', 'charcoal', 'olive', 'lavender', 'mustard']
+TYPES = {'tshirt': 'tee', 'hoodie': 'hoodie', 'sweatshirt': 'crewneck'}
+COMMENTS = ['runs small', 'super soft fabric', 'color faded after wash', 'perfect fit', 'great for layering']
+
+QUERIES = {
+    'common_term': "vintage",
+    'two_terms': "oversized black",
+    'rare_term': "zigzagpattern",
+    'prefix': "burgun",
+    'comment_match': "soft fabric"
+}
+
+
+class SearchPerformanceTest:
+    """全文搜索性能测试类"""
+
+    def __init__(self, product_count: int = 1_000_000):
+        self.product_count = product_count
+        self.rng = random.Random(3)
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "search_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False,
+            optimize_interval_hours=0
+        )
+        self.db = DatabaseManager(self.config)
+        self.test_results = {}
+
+    def _rows(self, start: int, end: int):
+        for i in range(start, end):
+            category = self.rng.choice(list(TYPES))
+            name = (f"{self.rng.choice(ADJECTIVES)} {self.rng.choice(MATERIALS)} "
+                    f"{self.rng.choice(COLORS)} {TYPES[category]}")
+            if i % 50_000 == 0:
+                name += " zigzagpattern"
+            keywords = json.dumps(self.rng.sample(ADJECTIVES + COLORS, 3))
+            yield (i, name.title(), self.rng.choice(['tiktok', 'amazon']), category,
+                   round(self.rng.uniform(9.99, 59.99), 2), f"https://shop.test/p/{i}", keywords)
+
+    def setup_test_data(self, batch: int = 100_000):
+        """写入产品及部分热评，再批量同步全文索引"""
+        logger.info(f"生成 {self.product_count} 个产品...")
+        start = time.perf_counter()
+        with self.db.pool.get_connection() as conn:
+            for offset in range(1, self.product_count + 1, batch):
+                conn.executemany("""
+                    INSERT INTO products (id, product_name, platform, category, price, product_url, keywords)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, self._rows(offset, min(offset + batch, self.product_count + 1)))
+                conn.commit()
+            conn.executemany("INSERT INTO hot_comments (product_id, comment_text) VALUES (?, ?)",
+                             ((i, self.rng.choice(COMMENTS)) for i in range(1, self.product_count + 1, 10)))
+            conn.commit()
+        insert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        synced = self.db.sync_search_index()
+        sync_seconds = time.perf_counter() - start
+
+        self.test_results['setup'] = {
+            'products': self.product_count,
+            'insert_seconds': round(insert_seconds, 2),
+            'fts_sync_seconds': round(sync_seconds, 2),
+            'fts_synced_products': synced,
+            'products_per_second': round(self.product_count / (insert_seconds + sync_seconds)),
+            'db_size_mb': round(os.path.getsize(self.config.db_path) / 1024 / 1024, 1)
+        }
+
+    def _measure(self, func, repeat: int) -> Dict[str, Any]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 2),
+            'results': len(result)
+        }
+
+    def test_like_scan(self):
+        """LIKE 全表扫描（无搜索索引时的做法）"""
+        def like(term: str):
+            with self.db.pool.read_connection() as conn:
+                return conn.execute("""
+                    SELECT * FROM products
+                    WHERE is_active = 1 AND (product_name LIKE ? OR keywords LIKE ?)
+                    LIMIT 20
+                """, (f"%{term}%", f"%{term}%")).fetchall()
+
+        self.test_results['like_scan'] = {
+            name: self._measure(lambda q=query: like(q.split()[-1]), repeat=5)
+            for name, query in QUERIES.items() if name != 'comment_match'
+        }
+
+    def test_fts_search(self):
+        """search_products：BM25 排序取前 20 条"""
+        results = {
+            name: self._measure(lambda q=query: self.db.search_products(q, limit=20), repeat=50)
+            for name, query in QUERIES.items()
+        }
+        results['filtered'] = self._measure(
+            lambda: self.db.search_products("cotton", platform='amazon', category='hoodie', limit=20), repeat=50)
+        results['p99_met'] = results['common_term']['p99_ms'] < 100
+        self.test_results['fts_search'] = results
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_like_scan()
+        self.test_fts_search()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_search_performance_tests(product_count: int = 1_000_000):
+    """运行全文搜索性能测试的主函数"""
+    print("=" * 60)
+    print("全文搜索性能测试")
+    print("=" * 60)
+
+    tester = SearchPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/search_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    run_search_performance_tests(count)
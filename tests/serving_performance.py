@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多 worker 部署吞吐量测试模块
+
+测试内容包括（同一个产品库，分别以 1、2、4 个 uvicorn worker 启动 app.main:app）：
+1. 各 worker 均收到请求（/health 返回的 worker_pid）
+2. 读接口 /api/v1/search 与 /api/v1/status 在固定并发下的吞吐量与 p99 延迟
+3. 吞吐量随 worker 数的扩展倍数
+
+测试指标（2万产品，64 并发）：
+- 吞吐量扩展倍数不低于 min(worker 数, CPU 核数) 的 70%
+  （单核机器上多 worker 只能保证不退化，压测客户端也占用同一颗 CPU）
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+import aiohttp
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+ADJECTIVES = ['vintage', 'oversized', 'cropped', 'relaxed', 'slim', 'classic', 'retro', 'cozy']
+COLORS = ['black', 'white', 'navy', 'sage', 'burgundy', 'cream', 'charcoal', 'olive']
+TYPES = ['tee', 'hoodie', 'crewneck']
+
+ENDPOINTS = {
+    'search': "/api/v1/search?q={term}&limit=20",
+    'status': "/api/v1/status"
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServingPerformanceTest:
+    """多 worker 部署吞吐量测试类"""
+
+    def __init__(self, product_count: int = 20_000, worker_counts=(1, 2, 4),
+                 concurrency: int = 64, duration: float = 10.0):
+        self.product_count = product_count
+        self.worker_counts = worker_counts
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rng = random.Random(7)
+        # 服务以临时目录为工作目录（协调器的 config/、data/、logs/ 都是相对路径）
+        self.temp_dir = tempfile.mkdtemp()
+        (Path(self.temp_dir) / "logs").mkdir()
+        self.db_path = str(Path(self.temp_dir) / "data" / "products.db")
+        self.test_results = {}
+
+    def setup_test_data(self):
+        logger.info(f"生成 {self.product_count} 个产品...")
+        db = DatabaseManager(DatabaseConfig(
+            db_path=self.db_path,
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False,
+            optimize_interval_hours=0
+        ))
+        try:
+            with db.pool.get_connection() as conn:
+                conn.executemany("""
+                    INSERT INTO products (product_name, platform, category, price, product_url)
+                    VALUES (?, ?, 'tshirt', ?, ?)
+                """, ((f"{self.rng.choice(ADJECTIVES)} {self.rng.choice(COLORS)} {self.rng.choice(TYPES)}",
+                       self.rng.choice(['tiktok', 'amazon']), round(self.rng.uniform(9.99, 59.99), 2),
+                       f"https://shop.test/p/{i}") for i in range(self.product_count)))
+                conn.commit()
+            db.sync_search_index()
+        finally:
+            db.close()
+        self.test_results['setup'] = {
+            'products': self.product_count,
+            'cpu_count': os.cpu_count(),
+            'concurrency': self.concurrency,
+            'duration_seconds': self.duration
+        }
+
+    def _start_server(self, workers: int, port: int) -> subprocess.Popen:
+        env = dict(os.environ, JOB_RUNNER="scheduler", PRODUCTS_DB_PATH=self.db_path)
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", str(PROJECT_ROOT),
+             "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+            cwd=self.temp_dir, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    async def _wait_ready(self, session: aiohttp.ClientSession, base: str, workers: int) -> int:
+        """等待服务就绪，返回收到请求的不同 worker 进程数"""
+        deadline = time.monotonic() + 60
+        pids = set()
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base}/api/v1/status") as resp:
+                    if resp.status == 200:
+                        break
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+        else:
+            raise RuntimeError(f"{workers} 个 worker 的服务未能启动")
+
+        # 每个 worker 都完成 lifespan 初始化后再压测（每次新建连接，由内核分发到不同 worker）
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as probe:
+            for _ in range(workers * 50):
+                async with probe.get(f"{base}/health") as resp:
+                    pids.add((await resp.json())['worker_pid'])
+                if len(pids) == workers:
+                    break
+                await asyncio.sleep(0.05)
+        return len(pids)
+
+    async def _load(self, session: aiohttp.ClientSession, base: str, path: str) -> Dict[str, Any]:
+        """固定并发持续请求 duration 秒"""
+        timings: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + self.duration
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                url = base + path.format(term=self.rng.choice(ADJECTIVES + COLORS))
+                start = time.perf_counter()
+                try:
+                    async with session.get(url) as resp:
+                        await resp.read()
+                        if resp.status != 200:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+        timings.sort()
+        return {
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p99_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 2),
+            'errors': errors
+        }
+
+    async def _run_workers(self, workers: int) -> Dict[str, Any]:
+        port = _free_port()
+        base = f"http://127.0.0.1:{port}"
+        server = self._start_server(workers, port)
+        try:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                result = {'workers_serving': await self._wait_ready(session, base, workers)}
+                for name, path in ENDPOINTS.items():
+                    result[name] = await self._load(session, base, path)
+                return result
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def test_throughput(self):
+        """每种 worker 数各压测一轮读接口"""
+        for workers in self.worker_counts:
+            logger.info(f"压测 {workers} 个 worker...")
+            self.test_results[f"workers_{workers}"] = asyncio.run(self._run_workers(workers))
+
+        baseline = self.test_results[f"workers_{self.worker_counts[0]}"]
+        best = max(self.worker_counts)
+        expected = min(best, os.cpu_count() or 1) * 0.7
+        scaling = {}
+        for name in ENDPOINTS:
+            scaling[f"{name}_speedup"] = round(
+                self.test_results[f"workers_{best}"][name]['requests_per_second'] /
+                baseline[name]['requests_per_second'], 2)
+        scaling['expected_speedup'] = round(expected, 2)
+        scaling['all_workers_serving_met'] = all(
+            self.test_results[f"workers_{n}"]['workers_serving'] == n for n in self.worker_counts)
+        scaling['scaling_met'] = all(scaling[f"{name}_speedup"] >= expected for name in ENDPOINTS)
+        self.test_results['scaling'] = scaling
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_throughput()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_serving_performance_tests(product_count: int = 20_000):
+    """运行多 worker 部署吞吐量测试的主函数"""
+    print("=" * 60)
+    print("多 worker 部署吞吐量测试")
+    print("=" * 60)
+
+    tester = ServingPerformanceTest(product_count)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/serving_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    run_serving_performance_tests(count)
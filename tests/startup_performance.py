@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web 应用冷启动性能测试模块
+
+测试内容包括（每项在新的 Python 进程中测量，工作目录为空的临时目录）：
+1. 导入耗时：import app.main；以及组件模块（code/main.py、code/database.py）、tiktok_scraper 各自的导入耗时
+2. 组件初始化耗时：get_db_manager + get_coordinator（启动后在后台预热，首个业务请求前完成）
+3. uvicorn 冷启动：从启动进程到 /health 首次应答、到 /api/v1/status 首次应答的时间
+
+测试指标：
+- /health 在组件初始化完成之前即可应答，冷启动到首次应答 < 2s
+"""
+
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+MEASURE_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {code!r})
+{setup}
+start = time.perf_counter()
+{statement}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StartupPerformanceTest:
+    """Web 应用冷启动性能测试类"""
+
+    def __init__(self, repeat: int = 5):
+        self.repeat = repeat
+        self.test_results = {}
+
+    def _run_isolated(self, statement: str, setup: str = "") -> float:
+        """在新进程、空工作目录中先执行 setup，再执行语句并返回语句耗时（秒）"""
+        with tempfile.TemporaryDirectory() as cwd:
+            script = MEASURE_SCRIPT.format(root=str(PROJECT_ROOT), code=str(PROJECT_ROOT / "code"),
+                                           setup=setup, statement=statement)
+            output = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True,
+                                    text=True, check=True).stdout
+        return json.loads(output.strip().splitlines()[-1])["seconds"]
+
+    def _median_ms(self, statement: str, setup: str = "") -> float:
+        return round(statistics.median(
+            self._run_isolated(statement, setup) for _ in range(self.repeat)) * 1000, 1)
+
+    def test_imports(self):
+        """各模块在全新进程中的导入耗时"""
+        self.test_results['imports'] = {
+            'app_main_ms': self._median_ms("import app.main"),
+            'fastapi_ms': self._median_ms("import fastapi"),
+            'components_ms': self._median_ms("import main, database"),
+            'tiktok_scraper_ms': self._median_ms("import tiktok_scraper"),
+            'components_deferred_match': json.loads(subprocess.run(
+                [sys.executable, "-c", "import sys, json; sys.path.insert(0, %r); import app.main; "
+                 "print(json.dumps('main' in sys.modules or 'database' in sys.modules))" % str(PROJECT_ROOT)],
+                cwd=tempfile.gettempdir(), capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]) is False
+        }
+
+    def test_component_init(self):
+        """首次创建产品库管理器与协调器（建库、建表、启动后台线程）"""
+        self.test_results['component_init'] = {
+            'init_ms': self._median_ms("m.get_db_manager()\nm.get_coordinator()",
+                                       setup="import app.main as m")
+        }
+
+    def _wait_for(self, url: str, deadline: float) -> float:
+        while time.perf_counter() < deadline:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter()
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"等待超时: {url}")
+
+    def test_cold_start(self):
+        """uvicorn 冷启动到首次应答"""
+        health, status = [], []
+        for _ in range(self.repeat):
+            port = _free_port()
+            with tempfile.TemporaryDirectory() as cwd:
+                start = time.perf_counter()
+                server = subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", str(PROJECT_ROOT),
+                     "--port", str(port), "--log-level", "warning"],
+                    cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                try:
+                    base = f"http://127.0.0.1:{port}"
+                    health.append(self._wait_for(f"{base}/health", start + 60) - start)
+                    status.append(self._wait_for(f"{base}/api/v1/status", start + 60) - start)
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+
+        health_s = statistics.median(health)
+        status_s = statistics.median(status)
+        self.test_results['cold_start'] = {
+            'health_first_response_s': round(health_s, 3),
+            'status_first_response_s': round(status_s, 3),
+            'health_met': health_s < 2
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.test_imports()
+        self.test_component_init()
+        self.test_cold_start()
+        return self.test_results
+
+
+def run_startup_performance_tests(repeat: int = 5):
+    """运行 Web 应用冷启动性能测试的主函数"""
+    print("=" * 60)
+    print("Web 应用冷启动性能测试")
+    print("=" * 60)
+
+    tester = StartupPerformanceTest(repeat)
+    results = tester.run_all_tests()
+    for test_name, values in results.items():
+        print(f"\n{test_name}:")
+        for key, value in values.items():
+            if key.endswith('_met') or key.endswith('_match'):
+                status = "✅" if value else "❌"
+                print(f"   {status} {key}: {value}")
+            else:
+                print(f"   {key}: {value}")
+
+    report_file = Path("tests/startup_performance_report.json")
+    report_file.parent.mkdir(exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 详细报告已保存: {report_file}")
+    return results
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    run_startup_performance_tests(repeat)
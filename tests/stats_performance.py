@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库统计信息性能测试模块
+
+测试内容包括：
+1. 旧版 get_database_stats（四张表 COUNT(*) + DATE() 函数全表扫描）
+2. 计数器版本（不使用缓存）
+3. 计数器版本（快照缓存命中）
+
+测试指标：
+- 计数器版本耗时只与今日新增量相关，不随总表大小线性增长
+- 50万产品时比旧版快 20 倍以上
+- 计数器结果与 COUNT(*) 一致
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from database import DatabaseManager, DatabaseConfig
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('database').setLevel(logging.WARNING)
+
+
+LEGACY_QUERIES = [
+    "SELECT COUNT(*) FROM products",
+    "SELECT COUNT(*) FROM hot_comments",
+    "SELECT COUNT(*) FROM price_history",
+    "SELECT COUNT(*) FROM scrape_logs",
+    "SELECT COUNT(*) FROM products WHERE DATE(first_seen_at) = DATE('now')",
+    "SELECT COUNT(*) FROM products WHERE is_active = 1",
+    "SELECT COUNT(*) FROM scrape_logs WHERE status = 'failed' AND DATE(started_at) = DATE('now')",
+]
+
+
+class StatsPerformanceTest:
+    """数据库统计信息性能测试类"""
+
+    def __init__(self, sizes: List[int] = None):
+        self.sizes = sizes or [10_000, 100_000, 500_000]
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = DatabaseConfig(
+            db_path=str(Path(self.temp_dir) / "stats_perf.db"),
+            backup_dir=str(Path(self.temp_dir) / "backup"),
+            auto_backup=False
+        )
+        self.db = DatabaseManager(self.config)
+        self.inserted = 0
+        self.test_results = {}
+
+    def _grow_to(self, size: int):
+        """产品、评论、价格历史、日志按 size 同比例增长（经过触发器）"""
+        with sqlite3.connect(self.config.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO products (id, product_name, platform, category, price, product_url, is_active,
+                                      first_seen_at)
+                VALUES (?, ?, 'amazon', 'tshirt', 19.99, ?, ?, datetime('now', ?))
+            """, ((i, f"product {i}", f"https://amazon.com/p/{i}", int(i % 10 != 0), f'-{i % 30} days')
+                  for i in range(self.inserted + 1, size + 1)))
+            conn.executemany("INSERT INTO hot_comments (product_id, comment_text) VALUES (?, 'nice')",
+                             ((i,) for i in range(self.inserted + 1, size + 1)))
+            conn.executemany("INSERT INTO price_history (product_id, price) VALUES (?, 19.99)",
+                             ((i,) for i in range(self.inserted + 1, size + 1)))
+            conn.executemany("""
+                INSERT INTO scrape_logs (platform, category, task_type, status, started_at)
+                VALUES ('amazon', 'tshirt', 'scrape', ?, datetime('now', ?))
+            """, (('failed' if i % 20 == 0 else 'completed', f'-{i % 30} days')
+                  for i in range(self.inserted + 1, size // 10 + 1)))
+        self.inserted = size
+
+    def _time(self, fn, repeat: int = 20) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) * 1000 / repeat
+
+    def test_size(self, size: int):
+        """在给定数据量下对比三种统计方式"""
+        logger.info(f"生成 {size} 条测试数据...")
+        self._grow_to(size)
+
+        with sqlite3.connect(self.config.db_path) as conn:
+            def legacy():
+                return [conn.execute(sql).fetchone()[0] for sql in LEGACY_QUERIES]
+
+            legacy_ms = self._time(legacy, repeat=3)
+            expected = legacy()
+
+        stats = self.db.get_database_stats(use_cache=False)
+        actual = [stats['products_count'], stats['hot_comments_count'], stats['price_history_count'],
+                  stats['scrape_logs_count'], stats['today_new_products'], stats['active_products'],
+                  stats['today_failed_tasks']]
+
+        self.test_results[f'size_{size}'] = {
+            'legacy_ms': round(legacy_ms, 2),
+            'counters_ms': round(self._time(lambda: self.db.get_database_stats(use_cache=False)), 3),
+            'cached_ms': round(self._time(self.db.get_database_stats, repeat=1000), 4),
+            'counts_match': actual == expected
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        for size in self.sizes:
+            self.test_size(size)
+        first, last = (self.test_results[f'size_{s}'] for s in (self.sizes[0], self.sizes[-1]))
+        self.test_results['summary'] = {
+            'legacy_growth': round(last['legacy_ms'] / first['legacy_ms'], 1),
+            'counters_growth': round(last['counters_ms'] / first['counters_ms'], 1),
+            'speedup': round(last['legacy_ms'] / last['counters_ms'], 1),
+            'speedup_met': last['legacy_ms'] > last['counters_ms'] * 20
+        }
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_stats_performance_tests():
+    """运行统计信息性能测试的主函数"""
+    print("=" * 60)
+    print("数据库统计信息性能测试")
+    print("=" * 60)
+
+    tester = StatsPerformanceTest()
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met') or key.endswith('_match'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/stats_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    run_stats_performance_tests()
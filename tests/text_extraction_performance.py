@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频文案提取性能测试模块
+
+测试内容包括：
+1. 旧版多次 re.findall 提取（10个链接模式 + 标签 + 平台判断）
+2. link_extractor 单次预编译扫描
+
+测试指标：
+- 10万条文案吞吐量: > 50000 captions/second
+- 两种实现提取结果一致
+"""
+
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+import link_extractor
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEGACY_PATTERNS = [
+    r'https?://(?:www\.)?amazon\.com/[^\s]+',
+    r'https?://(?:www\.)?ebay\.com/[^\s]+',
+    r'https?://(?:www\.)?shopify\.com/[^\s]+',
+    r'https?://(?:www\.)?etsy\.com/[^\s]+',
+    r'https?://(?:www\.)?aliexpress\.com/[^\s]+',
+    r'https?://(?:www\.)?temu\.com/[^\s]+',
+    r'https?://(?:www\.)?shein\.com/[^\s]+',
+    r'bit\.ly/[^\s]+',
+    r'tinyurl\.com/[^\s]+',
+    r'cutt\.ly/[^\s]+'
+]
+
+WORDS = ["love", "this", "outfit", "today", "so", "comfy", "new", "drop", "link", "below",
+         "summer", "vibes", "perfect", "fit", "must", "have", "sale", "restock", "cute"]
+HASHTAGS = ["#tshirt", "#hoodie", "#ootd", "#fashion", "#style", "#streetwear", "#fyp"]
+LINKS = [
+    "https://www.amazon.com/dp/B0{n:07d}?tag=shop-20",
+    "https://www.etsy.com/listing/{n}",
+    "https://shein.com/us/item-{n}.html",
+    "bit.ly/{n:x}",
+    "https://tinyurl.com/{n:x}",
+]
+
+
+def _legacy_extract(text: str) -> Dict[str, Any]:
+    """复现旧版 TikHubAPIClient/WebScraper 的提取方式"""
+    links = []
+    for pattern in LEGACY_PATTERNS:
+        links.extend(re.findall(pattern, text, re.IGNORECASE))
+    hashtags = list(set(re.findall(r'#\w+', text)))
+    platforms = []
+    for link in set(links):
+        url_lower = link.lower()
+        for name in ('amazon.', 'ebay.', 'shopify.', 'etsy.', 'aliexpress.', 'temu.', 'shein.'):
+            if name in url_lower:
+                platforms.append(name[:-1])
+                break
+        else:
+            platforms.append('other')
+    return {'hashtags': hashtags, 'product_links': list(set(links)), 'platforms': platforms}
+
+
+def build_corpus(size: int, seed: int = 42) -> List[str]:
+    """生成模拟视频文案语料"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        parts = rng.sample(WORDS, rng.randint(5, 12))
+        parts += rng.sample(HASHTAGS, rng.randint(1, 4))
+        if rng.random() < 0.4:
+            parts.append(rng.choice(LINKS).format(n=i))
+        rng.shuffle(parts)
+        corpus.append(' '.join(parts))
+    return corpus
+
+
+class TextExtractionPerformanceTest:
+    """文案提取性能测试类"""
+
+    def __init__(self, corpus_size: int = 100_000):
+        self.corpus_size = corpus_size
+        self.corpus = build_corpus(corpus_size)
+        self.test_results = {}
+
+    def _time(self, func) -> float:
+        start = time.perf_counter()
+        for text in self.corpus:
+            func(text)
+        return time.perf_counter() - start
+
+    def test_throughput(self):
+        """测试两种实现的吞吐量"""
+        logger.info(f"测试 {self.corpus_size} 条文案提取吞吐量...")
+
+        legacy_time = self._time(_legacy_extract)
+        compiled_time = self._time(link_extractor.extract)
+
+        self.test_results['throughput'] = {
+            'corpus_size': self.corpus_size,
+            'legacy_seconds': round(legacy_time, 3),
+            'compiled_seconds': round(compiled_time, 3),
+            'legacy_captions_per_second': round(self.corpus_size / legacy_time),
+            'compiled_captions_per_second': round(self.corpus_size / compiled_time),
+            'speedup': round(legacy_time / compiled_time, 2),
+            'target_met': self.corpus_size / compiled_time > 50000
+        }
+
+    def test_consistency(self):
+        """校验两种实现结果一致"""
+        mismatches = 0
+        for text in self.corpus:
+            legacy = _legacy_extract(text)
+            result = link_extractor.extract(text)
+            if (set(legacy['hashtags']) != set(result.hashtags)
+                    or set(legacy['product_links']) != set(result.product_links)):
+                mismatches += 1
+
+        self.test_results['consistency'] = {
+            'mismatches': mismatches,
+            'consistency_met': mismatches == 0
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.test_throughput()
+        self.test_consistency()
+        return self.test_results
+
+
+def run_text_extraction_performance_tests(corpus_size: int = 100_000):
+    """运行文案提取性能测试的主函数"""
+    print("=" * 60)
+    print("视频文案提取性能测试")
+    print("=" * 60)
+
+    tester = TextExtractionPerformanceTest(corpus_size)
+    results = tester.run_all_tests()
+
+    for test_name, values in results.items():
+        print(f"\n{test_name}:")
+        for key, value in values.items():
+            if key.endswith('_met'):
+                status = "✅" if value else "❌"
+                print(f"   {status} {key}: {value}")
+            else:
+                print(f"   {key}: {value}")
+
+    report_file = Path("tests/text_extraction_performance_report.json")
+    report_file.parent.mkdir(exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 详细报告已保存: {report_file}")
+
+    return results
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run_text_extraction_performance_tests(size)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TikTok视频存储查询性能测试模块
+
+测试内容包括：
+1. 最近视频查询（scraped_at 范围查询 vs 旧版全表扫描）
+2. 今日视频计数
+3. 热门标签聚合（video_hashtags 索引分组 vs 旧版按JSON字符串分组再在Python中累计）
+
+测试指标（100万条视频）：
+- 最近视频查询: < 100ms
+- 热门标签聚合: < 1s
+"""
+
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Callable
+import logging
+
+sys.path.append(str(Path(__file__).parent.parent / "code"))
+from tiktok_scraper import DatabaseManager, TikTokClothingScraper
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HASHTAGS = ["#tshirt", "#hoodie", "#sweatshirt", "#dress", "#jeans", "#jacket",
+            "#fashion", "#ootd", "#style", "#streetwear", "#vintage", "#outfit",
+            "#fyp", "#viral", "#summer", "#winter", "#casual", "#trendy"]
+
+
+class TikTokStoragePerformanceTest:
+    """TikTok视频存储性能测试类"""
+
+    def __init__(self, video_count: int = 1_000_000):
+        self.video_count = video_count
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = str(Path(self.temp_dir) / "tiktok_perf.db")
+        self.test_results = {}
+
+    def setup_test_data(self):
+        """批量生成视频数据（同时写入标签关系表）"""
+        logger.info(f"生成 {self.video_count} 条视频数据...")
+        DatabaseManager(self.db_path)
+        rng = random.Random(7)
+        now = datetime.now()
+        start = time.time()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            batch, tag_batch = [], []
+            for i in range(self.video_count):
+                video_id = f"v{i:08d}"
+                tags = rng.sample(HASHTAGS, rng.randint(1, 5))
+                scraped_at = (now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))).isoformat()
+                batch.append((
+                    video_id, f"title {i}", f"desc {i}", f"author{i % 5000}", f"a{i % 5000}",
+                    1000, 10, rng.randint(0, 10 ** 6), 0, 0, 0, json.dumps(tags), "",
+                    "[]", "[]", scraped_at, "US", "en", scraped_at,
+                    rng.choice(["tikhub_api", "web_scraper"]), f"h{i:08d}"
+                ))
+                tag_batch.extend((tag, video_id) for tag in tags)
+                if len(batch) >= 50_000:
+                    self._flush(conn, batch, tag_batch)
+                    batch, tag_batch = [], []
+            self._flush(conn, batch, tag_batch)
+            conn.execute("ANALYZE")
+
+        self.test_results['setup'] = {
+            'videos': self.video_count,
+            'seconds': round(time.time() - start, 2)
+        }
+
+    def _flush(self, conn, batch, tag_batch):
+        conn.executemany(f"""
+            INSERT INTO videos ({', '.join(TikTokClothingScraper.VIDEO_COLUMNS)})
+            VALUES ({', '.join('?' for _ in TikTokClothingScraper.VIDEO_COLUMNS)})
+        """, batch)
+        conn.executemany("INSERT OR IGNORE INTO video_hashtags (hashtag, video_id) VALUES (?, ?)", tag_batch)
+        conn.commit()
+
+    def _measure(self, conn, func: Callable, runs: int = 3) -> float:
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func(conn)
+            times.append(time.perf_counter() - start)
+        return min(times) * 1000
+
+    def test_recent_videos(self):
+        """测试最近24小时视频查询"""
+        cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
+        columns = ', '.join(TikTokClothingScraper.VIDEO_COLUMNS)
+
+        def legacy(conn):
+            conn.execute("""
+                SELECT * FROM videos NOT INDEXED
+                WHERE scraped_at > datetime('now', '-24 hours')
+                ORDER BY scraped_at DESC
+            """).fetchall()
+
+        def indexed(conn):
+            conn.execute(f"""
+                SELECT {columns} FROM videos
+                WHERE scraped_at > ? ORDER BY scraped_at DESC
+            """, (cutoff,)).fetchall()
+
+        with sqlite3.connect(self.db_path) as conn:
+            plan = conn.execute(f"""
+                EXPLAIN QUERY PLAN SELECT {columns} FROM videos
+                WHERE scraped_at > ? ORDER BY scraped_at DESC
+            """, (cutoff,)).fetchall()
+            legacy_ms = self._measure(conn, legacy)
+            indexed_ms = self._measure(conn, indexed)
+
+        self.test_results['recent_videos'] = {
+            'legacy_ms': round(legacy_ms, 2),
+            'indexed_ms': round(indexed_ms, 2),
+            'query_plan': [row[-1] for row in plan],
+            'target_met': indexed_ms < 100
+        }
+
+    def test_today_count(self):
+        """测试今日视频计数"""
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+
+        with sqlite3.connect(self.db_path) as conn:
+            legacy_ms = self._measure(conn, lambda c: c.execute(
+                "SELECT COUNT(*) FROM videos WHERE date(scraped_at) = date('now')"
+            ).fetchone())
+            indexed_ms = self._measure(conn, lambda c: c.execute(
+                "SELECT COUNT(*) FROM videos WHERE scraped_at >= ?", (today_start,)
+            ).fetchone())
+
+        self.test_results['today_count'] = {
+            'legacy_ms': round(legacy_ms, 2),
+            'indexed_ms': round(indexed_ms, 2),
+            'target_met': indexed_ms < 100
+        }
+
+    def test_top_hashtags(self):
+        """测试热门标签聚合"""
+
+        def legacy(conn):
+            stats = {}
+            for raw, count in conn.execute("""
+                SELECT hashtags, COUNT(*) as count FROM videos
+                GROUP BY hashtags ORDER BY count DESC LIMIT 10
+            """):
+                for tag in json.loads(raw):
+                    stats[tag] = stats.get(tag, 0) + count
+            return stats
+
+        def side_table(conn):
+            return dict(conn.execute("""
+                SELECT hashtag, COUNT(*) as count FROM video_hashtags
+                GROUP BY hashtag ORDER BY count DESC LIMIT 10
+            """).fetchall())
+
+        with sqlite3.connect(self.db_path) as conn:
+            legacy_ms = self._measure(conn, legacy, runs=1)
+            side_ms = self._measure(conn, side_table, runs=1)
+
+        self.test_results['top_hashtags'] = {
+            'legacy_ms': round(legacy_ms, 2),
+            'side_table_ms': round(side_ms, 2),
+            'target_met': side_ms < 1000
+        }
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        self.setup_test_data()
+        self.test_recent_videos()
+        self.test_today_count()
+        self.test_top_hashtags()
+        return self.test_results
+
+    def cleanup(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def run_tiktok_storage_performance_tests(video_count: int = 1_000_000):
+    """运行TikTok存储性能测试的主函数"""
+    print("=" * 60)
+    print("TikTok视频存储查询性能测试")
+    print("=" * 60)
+
+    tester = TikTokStoragePerformanceTest(video_count)
+    try:
+        results = tester.run_all_tests()
+        for test_name, values in results.items():
+            print(f"\n{test_name}:")
+            for key, value in values.items():
+                if key.endswith('_met'):
+                    status = "✅" if value else "❌"
+                    print(f"   {status} {key}: {value}")
+                else:
+                    print(f"   {key}: {value}")
+
+        report_file = Path("tests/tiktok_storage_performance_report.json")
+        report_file.parent.mkdir(exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 详细报告已保存: {report_file}")
+        return results
+    finally:
+        tester.cleanup()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    run_tiktok_storage_performance_tests(count)